@@ -33,20 +33,842 @@ same code that would run if someone used the SD-Pinnokio system outside the note
 # ║                          SINGLE MEGA CELL START                              ║
 # ╚═══════════════════════════════════════════════════════════════════════════════╝
 
+# Timestamp the cell's first line so the startup profile covers imports too
+import time
+_CELL_STARTED = time.perf_counter()
+
 import os
+import re
 import sys
 import json
+import enum
+import math
+import itertools
+import signal
+import atexit
+import asyncio
+import mmap
+import bisect
+import uuid
+import struct
+import shutil
+import hashlib
+import tarfile
+import zipfile
+import sysconfig
+import contextlib
+import contextvars
+import configparser
+import importlib
+import importlib.util
+import importlib.metadata
+import codecs
 import subprocess
 import threading
-import time
+import collections
+import concurrent.futures
 import tempfile
+import gzip
+import html
+import http.client
+import urllib.error
+import urllib.parse
+import urllib.request
 from pathlib import Path
+from collections.abc import MutableMapping
+try:
+    import fcntl
+except ImportError:  # Windows: cache locking is per-process only
+    fcntl = None
+_STDLIB_IMPORTED = time.perf_counter()
 import ipywidgets as widgets
 from IPython.display import display, HTML, clear_output
+_WIDGETS_IMPORTED = time.perf_counter()
 
 print("🚀 INITIALIZING SD-PINNOKIO COMPLETE INTERFACE...")
 print("=" * 70)
 
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           STARTUP PROFILE                                     ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class StartupProfile:
+    """Wall-clock record of startup stages, lazy imports and background tasks.
+    
+    Times are milliseconds from ``origin`` (the first line of the cell), so
+    the report shows where every millisecond before and after the UI
+    became interactive went, and on which thread.
+    """
+    
+    def __init__(self, origin=None):
+        self.origin = origin or time.perf_counter()
+        self.records = []
+        self.marks = {}
+        self._lock = threading.Lock()
+    
+    def add(self, name, start, end):
+        with self._lock:
+            self.records.append((
+                name,
+                (start - self.origin) * 1000,
+                (end - start) * 1000,
+                threading.current_thread().name,
+            ))
+    
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time a block of work under ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+    
+    def mark(self, name):
+        """Record a point in time, e.g. first interactive."""
+        self.marks[name] = (time.perf_counter() - self.origin) * 1000
+    
+    def report(self):
+        """Plain-text table of every stage in start order."""
+        with self._lock:
+            records = sorted(self.records, key=lambda record: record[1])
+        lines = [f"{'start ms':>10} {'took ms':>10}  stage"]
+        for name, start, duration, thread in records:
+            where = "" if thread == "MainThread" else f"  [{thread}]"
+            lines.append(f"{start:10.1f} {duration:10.1f}  {name}{where}")
+        for name, at in sorted(self.marks.items(), key=lambda item: item[1]):
+            lines.append(f"{at:10.1f} {'':>10}  ⏱️ {name}")
+        return "\n".join(lines)
+
+STARTUP_PROFILE = StartupProfile(origin=_CELL_STARTED)
+STARTUP_PROFILE.add("stdlib imports", _CELL_STARTED, _STDLIB_IMPORTED)
+STARTUP_PROFILE.add("ipywidgets/IPython imports", _STDLIB_IMPORTED, _WIDGETS_IMPORTED)
+
+def lazy_import(module_name, attribute=None):
+    """Import a module on first use, recording its cost in the startup profile."""
+    module = sys.modules.get(module_name)
+    if module is None:
+        with STARTUP_PROFILE.stage(f"import {module_name}"):
+            module = importlib.import_module(module_name)
+    return getattr(module, attribute) if attribute else module
+
+def module_available(module_name):
+    """Whether a module can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+class BackgroundStartup:
+    """Runs deferred setup tasks in order on a daemon thread, with a progress widget."""
+    
+    def __init__(self, tasks, profile=None):
+        self.tasks = list(tasks)
+        self.profile = profile or STARTUP_PROFILE
+        self.results = {}
+        self.done = threading.Event()
+        self.label = widgets.HTML(value="⏳ Background setup queued")
+        self.progress = widgets.IntProgress(value=0, min=0, max=max(1, len(self.tasks)),
+                                            layout=widgets.Layout(width='300px'))
+        self.report = widgets.HTML()
+        self.widget = widgets.VBox([widgets.HBox([self.progress, self.label]), self.report])
+        self._thread = None
+    
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="sd-startup")
+            self._thread.start()
+        return self
+    
+    def _run(self):
+        try:
+            for index, (name, task) in enumerate(self.tasks):
+                self.label.value = f"⏳ Background setup {index + 1}/{len(self.tasks)}: {name}"
+                try:
+                    with self.profile.stage(name):
+                        self.results[name] = task()
+                except Exception as e:
+                    self.results[name] = False
+                    print(f"❌ Background setup step '{name}' failed: {e}")
+                self.progress.value = index + 1
+            failed = [name for name, result in self.results.items() if result is False]
+            self.profile.mark("background setup complete")
+            self.label.value = (f"⚠️ Background setup finished; failed: {', '.join(failed)}" if failed
+                                else "✅ Background setup complete")
+            self.report.value = f"<details><summary>Startup profile</summary><pre>{self.profile.report()}</pre></details>"
+        finally:
+            self.done.set()
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           TRACING                                             ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class Span:
+    """One timed operation in a trace; attributes carry exit codes, byte counts, ports."""
+    
+    def __init__(self, tracer, name, trace_id, parent_id=None, app_id=None, attributes=None, start=None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.app_id = app_id
+        self.attributes = dict(attributes or {})
+        self.start = start or time.time()
+        self.end_time = None
+        self.status = 'ok'
+        self.error = None
+        self._otel = None
+    
+    @property
+    def duration(self):
+        """Seconds from start to end (or to now while the span is open)."""
+        return (self.end_time or time.time()) - self.start
+    
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+    
+    def fail(self, error):
+        self.status = 'error'
+        self.error = str(error)
+        return self
+    
+    def end(self, end=None, **attributes):
+        """Close the span (once) and hand it to the tracer for export."""
+        if self.end_time is None:
+            self.attributes.update(attributes)
+            self.end_time = end or time.time()
+            self.tracer._finish(self)
+        return self
+    
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'app_id': self.app_id,
+            'start': self.start,
+            'end': self.end_time,
+            'duration': self.duration,
+            'status': self.status,
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+class Tracer:
+    """Nested spans for the install, run and tunnel flows, exported as JSONL.
+    
+    ``span()`` nests under whatever span is active in the current thread or
+    task; ``start_span()`` returns a span that is ended later from any thread
+    (port discovery, HTTP readiness, process exit). Every finished span is
+    appended to ``path`` as one JSON line. ``export_otlp`` converts that file
+    to OTLP/JSON, and with ``otel=True`` spans are also mirrored live to the
+    OpenTelemetry SDK when it is installed.
+    """
+    
+    DEFAULT_PATH = Path("apps") / ".traces" / "spans.jsonl"
+    
+    def __init__(self, path=None, keep_traces=200, otel=False):
+        self.path = Path(path) if path else self.DEFAULT_PATH
+        self.keep_traces = keep_traces
+        # trace id -> finished spans, oldest trace first; open roots are kept aside
+        self.traces = collections.OrderedDict()
+        self.open_roots = {}
+        # Called with every finished root span
+        self.listeners = []
+        self._current = contextvars.ContextVar(f"sd_span_{id(self)}", default=None)
+        self._lock = threading.Lock()
+        self._otel_tracer = None
+        if otel and module_available("opentelemetry.trace"):
+            self._otel_tracer = lazy_import("opentelemetry.trace").get_tracer("sd-pinnokio")
+    
+    def current(self):
+        """The span active in this thread or task, if any."""
+        return self._current.get()
+    
+    def start_span(self, name, parent=None, app_id=None, start=None, **attributes):
+        """Open a span under ``parent`` (default: the current span); end it with ``span.end()``."""
+        parent = parent if parent is not None else self.current()
+        if parent is None:
+            trace_id, parent_id = uuid.uuid4().hex, None
+        else:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+            app_id = app_id or parent.app_id
+        span = Span(self, name, trace_id, parent_id, app_id, attributes, start)
+        if parent_id is None:
+            with self._lock:
+                self.open_roots[trace_id] = span
+        if self._otel_tracer is not None:
+            self._start_otel(span, parent)
+        return span
+    
+    @contextlib.contextmanager
+    def span(self, name, app_id=None, **attributes):
+        """Time a block as a child of the current span; exceptions mark it failed."""
+        span = self.start_span(name, app_id=app_id, **attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.fail(e)
+            raise
+        finally:
+            self._current.reset(token)
+            span.end()
+    
+    @contextlib.contextmanager
+    def use(self, span):
+        """Make ``span`` the current span for a block running on another thread."""
+        token = self._current.set(span)
+        try:
+            yield span
+        finally:
+            self._current.reset(token)
+    
+    def record(self, name, start, end, parent=None, app_id=None, **attributes):
+        """Add an interval that was measured elsewhere (e.g. by AppReadiness)."""
+        return self.start_span(name, parent=parent, app_id=app_id, start=start, **attributes).end(end)
+    
+    def _finish(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            if span.parent_id is None:
+                self.open_roots.pop(span.trace_id, None)
+            self.traces.setdefault(span.trace_id, []).append(span)
+            self.traces.move_to_end(span.trace_id)
+            while len(self.traces) > self.keep_traces:
+                self.traces.popitem(last=False)
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                print(f"⚠️ Could not write trace span: {e}")
+        if span._otel is not None:
+            self._end_otel(span)
+        if span.parent_id is None:
+            for listener in list(self.listeners):
+                try:
+                    listener(span)
+                except Exception as e:
+                    print(f"⚠️ Trace listener failed: {e}")
+    
+    # ---- OpenTelemetry -------------------------------------------------------------
+    
+    def _start_otel(self, span, parent):
+        try:
+            otel_trace = lazy_import("opentelemetry.trace")
+            context = None
+            if parent is not None and parent._otel is not None:
+                context = otel_trace.set_span_in_context(parent._otel)
+            span._otel = self._otel_tracer.start_span(span.name, context=context,
+                                                      start_time=int(span.start * 1e9))
+        except Exception as e:
+            print(f"⚠️ OpenTelemetry span failed: {e}")
+    
+    def _end_otel(self, span):
+        try:
+            otel_trace = lazy_import("opentelemetry.trace")
+            for key, value in self._otel_attributes(span).items():
+                span._otel.set_attribute(key, value)
+            if span.status == 'error':
+                span._otel.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, span.error))
+            span._otel.end(end_time=int(span.end_time * 1e9))
+        except Exception as e:
+            print(f"⚠️ OpenTelemetry span failed: {e}")
+    
+    @staticmethod
+    def _otel_attributes(record):
+        attributes = {} if record.get('app_id') is None else {'app.id': record['app_id']}
+        for key, value in record.get('attributes', {}).items():
+            attributes[key] = value if isinstance(value, (bool, int, float, str)) else str(value)
+        return attributes
+    
+    # ---- reading back --------------------------------------------------------------
+    
+    def trace(self, trace_id):
+        """Finished spans of a trace plus its root if still open, in start order."""
+        with self._lock:
+            spans = list(self.traces.get(trace_id, []))
+            root = self.open_roots.get(trace_id)
+        if root is not None:
+            spans.append(root)
+        return sorted(spans, key=lambda span: span.start)
+    
+    def recent_roots(self, app_id=None, limit=5):
+        """Newest root spans (open or finished), optionally for one app."""
+        with self._lock:
+            roots = list(self.open_roots.values())
+            for spans in self.traces.values():
+                roots.extend(span for span in spans if span.parent_id is None)
+        if app_id is not None:
+            roots = [root for root in roots if root.app_id == app_id]
+        return sorted(roots, key=lambda root: root.start, reverse=True)[:limit]
+    
+    def read_spans(self, path=None):
+        """Every span record in the JSONL export (across sessions)."""
+        path = Path(path) if path else self.path
+        records = []
+        if not path.exists():
+            return records
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+    
+    def phase_summary(self, path=None):
+        """Per span name: count, errors, total/mean/p50/p95 seconds, largest total first."""
+        durations = collections.defaultdict(list)
+        errors = collections.Counter()
+        for record in self.read_spans(path):
+            durations[record['name']].append(record['duration'])
+            if record.get('status') == 'error':
+                errors[record['name']] += 1
+        summary = []
+        for name, values in durations.items():
+            values.sort()
+            summary.append({
+                'name': name,
+                'count': len(values),
+                'errors': errors[name],
+                'total': sum(values),
+                'mean': sum(values) / len(values),
+                'p50': values[len(values) // 2],
+                'p95': values[min(len(values) - 1, int(len(values) * 0.95))],
+            })
+        return sorted(summary, key=lambda phase: phase['total'], reverse=True)
+    
+    def export_otlp(self, out_path, path=None, service_name="sd-pinnokio"):
+        """Write the JSONL spans as an OTLP/JSON ExportTraceServiceRequest document."""
+        spans = []
+        for record in self.read_spans(path):
+            attributes = []
+            for key, value in self._otel_attributes(record).items():
+                if isinstance(value, bool):
+                    attributes.append({'key': key, 'value': {'boolValue': value}})
+                elif isinstance(value, int):
+                    attributes.append({'key': key, 'value': {'intValue': str(value)}})
+                elif isinstance(value, float):
+                    attributes.append({'key': key, 'value': {'doubleValue': value}})
+                else:
+                    attributes.append({'key': key, 'value': {'stringValue': value}})
+            span = {
+                'traceId': record['trace_id'],
+                'spanId': record['span_id'],
+                'name': record['name'],
+                'kind': 1,
+                'startTimeUnixNano': str(int(record['start'] * 1e9)),
+                'endTimeUnixNano': str(int(record['end'] * 1e9)),
+                'attributes': attributes,
+                'status': {'code': 2, 'message': record.get('error') or ''} if record.get('status') == 'error'
+                          else {'code': 1},
+            }
+            if record.get('parent_id'):
+                span['parentSpanId'] = record['parent_id']
+            spans.append(span)
+        document = {'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+            'scopeSpans': [{'scope': {'name': 'sd-pinnokio'}, 'spans': spans}],
+        }]}
+        Path(out_path).write_text(json.dumps(document))
+        return len(spans)
+    
+    # ---- rendering -----------------------------------------------------------------
+    
+    def timeline_html(self, app_id=None, limit=5):
+        """Gantt-style timeline of the newest traces, one bar per span."""
+        roots = self.recent_roots(app_id, limit)
+        if not roots:
+            return "<i>No traces yet</i>"
+        blocks = []
+        for root in roots:
+            spans = self.trace(root.trace_id)
+            total = max(max(span.start + span.duration for span in spans) - root.start, 1e-6)
+            depth = {root.span_id: 0}
+            rows = []
+            for span in spans:
+                level = depth.setdefault(span.span_id, depth.get(span.parent_id, 0) + 1)
+                left = (span.start - root.start) / total * 100
+                width = max(span.duration / total * 100, 0.5)
+                color = '#e74c3c' if span.status == 'error' else ('#95a5a6' if span.end_time is None else '#3498db')
+                # Attributes carry commands, paths and error text: escape before they reach HTML
+                details = html.escape(", ".join(f"{key}={value}" for key, value in span.attributes.items()))
+                rows.append(
+                    f"<div style='display:flex;align-items:center;font-size:12px' title='{details}'>"
+                    f"<div style='width:180px;padding-left:{level * 12}px;white-space:nowrap;overflow:hidden'>"
+                    f"{html.escape(span.name)}</div>"
+                    f"<div style='flex:1;position:relative;height:12px;background:#f4f4f4'>"
+                    f"<div style='position:absolute;left:{left:.2f}%;width:{width:.2f}%;height:12px;"
+                    f"background:{color}'></div></div>"
+                    f"<div style='width:70px;text-align:right'>{span.duration:.2f}s</div></div>"
+                )
+            state = "⏳" if root.end_time is None else ("❌" if root.status == 'error' else "✅")
+            blocks.append(f"<div style='margin-bottom:8px'><b>{state} {html.escape(root.app_id or '')} · "
+                          f"{html.escape(root.name)}</b> "
+                          f"({total:.1f}s)" + "".join(rows) + "</div>")
+        return "".join(blocks)
+    
+    def summary_html(self, path=None):
+        """Table of where provisioning time goes across every recorded trace."""
+        rows = "".join(
+            f"<tr><td>{html.escape(phase['name'])}</td><td>{phase['count']}</td><td>{phase['errors']}</td>"
+            f"<td>{phase['total']:.1f}</td><td>{phase['mean']:.2f}</td>"
+            f"<td>{phase['p50']:.2f}</td><td>{phase['p95']:.2f}</td></tr>"
+            for phase in self.phase_summary(path)
+        )
+        return ("<table><tr><th>phase</th><th>count</th><th>errors</th><th>total s</th>"
+                "<th>mean s</th><th>p50 s</th><th>p95 s</th></tr>" + rows + "</table>")
+
+TRACER = Tracer()
+
+def directory_bytes(path):
+    """Total size of the regular files under path."""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           COMMAND ENGINE                                      ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class CommandStatus(enum.Enum):
+    """Lifecycle of a command run by the engine (mirrors ShellRunner's statuses)."""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+    CANCELLED = "cancelled"
+
+class CommandResult:
+    """Outcome of a command, shaped like ShellRunner's CommandResult."""
+    
+    def __init__(self, command_id, command, status, return_code=None, stdout="", stderr="",
+                 start_time=None, end_time=None, duration=None, error_message=None):
+        self.command_id = command_id
+        self.command = command
+        self.status = status
+        self.return_code = return_code
+        self.stdout = stdout
+        self.stderr = stderr
+        self.start_time = start_time
+        self.end_time = end_time
+        self.duration = duration
+        self.error_message = error_message
+    
+    @property
+    def returncode(self):
+        """subprocess-compatible alias for return_code."""
+        return self.return_code
+    
+    def __repr__(self):
+        return f"CommandResult({self.command_id!r}, status={self.status.value}, return_code={self.return_code})"
+
+class OutputRingBuffer:
+    """Fixed-size buffer of the most recent output lines of one stream."""
+    
+    def __init__(self, max_lines=2000):
+        self.lines = collections.deque(maxlen=max_lines)
+        self.total_lines = 0
+    
+    def append(self, line):
+        self.lines.append(line)
+        self.total_lines += 1
+    
+    @property
+    def dropped_lines(self):
+        return self.total_lines - len(self.lines)
+    
+    def text(self):
+        return "\n".join(self.lines) + ("\n" if self.lines else "")
+
+class CommandHandle:
+    """A command submitted to the engine: live status, output buffers and controls."""
+    
+    def __init__(self, engine, command_id, command, timeout, buffer_lines):
+        self.engine = engine
+        self.command_id = command_id
+        self.command = command
+        self.timeout = timeout
+        self.status = CommandStatus.PENDING
+        self.stdout = OutputRingBuffer(buffer_lines)
+        self.stderr = OutputRingBuffer(buffer_lines)
+        self.process = None
+        self.start_time = None
+        self.end_time = None
+        self.error_message = None
+        self.future = concurrent.futures.Future()
+        self._task = None
+    
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+    
+    @property
+    def returncode(self):
+        return self.process.returncode if self.process else None
+    
+    def poll(self):
+        """Popen-style: return code if finished, else None."""
+        return self.returncode if self.future.done() else None
+    
+    def done(self):
+        return self.future.done()
+    
+    def wait(self, timeout=None):
+        """Block until the command finishes and return its CommandResult."""
+        return self.future.result(timeout)
+    
+    def cancel(self):
+        """Kill the command's process group and mark it cancelled."""
+        self.engine.cancel(self.command_id)
+    
+    terminate = cancel
+    
+    def result(self):
+        duration = None
+        if self.start_time is not None:
+            duration = (self.end_time or time.time()) - self.start_time
+        return CommandResult(
+            command_id=self.command_id,
+            command=self.command,
+            status=self.status,
+            return_code=self.returncode,
+            stdout=self.stdout.text(),
+            stderr=self.stderr.text(),
+            start_time=self.start_time,
+            end_time=self.end_time,
+            duration=duration,
+            error_message=self.error_message,
+        )
+
+class AsyncCommandEngine:
+    """asyncio subprocess engine shared by the installer, runner and tunnels.
+    
+    Commands run on one event loop in a daemon thread, so any number of them
+    stream output concurrently without a thread per pipe. Every command
+    starts in its own process group, which timeouts and cancellation kill as
+    a whole. Output is kept in bounded ring buffers and also passed line by
+    line to an optional ``on_line(stream, line)`` callback, which runs on the
+    engine thread and must not block.
+    """
+    
+    KILL_GRACE_SECONDS = 5
+    READ_CHUNK = 64 * 1024
+    
+    def __init__(self, max_concurrent=32, buffer_lines=2000):
+        self.max_concurrent = max_concurrent
+        self.buffer_lines = buffer_lines
+        self.commands = {}
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._start_lock = threading.Lock()
+        self._ids = itertools.count(1)
+    
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return self._loop
+            ready = threading.Event()
+            
+            def serve():
+                self._loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self._loop)
+                self._semaphore = asyncio.Semaphore(self.max_concurrent)
+                ready.set()
+                self._loop.run_forever()
+            
+            self._thread = threading.Thread(target=serve, daemon=True, name="sd-command-engine")
+            self._thread.start()
+            ready.wait()
+            return self._loop
+    
+    def call_soon(self, coroutine):
+        """Schedule a coroutine on the engine loop from any thread."""
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Blocking engine calls are not allowed on the engine thread")
+        return asyncio.run_coroutine_threadsafe(coroutine, loop)
+    
+    # ---- submission ----------------------------------------------------------------
+    
+    def submit(self, command, cwd=None, env=None, timeout=None, on_line=None, merge_stderr=False,
+               stdin=None):
+        """Start a command (argument list or shell string) and return its handle."""
+        self._ensure_loop()
+        command_id = f"cmd_{next(self._ids)}_{uuid.uuid4().hex[:8]}"
+        handle = CommandHandle(self, command_id, command, timeout, self.buffer_lines)
+        self.commands[command_id] = handle
+        handle._task = self.call_soon(self._execute(handle, cwd, env, on_line, merge_stderr, stdin))
+        return handle
+    
+    def run(self, command, cwd=None, env=None, timeout=None, on_line=None, merge_stderr=True):
+        """Run to completion and return the exit code (127 if it could not start)."""
+        result = self.submit(command, cwd=cwd, env=env, timeout=timeout,
+                             on_line=on_line, merge_stderr=merge_stderr).wait()
+        return result.return_code if result.return_code is not None else 127
+    
+    def output(self, command, cwd=None, env=None, timeout=None):
+        """Run a short query; return stripped stdout, or None if it failed."""
+        result = self.submit(command, cwd=cwd, env=env, timeout=timeout).wait()
+        if result.status != CommandStatus.COMPLETED:
+            return None
+        return result.stdout.strip()
+    
+    def run_command(self, command, capture_output=True, timeout=None, cwd=None, env=None, on_line=None):
+        """ShellRunner-compatible entry point.
+        
+        With capture_output the call blocks and returns a CommandResult;
+        otherwise it returns the command id immediately.
+        """
+        handle = self.submit(command, cwd=cwd, env=env, timeout=timeout, on_line=on_line)
+        if not capture_output:
+            return handle.command_id
+        return handle.wait()
+    
+    def get(self, command_id):
+        return self.commands.get(command_id)
+    
+    def cancel(self, command_id):
+        """Cancel a running command; returns False if it already finished."""
+        handle = self.commands.get(command_id)
+        if handle is None or handle.done():
+            return False
+        handle.status = CommandStatus.CANCELLED
+        handle.error_message = "Cancelled"
+        self.call_soon(self._kill(handle))
+        return True
+    
+    def forget(self, command_id):
+        """Drop a finished command's handle and buffers."""
+        handle = self.commands.get(command_id)
+        if handle is not None and handle.done():
+            del self.commands[command_id]
+    
+    # ---- engine loop ---------------------------------------------------------------
+    
+    async def _execute(self, handle, cwd, env, on_line, merge_stderr, stdin):
+        async with self._semaphore:
+            handle.start_time = time.time()
+            handle.status = CommandStatus.RUNNING if handle.status == CommandStatus.PENDING else handle.status
+            stderr_target = asyncio.subprocess.STDOUT if merge_stderr else asyncio.subprocess.PIPE
+            stdin_target = asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL
+            try:
+                if handle.status == CommandStatus.CANCELLED:
+                    raise asyncio.CancelledError()
+                if isinstance(handle.command, str):
+                    handle.process = await asyncio.create_subprocess_shell(
+                        handle.command, cwd=cwd, env=env, stdin=stdin_target,
+                        stdout=asyncio.subprocess.PIPE, stderr=stderr_target, start_new_session=True
+                    )
+                else:
+                    handle.process = await asyncio.create_subprocess_exec(
+                        *[str(part) for part in handle.command], cwd=cwd, env=env, stdin=stdin_target,
+                        stdout=asyncio.subprocess.PIPE, stderr=stderr_target, start_new_session=True
+                    )
+            except (OSError, asyncio.CancelledError) as e:
+                handle.end_time = time.time()
+                if handle.status != CommandStatus.CANCELLED:
+                    handle.status = CommandStatus.FAILED
+                    handle.error_message = f"Failed to start: {e}"
+                handle.future.set_result(handle.result())
+                return
+            
+            if stdin is not None:
+                handle.process.stdin.write(stdin if isinstance(stdin, bytes) else stdin.encode())
+                await handle.process.stdin.drain()
+                handle.process.stdin.close()
+            
+            readers = [asyncio.ensure_future(self._pump(handle.process.stdout, handle.stdout, "stdout", on_line))]
+            if not merge_stderr:
+                readers.append(asyncio.ensure_future(self._pump(handle.process.stderr, handle.stderr, "stderr", on_line)))
+            
+            try:
+                await asyncio.wait_for(handle.process.wait(), timeout=handle.timeout)
+            except asyncio.TimeoutError:
+                handle.status = CommandStatus.TIMEOUT
+                handle.error_message = f"Command timed out after {handle.timeout}s"
+                await self._kill(handle)
+            
+            await asyncio.gather(*readers, return_exceptions=True)
+            handle.end_time = time.time()
+            if handle.status == CommandStatus.RUNNING:
+                handle.status = CommandStatus.COMPLETED if handle.process.returncode == 0 else CommandStatus.FAILED
+            handle.future.set_result(handle.result())
+    
+    async def _pump(self, stream, buffer, name, on_line):
+        """Read a pipe in chunks, splitting lines into the ring buffer and callback."""
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending = ""
+        while True:
+            chunk = await stream.read(self.READ_CHUNK)
+            text = decoder.decode(chunk, final=not chunk)
+            if text:
+                pending += text
+                *lines, pending = pending.split("\n")
+                for line in lines:
+                    self._deliver(buffer, name, line.rstrip("\r"), on_line)
+            if not chunk:
+                break
+        if pending:
+            self._deliver(buffer, name, pending.rstrip("\r"), on_line)
+    
+    @staticmethod
+    def _deliver(buffer, name, line, on_line):
+        buffer.append(line)
+        if on_line is not None:
+            try:
+                on_line(name, line)
+            except Exception:
+                pass
+    
+    def kill_all(self):
+        """SIGTERM every running process group; safe at interpreter exit."""
+        for handle in list(self.commands.values()):
+            if handle.process is not None and handle.process.returncode is None:
+                try:
+                    os.killpg(handle.process.pid, signal.SIGTERM)
+                except (ProcessLookupError, PermissionError):
+                    pass
+    
+    async def _kill(self, handle):
+        """SIGTERM the process group, then SIGKILL it after a grace period."""
+        process = handle.process
+        if process is None or process.returncode is not None:
+            return
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(process.pid, sig)
+            except (ProcessLookupError, PermissionError):
+                return
+            try:
+                await asyncio.wait_for(process.wait(), timeout=self.KILL_GRACE_SECONDS)
+                return
+            except asyncio.TimeoutError:
+                continue
+
+_COMMAND_ENGINE = None
+
+def command_engine():
+    """The process-wide command engine (created on first use)."""
+    global _COMMAND_ENGINE
+    if _COMMAND_ENGINE is None:
+        _COMMAND_ENGINE = AsyncCommandEngine()
+        # Commands run in their own sessions, so they would outlive the kernel
+        atexit.register(_COMMAND_ENGINE.kill_all)
+    return _COMMAND_ENGINE
+
 # ╔═══════════════════════════════════════════════════════════════════════════════╗
 # ║                           ENVIRONMENT SETUP                                   ║
 # ╚═══════════════════════════════════════════════════════════════════════════════╝
@@ -100,13 +922,13 @@ class EnvironmentSetup:
         requirements_file = self.repo_path / "requirements.txt"
         if requirements_file.exists():
             print("📦 Installing repository requirements...")
-            pip_result = subprocess.run(
-                [sys.executable, "-m", "pip", "install", "-r", str(requirements_file)],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True
+            installed = RequirementFingerprints.for_interpreter().install(
+                requirements_file,
+                WheelCache(),
+                run=lambda cmd, cwd=None: command_engine().run(cmd, cwd=cwd),
+                emit=print
             )
-            if pip_result.returncode == 0:
+            if installed:
                 print("✅ Requirements installed successfully!")
             else:
                 print("⚠️ Some requirements failed to install")
@@ -116,21 +938,23 @@ class EnvironmentSetup:
         self.setup_complete = True
         return True
     
+    REQUIRED_MODULES = (
+        "environment_management.shell_runner",
+        "engine.installer",
+    )
+    
     def verify_imports(self):
-        """Verify that we can import the necessary modules."""
+        """Verify that the necessary modules are importable (without importing them)."""
         if not self.setup_complete:
             return False
-            
-        try:
-            # Try to import key modules
-            from environment_management.shell_runner import ShellRunner
-            from engine.installer import ApplicationInstaller
-            from tunneling.cloudflare_manager import CloudflareManager
-            print("✅ All modules imported successfully!")
-            return True
-        except ImportError as e:
-            print(f"❌ Import failed: {e}")
+        
+        # The modules themselves are imported lazily on first use
+        missing = [name for name in self.REQUIRED_MODULES if not module_available(name)]
+        if missing:
+            print(f"❌ Modules not found: {', '.join(missing)}")
             return False
+        print("✅ All modules available!")
+        return True
 
 # ╔═══════════════════════════════════════════════════════════════════════════════╗
 # ║                           APPS DATABASE LOADER                               ║
@@ -139,16 +963,27 @@ class EnvironmentSetup:
 class AppsDatabase:
     """Load and manage the Pinokio apps database."""
     
-    def __init__(self):
+    def __init__(self, catalog_path=None):
+        # Explicit catalog location; SD_PINNOKIO_CATALOG, then the usual paths, otherwise
+        self.catalog_path = catalog_path
         self.apps_data = {}
         self.categories = set()
+        self.category_counts = collections.Counter()
+        self.search_index = None
+        # Held while records change, so searches never see a half-applied delta
+        self.lock = threading.RLock()
         
-    def load_apps_database(self):
-        """Load the complete apps database."""
+    def load_apps_database(self, build_index=True):
+        """Load the complete apps database.
+        
+        With ``build_index=False`` the search index is left for later (see
+        build_search_index); unfiltered listings work without it.
+        """
         print("📚 Loading apps database...")
         
         # Try multiple locations for the database
-        possible_paths = [
+        configured = [self.catalog_path, os.environ.get("SD_PINNOKIO_CATALOG")]
+        possible_paths = [str(path) for path in configured if path] + [
             "cleaned_pinokio_apps.json",
             "sd-pinnokio-project/cleaned_pinokio_apps.json",
             "../sd-pinnokio-project/cleaned_pinokio_apps.json",
@@ -160,10 +995,17 @@ class AppsDatabase:
         for path in possible_paths:
             if os.path.exists(path):
                 try:
-                    with open(path, 'r') as f:
-                        self.apps_data = json.load(f)
+                    try:
+                        self.apps_data = CatalogSnapshot.load(path)
+                    except Exception as e:
+                        print(f"⚠️ Catalog snapshot unavailable ({e}), reading JSON directly")
+                        with open(path, 'r') as f:
+                            self.apps_data = json.load(f)
                     print(f"✅ Loaded {len(self.apps_data)} apps from {path}")
+                    self.catalog_path = path
                     self.extract_categories()
+                    if build_index:
+                        self.build_search_index()
                     return True
                 except Exception as e:
                     print(f"❌ Failed to load {path}: {e}")
@@ -177,150 +1019,4461 @@ class AppsDatabase:
     
     def extract_categories(self):
         """Extract categories from apps data."""
-        self.categories = set()
-        for app_data in self.apps_data.values():
-            if isinstance(app_data, dict):
-                category = app_data.get('category', 'Unknown')
-                self.categories.add(category)
-        self.categories = sorted(list(self.categories))
+        if isinstance(self.apps_data, LazyCatalog):
+            # Read the interned column instead of materializing every record
+            self.category_counts = collections.Counter(
+                category or 'Unknown' for category in self.apps_data.column('category'))
+        else:
+            self.category_counts = collections.Counter(
+                app_data.get('category') or 'Unknown'
+                for app_data in self.apps_data.values() if isinstance(app_data, dict))
+        self.categories = sorted(self.category_counts)
+    
+    def apply_delta(self, upserts, deletions=()):
+        """Add, replace and remove records by id; returns the ids that changed.
+        
+        Category counts and (if built) the search index are adjusted for the
+        changed records only.
+        """
+        changed = []
+        with self.lock:
+            for app_id in deletions:
+                if app_id not in self.apps_data:
+                    continue
+                self.category_counts[self.apps_data[app_id].get('category') or 'Unknown'] -= 1
+                del self.apps_data[app_id]
+                if self.search_index is not None:
+                    self.search_index.remove(app_id)
+                changed.append(app_id)
+            
+            for app_id, app_data in upserts.items():
+                if not isinstance(app_data, dict):
+                    continue
+                if app_id in self.apps_data:
+                    self.category_counts[self.apps_data[app_id].get('category') or 'Unknown'] -= 1
+                self.apps_data[app_id] = app_data
+                self.category_counts[app_data.get('category') or 'Unknown'] += 1
+                if self.search_index is not None:
+                    self.search_index.update(app_id, app_data)
+                changed.append(app_id)
+            
+            self.category_counts = +self.category_counts
+            self.categories = sorted(self.category_counts)
+        return changed
+    
+    def save_catalog(self):
+        """Write the records back to the catalog JSON and recompile its snapshot."""
+        path = Path(self.catalog_path)
+        with self.lock:
+            records = dict(self.apps_data.iter_records() if isinstance(self.apps_data, LazyCatalog)
+                           else self.apps_data.items())
+        tmp_path = path.with_name(path.name + f".tmp{os.getpid()}")
+        with open(tmp_path, 'w') as f:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        # Compile now, so the next start opens the snapshot instead of parsing JSON
+        CatalogSnapshot.compile(records, CatalogSnapshot.snapshot_path_for(path), path.stat())
+    
+    def build_search_index(self):
+        """Build the inverted search index over the loaded apps."""
+        started = time.time()
+        with self.lock:
+            self.search_index = AppSearchIndex(self.apps_data)
+        elapsed_ms = (time.time() - started) * 1000
+        print(f"🔎 Indexed {len(self.search_index.doc_lengths)} apps "
+              f"({len(self.search_index.vocabulary)} terms) in {elapsed_ms:.1f}ms")
+    
+    def search(self, query, category=None, tags=None, limit=None, filters=None):
+        """Return ranked app ids matching the query and filters."""
+        with self.lock:
+            return self._search(query, category, tags, limit, filters)
+    
+    def facet_counts(self, query="", category=None, tags=None, filters=None, facets=None):
+        """Facet -> {value: count} for the query under the filters (see FacetIndex.counts)."""
+        with self.lock:
+            if self.search_index is None:
+                self.build_search_index()
+            return self.search_index.facet_counts(query, category, tags, filters, facets)
+    
+    def _search(self, query, category, tags, limit, filters=None):
+        if self.search_index is None:
+            if not (query or '').strip() and not category and not tags and not filters:
+                # Catalog order needs no index; keeps first paint off the index build
+                if isinstance(self.apps_data, LazyCatalog):
+                    ids = list(self.apps_data.keys())
+                else:
+                    ids = [app_id for app_id, app_data in self.apps_data.items() if isinstance(app_data, dict)]
+                return ids[:limit] if limit else ids
+            self.build_search_index()
+        return self.search_index.search(query, category=category, tags=tags, limit=limit, filters=filters)
 
 # ╔═══════════════════════════════════════════════════════════════════════════════╗
-# ║                           INSTALLATION MANAGER                                ║
+# ║                           CATALOG SNAPSHOT                                    ║
 # ╚═══════════════════════════════════════════════════════════════════════════════╝
 
-class InstallationManager:
-    """Handle real app installation with actual SD-Pinnokio code."""
+class CatalogSnapshot:
+    """Compiled, memory-mapped columnar snapshot of the apps catalog JSON.
     
-    def __init__(self, output_widget):
-        self.output_widget = output_widget
-        self.shell_runner = None
-        self.installer = None
+    Layout (little endian): header, string offset table, UTF-8 string blob,
+    one fixed-width row per record, then the flat tag reference array. Every
+    distinct string is stored once, so categories, tags, authors and installer
+    types are interned across records.
+    """
+    
+    MAGIC = b"SDPCAT01"
+    VERSION = 1
+    SUFFIX = ".catalog"
+    HEADER = struct.Struct("<8sIqqIII")
+    STRING_FIELDS = (
+        'name', 'description', 'repo_url', 'clone_url',
+        'category', 'author', 'installer_type', 'source',
+    )
+    # Low-cardinality columns whose decoded values are shared via sys.intern
+    INTERNED_FIELDS = {'category', 'author', 'installer_type', 'source'}
+    FLAG_FIELDS = ('has_install_js', 'has_install_json', 'has_pinokio_js', 'is_pinokio_app')
+    # id ref, 8 string field refs, extra JSON ref, stars, tags start, tags count,
+    # flag values, presence mask (flag bits, then PRESENT_STARS / PRESENT_TAGS)
+    ROW = struct.Struct("<10IiIHBB")
+    NO_STRING = 0xFFFFFFFF
+    PRESENT_STARS = 1 << 4
+    PRESENT_TAGS = 1 << 5
+    
+    @classmethod
+    def snapshot_path_for(cls, json_path):
+        """Return where the snapshot for a JSON catalog lives."""
+        json_path = Path(json_path)
+        local = json_path.with_suffix(cls.SUFFIX)
+        if os.access(json_path.parent, os.W_OK) or local.exists():
+            return local
+        cache_dir = Path(tempfile.gettempdir()) / "sd-pinnokio-catalog"
+        return cache_dir / (json_path.stem + cls.SUFFIX)
+    
+    @classmethod
+    def load(cls, json_path):
+        """Open the snapshot for json_path, recompiling it when the JSON is newer."""
+        json_path = Path(json_path)
+        snapshot_path = cls.snapshot_path_for(json_path)
+        source_stat = json_path.stat()
         
-    def setup_sd_pinnokio_components(self):
-        """Setup SD-Pinnokio components."""
+        if not cls.is_fresh(snapshot_path, source_stat):
+            with open(json_path, 'r') as f:
+                apps_data = json.load(f)
+            cls.compile(apps_data, snapshot_path, source_stat)
+            print(f"🗜️ Compiled catalog snapshot: {snapshot_path}")
+        
+        return LazyCatalog(snapshot_path)
+    
+    @classmethod
+    def is_fresh(cls, snapshot_path, source_stat):
+        """Check that a snapshot exists and was compiled from this exact JSON."""
         try:
-            from environment_management.shell_runner import ShellRunner
-            from engine.installer import ApplicationInstaller
-            
-            self.shell_runner = ShellRunner()
-            self.installer = ApplicationInstaller()
-            print("✅ SD-Pinnokio components initialized!")
-            return True
-        except Exception as e:
-            print(f"❌ Failed to initialize SD-Pinnokio components: {e}")
+            with open(snapshot_path, 'rb') as f:
+                header = f.read(cls.HEADER.size)
+            magic, version, mtime_ns, size, _, _, _ = cls.HEADER.unpack(header)
+        except (OSError, struct.error):
             return False
+        return (magic == cls.MAGIC and version == cls.VERSION
+                and mtime_ns == source_stat.st_mtime_ns and size == source_stat.st_size)
     
-    def install_app(self, app_id, app_data):
-        """Install an app using real SD-Pinnokio code."""
-        with self.output_widget:
-            print(f"\n🚀 INSTALLING: {app_data.get('name', app_id)}")
-            print("=" * 60)
+    @classmethod
+    def compile(cls, apps_data, snapshot_path, source_stat=None):
+        """Write apps_data to snapshot_path in the compiled format."""
+        strings = []
+        string_refs = {}
+        
+        def ref(value):
+            if value is None:
+                return cls.NO_STRING
+            if value not in string_refs:
+                string_refs[value] = len(strings)
+                strings.append(value)
+            return string_refs[value]
+        
+        rows = []
+        tag_refs = []
+        for app_id, app_data in apps_data.items():
+            if not isinstance(app_data, dict):
+                continue
+            extra = {}
+            field_refs = []
+            for field in cls.STRING_FIELDS:
+                value = app_data.get(field)
+                if value is not None and not isinstance(value, str):
+                    extra[field] = value
+                    value = None
+                field_refs.append(ref(value))
             
-            if not self.installer:
-                print("❌ Installer not initialized")
-                return False
+            flags = 0
+            present = 0
+            for bit, field in enumerate(cls.FLAG_FIELDS):
+                value = app_data.get(field)
+                if isinstance(value, bool):
+                    present |= 1 << bit
+                    flags |= (1 << bit) if value else 0
+                elif field in app_data:
+                    extra[field] = value
             
-            try:
-                # Create app directory structure
-                apps_dir = Path("apps")
-                apps_dir.mkdir(exist_ok=True)
-                app_dir = apps_dir / app_id
-                
-                # Get repository URL
-                repo_url = app_data.get('repo_url')
-                if not repo_url:
-                    print("❌ No repository URL available")
-                    return False
-                
-                # Clone repository
-                print(f"📥 Cloning repository: {repo_url}")
-                clone_result = subprocess.run(
-                    ["git", "clone", repo_url, str(app_dir)],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True
-                )
-                
-                print("GIT CLONE OUTPUT:")
-                print(clone_result.stdout)
-                
-                if clone_result.returncode != 0:
-                    print(f"❌ Git clone failed with code: {clone_result.returncode}")
-                    return False
-                
-                print("✅ Repository cloned successfully!")
-                
-                # Install requirements
-                requirements_files = [
-                    app_dir / "requirements.txt",
-                    app_dir / "requirements.pip",
-                    app_dir / "deps.txt"
-                ]
-                
-                requirements_installed = False
-                for req_file in requirements_files:
-                    if req_file.exists():
-                        print(f"\n📦 Installing requirements from: {req_file.name}")
-                        
-                        # Show requirements content
-                        try:
-                            with open(req_file, 'r') as f:
-                                req_content = f.read()
-                            print("REQUIREMENTS CONTENT:")
-                            print(req_content[:300] + "..." if len(req_content) > 300 else req_content)
-                        except Exception as e:
-                            print(f"⚠️ Could not read requirements: {e}")
-                        
-                        # Install requirements
-                        pip_result = subprocess.run(
-                            [sys.executable, "-m", "pip", "install", "-r", str(req_file)],
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.STDOUT,
-                            text=True,
-                            cwd=str(app_dir)
-                        )
-                        
-                        print("PIP INSTALL OUTPUT:")
-                        print(pip_result.stdout)
-                        
-                        if pip_result.returncode == 0:
-                            print("✅ Requirements installed successfully!")
-                            requirements_installed = True
-                        else:
-                            print(f"❌ Requirements installation failed with code: {pip_result.returncode}")
-                        
-                        break
-                
-                if not requirements_installed:
-                    print("⚠️ No requirements file found, app may be ready to run")
-                
-                print(f"\n🎉 INSTALLATION COMPLETE: {app_data.get('name', app_id)}")
-                print("✅ App is ready to run!")
-                return True
-                
-            except Exception as e:
-                print(f"❌ Installation failed with exception: {e}")
-                import traceback
-                traceback.print_exc()
-                return False
+            stars = app_data.get('stars')
+            if isinstance(stars, int) and not isinstance(stars, bool) and -2**31 <= stars < 2**31:
+                present |= cls.PRESENT_STARS
+            else:
+                if 'stars' in app_data:
+                    extra['stars'] = stars
+                stars = 0
+            
+            tags = app_data.get('tags')
+            tags_start = len(tag_refs)
+            if isinstance(tags, list) and all(isinstance(tag, str) for tag in tags):
+                present |= cls.PRESENT_TAGS
+                tag_refs.extend(ref(tag) for tag in tags)
+            elif 'tags' in app_data:
+                extra['tags'] = tags
+            
+            known = set(cls.STRING_FIELDS) | set(cls.FLAG_FIELDS) | {'stars', 'tags'}
+            for key, value in app_data.items():
+                if key not in known:
+                    extra[key] = value
+            extra_ref = ref(json.dumps(extra)) if extra else cls.NO_STRING
+            
+            rows.append(cls.ROW.pack(
+                ref(app_id), *field_refs, extra_ref, stars,
+                tags_start, len(tag_refs) - tags_start, flags, present
+            ))
+        
+        encoded = [value.encode('utf-8') for value in strings]
+        offsets = [0]
+        for blob in encoded:
+            offsets.append(offsets[-1] + len(blob))
+        
+        header = cls.HEADER.pack(
+            cls.MAGIC, cls.VERSION,
+            source_stat.st_mtime_ns if source_stat else 0,
+            source_stat.st_size if source_stat else 0,
+            len(rows), len(strings), len(tag_refs)
+        )
+        
+        snapshot_path = Path(snapshot_path)
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = snapshot_path.with_name(snapshot_path.name + f".tmp{os.getpid()}")
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            f.write(b"".join(encoded))
+            f.write(b"".join(rows))
+            f.write(struct.pack(f"<{len(tag_refs)}I", *tag_refs))
+        os.replace(tmp_path, snapshot_path)
+
+class LazyCatalog(MutableMapping):
+    """Dict-like view of a CatalogSnapshot that builds records on first access.
+    
+    Only the id column is decoded when the snapshot is opened. Assigned or
+    deleted records live in an in-memory overlay on top of the mapped file.
+    """
+    
+    def __init__(self, snapshot_path):
+        self.snapshot_path = Path(snapshot_path)
+        with open(self.snapshot_path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        _, _, _, _, record_count, string_count, tag_ref_count = CatalogSnapshot.HEADER.unpack_from(self._mm, 0)
+        self._offsets_start = CatalogSnapshot.HEADER.size
+        self._blob_start = self._offsets_start + 4 * (string_count + 1)
+        blob_size = struct.unpack_from("<I", self._mm, self._offsets_start + 4 * string_count)[0]
+        self._rows_start = self._blob_start + blob_size
+        self._tags_start = self._rows_start + CatalogSnapshot.ROW.size * record_count
+        self._interned = {}
+        self._records = {}
+        self._overlay = {}
+        self._deleted = set()
+        
+        self._index = {}
+        for row in range(record_count):
+            id_ref = struct.unpack_from("<I", self._mm, self._rows_start + CatalogSnapshot.ROW.size * row)[0]
+            self._index[self._string(id_ref)] = row
+    
+    def _string(self, string_ref, intern=False):
+        """Decode one string from the blob, sharing low-cardinality values."""
+        if string_ref == CatalogSnapshot.NO_STRING:
+            return None
+        if intern and string_ref in self._interned:
+            return self._interned[string_ref]
+        start, end = struct.unpack_from("<II", self._mm, self._offsets_start + 4 * string_ref)
+        value = self._mm[self._blob_start + start:self._blob_start + end].decode('utf-8')
+        if intern:
+            value = self._interned[string_ref] = sys.intern(value)
+        return value
+    
+    def _unpack_row(self, row):
+        return CatalogSnapshot.ROW.unpack_from(self._mm, self._rows_start + CatalogSnapshot.ROW.size * row)
+    
+    def _materialize(self, row):
+        """Turn one mapped row into a plain record dict."""
+        fields = self._unpack_row(row)
+        string_count = len(CatalogSnapshot.STRING_FIELDS)
+        extra_ref, stars, tags_start, tags_count, flags, present = fields[1 + string_count:]
+        
+        record = {}
+        for field, string_ref in zip(CatalogSnapshot.STRING_FIELDS, fields[1:1 + string_count]):
+            if string_ref != CatalogSnapshot.NO_STRING:
+                record[field] = self._string(string_ref, intern=field in CatalogSnapshot.INTERNED_FIELDS)
+        if present & CatalogSnapshot.PRESENT_TAGS:
+            tag_refs = struct.unpack_from(f"<{tags_count}I", self._mm, self._tags_start + 4 * tags_start)
+            record['tags'] = [self._string(tag_ref, intern=True) for tag_ref in tag_refs]
+        if present & CatalogSnapshot.PRESENT_STARS:
+            record['stars'] = stars
+        for bit, field in enumerate(CatalogSnapshot.FLAG_FIELDS):
+            if present & (1 << bit):
+                record[field] = bool(flags & (1 << bit))
+        if extra_ref != CatalogSnapshot.NO_STRING:
+            record.update(json.loads(self._string(extra_ref)))
+        return record
+    
+    def column(self, field):
+        """Return one interned string column without materializing records."""
+        position = 1 + CatalogSnapshot.STRING_FIELDS.index(field)
+        values = []
+        for app_id in self:
+            if app_id in self._overlay:
+                values.append(self._overlay[app_id].get(field))
+            else:
+                values.append(self._string(self._unpack_row(self._index[app_id])[position], intern=True))
+        return values
+    
+    def iter_records(self):
+        """Yield (app_id, record) pairs without caching them, for one-off scans."""
+        for app_id in self:
+            if app_id in self._overlay:
+                yield app_id, self._overlay[app_id]
+            elif app_id in self._records:
+                yield app_id, self._records[app_id]
+            else:
+                yield app_id, self._materialize(self._index[app_id])
+    
+    def __getitem__(self, app_id):
+        if app_id in self._overlay:
+            return self._overlay[app_id]
+        if app_id in self._deleted or app_id not in self._index:
+            raise KeyError(app_id)
+        record = self._records.get(app_id)
+        if record is None:
+            record = self._records[app_id] = self._materialize(self._index[app_id])
+        return record
+    
+    def __setitem__(self, app_id, record):
+        self._overlay[app_id] = record
+        self._deleted.discard(app_id)
+    
+    def __delitem__(self, app_id):
+        if app_id not in self:
+            raise KeyError(app_id)
+        self._overlay.pop(app_id, None)
+        self._records.pop(app_id, None)
+        if app_id in self._index:
+            self._deleted.add(app_id)
+    
+    def __contains__(self, app_id):
+        return app_id in self._overlay or (app_id in self._index and app_id not in self._deleted)
+    
+    def __iter__(self):
+        for app_id in self._index:
+            if app_id not in self._deleted:
+                yield app_id
+        for app_id in self._overlay:
+            if app_id not in self._index:
+                yield app_id
+    
+    def __len__(self):
+        return len(self._index) - len(self._deleted) + sum(1 for app_id in self._overlay if app_id not in self._index)
+    
+    @property
+    def materialized_count(self):
+        """Number of records currently held as Python dicts."""
+        return len(self._records) + len(self._overlay)
 
 # ╔═══════════════════════════════════════════════════════════════════════════════╗
-# ║                           APP RUNNER                                          ║
+# ║                           APPS SEARCH INDEX                                   ║
 # ╚═══════════════════════════════════════════════════════════════════════════════╝
 
-class AppRunner:
-    """Handle running applications with real process monitoring."""
+_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+")
+_CAMEL_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+def tokenize_search_text(text):
+    """Split text into lowercase search tokens, including camelCase parts."""
+    tokens = []
+    for word in _TOKEN_PATTERN.findall(text or ""):
+        lowered = word.lower()
+        tokens.append(lowered)
+        parts = _CAMEL_PATTERN.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+    return tokens
+
+_popcount = int.bit_count if hasattr(int, 'bit_count') else (lambda bits: bin(bits).count("1"))
+
+class FacetIndex:
+    """Bitset postings for the catalog facets, with live counts.
     
-    def __init__(self, output_widget):
-        self.output_widget = output_widget
-        self.running_processes = {}
+    Every record owns a slot (its catalog position) and every facet value
+    keeps one Python int with a bit set per slot having that value. Values
+    chosen within a facet are OR'ed, facets are AND'ed, and counts are
+    popcounts of those ints, so a combined filter such as IMAGE and <=8GB
+    VRAM and install.json costs a few big-int operations, not a pass over
+    the records.
+    """
+    
+    FACETS = ('category', 'tag', 'installer_type', 'author', 'vram')
+    VRAM_TIERS = (4, 6, 8, 12, 16, 24, 48)
+    # "low-vram" apps are taken to fit the common 8GB cards
+    LOW_VRAM_GB = 8
+    _VRAM_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*gb[-_ ]?vram$", re.IGNORECASE)
+    
+    def __init__(self):
+        self.bits = {facet: {} for facet in self.FACETS}
+        self.slots = {}
+        self.slot_ids = {}
+        self.doc_values = {}
+        self.all_bits = 0
+    
+    @classmethod
+    def vram_gb(cls, tags):
+        """Least VRAM in GB the tags ask for ("12GB-VRAM", "low-vram"), or None."""
+        needed = None
+        for tag in tags:
+            match = cls._VRAM_PATTERN.match(tag.strip())
+            if match:
+                gb = float(match.group(1))
+            elif tag.strip().lower() == 'low-vram':
+                gb = cls.LOW_VRAM_GB
+            else:
+                continue
+            needed = gb if needed is None else min(needed, gb)
+        return needed
+    
+    @classmethod
+    def vram_tier(cls, tags):
+        """Tier label ("≤8GB") for the least VRAM the tags ask for, or None."""
+        needed = cls.vram_gb(tags)
+        if needed is None:
+            return None
+        for tier in cls.VRAM_TIERS:
+            if needed <= tier:
+                return f"≤{tier}GB"
+        return f">{cls.VRAM_TIERS[-1]}GB"
+    
+    @classmethod
+    def tiers_within(cls, gb):
+        """Tier labels of every tier that fits in gb of VRAM."""
+        return [f"≤{tier}GB" for tier in cls.VRAM_TIERS if tier <= gb]
+    
+    @classmethod
+    def values_for(cls, app_data):
+        """Facet -> set of values for one record."""
+        tags = [tag for tag in app_data.get('tags', []) or [] if isinstance(tag, str)]
+        tier = cls.vram_tier(tags)
+        return {
+            'category': {app_data.get('category') or 'Unknown'},
+            'tag': {tag.lower() for tag in tags},
+            'installer_type': {app_data['installer_type']} if app_data.get('installer_type') else set(),
+            'author': {app_data['author']} if app_data.get('author') else set(),
+            'vram': {tier} if tier else set(),
+        }
+    
+    def add(self, app_id, app_data, slot):
+        values = self.values_for(app_data)
+        bit = 1 << slot
+        for facet, facet_values in values.items():
+            postings = self.bits[facet]
+            for value in facet_values:
+                postings[value] = postings.get(value, 0) | bit
+        self.slots[app_id] = slot
+        self.slot_ids[slot] = app_id
+        self.doc_values[app_id] = values
+        self.all_bits |= bit
+    
+    def remove(self, app_id):
+        slot = self.slots.pop(app_id, None)
+        if slot is None:
+            return False
+        mask = ~(1 << slot)
+        for facet, facet_values in self.doc_values.pop(app_id).items():
+            postings = self.bits[facet]
+            for value in facet_values:
+                postings[value] &= mask
+                if not postings[value]:
+                    del postings[value]
+        del self.slot_ids[slot]
+        self.all_bits &= mask
+        return True
+    
+    def value_bits(self, facet, values):
+        """Records having any of the values; a number for 'vram' means "fits in N GB"."""
+        if not isinstance(values, (list, tuple, set, frozenset)):
+            values = [values]
+        postings = self.bits[facet]
+        bits = 0
+        for value in values:
+            if facet == 'vram' and isinstance(value, (int, float)):
+                for tier in self.tiers_within(value):
+                    bits |= postings.get(tier, 0)
+                continue
+            bits |= postings.get(value.lower() if facet == 'tag' else value, 0)
+        return bits
+    
+    def select(self, filters, exclude=None):
+        """Bits passing every (facet, values) filter, skipping ``exclude``; None if unfiltered."""
+        selected = None
+        for facet, values in filters:
+            if facet == exclude or values is None or values == '' or values == []:
+                continue
+            bits = self.value_bits(facet, values)
+            selected = bits if selected is None else selected & bits
+        return selected
+    
+    def counts(self, filters=(), within=None, facets=None):
+        """Facet -> {value: count} under the filters.
         
-    def run_app(self, app_id, app_data):
-        """Run an application with real process monitoring."""
-        with self.output_widget:
-            print(f"\n▶️ RUNNING: {app_data.get('name', app_id)}")
-            print("=" * 50)
-            
+        Each facet is counted with every *other* facet's filter applied, so
+        the counts say what picking a different value would return.
+        ``within`` restricts counting to a bitset (e.g. the query matches).
+        """
+        counts = {}
+        for facet in facets or self.FACETS:
+            base = self.select(filters, exclude=facet)
+            if within is not None:
+                base = within if base is None else base & within
+            counts[facet] = {value: _popcount(bits if base is None else bits & base)
+                             for value, bits in self.bits[facet].items()}
+        return counts
+    
+    def to_bits(self, app_ids):
+        bits = 0
+        for app_id in app_ids:
+            slot = self.slots.get(app_id)
+            if slot is not None:
+                bits |= 1 << slot
+        return bits
+    
+    def ids(self, bits):
+        """App ids of the set bits, in slot (catalog) order."""
+        ids = []
+        while bits:
+            low = bits & -bits
+            ids.append(self.slot_ids[low.bit_length() - 1])
+            bits ^= low
+        return ids
+
+class AppSearchIndex:
+    """Token-level inverted index with BM25 ranking over the apps catalog.
+    
+    Filters go through a FacetIndex. Records can be re-indexed or removed one
+    at a time (update/remove), which touches only that record's terms,
+    n-grams and facet bits.
+    """
+    
+    # Field weights applied to term frequencies before BM25 saturation
+    FIELD_WEIGHTS = {
+        'name': 3.0,
+        'tags': 2.0,
+        'category': 1.5,
+        'author': 1.5,
+        'description': 1.0,
+    }
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    PREFIX_MATCH_WEIGHT = 0.7
+    SUBSTRING_MATCH_WEIGHT = 0.4
+    NGRAM_SIZE = 3
+    
+    def __init__(self, apps_data):
+        self.postings = {}
+        self.doc_lengths = {}
+        self.doc_order = {}
+        self.facets = FacetIndex()
+        self.ngram_postings = {}
+        self.vocabulary = []
+        self.average_length = 0.0
+        self.total_length = 0
+        # Per-record terms, so a record can be un-indexed
+        self.doc_terms = {}
+        self.build(apps_data)
+    
+    def build(self, apps_data):
+        """Index every app record once; records are referenced by id only."""
+        records = apps_data.iter_records() if isinstance(apps_data, LazyCatalog) else apps_data.items()
+        for position, (app_id, app_data) in enumerate(records):
+            if isinstance(app_data, dict):
+                self._add(app_id, app_data, position)
+        
+        self.vocabulary = sorted(self.postings)
+        for term in self.vocabulary:
+            for gram in self._ngrams(term):
+                self.ngram_postings.setdefault(gram, set()).add(term)
+        self._refresh_average()
+    
+    def _add(self, app_id, app_data, position):
+        """Add one record's postings; vocabulary and n-grams are left to the caller."""
+        self.doc_order[app_id] = position
+        
+        fields = {
+            'name': f"{app_data.get('name', '')} {app_id}",
+            'tags': " ".join(app_data.get('tags', []) or []),
+            'category': app_data.get('category', ''),
+            'author': app_data.get('author', ''),
+            'description': app_data.get('description', ''),
+        }
+        
+        term_weights = {}
+        doc_length = 0
+        for field, text in fields.items():
+            weight = self.FIELD_WEIGHTS[field]
+            for token in tokenize_search_text(text):
+                term_weights[token] = term_weights.get(token, 0.0) + weight
+                doc_length += 1
+        
+        for token, weight in term_weights.items():
+            self.postings.setdefault(token, {})[app_id] = weight
+        self.doc_lengths[app_id] = doc_length
+        self.total_length += doc_length
+        self.doc_terms[app_id] = tuple(term_weights)
+        self.facets.add(app_id, app_data, position)
+    
+    def _refresh_average(self):
+        self.average_length = self.total_length / len(self.doc_lengths) if self.doc_lengths else 0.0
+    
+    def update(self, app_id, app_data):
+        """Index an added or changed record in place, keeping its position."""
+        position = self.doc_order.get(app_id)
+        self.remove(app_id)
+        if not isinstance(app_data, dict):
+            return
+        if position is None:
+            position = max(self.doc_order.values(), default=-1) + 1
+        self._add(app_id, app_data, position)
+        for term in self.doc_terms[app_id]:
+            if len(self.postings[term]) == 1:
+                bisect.insort(self.vocabulary, term)
+                for gram in self._ngrams(term):
+                    self.ngram_postings.setdefault(gram, set()).add(term)
+        self._refresh_average()
+    
+    def remove(self, app_id):
+        """Drop a record's postings, and any terms only it used; False if not indexed."""
+        terms = self.doc_terms.pop(app_id, None)
+        if terms is None:
+            return False
+        for term in terms:
+            postings = self.postings[term]
+            del postings[app_id]
+            if not postings:
+                del self.postings[term]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+                for gram in self._ngrams(term):
+                    grams = self.ngram_postings[gram]
+                    grams.discard(term)
+                    if not grams:
+                        del self.ngram_postings[gram]
+        
+        self.facets.remove(app_id)
+        self.total_length -= self.doc_lengths.pop(app_id)
+        del self.doc_order[app_id]
+        self._refresh_average()
+        return True
+    
+    def _ngrams(self, term):
+        """Return the character n-grams of a term."""
+        size = self.NGRAM_SIZE
+        if len(term) < size:
+            return set()
+        return {term[i:i + size] for i in range(len(term) - size + 1)}
+    
+    def expand_term(self, token):
+        """Map a query token to indexed terms with a match-quality weight."""
+        expansions = {}
+        if token in self.postings:
+            expansions[token] = 1.0
+        
+        # Prefix matches for as-you-type queries
+        start = bisect.bisect_left(self.vocabulary, token)
+        for term in self.vocabulary[start:]:
+            if not term.startswith(token):
+                break
+            expansions.setdefault(term, self.PREFIX_MATCH_WEIGHT)
+        
+        # Substring matches through the n-gram index (e.g. "diffus" in "stablediffusion")
+        grams = self._ngrams(token)
+        if grams:
+            candidates = None
+            for gram in grams:
+                terms = self.ngram_postings.get(gram, set())
+                candidates = terms if candidates is None else candidates & terms
+                if not candidates:
+                    break
+            for term in candidates or ():
+                if token in term:
+                    expansions.setdefault(term, self.SUBSTRING_MATCH_WEIGHT)
+        
+        return expansions
+    
+    @staticmethod
+    def facet_filters(category=None, tags=None, filters=None):
+        """(facet, values) pairs; every tag is required, a list in filters means any of."""
+        pairs = [('category', category)] + [('tag', tag) for tag in tags or []]
+        return pairs + list((filters or {}).items())
+    
+    def filter_bits(self, category=None, tags=None, filters=None):
+        """Bitset of the records passing the filters, or None for all."""
+        return self.facets.select(self.facet_filters(category, tags, filters))
+    
+    def filter_ids(self, category=None, tags=None, filters=None):
+        """Return the set of app ids passing the filters, or None for all."""
+        bits = self.filter_bits(category, tags, filters)
+        return None if bits is None else set(self.facets.ids(bits))
+    
+    def facet_counts(self, query="", category=None, tags=None, filters=None, facets=None):
+        """Live facet counts for the query matches under the other filters."""
+        within = None
+        if (query or "").strip():
+            within = self.facets.to_bits(self.search(query))
+        return self.facets.counts(self.facet_filters(category, tags, filters), within, facets)
+    
+    def search(self, query, category=None, tags=None, limit=None, filters=None):
+        """Return app ids ranked by BM25 relevance; every query token must match.
+        
+        ``filters`` maps facets (category, tag, installer_type, author, vram)
+        to a value or a list of accepted values; see FacetIndex.
+        """
+        allowed_bits = self.filter_bits(category, tags, filters)
+        query_tokens = list(dict.fromkeys(_TOKEN_PATTERN.findall((query or "").lower())))
+        
+        if not query_tokens:
+            if allowed_bits is None:
+                ranked = sorted(self.doc_order, key=self.doc_order.get)
+            else:
+                # Slots are catalog positions, so the bits decode in display order
+                ranked = self.facets.ids(allowed_bits)
+            return ranked[:limit] if limit else ranked
+        
+        allowed = None if allowed_bits is None else set(self.facets.ids(allowed_bits))
+        
+        total_docs = len(self.doc_lengths)
+        scores = None
+        for token in query_tokens:
+            token_scores = {}
+            for term, match_weight in self.expand_term(token).items():
+                postings = self.postings[term]
+                idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for app_id, tf in postings.items():
+                    if allowed is not None and app_id not in allowed:
+                        continue
+                    norm = self.BM25_K1 * (1 - self.BM25_B + self.BM25_B * self.doc_lengths[app_id] / self.average_length)
+                    score = match_weight * idf * tf * (self.BM25_K1 + 1) / (tf + norm)
+                    if score > token_scores.get(app_id, 0.0):
+                        token_scores[app_id] = score
+            
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {app_id: scores[app_id] + score
+                          for app_id, score in token_scores.items() if app_id in scores}
+            if not scores:
+                return []
+        
+        ranked = sorted(scores, key=lambda app_id: (-scores[app_id], self.doc_order[app_id]))
+        return ranked[:limit] if limit else ranked
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           CATALOG SYNC                                        ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class CatalogSync:
+    """Keep the local catalog in step with a remote source, record by record.
+    
+    The source URL (``SD_PINNOKIO_CATALOG_URL`` by default) is fetched
+    conditionally with If-None-Match / If-Modified-Since and gzip, so an
+    unchanged catalog costs one 304. Sources may serve deltas: a JSON object
+    with ``upserts`` (id -> record) and ``deletions`` (ids), requested with
+    ``?since=<version>`` from the previous sync. A plain full catalog is
+    diffed against per-record hashes kept from the previous sync. Only the
+    changed records are applied to the AppsDatabase (see apply_delta), and
+    the local JSON and snapshot are rewritten once when anything changed.
+    """
+    
+    STATE_SUFFIX = ".sync.json"
+    
+    def __init__(self, apps_db, source=None, state_path=None, timeout=30):
+        self.apps_db = apps_db
+        self.source = source or os.environ.get("SD_PINNOKIO_CATALOG_URL")
+        self.timeout = timeout
+        self._state_path = Path(state_path) if state_path else None
+    
+    @property
+    def state_path(self):
+        if self._state_path is not None:
+            return self._state_path
+        catalog = Path(self.apps_db.catalog_path)
+        return catalog.with_name(catalog.name + self.STATE_SUFFIX)
+    
+    @staticmethod
+    def record_hash(app_data):
+        return hashlib.sha256(json.dumps(app_data, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def _read_state(self):
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state if state.get('source') == self.source else {}
+    
+    def _write_state(self, state):
+        tmp_path = self.state_path.with_name(self.state_path.name + f".tmp{os.getpid()}")
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+    
+    def _local_hashes(self):
+        """Hashes of the local records, for the first diff against a full catalog."""
+        data = self.apps_db.apps_data
+        records = data.iter_records() if isinstance(data, LazyCatalog) else data.items()
+        return {app_id: self.record_hash(app_data) for app_id, app_data in records if isinstance(app_data, dict)}
+    
+    def _fetch(self, state):
+        """(status, document, response headers, bytes on the wire)."""
+        url = self.source
+        if state.get('version'):
+            url += ('&' if '?' in url else '?') + urllib.parse.urlencode({'since': state['version']})
+        request = urllib.request.Request(url, headers={
+            "Accept": "application/json", "Accept-Encoding": "gzip", "User-Agent": "sd-pinnokio"})
+        if state.get('etag'):
+            request.add_header("If-None-Match", state['etag'])
+        if state.get('last_modified'):
+            request.add_header("If-Modified-Since", state['last_modified'])
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                headers = response.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, None, e.headers, 0
+            raise
+        size = len(body)
+        if (headers.get("Content-Encoding") or "").lower() == "gzip":
+            body = gzip.decompress(body)
+        return 200, json.loads(body), headers, size
+    
+    def sync(self):
+        """Pull and apply catalog changes; returns a summary dict.
+        
+        ``status`` is 'disabled' (no source), 'unchanged', 'updated' or
+        'failed'; failures leave the local catalog as it was.
+        """
+        summary = {'status': 'disabled', 'upserts': 0, 'deletions': 0, 'bytes': 0, 'changed': []}
+        if not self.source:
+            return summary
+        if not self.apps_db.catalog_path:
+            summary['status'] = 'failed'
+            return summary
+        
+        state = self._read_state()
+        try:
+            status, document, headers, size = self._fetch(state)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Catalog sync failed, keeping the local catalog: {e}")
+            summary['status'] = 'failed'
+            return summary
+        summary['bytes'] = size
+        if status == 304:
+            print("✅ Catalog is up to date (not modified)")
+            summary['status'] = 'unchanged'
+            return summary
+        
+        hashes = state.get('hashes')
+        is_delta = isinstance(document, dict) and isinstance(document.get('upserts'), dict) \
+            and not document.get('full')
+        if is_delta:
+            upserts = document['upserts']
+            deletions = [app_id for app_id in document.get('deletions') or [] if isinstance(app_id, str)]
+            if hashes is None:
+                hashes = self._local_hashes()
+        else:
+            remote = document.get('upserts') if isinstance(document, dict) and document.get('full') else document
+            if not isinstance(remote, dict):
+                print("⚠️ Catalog sync failed: the source did not return a catalog object")
+                summary['status'] = 'failed'
+                return summary
+            if hashes is None:
+                hashes = self._local_hashes()
+            upserts = {app_id: app_data for app_id, app_data in remote.items()
+                       if isinstance(app_data, dict) and hashes.get(app_id) != self.record_hash(app_data)}
+            deletions = [app_id for app_id in hashes if app_id not in remote]
+        
+        # Deltas may repeat records we already have; only real changes are applied
+        upserts = {app_id: app_data for app_id, app_data in upserts.items()
+                   if isinstance(app_data, dict) and hashes.get(app_id) != self.record_hash(app_data)}
+        deletions = [app_id for app_id in deletions if app_id in self.apps_db.apps_data]
+        changed = self.apps_db.apply_delta(upserts, deletions)
+        for app_id, app_data in upserts.items():
+            hashes[app_id] = self.record_hash(app_data)
+        for app_id in deletions:
+            hashes.pop(app_id, None)
+        if changed:
+            self.apps_db.save_catalog()
+        
+        self._write_state({
+            'source': self.source,
+            'etag': headers.get("ETag"),
+            'last_modified': headers.get("Last-Modified"),
+            'version': document.get('version') if is_delta or isinstance(document.get('upserts'), dict) else None,
+            'hashes': hashes,
+            'synced_at': time.time(),
+        })
+        summary.update(status='updated' if changed else 'unchanged', upserts=len(upserts),
+                       deletions=len(deletions), changed=changed)
+        print(f"🔄 Catalog sync: {summary['upserts']} updated, {summary['deletions']} removed "
+              f"({_format_bytes(size)} transferred)")
+        return summary
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           CLONE STRATEGY                                      ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class GitCloneStrategy:
+    """Shallow, partial and cache-backed git checkouts for app installs.
+    
+    With the object cache enabled, each clone_url gets one partial bare repo
+    (commits and trees, blobs fetched on demand) under cache_dir, and every
+    app checkout is a detached worktree of it, so reinstalls and duplicate
+    catalog entries share one object store. Without the cache, checkouts are
+    shallow single-branch clones. Existing checkouts are updated by fetching
+    and moving HEAD with ``reset --keep`` rather than re-cloning.
+    """
+    
+    DEFAULT_CACHE_DIR = Path("apps") / ".git-cache"
+    
+    def __init__(self, cache_dir=None, use_cache=True, depth=1, partial_filter="blob:none"):
+        self.cache_dir = Path(cache_dir) if cache_dir else self.DEFAULT_CACHE_DIR
+        self.use_cache = use_cache
+        self.depth = depth
+        self.partial_filter = partial_filter
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+    
+    @staticmethod
+    def normalize_url(clone_url):
+        """Canonical form used for cache keys (trailing slash and .git ignored)."""
+        url = clone_url.strip().rstrip('/')
+        if url.endswith('.git'):
+            url = url[:-4]
+        return url
+    
+    def cache_path(self, clone_url):
+        """Bare cache repository for a clone URL."""
+        url = self.normalize_url(clone_url)
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", url.rsplit('/', 1)[-1]) or "repo"
+        return self.cache_dir / f"{name}-{digest}.git"
+    
+    def _lock_for(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(str(path), threading.Lock())
+    
+    @staticmethod
+    def _git_output(args, cwd=None):
+        """Run a short git query and return its stripped stdout, or None on failure."""
+        return command_engine().output(["git"] + args, cwd=cwd)
+    
+    @staticmethod
+    def is_checkout(path):
+        """True if path is the top level of a git work tree."""
+        path = Path(path)
+        return (path / ".git").exists()
+    
+    def checkout(self, clone_url, dest, run, emit):
+        """Clone or update clone_url at dest.
+        
+        ``run(cmd, cwd=None)`` executes a command and returns its exit code;
+        ``emit(text)`` reports progress. Returns True on success.
+        """
+        dest = Path(dest)
+        if dest.exists() and not self.is_checkout(dest):
+            if any(dest.iterdir()):
+                emit(f"❌ {dest} exists and is not a git checkout")
+                return False
+            dest.rmdir()
+        
+        if self.use_cache:
+            return self._checkout_from_cache(clone_url, dest, run, emit)
+        if self.is_checkout(dest):
+            return self._update_shallow(dest, run, emit)
+        return self._clone_shallow(clone_url, dest, run, emit)
+    
+    def _clone_shallow(self, clone_url, dest, run, emit):
+        cmd = ["git", "clone", "--single-branch", "--no-tags"]
+        if self.depth:
+            cmd += ["--depth", str(self.depth)]
+        elif self.partial_filter:
+            cmd += [f"--filter={self.partial_filter}"]
+        cmd += [clone_url, str(dest)]
+        emit(f"🪶 Shallow clone (depth={self.depth or 'full'})")
+        return run(cmd) == 0
+    
+    def _update_shallow(self, dest, run, emit):
+        emit(f"🔄 Existing checkout found, fetching updates into {dest}")
+        cmd = ["git", "fetch", "--no-tags", "origin", "HEAD"]
+        if self.depth and self._git_output(["rev-parse", "--is-shallow-repository"], cwd=dest) == "true":
+            cmd[2:2] = ["--depth", str(self.depth)]
+        if run(cmd, cwd=str(dest)) != 0:
+            return False
+        return run(["git", "reset", "--keep", "FETCH_HEAD"], cwd=str(dest)) == 0
+    
+    def ensure_cache(self, clone_url, run, emit):
+        """Create or refresh the partial bare cache for clone_url; returns its path or None."""
+        cache = self.cache_path(clone_url)
+        if (cache / "HEAD").exists():
+            emit(f"♻️ Refreshing object cache: {cache}")
+            if run(["git", "fetch", "--prune", "--no-tags", "origin"], cwd=str(cache)) != 0:
+                emit("⚠️ Cache refresh failed, using cached objects as-is")
+            return cache
+        
+        emit(f"🗄️ Creating object cache: {cache}")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cmd = ["git", "clone", "--bare", "--no-tags"]
+        if self.partial_filter:
+            cmd.append(f"--filter={self.partial_filter}")
+        if run(cmd + [clone_url, str(cache)]) != 0:
+            return None
+        # Fetch branch heads straight into the bare repo; worktrees stay detached
+        # so fetches never collide with a checked-out branch.
+        run(["git", "config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*"], cwd=str(cache))
+        return cache
+    
+    def _checkout_from_cache(self, clone_url, dest, run, emit):
+        cache = self.cache_path(clone_url)
+        with self._lock_for(cache):
+            if self.ensure_cache(clone_url, run, emit) is None:
+                return False
+            commit = self._git_output(["rev-parse", "HEAD"], cwd=cache)
+            if not commit:
+                emit("❌ Object cache has no default branch")
+                return False
+            
+            if self.is_checkout(dest):
+                emit(f"🔄 Updating existing checkout to {commit[:12]}")
+                target = commit
+                if self._git_output(["cat-file", "-t", commit], cwd=dest) != "commit":
+                    # Checkout predates the cache and does not share its objects
+                    if run(["git", "fetch", "--no-tags", "origin", "HEAD"], cwd=str(dest)) != 0:
+                        return False
+                    target = "FETCH_HEAD"
+                return run(["git", "reset", "--keep", target], cwd=str(dest)) == 0
+            
+            emit(f"🌿 Checking out {commit[:12]} from object cache")
+            run(["git", "worktree", "prune"], cwd=str(cache))
+            return run(["git", "worktree", "add", "--detach", str(dest.resolve()), commit], cwd=str(cache)) == 0
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           CATALOG ENRICHMENT                                  ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class CatalogEnricher:
+    """Refresh the probed catalog fields from each app's repository.
+    
+    Every repo gets a ``git ls-remote`` for its HEAD; results are cached per
+    repo by HEAD commit (apps/.repo-probes.json), so unchanged repos cost
+    that one round trip. Changed repos are read with a depth-1, blobless,
+    sparse clone that downloads only the installer scripts and requirements
+    files. From those the installer fields and a rough install size are
+    derived. Probes run concurrently, at most ``parallel`` at a time.
+    
+    Usage: ``CatalogEnricher().enrich(apps_db)`` updates the records in
+    place and saves the catalog when anything changed. Setting
+    ``SD_PINNOKIO_ENRICH_CATALOG=1`` runs it as the last background startup
+    step (see startup_task).
+    """
+    
+    DEFAULT_CACHE_PATH = Path("apps") / ".repo-probes.json"
+    ENV_FLAG = "SD_PINNOKIO_ENRICH_CATALOG"
+    SCRIPT_FILES = ("install.js", "install.json", "pinokio.js", "pinokio.json")
+    REQUIREMENTS_PATTERN = re.compile(r"(^|/)requirements[^/]*\.txt$")
+    PIP_INSTALL_PATTERN = re.compile(r"pip3?\s+install\s+([^\"'`\n&;|]+)")
+    
+    # Approximate installed size of packages that dominate real app installs
+    PACKAGE_SIZES = {
+        'torch': 2600, 'tensorflow': 1100, 'jax': 450, 'jaxlib': 450, 'xformers': 250,
+        'triton': 400, 'flash-attn': 500, 'bitsandbytes': 150, 'onnxruntime-gpu': 350,
+        'onnxruntime': 60, 'torchvision': 30, 'torchaudio': 15, 'opencv-python': 90,
+        'opencv-python-headless': 90, 'opencv-contrib-python': 120, 'scipy': 110,
+        'gradio': 90, 'transformers': 40, 'pandas': 70, 'numpy': 40, 'llvmlite': 120,
+        'deepspeed': 60, 'insightface': 40, 'librosa': 10, 'diffusers': 15,
+        'accelerate': 5, 'scikit-learn': 45, 'matplotlib': 40, 'pillow': 15,
+    }
+    DEFAULT_PACKAGE_MB = 3
+    
+    def __init__(self, cache_path=None, parallel=8, timeout=120, fetch_stars=None, stars_max_age=86400):
+        self.cache_path = Path(cache_path) if cache_path else self.DEFAULT_CACHE_PATH
+        self.parallel = parallel
+        self.timeout = timeout
+        # GitHub star counts need the API; on by default only with a token (rate limits)
+        self.fetch_stars = bool(os.environ.get("GITHUB_TOKEN")) if fetch_stars is None else fetch_stars
+        self.stars_max_age = stars_max_age
+        self._cache_lock = threading.Lock()
+    
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _write_cache(self, cache):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(self.cache_path.name + f".tmp{os.getpid()}")
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f, indent=1)
+        os.replace(tmp_path, self.cache_path)
+    
+    def _git(self, args, cwd=None):
+        return command_engine().output(["git"] + args, cwd=cwd, timeout=self.timeout,
+                                       env=dict(os.environ, GIT_TERMINAL_PROMPT="0"))
+    
+    def remote_head(self, clone_url):
+        """Commit the remote's HEAD points at, or None if the repo is unreachable."""
+        output = self._git(["ls-remote", clone_url, "HEAD"])
+        if not output:
+            return None
+        return output.split()[0]
+    
+    def read_files(self, clone_url):
+        """Sparse-read the installer and requirements files at HEAD.
+        
+        Returns (head, {path: text}); only trees and the selected blobs are
+        downloaded.
+        """
+        with tempfile.TemporaryDirectory(prefix="sd-probe-") as tmp:
+            checkout = Path(tmp) / "repo"
+            if self._git(["clone", "--depth", "1", "--filter=blob:none", "--no-checkout",
+                          "--no-tags", "--single-branch", clone_url, str(checkout)]) is None:
+                return None, {}
+            head = self._git(["rev-parse", "HEAD"], cwd=checkout)
+            listing = self._git(["ls-tree", "-r", "--name-only", "HEAD"], cwd=checkout) or ""
+            wanted = [path for path in listing.splitlines()
+                      if path in self.SCRIPT_FILES
+                      or (self.REQUIREMENTS_PATTERN.search(path) and path.count('/') <= 1)]
+            if wanted:
+                # Checkout fetches the missing blobs for the sparse paths in one batch
+                patterns = ["/" + path for path in wanted]
+                self._git(["sparse-checkout", "set", "--no-cone"] + patterns, cwd=checkout)
+                self._git(["checkout", "--quiet", "HEAD"], cwd=checkout)
+            files = {}
+            for path in wanted:
+                try:
+                    files[path] = (checkout / path).read_text(encoding='utf-8', errors='replace')
+                except OSError:
+                    continue
+            return head, files
+    
+    @classmethod
+    def requirement_names(cls, files):
+        """Package names from requirements files and pip installs in scripts."""
+        names = []
+        for path, text in files.items():
+            if cls.REQUIREMENTS_PATTERN.search(path):
+                candidates = text.replace("\\\n", " ").splitlines()
+            elif path.startswith("install."):
+                candidates = [token for match in cls.PIP_INSTALL_PATTERN.finditer(text)
+                              for token in match.group(1).split()]
+            else:
+                continue
+            for line in candidates:
+                line = re.split(r"(^|\s)#", line, maxsplit=1)[0].strip()
+                if not line or line.startswith(("-", ".", "/", "{")) or line.endswith(".txt") or "://" in line:
+                    continue
+                match = WheelCache._NAME_PATTERN.match(line)
+                if match:
+                    name = re.sub(r"[-_.]+", "-", match.group(1)).lower()
+                    if name not in names:
+                        names.append(name)
+        return names
+    
+    @classmethod
+    def estimate_install_bytes(cls, names):
+        """Rough installed size of a package list, in bytes."""
+        return sum(cls.PACKAGE_SIZES.get(name, cls.DEFAULT_PACKAGE_MB) for name in names) * 1024 * 1024
+    
+    @classmethod
+    def fields_from_files(cls, files):
+        """Catalog fields derived from the probed files."""
+        has_js, has_json = "install.js" in files, "install.json" in files
+        names = cls.requirement_names(files)
+        return {
+            'has_install_js': has_js,
+            'has_install_json': has_json,
+            'has_pinokio_js': "pinokio.js" in files,
+            'requirements_files': sorted(path for path in files if cls.REQUIREMENTS_PATTERN.search(path)),
+            'requirements_count': len(names),
+            'estimated_install_bytes': cls.estimate_install_bytes(names),
+            'installer_type': 'js' if has_js else 'json' if has_json else None,
+        }
+    
+    def github_stars(self, repo_url):
+        """Stargazer count from the GitHub API, or None."""
+        match = re.match(r"https?://github\.com/([^/]+)/([^/#?]+?)(?:\.git)?/?$", repo_url or "")
+        if not match:
+            return None
+        request = urllib.request.Request(f"https://api.github.com/repos/{match.group(1)}/{match.group(2)}",
+                                         headers={"Accept": "application/vnd.github+json",
+                                                  "User-Agent": "sd-pinnokio"})
+        if os.environ.get("GITHUB_TOKEN"):
+            request.add_header("Authorization", f"Bearer {os.environ['GITHUB_TOKEN']}")
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return int(json.load(response).get('stargazers_count'))
+        except (OSError, ValueError, TypeError):
+            return None
+    
+    def probe(self, app_data, cache):
+        """Probe one app's repository; returns (probe record, cache hit)."""
+        clone_url = app_data.get('clone_url') or app_data.get('repo_url')
+        key = GitCloneStrategy.normalize_url(clone_url)
+        with self._cache_lock:
+            cached = dict(cache.get(key) or {})
+        
+        head = self.remote_head(clone_url)
+        if head is None:
+            return {**cached, 'error': "unreachable"} if cached else {'error': "unreachable"}, False
+        hit = cached.get('head') == head and 'fields' in cached
+        if not hit:
+            probed_head, files = self.read_files(clone_url)
+            if probed_head is None:
+                return {**cached, 'error': "fetch failed"}, False
+            cached = {'head': probed_head, 'fields': self.fields_from_files(files), 'probed_at': time.time()}
+        cached.pop('error', None)
+        
+        if self.fetch_stars and time.time() - cached.get('stars_at', 0) > self.stars_max_age:
+            stars = self.github_stars(app_data.get('repo_url') or clone_url)
+            if stars is not None:
+                cached.update(stars=stars, stars_at=time.time())
+        
+        with self._cache_lock:
+            cache[key] = cached
+        return cached, hit
+    
+    def enrich(self, apps_db, app_ids=None, emit=print):
+        """Probe the apps' repos concurrently and write changed fields back.
+        
+        Returns a summary dict: probed, cached (HEAD unchanged), failed and
+        the ids of the records that changed.
+        """
+        if app_ids is None:
+            app_ids = list(apps_db.apps_data.keys())
+        records = {app_id: apps_db.apps_data[app_id] for app_id in app_ids}
+        records = {app_id: app_data for app_id, app_data in records.items()
+                   if isinstance(app_data, dict) and (app_data.get('clone_url') or app_data.get('repo_url'))}
+        cache = self._read_cache()
+        summary = {'probed': 0, 'cached': 0, 'failed': 0, 'changed': []}
+        upserts = {}
+        
+        emit(f"🔬 Probing {len(records)} repositories ({self.parallel} at a time)...")
+        started = time.time()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.parallel) as pool:
+            futures = {pool.submit(self.probe, app_data, cache): app_id for app_id, app_data in records.items()}
+            for future in concurrent.futures.as_completed(futures):
+                app_id = futures[future]
+                try:
+                    result, hit = future.result()
+                except Exception as e:
+                    result, hit = {'error': str(e)}, False
+                if result.get('error') or 'fields' not in result:
+                    summary['failed'] += 1
+                    emit(f"⚠️ {app_id}: {result.get('error', 'probe failed')}")
+                    continue
+                summary['cached' if hit else 'probed'] += 1
+                
+                updated = dict(records[app_id], **result['fields'])
+                if 'stars' in result:
+                    updated['stars'] = result['stars']
+                if updated != records[app_id]:
+                    upserts[app_id] = updated
+        
+        self._write_cache(cache)
+        if upserts:
+            summary['changed'] = apps_db.apply_delta(upserts)
+            if apps_db.catalog_path:
+                apps_db.save_catalog()
+        emit(f"✅ Enriched catalog in {time.time() - started:.1f}s: {summary['probed']} probed, "
+             f"{summary['cached']} unchanged, {summary['failed']} failed, {len(summary['changed'])} records updated")
+        return summary
+    
+    @classmethod
+    def startup_task(cls, apps_db, on_changed=None, **options):
+        """("catalog enrichment", task) for BackgroundStartup, or None unless ENV_FLAG is set.
+        
+        The task enriches every app and calls ``on_changed`` when records
+        changed; it fails only if no repository could be probed at all.
+        """
+        if os.environ.get(cls.ENV_FLAG, "").strip().lower() in ("", "0", "false", "no"):
+            return None
+        
+        def enrich_catalog():
+            summary = cls(**options).enrich(apps_db)
+            if summary['changed'] and on_changed is not None:
+                on_changed()
+            return bool(summary['probed'] or summary['cached'] or not summary['failed'])
+        return ("catalog enrichment", enrich_catalog)
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           DEPENDENCY CACHE                                    ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class WheelCache:
+    """Content-addressed wheel store shared by every requirements install.
+    
+    Layout under root:
+      objects/<sha256>       one copy of every wheel ever built or downloaded
+      wheels/<filename>      flat hard-link view of objects, used as --find-links
+      sets/<key>/            wheelhouse for one normalized requirement set
+      trees/<sha256>/        unpacked wheel, hard-linked into site-packages
+      index.json             set manifest with sizes and last-used times, and
+                             the object each flat wheel was placed from
+    
+    A set key hashes the normalized requirement lines together with the
+    interpreter version and platform. Warm sets install with --no-index, so
+    they work offline. Sets are evicted least-recently-used once the store
+    exceeds max_bytes; objects no set references are then removed.
+    """
+    
+    DEFAULT_ROOT = Path("apps") / ".wheel-cache"
+    DEFAULT_MAX_BYTES = 30 * 1024 ** 3
+    _NAME_PATTERN = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)(.*)$")
+    _PINNED_VCS = re.compile(r"@[0-9a-f]{40}\b")
+    
+    def __init__(self, root=None, max_bytes=None):
+        self.root = Path(root) if root else self.DEFAULT_ROOT
+        self.max_bytes = max_bytes or self.DEFAULT_MAX_BYTES
+        self._thread_lock = threading.Lock()
+    
+    # ---- requirement normalization -------------------------------------------------
+    
+    @classmethod
+    def normalize_requirements(cls, req_file, _seen=None):
+        """Return sorted canonical requirement lines, or None if the set is not cacheable.
+        
+        Editable installs, local paths and unpinned VCS/URL requirements can
+        change without the file changing, so they are never cached.
+        """
+        req_file = Path(req_file)
+        seen = _seen if _seen is not None else set()
+        if req_file.resolve() in seen:
+            return []
+        seen.add(req_file.resolve())
+        
+        try:
+            text = req_file.read_text(encoding='utf-8', errors='replace')
+        except OSError:
+            return None
+        
+        lines = []
+        for raw in text.replace("\\\n", " ").splitlines():
+            line = re.split(r"(^|\s)#", raw, maxsplit=1)[0].strip()
+            if not line:
+                continue
+            
+            option, _, value = line.partition(" ")
+            option, _, inline_value = option.partition("=")
+            value = (inline_value or value).strip()
+            if option in ("-r", "--requirement", "-c", "--constraint"):
+                included = cls.normalize_requirements(req_file.parent / value, seen)
+                if included is None:
+                    return None
+                prefix = "constraint:" if option in ("-c", "--constraint") else ""
+                lines.extend(prefix + item for item in included)
+                continue
+            if option in ("-e", "--editable"):
+                return None
+            if line.startswith("-"):
+                lines.append(re.sub(r"\s+", " ", line))
+                continue
+            if line.startswith((".", "/", "~", "file:")) or ("://" in line and not cls._PINNED_VCS.search(line)):
+                return None
+            
+            match = cls._NAME_PATTERN.match(line)
+            if not match:
+                return None
+            name = re.sub(r"[-_.]+", "-", match.group(1)).lower()
+            lines.append(name + re.sub(r"\s+", "", match.group(2)))
+        
+        return sorted(set(lines))
+    
+    @staticmethod
+    def interpreter_tag(python=None):
+        """Version/platform tag wheels built for this interpreter are valid for."""
+        if not python or python == sys.executable:
+            return f"cp{sys.version_info[0]}{sys.version_info[1]}-{sysconfig.get_platform()}"
+        tag = command_engine().output(
+            [python, "-c", "import sys, sysconfig; "
+             "print(f'cp{sys.version_info[0]}{sys.version_info[1]}-{sysconfig.get_platform()}')"]
+        )
+        return tag or "unknown"
+    
+    def set_key(self, requirements, python=None):
+        """Content address of a normalized requirement set."""
+        payload = self.interpreter_tag(python) + "\n" + "\n".join(requirements)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    # ---- manifest ------------------------------------------------------------------
+    
+    @contextlib.contextmanager
+    def locked(self):
+        """Serialize manifest and store mutations across threads and kernels."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._thread_lock, open(self.root / ".lock", 'w') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _read_index(self):
+        try:
+            with open(self.root / "index.json", 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"sets": {}, "flat": {}}
+    
+    def _write_index(self, index):
+        tmp_path = self.root / f"index.json.tmp{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp_path, self.root / "index.json")
+    
+    @staticmethod
+    def _sha256(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _link(source, target):
+        """Hard link source to target, copying when links cross filesystems."""
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+    
+    # ---- wheelhouses ---------------------------------------------------------------
+    
+    def lookup(self, req_file, python=None):
+        """Return (key, wheelhouse dir or None); key is None when not cacheable."""
+        requirements = self.normalize_requirements(req_file)
+        if requirements is None:
+            return None, None
+        key = self.set_key(requirements, python)
+        set_dir = self.root / "sets" / key
+        return key, (set_dir if (set_dir / ".complete").exists() else None)
+    
+    def ensure_wheelhouse(self, req_file, run, emit, python=None):
+        """Build or reuse the wheelhouse for req_file; returns (key, dir) or (None, None)."""
+        python = python or sys.executable
+        key, set_dir = self.lookup(req_file, python)
+        if key is None:
+            emit("ℹ️ Requirements reference local/editable/unpinned sources, wheel cache bypassed")
+            return None, None
+        
+        if set_dir:
+            emit(f"♻️ Wheel cache hit: {key[:12]}")
+            with self.locked():
+                index = self._read_index()
+                if key in index["sets"]:
+                    index["sets"][key]["last_used"] = time.time()
+                    self._write_index(index)
+            return key, set_dir
+        
+        emit(f"🧱 Wheel cache miss: {key[:12]}, building wheelhouse")
+        pool = self.root / "wheels"
+        pool.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix="staging-", dir=self.root))
+        try:
+            base_cmd = [python, "-m", "pip", "wheel", "-r", str(Path(req_file).resolve()),
+                        "-w", str(staging), "--find-links", str(pool.resolve())]
+            # Overlapping sets often resolve entirely from wheels other apps already built
+            if run(base_cmd + ["--no-index"]) != 0:
+                emit("🌐 Pool incomplete, resolving against the package index")
+                for leftover in staging.iterdir():
+                    leftover.unlink()
+                if run(base_cmd) != 0:
+                    return None, None
+            
+            return key, self._store_set(key, req_file, staging)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    
+    def _store_set(self, key, req_file, staging):
+        """Move staged wheels into the content store and publish the set."""
+        objects = self.root / "objects"
+        objects.mkdir(parents=True, exist_ok=True)
+        set_dir = self.root / "sets" / key
+        
+        with self.locked():
+            if (set_dir / ".complete").exists():
+                return set_dir
+            shutil.rmtree(set_dir, ignore_errors=True)
+            set_dir.mkdir(parents=True)
+            
+            index = self._read_index()
+            placed = index.setdefault("flat", {})
+            wheels = {}
+            for wheel in sorted(staging.glob("*.whl")):
+                digest = self._sha256(wheel)
+                stored = objects / digest
+                if not stored.exists():
+                    os.replace(wheel, stored)
+                self._link(stored, set_dir / wheel.name)
+                flat = self.root / "wheels" / wheel.name
+                if not flat.exists():
+                    self._link(stored, flat)
+                    placed[wheel.name] = digest
+                wheels[wheel.name] = digest
+            
+            index["sets"][key] = {
+                "requirements": str(req_file),
+                "wheels": wheels,
+                "created": time.time(),
+                "last_used": time.time(),
+            }
+            self._write_index(index)
+            (set_dir / ".complete").touch()
+        return set_dir
+    
+    # ---- installing ----------------------------------------------------------------
+    
+    @staticmethod
+    def interpreter_paths(python=None):
+        """sysconfig install paths of the target interpreter."""
+        if not python or python == sys.executable:
+            return sysconfig.get_paths()
+        output = command_engine().output(
+            [python, "-c", "import json, sysconfig; print(json.dumps(sysconfig.get_paths()))"]
+        )
+        return json.loads(output) if output else None
+    
+    def install(self, req_file, run, emit, python=None, cwd=None):
+        """Install req_file into python's environment through the cache."""
+        python = python or sys.executable
+        key, set_dir = self.ensure_wheelhouse(req_file, run, emit, python)
+        if set_dir is None:
+            return run([python, "-m", "pip", "install", "-r", str(req_file)], cwd=cwd) == 0
+        
+        paths = self.interpreter_paths(python)
+        if paths and self.link_set(key, paths, python, emit):
+            ok = True
+        else:
+            ok = run([python, "-m", "pip", "install", "--no-index", "--find-links", str(set_dir.resolve()),
+                      "-r", str(req_file)], cwd=cwd) == 0
+        self.evict(emit, keep={key})
+        return ok
+    
+    def _tree_for(self, digest, wheel_path):
+        """Unpack a wheel once into trees/<sha256>."""
+        tree = self.root / "trees" / digest
+        if not tree.exists():
+            tmp_tree = tree.with_name(digest + f".tmp{os.getpid()}")
+            shutil.rmtree(tmp_tree, ignore_errors=True)
+            with zipfile.ZipFile(wheel_path) as archive:
+                archive.extractall(tmp_tree)
+            try:
+                os.rename(tmp_tree, tree)
+            except OSError:
+                shutil.rmtree(tmp_tree, ignore_errors=True)  # another kernel won the race
+        return tree
+    
+    def link_set(self, key, paths, python, emit):
+        """Hard-link every unpacked wheel of a set into a fresh site-packages.
+        
+        Only used when none of the set's distributions are installed in the
+        target, so there is nothing to upgrade or uninstall; otherwise pip
+        installs from the wheelhouse. Returns True if the set was linked.
+        """
+        entry = self._read_index()["sets"].get(key)
+        if not entry:
+            return False
+        
+        plan = []
+        for filename, digest in entry["wheels"].items():
+            tree = self._tree_for(digest, self.root / "objects" / digest)
+            wheel_info = next(tree.glob("*.dist-info/WHEEL"), None)
+            purelib = wheel_info is None or "root-is-purelib: true" in wheel_info.read_text().lower()
+            root_target = Path(paths["purelib"] if purelib else paths["platlib"])
+            
+            for source in tree.rglob("*"):
+                if source.is_dir():
+                    continue
+                relative = source.relative_to(tree)
+                top = relative.parts[0]
+                if top.endswith(".data"):
+                    scheme = relative.parts[1]
+                    if scheme not in ("purelib", "platlib", "scripts"):
+                        return False  # headers/data files need pip's full scheme handling
+                    base = Path(paths["scripts"] if scheme == "scripts" else paths[scheme])
+                    plan.append((source, base.joinpath(*relative.parts[2:]), scheme == "scripts"))
+                else:
+                    plan.append((source, root_target / relative, False))
+        
+        if any(target.exists() for _, target, _ in plan):
+            return False
+        
+        emit(f"🔗 Linking {len(entry['wheels'])} cached wheels into {paths['purelib']}")
+        for source, target, is_script in plan:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if is_script and source.read_bytes().startswith(b"#!python"):
+                target.write_bytes(f"#!{python}".encode() + source.read_bytes()[len(b"#!python"):])
+                target.chmod(0o755)
+            else:
+                self._link(source, target)
+        
+        for dist_info in {target.parent for _, target, _ in plan if target.parent.name.endswith(".dist-info")}:
+            # A wheel may ship its own INSTALLER: replace the link, never write through it
+            installer = dist_info / "INSTALLER"
+            installer.unlink(missing_ok=True)
+            installer.write_text("sd-pinnokio\n")
+            self._write_console_scripts(dist_info, Path(paths["scripts"]), python)
+        return True
+    
+    @staticmethod
+    def _write_console_scripts(dist_info, scripts_dir, python):
+        """Generate console_scripts launchers the way pip would."""
+        entry_points = dist_info / "entry_points.txt"
+        if not entry_points.exists():
+            return
+        parser = configparser.ConfigParser(delimiters=("=",))
+        parser.optionxform = str
+        parser.read(entry_points)
+        if not parser.has_section("console_scripts"):
+            return
+        scripts_dir.mkdir(parents=True, exist_ok=True)
+        for name, target in parser.items("console_scripts"):
+            module, _, attr = target.strip().partition(":")
+            attr = attr.split("[")[0].strip()
+            script = scripts_dir / name
+            script.write_text(
+                f"#!{python}\nimport sys\nfrom {module.strip()} import {attr.split('.')[0]}\n"
+                f"if __name__ == '__main__':\n    sys.exit({attr}())\n"
+            )
+            script.chmod(0o755)
+    
+    # ---- eviction ------------------------------------------------------------------
+    
+    def size_bytes(self):
+        """Disk used by stored wheels and unpacked trees (hard links counted once)."""
+        seen = set()
+        total = 0
+        for folder in ("objects", "trees"):
+            for path in (self.root / folder).rglob("*"):
+                try:
+                    stat = path.lstat()
+                except OSError:
+                    continue
+                if path.is_file() and (stat.st_dev, stat.st_ino) not in seen:
+                    seen.add((stat.st_dev, stat.st_ino))
+                    total += stat.st_size
+        return total
+    
+    def evict(self, emit, keep=()):
+        """Drop least-recently-used sets until the store fits in max_bytes."""
+        with self.locked():
+            index = self._read_index()
+            size = self.size_bytes()
+            if size <= self.max_bytes:
+                return
+            
+            for key in sorted(index["sets"], key=lambda k: index["sets"][k]["last_used"]):
+                if size <= self.max_bytes:
+                    break
+                if key in keep:
+                    continue
+                del index["sets"][key]
+                shutil.rmtree(self.root / "sets" / key, ignore_errors=True)
+                
+                referenced = {digest for entry in index["sets"].values() for digest in entry["wheels"].values()}
+                # Flat wheels are found through the record _store_set keeps, since
+                # copies made across filesystems share no inode with their object
+                placed = index.setdefault("flat", {})
+                for filename, digest in list(placed.items()):
+                    if digest not in referenced:
+                        (self.root / "wheels" / filename).unlink(missing_ok=True)
+                        del placed[filename]
+                for stored in (self.root / "objects").iterdir():
+                    if stored.name in referenced:
+                        continue
+                    stored.unlink()
+                    shutil.rmtree(self.root / "trees" / stored.name, ignore_errors=True)
+                size = self.size_bytes()
+                emit(f"🧹 Evicted wheel set {key[:12]} (cache now {size / 1024 ** 3:.1f} GB)")
+            
+            self._write_index(index)
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           REQUIREMENT FINGERPRINTS                            ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class RequirementFingerprints:
+    """Per-environment record of which requirement files are already installed.
+    
+    A fingerprint is the hash of the requirement set, the interpreter tag and
+    the installed distributions after the last successful install. When all
+    three still match, the install is skipped. Otherwise requirements are
+    checked against what is installed and only missing or mismatched lines
+    are handed to pip. Environment markers are evaluated for the target
+    interpreter, not the kernel's.
+    """
+    
+    DEFAULT_DIR = Path("apps") / ".fingerprints"
+    # PEP 508 marker variables, computed the way packaging.markers.default_environment does
+    MARKER_ENVIRONMENT_SCRIPT = (
+        "import json, os, platform, sys\n"
+        "v = sys.implementation.version\n"
+        "version = f'{v.major}.{v.minor}.{v.micro}'\n"
+        "if v.releaselevel != 'final':\n"
+        "    version += v.releaselevel[0] + str(v.serial)\n"
+        "print(json.dumps({'implementation_name': sys.implementation.name,\n"
+        "    'implementation_version': version, 'os_name': os.name,\n"
+        "    'platform_machine': platform.machine(), 'platform_release': platform.release(),\n"
+        "    'platform_system': platform.system(), 'platform_version': platform.version(),\n"
+        "    'python_full_version': platform.python_version(),\n"
+        "    'platform_python_implementation': platform.python_implementation(),\n"
+        "    'python_version': '.'.join(platform.python_version_tuple()[:2]),\n"
+        "    'sys_platform': sys.platform}))\n"
+    )
+    # Interpreter path -> marker environment, shared by every store (one query per interpreter)
+    _marker_environments = {}
+    _marker_lock = threading.Lock()
+    
+    def __init__(self, store_path):
+        self.store_path = Path(store_path)
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def for_interpreter(cls, python=None):
+        """Fingerprint store for an interpreter's environment."""
+        python = python or sys.executable
+        digest = hashlib.sha1(str(Path(python).absolute()).encode('utf-8')).hexdigest()[:12]
+        return cls(cls.DEFAULT_DIR / f"{digest}.json")
+    
+    # ---- inputs --------------------------------------------------------------------
+    
+    @staticmethod
+    def requirements_hash(req_file):
+        """Hash of the requirement set (normalized when possible, raw bytes otherwise)."""
+        lines = WheelCache.normalize_requirements(req_file)
+        payload = "\n".join(lines) if lines is not None else Path(req_file).read_text(errors='replace')
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def installed_distributions(python=None):
+        """Map of canonical distribution name -> version in the target environment."""
+        if not python or python == sys.executable:
+            importlib.invalidate_caches()
+            installed = {}
+            for dist in importlib.metadata.distributions():
+                name = dist.metadata['Name']
+                if name:
+                    installed[re.sub(r"[-_.]+", "-", name).lower()] = dist.version
+            return installed
+        output = command_engine().output(
+            [python, "-c",
+             "import importlib.metadata as m, json, re; print(json.dumps({"
+             "re.sub(r'[-_.]+', '-', d.metadata['Name']).lower(): d.version "
+             "for d in m.distributions() if d.metadata['Name']}))"]
+        )
+        return json.loads(output) if output else {}
+    
+    @classmethod
+    def marker_environment(cls, python=None):
+        """The target interpreter's marker variables, or None if it cannot be asked."""
+        python = str(Path(python or sys.executable).absolute())
+        with cls._marker_lock:
+            if python in cls._marker_environments:
+                return cls._marker_environments[python]
+        if python == str(Path(sys.executable).absolute()):
+            try:
+                from packaging.markers import default_environment
+            except ImportError:
+                from pip._vendor.packaging.markers import default_environment
+            environment = default_environment()
+        else:
+            output = command_engine().output([python, "-c", cls.MARKER_ENVIRONMENT_SCRIPT])
+            try:
+                environment = json.loads(output) if output else None
+            except ValueError:
+                environment = None
+            if environment is None:
+                return None  # not cached: the interpreter may not exist yet
+        with cls._marker_lock:
+            cls._marker_environments[python] = environment
+        return environment
+    
+    @staticmethod
+    def snapshot_hash(installed):
+        lines = "\n".join(f"{name}=={version}" for name, version in sorted(installed.items()))
+        return hashlib.sha256(lines.encode('utf-8')).hexdigest()
+    
+    # ---- store ---------------------------------------------------------------------
+    
+    def _read(self):
+        try:
+            with open(self.store_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def record(self, req_file, python=None):
+        """Remember the current state after a successful install."""
+        with self._lock:
+            store = self._read()
+            store[str(Path(req_file).resolve())] = {
+                "requirements": self.requirements_hash(req_file),
+                "interpreter": WheelCache.interpreter_tag(python),
+                "installed": self.snapshot_hash(self.installed_distributions(python)),
+                "recorded": time.time(),
+            }
+            self.store_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.store_path.with_name(self.store_path.name + f".tmp{os.getpid()}")
+            with open(tmp_path, 'w') as f:
+                json.dump(store, f, indent=1)
+            os.replace(tmp_path, self.store_path)
+    
+    # ---- decisions -----------------------------------------------------------------
+    
+    @staticmethod
+    def unsatisfied_lines(req_file, installed, environment):
+        """Return (unmet lines, option lines).
+        
+        ``environment`` holds the target's marker variables (None if unknown).
+        Unmet lines are None if some line cannot be evaluated locally; option
+        lines are None when every requirement is unmet.
+        """
+        try:
+            from packaging.requirements import Requirement, InvalidRequirement
+        except ImportError:
+            from pip._vendor.packaging.requirements import Requirement, InvalidRequirement
+        
+        lines = WheelCache.normalize_requirements(req_file)
+        if lines is None:
+            return None, None
+        
+        options = []
+        missing = []
+        checked = 0
+        for line in lines:
+            if line.startswith("-") or line.startswith("constraint:"):
+                options.append(line)
+                continue
+            try:
+                requirement = Requirement(line)
+            except InvalidRequirement:
+                return None, None
+            if requirement.url:
+                return None, None
+            if requirement.marker:
+                if environment is None:
+                    return None, None
+                if not requirement.marker.evaluate(environment):
+                    continue
+            checked += 1
+            version = installed.get(re.sub(r"[-_.]+", "-", requirement.name).lower())
+            if version is None or not requirement.specifier.contains(version, prereleases=True):
+                missing.append(line)
+        if missing and len(missing) == checked:
+            # Nothing to reduce; keep the original file so its wheel set key stays stable
+            return missing, None
+        return missing, options
+    
+    def plan(self, req_file, python=None):
+        """Decide how to install req_file: ('skip' | 'partial' | 'full', reason, lines)."""
+        installed = self.installed_distributions(python)
+        previous = self._read().get(str(Path(req_file).resolve()))
+        current = {
+            "requirements": self.requirements_hash(req_file),
+            "interpreter": WheelCache.interpreter_tag(python),
+            "installed": self.snapshot_hash(installed),
+        }
+        if previous and all(previous.get(key) == value for key, value in current.items()):
+            return 'skip', "fingerprint unchanged since last install", []
+        
+        missing, options = self.unsatisfied_lines(req_file, installed, self.marker_environment(python))
+        if missing is None:
+            return 'full', "requirements include entries that cannot be checked locally", []
+        if not missing:
+            return 'skip', "every requirement is already satisfied", []
+        if options is None:
+            return 'full', "none of the requirements are satisfied", missing
+        if any(option.startswith("constraint:") for option in options):
+            return 'full', f"{len(missing)} requirements unmet and constraints present", missing
+        return 'partial', f"{len(missing)} requirements missing or mismatched", options + missing
+    
+    def install(self, req_file, wheel_cache, run, emit, python=None, cwd=None):
+        """Install req_file only as far as needed, reporting the decision."""
+        req_file = Path(req_file).resolve()
+        action, reason, lines = self.plan(req_file, python)
+        
+        if action == 'skip':
+            emit(f"⏭️ Fingerprint: skipping install ({reason})")
+            return True
+        
+        if action == 'partial':
+            emit(f"🧮 Fingerprint: partial install ({reason}): {', '.join(lines)}")
+            reduced = Path(tempfile.mkdtemp(prefix="sd-req-")) / "requirements.txt"
+            reduced.write_text("\n".join(lines) + "\n")
+            try:
+                ok = wheel_cache.install(reduced, run, emit, python=python, cwd=cwd)
+            finally:
+                shutil.rmtree(reduced.parent, ignore_errors=True)
+        else:
+            emit(f"🧮 Fingerprint: full install ({reason})")
+            ok = wheel_cache.install(req_file, run, emit, python=python, cwd=cwd)
+        
+        if ok:
+            self.record(req_file, python)
+        return ok
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           APP ENVIRONMENTS                                    ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class AppEnvironments:
+    """Isolated per-app virtualenvs cloned from a pre-warmed base environment.
+    
+    The base venv is built once (venv + pip + optional common packages) and
+    rebuilt only when its requirements or the interpreter change. App
+    environments are hard-link clones of it: the interpreter and stdlib are
+    still symlinked by venv itself, site-packages files are hard links, and
+    only bin/ scripts and pyvenv.cfg are rewritten for the new prefix. A few
+    spare clones are kept ready so handing one to an app is a rename.
+    
+    pip replaces files rather than editing them, so upgrading a package in
+    one app never changes the base or another app.
+    """
+    
+    DEFAULT_ROOT = Path("environments")
+    MARKER = ".sd-env.json"
+    
+    def __init__(self, root=None, base_requirements=(), pool_size=2, system_site_packages=False,
+                 wheel_cache=None):
+        self.root = Path(root) if root else self.DEFAULT_ROOT
+        self.apps_root = self.root / "apps"
+        self.base_dir = self.root / ".base"
+        self.spares_dir = self.root / ".spares"
+        self.base_requirements = list(base_requirements)
+        self.pool_size = pool_size
+        self.system_site_packages = system_site_packages
+        self.wheel_cache = wheel_cache or WheelCache()
+        self._lock = threading.RLock()
+        self._replenishing = False
+    
+    # ---- paths ---------------------------------------------------------------------
+    
+    @staticmethod
+    def python_in(env_dir):
+        """Interpreter path inside a venv."""
+        if os.name == 'nt':
+            return Path(env_dir) / "Scripts" / "python.exe"
+        return Path(env_dir) / "bin" / "python"
+    
+    def env_dir(self, app_id):
+        return self.apps_root / app_id
+    
+    def python_for(self, app_id):
+        """The app's own interpreter, or the kernel's if it has no environment yet."""
+        python = self.python_in(self.env_dir(app_id))
+        return str(python.absolute()) if python.exists() else sys.executable
+    
+    def exists(self, app_id):
+        return self.python_in(self.env_dir(app_id)).exists()
+    
+    # ---- base environment ----------------------------------------------------------
+    
+    def base_signature(self):
+        payload = "\n".join([WheelCache.interpreter_tag(), str(self.system_site_packages)]
+                            + sorted(self.base_requirements))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _read_marker(self, env_dir):
+        try:
+            with open(Path(env_dir) / self.MARKER, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _write_marker(self, env_dir, **fields):
+        marker = self._read_marker(env_dir)
+        marker.update(fields)
+        with open(Path(env_dir) / self.MARKER, 'w') as f:
+            json.dump(marker, f)
+    
+    def ensure_base(self, run, emit):
+        """Build the base venv if it is missing or stale; returns True when ready."""
+        with self._lock:
+            signature = self.base_signature()
+            if self._read_marker(self.base_dir).get("signature") == signature:
+                return True
+            
+            emit(f"🧪 Building base environment: {self.base_dir}")
+            shutil.rmtree(self.base_dir, ignore_errors=True)
+            shutil.rmtree(self.spares_dir, ignore_errors=True)
+            self.root.mkdir(parents=True, exist_ok=True)
+            
+            cmd = [sys.executable, "-m", "venv", str(self.base_dir)]
+            if self.system_site_packages:
+                cmd.append("--system-site-packages")
+            if run(cmd) != 0:
+                emit("❌ Could not create base environment")
+                return False
+            
+            python = str(self.python_in(self.base_dir).absolute())
+            if self.base_requirements:
+                req_file = self.base_dir / "base-requirements.txt"
+                req_file.write_text("\n".join(self.base_requirements) + "\n")
+                fingerprints = RequirementFingerprints.for_interpreter(python)
+                if not fingerprints.install(req_file, self.wheel_cache, run, emit, python=python):
+                    emit("❌ Base environment packages failed to install")
+                    return False
+            
+            self._write_marker(self.base_dir, signature=signature, prefix=str(self.base_dir.absolute()))
+            emit("✅ Base environment ready")
+            return True
+    
+    # ---- cloning -------------------------------------------------------------------
+    
+    def _clone(self, source, dest):
+        """Hard-link clone source venv to dest, rewriting prefix-bearing text files."""
+        source = Path(source).absolute()
+        dest = Path(dest).absolute()
+        tmp = dest.with_name(dest.name + f".tmp{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        
+        for root, dirs, files in os.walk(source):
+            rel = Path(root).relative_to(source)
+            (tmp / rel).mkdir(parents=True, exist_ok=True)
+            for name in list(dirs):
+                if (Path(root) / name).is_symlink():
+                    os.symlink(os.readlink(Path(root) / name), tmp / rel / name)
+                    dirs.remove(name)
+            for name in files:
+                src = Path(root) / name
+                dst = tmp / rel / name
+                if src.is_symlink():
+                    os.symlink(os.readlink(src), dst)
+                elif rel.parts[:1] in (("bin",), ("Scripts",)) or name in ("pyvenv.cfg", self.MARKER):
+                    shutil.copy2(src, dst)  # rewritten by _relocate, so never shared
+                else:
+                    WheelCache._link(src, dst)
+        
+        self._relocate(tmp, str(source), str(dest))
+        os.rename(tmp, dest)
+        self._write_marker(dest, prefix=str(dest))
+    
+    def _relocate(self, env_dir, old_prefix, new_prefix):
+        """Point shebangs, activate scripts and pyvenv.cfg at a new prefix."""
+        if not old_prefix or old_prefix == new_prefix:
+            return
+        candidates = [Path(env_dir) / "pyvenv.cfg"]
+        for scripts in ("bin", "Scripts"):
+            folder = Path(env_dir) / scripts
+            if folder.is_dir():
+                candidates.extend(path for path in folder.iterdir() if path.is_file() and not path.is_symlink())
+        
+        for path in candidates:
+            try:
+                data = path.read_bytes()
+            except OSError:
+                continue
+            if b"\0" in data[:1024] or old_prefix.encode() not in data:
+                continue
+            path.write_bytes(data.replace(old_prefix.encode(), new_prefix.encode()))
+    
+    def replenish(self, run=None, emit=None):
+        """Top the spare pool back up to pool_size clones of the base."""
+        run = run or (lambda cmd, cwd=None: command_engine().run(cmd, cwd=cwd))
+        emit = emit or (lambda text: None)
+        try:
+            if not self.ensure_base(run, emit):
+                return
+            self.spares_dir.mkdir(parents=True, exist_ok=True)
+            while True:
+                with self._lock:
+                    spares = [p for p in self.spares_dir.iterdir() if ".tmp" not in p.name]
+                    if len(spares) >= self.pool_size:
+                        return
+                self._clone(self.base_dir, self.spares_dir / uuid.uuid4().hex[:12])
+        finally:
+            self._replenishing = False
+    
+    def replenish_in_background(self):
+        """Refill the spare pool on a daemon thread."""
+        with self._lock:
+            if self._replenishing or self.pool_size <= 0:
+                return
+            self._replenishing = True
+        threading.Thread(target=self.replenish, daemon=True, name="sd-env-pool").start()
+    
+    def _take_spare(self):
+        with self._lock:
+            if not self.spares_dir.is_dir():
+                return None
+            signature = self._read_marker(self.base_dir).get("signature")
+            for spare in self.spares_dir.iterdir():
+                if ".tmp" in spare.name:
+                    continue
+                if self._read_marker(spare).get("signature") != signature:
+                    shutil.rmtree(spare, ignore_errors=True)
+                    continue
+                claimed = spare.with_name(spare.name + ".claimed")
+                os.rename(spare, claimed)
+                return claimed
+        return None
+    
+    # ---- app environments ----------------------------------------------------------
+    
+    def ensure(self, app_id, run, emit):
+        """Return the app's interpreter, creating its environment if needed (None on failure)."""
+        env_dir = self.env_dir(app_id)
+        if self.exists(app_id):
+            emit(f"🐍 Using app environment: {env_dir}")
+            return str(self.python_in(env_dir).absolute())
+        
+        started = time.time()
+        if not self.ensure_base(run, emit):
+            return None
+        self.apps_root.mkdir(parents=True, exist_ok=True)
+        
+        spare = self._take_spare()
+        if spare is not None:
+            self._relocate(spare, self._read_marker(spare).get("prefix", ""), str(env_dir.absolute()))
+            os.rename(spare, env_dir)
+            self._write_marker(env_dir, prefix=str(env_dir.absolute()), app_id=app_id)
+            source = "warm pool"
+        else:
+            self._clone(self.base_dir, env_dir)
+            self._write_marker(env_dir, app_id=app_id)
+            source = "base clone"
+        
+        emit(f"🐍 Created app environment from {source} in {time.time() - started:.1f}s: {env_dir}")
+        self.replenish_in_background()
+        return str(self.python_in(env_dir).absolute())
+    
+    def create_at(self, env_dir, run, emit):
+        """Return the interpreter of a venv at any path, cloning it from the base if missing.
+        
+        Used for environments an app's own install script asks for
+        (``venv: "env"``), which live inside the app rather than under root.
+        """
+        env_dir = Path(env_dir)
+        python = self.python_in(env_dir)
+        if python.exists():
+            return str(python.absolute())
+        if not self.ensure_base(run, emit):
+            return None
+        env_dir.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if not python.exists():
+                self._clone(self.base_dir, env_dir)
+        emit(f"🐍 Created environment from base clone: {env_dir}")
+        return str(python.absolute())
+    
+    def remove(self, app_id):
+        """Delete an app's environment (shared files stay alive through other links)."""
+        shutil.rmtree(self.env_dir(app_id), ignore_errors=True)
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           INSTALL GRAPH                                       ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class StepCache:
+    """Cache keys and outputs of completed install steps, per app.
+    
+    A step whose cache key is unchanged, and whose recorded outputs still
+    check out, is not run again; its outputs are handed to the steps after it.
+    """
+    
+    DEFAULT_PATH = Path("apps") / ".install-steps.json"
+    
+    def __init__(self, path=None):
+        self.path = Path(path) if path else self.DEFAULT_PATH
+        self._lock = threading.Lock()
+    
+    def _read(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _write(self, store):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + f".tmp{os.getpid()}")
+        with open(tmp_path, 'w') as f:
+            json.dump(store, f, indent=1)
+        os.replace(tmp_path, self.path)
+    
+    def get(self, app_id, step):
+        with self._lock:
+            return self._read().get(app_id, {}).get(step)
+    
+    def put(self, app_id, step, key, outputs, run=None):
+        with self._lock:
+            store = self._read()
+            entry = {"key": key, "outputs": outputs, "recorded": time.time()}
+            if run is not None:
+                entry["run"] = run
+            store.setdefault(app_id, {})[step] = entry
+            self._write(store)
+    
+    def invalidate(self, app_id, step=None):
+        """Forget one step (or every step) of an app so it runs again."""
+        with self._lock:
+            store = self._read()
+            if step is None:
+                store.pop(app_id, None)
+            else:
+                store.get(app_id, {}).pop(step, None)
+            self._write(store)
+
+class InstallStep:
+    """One node of the install graph: a unit of work for one app.
+    
+    ``run(context)`` returns a dict of outputs merged into the app's context
+    (or raises). ``cache_key(context)`` makes the step cacheable; ``is_valid``
+    double-checks cached outputs (e.g. that a directory still exists).
+    """
+    
+    TERMINAL = ('done', 'cached', 'failed', 'blocked')
+    
+    def __init__(self, app_id, name, run, deps=(), slot=None, cache_key=None, is_valid=None,
+                 phase='installing'):
+        self.app_id = app_id
+        self.name = name
+        self.key = f"{app_id}:{name}"
+        self.run = run
+        self.deps = [f"{app_id}:{dep}" for dep in deps]
+        self.slot = slot
+        self.cache_key = cache_key
+        self.is_valid = is_valid
+        self.phase = phase
+        self.state = 'pending'
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+    
+    @property
+    def finished(self):
+        return self.state in self.TERMINAL
+
+class InstallGraph:
+    """Install steps for a batch of apps, run as one dependency graph.
+    
+    A step is dispatched as soon as the steps it depends on have finished and
+    a slot of its kind ('network' or 'cpu') is free, so one app's wheels
+    build while another app is still cloning and environments are prepared
+    while sources are fetched. Cacheable steps consult the StepCache first.
+    A failed step blocks only the steps that depend on it.
+    """
+    
+    def __init__(self, executor, slots, cache=None, tracer=None):
+        self.executor = executor
+        self.slots = slots
+        self.cache = cache or StepCache()
+        self.tracer = tracer or TRACER
+        self.steps = {}
+        self.jobs = {}
+        self.contexts = {}
+        self.spans = {}
+        # (start, end) of the batch's wait for background setup, shown in each install span
+        self.setup_wait = None
+        self._lock = threading.RLock()
+        # Steps with the same name and cache key (e.g. two apps sharing a wheel set)
+        # run one at a time, so the second finds the first one's result
+        self._key_locks = {}
+    
+    def add_job(self, job, steps):
+        """Add one app's steps; dependencies refer to step names of the same app."""
+        self.jobs[job.app_id] = job
+        self.contexts[job.app_id] = {}
+        for step in steps:
+            self.steps[step.key] = step
+        for step in steps:
+            unknown = [dep for dep in step.deps if dep not in self.steps]
+            if unknown:
+                raise ValueError(f"Step {step.key} depends on unknown steps: {', '.join(unknown)}")
+    
+    def run(self):
+        """Run every step to completion (blocking); True if every job succeeded."""
+        for app_id, job in self.jobs.items():
+            span = self.tracer.start_span("install", app_id=app_id, app=job.name,
+                                          start=self.setup_wait[0] if self.setup_wait else None)
+            if self.setup_wait:
+                self.tracer.record("wait for setup", *self.setup_wait, parent=span)
+            self.spans[app_id] = span
+        
+        pending = list(self.steps.values())
+        running = {}
+        while pending or running:
+            waiting_on_slot = False
+            for step in list(pending):
+                deps = [self.steps[key] for key in step.deps]
+                broken = [dep for dep in deps if dep.state in ('failed', 'blocked')]
+                if broken:
+                    pending.remove(step)
+                    self._finish(step, 'blocked', error=f"{broken[0].name} failed")
+                    continue
+                if not all(dep.state in ('done', 'cached') for dep in deps):
+                    continue
+                slot = self.slots.get(step.slot)
+                if slot is not None and not slot.acquire(blocking=False):
+                    waiting_on_slot = True
+                    continue
+                pending.remove(step)
+                step.state = 'running'
+                step.started_at = time.time()
+                self._update_job(self.jobs[step.app_id])
+                running[self.executor.submit(self._execute, step)] = (step, slot)
+            
+            if not running:
+                if waiting_on_slot:
+                    # Slots are shared with other graphs; poll until one frees up
+                    time.sleep(0.05)
+                    continue
+                for step in pending:
+                    self._finish(step, 'blocked', error="dependencies can never complete")
+                break
+            
+            done, _ = concurrent.futures.wait(
+                running, timeout=0.05 if waiting_on_slot else None,
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                step, slot = running.pop(future)
+                if slot is not None:
+                    slot.release()
+                if not step.finished:
+                    self._finish(step, 'failed', error=str(future.exception() or "step did not finish"))
+        
+        return all(job.state == 'done' for job in self.jobs.values())
+    
+    def _execute(self, step):
+        job = self.jobs[step.app_id]
+        context = self.contexts[step.app_id]
+        span = self.tracer.start_span(step.name, parent=self.spans[step.app_id])
+        state, error = 'done', None
+        try:
+            with self.tracer.use(span):
+                key = step.cache_key(context) if step.cache_key else None
+                cached = self.cache.get(step.app_id, step.name) if key else None
+                if (cached and cached.get('key') == key and
+                        (step.is_valid is None or step.is_valid(context, cached['outputs']))):
+                    context.update(cached['outputs'])
+                    job.emit(f"♻️ {step.name}: unchanged, reusing the cached result")
+                    span.set(cached=True)
+                    state = 'cached'
+                else:
+                    with self._key_lock(step.name, key) if key else contextlib.nullcontext():
+                        outputs = step.run(context) or {}
+                    context.update(outputs)
+                    if key:
+                        self.cache.put(step.app_id, step.name, key, outputs)
+        except Exception as e:
+            job.emit(f"❌ {step.name} failed: {e}")
+            span.fail(e)
+            state, error = 'failed', str(e)
+        span.end(state=state)
+        self._finish(step, state, error=error)
+    
+    def _key_lock(self, name, key):
+        """The lock for one step name and cache key, created under the graph lock."""
+        with self._lock:
+            return self._key_locks.setdefault((name, key), threading.Lock())
+    
+    def _finish(self, step, state, error=None):
+        step.state = state
+        step.error = error
+        step.finished_at = time.time()
+        self._update_job(self.jobs[step.app_id])
+    
+    def _update_job(self, job):
+        """Derive the job's state from its steps; close it once every step is finished."""
+        with self._lock:
+            if job.finished.is_set():
+                return
+            steps = [step for step in self.steps.values() if step.app_id == job.app_id]
+            if all(step.finished for step in steps):
+                failed = sorted((step for step in steps if step.state in ('failed', 'blocked')),
+                                key=lambda step: step.state != 'failed')
+                error = (failed[0].error or f"{failed[0].name} failed") if failed else None
+                # End the span first so whoever waits on the job sees a complete trace
+                span = self.spans.get(job.app_id)
+                if span is not None:
+                    if failed:
+                        span.fail(error)
+                    span.end(state='failed' if failed else 'done',
+                             cached=sum(step.state == 'cached' for step in steps))
+                if failed:
+                    job.set_state('failed', error=error)
+                else:
+                    job.emit(f"\n🎉 INSTALLATION COMPLETE: {job.name}")
+                    job.emit("✅ App is ready to run!")
+                    job.set_state('done')
+                return
+            if any(step.state == 'running' for step in steps):
+                cloning = any(step.phase == 'cloning' and not step.finished for step in steps)
+                state = 'cloning' if cloning else 'installing'
+                if job.state != state:
+                    job.set_state(state)
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           MODEL STORE                                         ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class ModelStore:
+    """Content-addressed store for checkpoints and other large downloads.
+    
+    Layout under root:
+      objects/<sha256>     one read-only copy of every downloaded file
+      partial/<url hash>/  data + state.json of downloads still in progress
+      index.json           url -> sha256, size and ETag
+    
+    Apps get hard links to objects, so a checkpoint used by ten apps is on
+    disk once, and deleting an app never removes a file another app uses.
+    """
+    
+    DEFAULT_ROOT = Path("apps") / ".models"
+    
+    def __init__(self, root=None):
+        self.root = Path(root) if root else self.DEFAULT_ROOT
+        self._lock = threading.Lock()
+    
+    def object_path(self, digest):
+        return self.root / "objects" / digest
+    
+    def partial_dir(self, url):
+        return self.root / "partial" / hashlib.sha256(url.encode('utf-8')).hexdigest()[:24]
+    
+    def _read_index(self):
+        try:
+            with open(self.root / "index.json", 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def lookup(self, url):
+        """The digest already stored for url, or None."""
+        with self._lock:
+            entry = self._read_index().get(url)
+        if entry and self.object_path(entry['sha256']).exists():
+            return entry['sha256']
+        return None
+    
+    def add(self, path, url=None, digest=None, etag=None):
+        """Move a finished download into objects/ and index it; returns its digest."""
+        digest = digest or self.hash_file(path)
+        target = self.object_path(digest)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        size = Path(path).stat().st_size
+        if target.exists():
+            Path(path).unlink()
+        else:
+            os.chmod(path, 0o444)  # links share the inode, so nothing may edit it in place
+            os.replace(path, target)
+        if url:
+            with self._lock:
+                index = self._read_index()
+                index[url] = {"sha256": digest, "size": size, "etag": etag, "stored": time.time()}
+                tmp_path = self.root / f"index.json.tmp{os.getpid()}"
+                with open(tmp_path, 'w') as f:
+                    json.dump(index, f, indent=1)
+                os.replace(tmp_path, self.root / "index.json")
+        return digest
+    
+    def link(self, digest, dest):
+        """Hard-link a stored object to dest (copying across filesystems)."""
+        source = self.object_path(digest)
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists() and os.path.samefile(source, dest):
+            return dest
+        tmp_path = dest.with_name(dest.name + f".tmp{os.getpid()}")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        WheelCache._link(source, tmp_path)
+        os.replace(tmp_path, dest)
+        return dest
+    
+    @staticmethod
+    def hash_file(path, block_size=4 * 1024 * 1024):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def usage(self):
+        """(object count, total bytes) stored."""
+        objects = self.root / "objects"
+        if not objects.is_dir():
+            return 0, 0
+        sizes = [path.stat().st_size for path in objects.iterdir() if path.is_file()]
+        return len(sizes), sum(sizes)
+
+class RateLimiter:
+    """Token bucket shared by every download connection; None means unlimited."""
+    
+    def __init__(self, bytes_per_second=None):
+        self.bytes_per_second = bytes_per_second
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def consume(self, amount):
+        if not self.bytes_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.bytes_per_second, self._tokens + (now - self._last) * self.bytes_per_second)
+            self._last = now
+            self._tokens -= amount
+            delay = -self._tokens / self.bytes_per_second if self._tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+
+class DownloadProgress:
+    """Byte counter for one download that reports at most every few seconds."""
+    
+    def __init__(self, name, total, emit, callback=None, interval=2.0, resumed=0):
+        self.name = name
+        self.total = total
+        self.emit = emit
+        self.callback = callback
+        self.interval = interval
+        self.resumed = resumed
+        self.done = resumed
+        self.started = time.monotonic()
+        self._reported = self.started
+        self._lock = threading.Lock()
+    
+    def add(self, amount):
+        with self._lock:
+            self.done += amount
+            now = time.monotonic()
+            report = now - self._reported >= self.interval
+            if report:
+                self._reported = now
+        if self.callback:
+            self.callback(self.name, self.done, self.total)
+        if report:
+            self.emit(f"⬇️ {self.name}: {self.describe()}")
+    
+    def describe(self):
+        rate = (self.done - self.resumed) / max(time.monotonic() - self.started, 1e-6)
+        if self.total:
+            return (f"{self.done * 100 / self.total:.0f}% of {_format_bytes(self.total)}"
+                    f" at {_format_bytes(rate)}/s")
+        return f"{_format_bytes(self.done)} at {_format_bytes(rate)}/s"
+
+class ModelDownloader:
+    """Parallel, resumable HTTP downloads into the ModelStore.
+    
+    Files are fetched as fixed-size byte ranges over several connections and
+    written in place into a preallocated partial file. Finished chunks are
+    recorded in state.json, so an interrupted download resumes with only
+    the missing chunks (as long as size and ETag are unchanged). Servers
+    without range support get a single stream. The result is checked
+    against ``sha256`` when given, then moved into the store and linked to
+    the destination.
+    
+    ``max_connections`` caps connections across all downloads and
+    ``bytes_per_second`` caps their combined bandwidth.
+    """
+    
+    DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+    READ_SIZE = 256 * 1024
+    
+    def __init__(self, store=None, connections_per_file=4, max_connections=8, chunk_size=None,
+                 bytes_per_second=None, retries=3, timeout=60):
+        self.store = store or ModelStore()
+        self.connections_per_file = connections_per_file
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.limiter = RateLimiter(bytes_per_second)
+        self.retries = retries
+        self.timeout = timeout
+        self._connections = threading.BoundedSemaphore(max_connections)
+        self._url_locks = collections.defaultdict(threading.Lock)
+        self._locks_guard = threading.Lock()
+    
+    def download(self, url, dest=None, sha256=None, emit=None, progress=None):
+        """Make url available (at dest, if given); returns the content digest."""
+        emit = emit or (lambda text: None)
+        name = urllib.parse.unquote(Path(urllib.parse.urlparse(url).path).name) or url
+        with self._locks_guard:
+            url_lock = self._url_locks[url]
+        with url_lock:
+            digest = self._stored(url, sha256)
+            if digest:
+                emit(f"♻️ {name} is already in the model store")
+            else:
+                digest = self._fetch(url, name, sha256, emit, progress)
+        if dest is not None:
+            self.store.link(digest, dest)
+        return digest
+    
+    def _stored(self, url, sha256):
+        if sha256 and self.store.object_path(sha256).exists():
+            return sha256
+        digest = self.store.lookup(url)
+        if digest and sha256 and digest != sha256:
+            return None
+        return digest
+    
+    # ---- transfer ------------------------------------------------------------------
+    
+    def _open(self, url, start=None, end=None):
+        request = urllib.request.Request(url, headers={"User-Agent": "sd-pinnokio"})
+        if start is not None:
+            request.add_header("Range", f"bytes={start}-{'' if end is None else end}")
+        return urllib.request.urlopen(request, timeout=self.timeout)
+    
+    def _probe(self, url):
+        """(final url, size or None, ETag, ranges supported) from a one-byte range request."""
+        with self._connections, self._open(url, 0, 0) as response:
+            etag = response.headers.get("ETag")
+            final_url = response.geturl()
+            content_range = response.headers.get("Content-Range") or ""
+            if response.status == 206 and "/" in content_range and not content_range.endswith("/*"):
+                return final_url, int(content_range.rsplit("/", 1)[1]), etag, True
+            length = response.headers.get("Content-Length")
+            return final_url, int(length) if length else None, etag, False
+    
+    def _copy(self, response, f, tracker, limit=None, counted=None):
+        """Copy the response body into f; returns the byte count.
+        
+        ``counted`` (a dict) holds the running count under 'bytes', so a
+        caller still knows what reached the tracker when a read fails.
+        """
+        copied = 0
+        while limit is None or copied < limit:
+            block = response.read(self.READ_SIZE if limit is None else min(self.READ_SIZE, limit - copied))
+            if not block:
+                break
+            self.limiter.consume(len(block))
+            f.write(block)
+            copied += len(block)
+            tracker.add(len(block))
+            if counted is not None:
+                counted['bytes'] = copied
+        return copied
+    
+    def _fetch_chunk(self, url, data, start, end, tracker):
+        """Download bytes start..end (inclusive) into data, retrying with backoff."""
+        for attempt in range(self.retries + 1):
+            counted = {'bytes': 0}
+            try:
+                with self._connections, self._open(url, start, end) as response, open(data, 'r+b') as f:
+                    if response.status != 206:
+                        raise OSError(f"server ignored the range request (HTTP {response.status})")
+                    f.seek(start)
+                    written = self._copy(response, f, tracker, limit=end - start + 1, counted=counted)
+                if written != end - start + 1:
+                    raise OSError(f"chunk at {start} ended after {written} bytes")
+                return
+            except (OSError, http.client.HTTPException):
+                # A connection cut mid-body raises IncompleteRead, an HTTPException
+                tracker.add(-counted['bytes'])
+                if attempt == self.retries:
+                    raise
+                time.sleep(min(2 ** attempt, 10))
+    
+    def _fetch(self, url, name, sha256, emit, progress):
+        partial = self.store.partial_dir(url)
+        final_url, size, etag, ranges = self._probe(url)
+        state_path = partial / "state.json"
+        try:
+            state = json.loads(state_path.read_text())
+        except (OSError, ValueError):
+            state = {}
+        if (state.get("size"), state.get("etag"), state.get("chunk_size")) != (size, etag, self.chunk_size):
+            shutil.rmtree(partial, ignore_errors=True)
+            state = {"url": url, "size": size, "etag": etag, "chunk_size": self.chunk_size, "done": []}
+        partial.mkdir(parents=True, exist_ok=True)
+        data = partial / "data"
+        
+        if ranges and size:
+            if not data.exists():
+                with open(data, 'wb') as f:
+                    f.truncate(size)
+            chunks = [(index, start, min(start + self.chunk_size, size) - 1)
+                      for index, start in enumerate(range(0, size, self.chunk_size))]
+            done = set(state["done"])
+            tracker = DownloadProgress(name, size, emit, progress,
+                                       resumed=sum(end - start + 1 for index, start, end in chunks if index in done))
+            if done:
+                emit(f"⏯️ Resuming {name}: {len(done)}/{len(chunks)} chunks already downloaded")
+            else:
+                emit(f"⬇️ Downloading {name} ({_format_bytes(size)}, {len(chunks)} chunks)")
+            
+            state_lock = threading.Lock()
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.connections_per_file,
+                                                       thread_name_prefix="sd-download") as pool:
+                futures = {pool.submit(self._fetch_chunk, final_url, data, start, end, tracker): index
+                           for index, start, end in chunks if index not in done}
+                try:
+                    for future in concurrent.futures.as_completed(futures):
+                        future.result()
+                        with state_lock:
+                            state["done"].append(futures[future])
+                            state_path.write_text(json.dumps(state))
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        else:
+            emit(f"⬇️ Downloading {name} (single stream, server does not support ranges)")
+            tracker = DownloadProgress(name, size, emit, progress)
+            with self._connections, self._open(final_url) as response, open(data, 'wb') as f:
+                self._copy(response, f, tracker)
+            if size is not None and data.stat().st_size != size:
+                raise OSError(f"{name} ended after {data.stat().st_size} of {size} bytes")
+        
+        digest = ModelStore.hash_file(data)
+        if sha256 and digest != sha256:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise ValueError(f"{name} checksum mismatch: expected {sha256}, got {digest}")
+        self.store.add(data, url=url, digest=digest, etag=etag)
+        shutil.rmtree(partial, ignore_errors=True)
+        emit(f"✅ Downloaded {name}: {tracker.describe()}")
+        return digest
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           PINOKIO SCRIPTS                                     ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class JSObjectParser:
+    """Parse the object literal a Pinokio install.js exports, without Node.
+    
+    Accepts the JSON superset scripts are written in: comments, unquoted and
+    single-quoted keys, single-quoted and backtick strings (without ``${}``),
+    trailing commas and ``undefined``. Anything that needs evaluating
+    (functions, variables, ``${}`` interpolation) raises ValueError.
+    """
+    
+    TOKEN = re.compile(r"""
+        (?P<space>\s+|//[^\n]*|/\*.*?\*/)
+      | (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|`(?:\\.|[^`\\])*`)
+      | (?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<name>[A-Za-z_$][\w$]*)
+      | (?P<punct>[{}\[\]:,;])
+    """, re.VERBOSE | re.DOTALL)
+    ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+    EXPORT = re.compile(r"\bmodule\.exports\s*=\s*")
+    
+    def __init__(self, source):
+        self.tokens = []
+        position = 0
+        while position < len(source):
+            match = self.TOKEN.match(source, position)
+            if match is None:
+                raise ValueError(f"unsupported syntax near {source[position:position + 30]!r}")
+            if match.lastgroup != 'space':
+                self.tokens.append((match.lastgroup, match.group()))
+            position = match.end()
+        self.index = 0
+    
+    @classmethod
+    def parse_module(cls, source):
+        """The value assigned to ``module.exports``."""
+        match = cls.EXPORT.search(source)
+        if match is None:
+            raise ValueError("no module.exports assignment")
+        parser = cls(source[match.end():])
+        value = parser.value()
+        while parser.index < len(parser.tokens) and parser.tokens[parser.index] == ('punct', ';'):
+            parser.index += 1
+        if parser.index != len(parser.tokens):
+            raise ValueError("code after module.exports")
+        return value
+    
+    def _next(self):
+        if self.index >= len(self.tokens):
+            raise ValueError("unexpected end of script")
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+    
+    def _peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else (None, None)
+    
+    @classmethod
+    def _string(cls, literal):
+        if literal[0] == '`' and '${' in literal:
+            raise ValueError("template literal interpolation")
+        out = []
+        chars = iter(literal[1:-1])
+        for char in chars:
+            if char != '\\':
+                out.append(char)
+                continue
+            escaped = next(chars, '')
+            if escaped == 'u':
+                out.append(chr(int("".join(next(chars, '') for _ in range(4)), 16)))
+            elif escaped == '\n':
+                continue
+            else:
+                out.append(cls.ESCAPES.get(escaped, escaped))
+        return "".join(out)
+    
+    def value(self):
+        kind, text = self._next()
+        if kind == 'string':
+            return self._string(text)
+        if kind == 'number':
+            number = float(text)
+            return int(number) if number.is_integer() and not re.search(r"[.eE]", text) else number
+        if kind == 'name':
+            literals = {'true': True, 'false': False, 'null': None, 'undefined': None}
+            if text in literals:
+                return literals[text]
+            raise ValueError(f"expression {text!r} needs evaluation")
+        if text == '[':
+            items = []
+            while self._peek() != ('punct', ']'):
+                items.append(self.value())
+                if self._peek() == ('punct', ','):
+                    self._next()
+                elif self._peek() != ('punct', ']'):
+                    raise ValueError("expected , or ] in array")
+            self._next()
+            return items
+        if text == '{':
+            result = {}
+            while self._peek() != ('punct', '}'):
+                key_kind, key = self._next()
+                if key_kind == 'string':
+                    key = self._string(key)
+                elif key_kind not in ('name', 'number'):
+                    raise ValueError(f"unexpected {key!r} as object key")
+                if self._next() != ('punct', ':'):
+                    raise ValueError(f"expected : after key {key!r}")
+                result[key] = self.value()
+                if self._peek() == ('punct', ','):
+                    self._next()
+                elif self._peek() != ('punct', '}'):
+                    raise ValueError("expected , or } in object")
+            self._next()
+            return result
+        raise ValueError(f"unexpected {text!r}")
+
+class TemplateExpression:
+    """Evaluate the JavaScript expressions inside Pinokio ``{{ }}`` templates.
+    
+    Supports literals, variables with member and index access, ``!``, ``-``,
+    comparison, ``&&``/``||`` (returning operands, like JS), ``+``, the
+    ternary operator and a few string/array methods. Unknown names are
+    ``undefined`` (None).
+    """
+    
+    TOKEN = re.compile(r"""\s*(?:
+        (?P<number>\d+\.?\d*)
+      | (?P<string>'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*"|`(?:\\.|[^`\\])*`)
+      | (?P<op>===|!==|==|!=|<=|>=|&&|\|\||[?:.!()\[\]<>+\-,*/%])
+      | (?P<name>[A-Za-z_$][\w$]*)
+    )""", re.VERBOSE)
+    METHODS = {
+        'includes': lambda target, item: item in target,
+        'startsWith': lambda target, prefix: target.startswith(prefix),
+        'endsWith': lambda target, suffix: target.endswith(suffix),
+        'toLowerCase': lambda target: target.lower(),
+        'toUpperCase': lambda target: target.upper(),
+        'trim': lambda target: target.strip(),
+        'join': lambda target, separator=',': separator.join(TemplateExpression.to_string(x) for x in target),
+    }
+    
+    def __init__(self, expression, scope):
+        self.scope = scope
+        self.tokens = []
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = self.TOKEN.match(expression, position)
+            if match is None or match.end() == position:
+                raise ValueError(f"cannot parse template expression {expression!r}")
+            self.tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+        self.index = 0
+    
+    @classmethod
+    def evaluate(cls, expression, scope):
+        parser = cls(expression, scope)
+        value = parser.ternary()
+        if parser.index != len(parser.tokens):
+            raise ValueError(f"unexpected {parser.tokens[parser.index][1]!r} in {expression!r}")
+        return value
+    
+    @staticmethod
+    def truthy(value):
+        return value not in (None, False, 0, "") and value == value
+    
+    @staticmethod
+    def to_string(value):
+        if value is None:
+            return ""
+        if value is True or value is False:
+            return "true" if value else "false"
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        if isinstance(value, (list, dict)):
+            return json.dumps(value)
+        return str(value)
+    
+    def _accept(self, *ops):
+        if self.index < len(self.tokens) and self.tokens[self.index][0] == 'op' and self.tokens[self.index][1] in ops:
+            self.index += 1
+            return self.tokens[self.index - 1][1]
+        return None
+    
+    def _expect(self, op):
+        if not self._accept(op):
+            raise ValueError(f"expected {op!r}")
+    
+    def ternary(self):
+        condition = self.logical_or()
+        if self._accept('?'):
+            when_true = self.ternary()
+            self._expect(':')
+            when_false = self.ternary()
+            return when_true if self.truthy(condition) else when_false
+        return condition
+    
+    def logical_or(self):
+        value = self.logical_and()
+        while self._accept('||'):
+            right = self.logical_and()
+            value = value if self.truthy(value) else right
+        return value
+    
+    def logical_and(self):
+        value = self.equality()
+        while self._accept('&&'):
+            right = self.equality()
+            value = right if self.truthy(value) else value
+        return value
+    
+    def equality(self):
+        value = self.relational()
+        while True:
+            op = self._accept('===', '!==', '==', '!=')
+            if op is None:
+                return value
+            right = self.relational()
+            value = (value == right) if op in ('===', '==') else (value != right)
+    
+    def relational(self):
+        value = self.additive()
+        while True:
+            op = self._accept('<=', '>=', '<', '>')
+            if op is None:
+                return value
+            right = self.additive()
+            try:
+                value = {'<': value < right, '>': value > right, '<=': value <= right, '>=': value >= right}[op]
+            except TypeError:
+                value = False
+    
+    def additive(self):
+        value = self.multiplicative()
+        while True:
+            op = self._accept('+', '-')
+            if op is None:
+                return value
+            right = self.multiplicative()
+            if op == '+' and (isinstance(value, str) or isinstance(right, str)):
+                value = self.to_string(value) + self.to_string(right)
+            else:
+                value = (value or 0) + (right or 0) if op == '+' else (value or 0) - (right or 0)
+    
+    def multiplicative(self):
+        value = self.unary()
+        while True:
+            op = self._accept('*', '/', '%')
+            if op is None:
+                return value
+            right = self.unary()
+            value = {'*': lambda a, b: a * b, '/': lambda a, b: a / b, '%': lambda a, b: a % b}[op](value, right)
+    
+    def unary(self):
+        if self._accept('!'):
+            return not self.truthy(self.unary())
+        if self._accept('-'):
+            return -self.unary()
+        return self.postfix()
+    
+    def postfix(self):
+        value = self.primary()
+        while True:
+            if self._accept('.'):
+                kind, name = self.tokens[self.index]
+                self.index += 1
+                if self._accept('('):
+                    args = self._arguments()
+                    method = self.METHODS.get(name)
+                    value = method(value, *args) if method and value is not None else None
+                elif name == 'length' and isinstance(value, (str, list)):
+                    value = len(value)
+                else:
+                    value = value.get(name) if isinstance(value, dict) else getattr(value, name, None)
+            elif self._accept('['):
+                key = self.ternary()
+                self._expect(']')
+                if isinstance(value, list) and isinstance(key, (int, float)):
+                    value = value[int(key)] if 0 <= int(key) < len(value) else None
+                else:
+                    value = value.get(key) if isinstance(value, dict) else None
+            elif self._accept('('):
+                args = self._arguments()
+                value = value(*args) if callable(value) else None
+            else:
+                return value
+    
+    def _arguments(self):
+        args = []
+        while not self._accept(')'):
+            args.append(self.ternary())
+            self._accept(',')
+        return args
+    
+    def primary(self):
+        if self.index >= len(self.tokens):
+            raise ValueError("unexpected end of expression")
+        kind, text = self.tokens[self.index]
+        self.index += 1
+        if kind == 'number':
+            return float(text) if '.' in text else int(text)
+        if kind == 'string':
+            return JSObjectParser._string(text)
+        if kind == 'name':
+            return {'true': True, 'false': False, 'null': None, 'undefined': None}.get(text, self.scope.get(text)) \
+                if text in ('true', 'false', 'null', 'undefined') else self.scope.get(text)
+        if text == '(':
+            value = self.ternary()
+            self._expect(')')
+            return value
+        if text == '[':
+            items = []
+            while not self._accept(']'):
+                items.append(self.ternary())
+                self._accept(',')
+            return items
+        raise ValueError(f"unexpected {text!r}")
+
+TEMPLATE = re.compile(r"\{\{(.*?)\}\}", re.DOTALL)
+
+def render_template(value, scope):
+    """Substitute ``{{ }}`` expressions in strings, recursively through lists and dicts.
+    
+    A string that is exactly one template keeps the expression's type, so
+    ``"when": "{{gpu === 'nvidia'}}"`` renders to a boolean.
+    """
+    if isinstance(value, dict):
+        return {key: render_template(item, scope) for key, item in value.items()}
+    if isinstance(value, list):
+        return [render_template(item, scope) for item in value]
+    if not isinstance(value, str) or "{{" not in value:
+        return value
+    whole = TEMPLATE.fullmatch(value.strip())
+    if whole and "}}" not in whole.group(1):
+        return TemplateExpression.evaluate(whole.group(1), scope)
+    return TEMPLATE.sub(lambda match: TemplateExpression.to_string(
+        TemplateExpression.evaluate(match.group(1), scope)), value)
+
+def detect_gpu():
+    """Pinokio's ``gpu`` variable: 'nvidia', 'amd', 'apple' or 'none'."""
+    if shutil.which("nvidia-smi") or Path("/proc/driver/nvidia").exists():
+        return "nvidia"
+    if shutil.which("rocminfo") or Path("/dev/kfd").exists():
+        return "amd"
+    if sys.platform == "darwin" and os.uname().machine == "arm64":
+        return "apple"
+    return "none"
+
+def pinokio_platform_variables():
+    """platform/arch/gpu as Pinokio (Node's process.platform/arch) names them."""
+    machine = os.uname().machine if hasattr(os, 'uname') else os.environ.get("PROCESSOR_ARCHITECTURE", "")
+    arch = {'x86_64': 'x64', 'amd64': 'x64', 'AMD64': 'x64', 'aarch64': 'arm64', 'arm64': 'arm64'}.get(machine, machine)
+    gpu = detect_gpu()
+    return {
+        'platform': 'win32' if sys.platform.startswith('win') else sys.platform,
+        'arch': arch,
+        'gpu': gpu,
+        'gpus': [] if gpu == 'none' else [gpu],
+    }
+
+class PinokioInterpreter:
+    """Run Pinokio install.json / install.js scripts natively.
+    
+    install.json is read as JSON and install.js as an exported object literal
+    (see JSObjectParser); only scripts that compute their steps in code are
+    evaluated once with Node, when it is available. Steps then run here:
+    shell.run (with ``venv`` environments cloned from the shared base),
+    fs.download/write/copy/rm/link, script.start, local.set, log and notify.
+    Downloads go through the ModelDownloader, so apps share checkpoints.
+    
+    Steps are scheduled by the paths they touch: a step waits for earlier
+    steps that share (or contain) its paths, and for barrier steps such as
+    script.start and local.set, so downloads into one folder run alongside
+    a pip install in another. Every step is memoized in the StepCache on its
+    rendered parameters and the keys of the steps it waited for, so a
+    re-install skips the steps that already completed.
+    
+    A shell.run whose ``on`` handler matches without ``kill`` lets the script
+    carry on while the command keeps running (say, a server later steps
+    talk to); the interpreter keeps its handle and stops it when the
+    top-level script finishes.
+    """
+    
+    MAX_DEPTH = 8
+    PATH_METHODS = ('shell.run', 'fs.download', 'fs.write', 'fs.copy', 'fs.rm', 'fs.link')
+    NODE_LOADER = (
+        "const m = require(process.argv[1]);"
+        "const kernel = {platform: process.platform, arch: process.arch, gpu: process.argv[2],"
+        " gpus: [process.argv[2]], which: () => null, exists: () => false};"
+        "Promise.resolve(typeof m === 'function' ? m(kernel, {}) : m)"
+        ".then(v => console.log(JSON.stringify(v)));"
+    )
+    
+    def __init__(self, app_id, app_dir, engine, environments, cache, emit, tracer=None, parallel=4,
+                 downloader=None):
+        self.app_id = app_id
+        self.app_dir = Path(app_dir)
+        self.engine = engine
+        self.environments = environments
+        self.cache = cache
+        self.emit = emit
+        self.tracer = tracer or TRACER
+        self.parallel = parallel
+        self.downloader = downloader or ModelDownloader()
+        self.variables = pinokio_platform_variables()
+        self.local = {}
+        self._local_lock = threading.Lock()
+        self.lingering = []
+        self.handlers = {
+            'shell.run': self._shell_run,
+            'fs.download': self._fs_download,
+            'fs.write': self._fs_write,
+            'fs.copy': self._fs_copy,
+            'fs.rm': self._fs_rm,
+            'fs.link': self._fs_link,
+            'script.start': self._script_start,
+            'local.set': self._local_set,
+            'log': self._log,
+            'notify': self._log,
+            'web.open': self._log,
+        }
+    
+    @staticmethod
+    def find_script(app_dir, app_data=None):
+        """The install script for an app, preferring the catalog's installer type."""
+        names = ["install.json", "install.js"]
+        if (app_data or {}).get('installer_type') == 'js':
+            names.reverse()
+        for name in names:
+            if (Path(app_dir) / name).is_file():
+                return name
+        return None
+    
+    def load(self, script_path):
+        """Read a script into its ``run`` step list."""
+        script_path = Path(script_path)
+        source = script_path.read_text(encoding='utf-8')
+        if script_path.suffix == '.json':
+            document = json.loads(source)
+        else:
+            try:
+                document = JSObjectParser.parse_module(source)
+            except ValueError as e:
+                document = self._load_with_node(script_path, e)
+        if isinstance(document, list):
+            document = {'run': document}
+        if not isinstance(document, dict) or not isinstance(document.get('run'), list):
+            raise ValueError(f"{script_path.name} has no run steps")
+        return document['run']
+    
+    def _load_with_node(self, script_path, reason):
+        node = shutil.which("node")
+        if node is None:
+            raise ValueError(f"{script_path.name} needs evaluating ({reason}) and Node is not installed")
+        self.emit(f"🟩 {script_path.name} computes its steps ({reason}); evaluating it once with Node")
+        output = self.engine.output([node, "-e", self.NODE_LOADER, str(script_path.absolute()),
+                                     self.variables['gpu']], cwd=str(script_path.parent))
+        if not output:
+            raise ValueError(f"Node could not evaluate {script_path.name}")
+        return json.loads(output.splitlines()[-1])
+    
+    # ---- scheduling ----------------------------------------------------------------
+    
+    def run_script(self, name, args=None, depth=0, inherited=()):
+        """Run a script (path relative to the app directory); raises on the first failed step.
+        
+        ``inherited`` are memo keys every step also depends on (those of the
+        calling script.start step). Returns a digest of the steps' memo keys.
+        """
+        if depth > self.MAX_DEPTH:
+            raise RuntimeError(f"script.start nested deeper than {self.MAX_DEPTH} levels")
+        script_path = self.app_dir / name
+        steps = self.load(script_path)
+        scope = self._scope(script_path.parent, args)
+        self.emit(f"📜 Running {name}: {len(steps)} steps")
+        deps = self._dependencies(steps, scope, script_path.parent)
+        parent_span = self.tracer.current()
+        
+        keys = {}
+        errors = []
+        pending = list(range(len(steps)))
+        running = {}
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.parallel,
+                                                       thread_name_prefix="sd-pinokio") as pool:
+                while pending or running:
+                    if not errors:
+                        for index in list(pending):
+                            if all(dep in keys for dep in deps[index]):
+                                pending.remove(index)
+                                running[pool.submit(
+                                    self._run_step, name, index, steps[index], script_path.parent, args,
+                                    list(inherited) + [keys[dep] for dep in deps[index]], depth, parent_span
+                                )] = index
+                    if not running:
+                        break
+                    done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        index = running.pop(future)
+                        try:
+                            keys[index] = future.result()
+                        except Exception as e:
+                            errors.append(f"{name} step {index + 1} ({steps[index].get('method')}): {e}")
+        finally:
+            if depth == 0:
+                self.stop_lingering()
+        if errors:
+            raise RuntimeError(errors[0])
+        if pending:
+            raise RuntimeError(f"{name}: steps {', '.join(str(i + 1) for i in pending)} never became runnable")
+        return hashlib.sha256(json.dumps([keys[index] for index in sorted(keys)]).encode()).hexdigest()
+    
+    def stop_lingering(self):
+        """Stop commands that ``on`` handlers left running; returns how many were still alive."""
+        with self._local_lock:
+            handles, self.lingering = self.lingering, []
+        alive = [handle for handle in handles if not handle.done()]
+        for handle in alive:
+            self.emit(f"🛑 Stopping command left running by an on handler (pid {handle.pid})")
+            handle.cancel()
+        for handle in alive:
+            try:
+                handle.wait(10)
+            except concurrent.futures.TimeoutError:
+                pass
+        return len(alive)
+    
+    def _scope(self, script_dir, args):
+        with self._local_lock:
+            local = dict(self.local)
+        return {**self.variables, 'args': args or {}, 'local': local, 'env': dict(os.environ),
+                'cwd': str(Path(script_dir).absolute()), 'self': {}}
+    
+    def _paths(self, step, scope, script_dir):
+        """App-relative paths a step touches, or None if it must run alone."""
+        method = step.get('method')
+        if method not in self.PATH_METHODS:
+            return None
+        try:
+            params = render_template(step.get('params') or {}, scope)
+        except Exception:
+            return None
+        if method == 'shell.run':
+            cwd = params.get('path') or '.'
+            paths = [cwd] + ([os.path.join(cwd, params['venv'])] if params.get('venv') else [])
+        elif method == 'fs.download':
+            target = params.get('path') or params.get('file')
+            paths = [os.path.dirname(target) if target else (params.get('dir') or '.')]
+        elif method == 'fs.link' and params.get('venv'):
+            paths = [params['venv']]
+        else:
+            paths = [params[key] for key in ('path', 'src', 'dest') if isinstance(params.get(key), str)]
+        if not paths:
+            return None
+        base = Path(script_dir).absolute()
+        app = self.app_dir.absolute()
+        normalized = set()
+        for path in paths:
+            absolute = Path(os.path.normpath(base / str(path)))
+            try:
+                normalized.add(absolute.relative_to(app).as_posix())
+            except ValueError:
+                return None
+        return normalized
+    
+    @staticmethod
+    def _overlap(first, second):
+        for a in first:
+            for b in second:
+                if a == b or a == '.' or b == '.' or a.startswith(b + '/') or b.startswith(a + '/'):
+                    return True
+        return False
+    
+    def _dependencies(self, steps, scope, script_dir):
+        """For each step, the earlier steps it has to wait for."""
+        paths = [self._paths(step, scope, script_dir) for step in steps]
+        deps = []
+        for index in range(len(steps)):
+            mine = paths[index]
+            deps.append([
+                earlier for earlier in range(index)
+                if mine is None or paths[earlier] is None or self._overlap(mine, paths[earlier])
+            ])
+        return deps
+    
+    def _run_step(self, name, index, step, script_dir, args, dep_keys, depth, parent_span):
+        """Run (or skip) one step; returns its memo key.
+        
+        The memo key covers the step's inputs and the run that produced its
+        outputs, so steps depending on one that actually ran again (say, a
+        venv recreated after being deleted) miss the cache and rerun too.
+        """
+        method = step.get('method')
+        with self.tracer.use(parent_span), \
+                self.tracer.span("script step", script=name, index=index + 1, method=method) as span:
+            scope = self._scope(script_dir, args)
+            if 'when' in step and not TemplateExpression.truthy(render_template(step['when'], scope)):
+                span.set(skipped=True)
+                return hashlib.sha256(f"{name}#{index}:skipped:{dep_keys}".encode()).hexdigest()
+            
+            params = render_template(step.get('params') or {}, scope)
+            payload = json.dumps([name, index, method, params, dep_keys], sort_keys=True, default=str)
+            key = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+            cache_name = f"script:{name}#{index + 1}"
+            # script.start always recurses: the nested script memoizes its own steps
+            cached = self.cache.get(self.app_id, cache_name) if method != 'script.start' else None
+            if cached and cached.get('key') == key and self._still_valid(method, cached.get('outputs') or {}):
+                self.emit(f"♻️ {name} step {index + 1} ({method}): already done")
+                span.set(cached=True)
+                return hashlib.sha256(f"{key}:{cached.get('run', '')}".encode()).hexdigest()
+            
+            handler = self.handlers.get(method)
+            if handler is None:
+                raise RuntimeError(f"unsupported method {method!r}")
+            self.emit(f"▶️ {name} step {index + 1}: {method}")
+            if method == 'script.start':
+                # The nested steps depend on what this step depends on; its key on theirs
+                outputs = self._script_start(params, Path(script_dir), depth, inherited=dep_keys)
+                return hashlib.sha256(f"{key}:{outputs['steps']}".encode()).hexdigest()
+            outputs = handler(params, Path(script_dir), depth) or {}
+            run = uuid.uuid4().hex
+            self.cache.put(self.app_id, cache_name, key, outputs, run=run)
+            return hashlib.sha256(f"{key}:{run}".encode()).hexdigest()
+    
+    @staticmethod
+    def _still_valid(method, outputs):
+        """Cached outputs that name files must still exist."""
+        return all(Path(path).exists() for path in outputs.get('files', []))
+    
+    # ---- methods -------------------------------------------------------------------
+    
+    def _shell_run(self, params, script_dir, depth):
+        if params.get('sudo'):
+            raise RuntimeError("shell.run with sudo is not supported in the notebook")
+        cwd = (script_dir / str(params.get('path') or '.')).absolute()
+        cwd.mkdir(parents=True, exist_ok=True)
+        env = {**os.environ, **{key: TemplateExpression.to_string(value)
+                                 for key, value in (params.get('env') or {}).items()}}
+        files = []
+        if params.get('venv'):
+            venv_dir = cwd / str(params['venv'])
+            python = self.environments.create_at(
+                venv_dir, run=lambda cmd, cwd=None: self.engine.run(cmd, cwd=cwd, on_line=self._emit_line),
+                emit=self.emit
+            )
+            if python is None:
+                raise RuntimeError(f"could not create venv {params['venv']}")
+            env['VIRTUAL_ENV'] = str(venv_dir)
+            env['PATH'] = str(Path(python).parent) + os.pathsep + env.get('PATH', '')
+            env.pop('PYTHONHOME', None)
+            files.append(python)
+        if params.get('conda'):
+            self.emit("⚠️ conda settings are ignored; commands run in the venv/kernel environment")
+        
+        messages = params.get('message') or []
+        if isinstance(messages, str):
+            messages = [messages]
+        commands = [TemplateExpression.to_string(message) for message in messages if message]
+        if not shutil.which("uv", path=env.get('PATH')):
+            # Pinokio ships uv; without it, the venv's own pip does the same job
+            commands = [re.sub(r"\buv pip\b", "python -m pip", command) for command in commands]
+        if not commands:
+            return {'files': files}
+        
+        script = "set -e\n" + "\n".join(commands)
+        handlers = [handler for handler in params.get('on') or [] if isinstance(handler, dict)]
+        if handlers:
+            self._run_until(script, cwd, env, handlers)
+        else:
+            return_code = self.engine.run(["bash", "-c", script], cwd=str(cwd), env=env, on_line=self._emit_line)
+            if return_code != 0:
+                raise RuntimeError(f"command exited with {return_code}")
+        return {'files': files}
+    
+    def _run_until(self, script, cwd, env, handlers):
+        """Run with Pinokio ``on`` handlers: an event regex with done/kill ends the wait.
+        
+        With ``kill`` the command is stopped; otherwise it keeps running and
+        its handle goes to ``lingering`` for stop_lingering.
+        """
+        patterns = []
+        for handler in handlers:
+            event = str(handler.get('event') or '')
+            if event.startswith('/') and event.rfind('/') > 0:
+                event = event[1:event.rfind('/')]
+            patterns.append((re.compile(event), handler))
+        matched = threading.Event()
+        outcome = {}
+        
+        def on_line(stream, line):
+            self._emit_line(stream, line)
+            for pattern, handler in patterns:
+                if not matched.is_set() and pattern.search(line):
+                    outcome['handler'] = handler
+                    matched.set()
+        
+        handle = self.engine.submit(["bash", "-c", script], cwd=str(cwd), env=env, on_line=on_line,
+                                    merge_stderr=True)
+        while not matched.wait(0.2) and not handle.done():
+            pass
+        if matched.is_set():
+            if outcome['handler'].get('kill'):
+                handle.cancel()
+            elif not handle.done():
+                with self._local_lock:
+                    self.lingering.append(handle)
+            return
+        if handle.wait().return_code != 0:
+            raise RuntimeError(f"command exited with {handle.returncode}")
+    
+    def _emit_line(self, stream, line):
+        self.emit(line)
+    
+    def _fs_download(self, params, script_dir, depth):
+        uris = params.get('uri') or params.get('url')
+        if isinstance(uris, str):
+            uris = [uris]
+        if not uris:
+            raise RuntimeError("fs.download needs a uri")
+        target = params.get('path') or params.get('file')
+        files = []
+        for uri in uris:
+            if target and len(uris) == 1:
+                dest = script_dir / str(target)
+            else:
+                name = urllib.parse.unquote(Path(urllib.parse.urlparse(uri).path).name) or "download"
+                dest = script_dir / str(params.get('dir') or '.') / name
+            self.downloader.download(uri, dest, sha256=params.get('sha256'), emit=self.emit)
+            files.append(str(dest.absolute()))
+        return {'files': files}
+    
+    def _fs_write(self, params, script_dir, depth):
+        dest = script_dir / str(params['path'])
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if 'json' in params:
+            dest.write_text(json.dumps(params['json'], indent=2))
+        else:
+            dest.write_text(TemplateExpression.to_string(params.get('text', '')))
+        return {'files': [str(dest.absolute())]}
+    
+    def _fs_copy(self, params, script_dir, depth):
+        src, dest = script_dir / str(params['src']), script_dir / str(params['dest'])
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if src.is_dir():
+            shutil.copytree(src, dest, dirs_exist_ok=True)
+        else:
+            shutil.copy2(src, dest)
+        return {'files': [str(dest.absolute())]}
+    
+    def _fs_rm(self, params, script_dir, depth):
+        target = script_dir / str(params['path'])
+        if target.is_dir() and not target.is_symlink():
+            shutil.rmtree(target)
+        elif target.exists() or target.is_symlink():
+            target.unlink()
+        return {}
+    
+    def _fs_link(self, params, script_dir, depth):
+        if params.get('venv'):
+            # Pinokio dedupes venv packages through a drive; the wheel cache hard-links them already
+            self.emit(f"🔗 fs.link venv {params['venv']}: packages are already shared through the wheel cache")
+            return {}
+        if params.get('src') and params.get('dest'):
+            src, dest = (script_dir / str(params['src'])).absolute(), script_dir / str(params['dest'])
+            src.mkdir(parents=True, exist_ok=True)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if dest.is_symlink():
+                dest.unlink()
+            elif dest.is_dir() and not any(dest.iterdir()):
+                dest.rmdir()
+            if not dest.exists():
+                os.symlink(src, dest, target_is_directory=True)
+            return {'files': [str(dest.absolute())]}
+        self.emit("⚠️ fs.link virtual drives are not supported; skipping")
+        return {}
+    
+    def _script_start(self, params, script_dir, depth, inherited=()):
+        uri = str(params.get('uri') or '')
+        target = (script_dir / uri).absolute()
+        try:
+            relative = target.relative_to(self.app_dir.absolute()).as_posix()
+        except ValueError:
+            raise RuntimeError(f"script.start outside the app is not supported: {uri}")
+        return {'steps': self.run_script(relative, args=params.get('params') or {}, depth=depth + 1,
+                                         inherited=inherited)}
+    
+    def _local_set(self, params, script_dir, depth):
+        with self._local_lock:
+            self.local.update(params)
+        return {}
+    
+    def _log(self, params, script_dir, depth):
+        text = params.get('text') or params.get('html') or params.get('raw') or params.get('uri') or params
+        self.emit(f"📝 {re.sub(r'<[^>]+>', '', TemplateExpression.to_string(text))}")
+        return {}
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           INSTALLATION MANAGER                                ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class InstallJob:
+    """State machine and private output channel for one app install."""
+    
+    STATES = ('queued', 'cloning', 'installing', 'done', 'failed')
+    STATE_ICONS = {
+        'queued': '⏳',
+        'cloning': '📥',
+        'installing': '📦',
+        'done': '✅',
+        'failed': '❌',
+    }
+    MAX_LINES = 2000
+    
+    def __init__(self, app_id, app_data, channel=None):
+        self.app_id = app_id
+        self.app_data = app_data
+        self.name = app_data.get('name', app_id)
+        self.state = 'queued'
+        self.error = None
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.lines = collections.deque(maxlen=self.MAX_LINES)
+        self.channel = channel or widgets.Output(
+            layout=widgets.Layout(max_height='200px', overflow='auto')
+        )
+        self.status_label = widgets.HTML(value=self.status_html())
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+        self._widget = None
+    
+    def emit(self, text=""):
+        """Append a line to this job's output channel."""
+        with self._lock:
+            self.lines.append(text)
+        self.channel.append_stdout(text + "\n")
+    
+    def set_state(self, state, error=None):
+        """Move the job to a new state and refresh its status label."""
+        if state not in self.STATES:
+            raise ValueError(f"Unknown install state: {state}")
+        self.state = state
+        if state != 'queued' and self.started_at is None:
+            self.started_at = time.time()
+        if state in ('done', 'failed'):
+            self.error = error
+            self.finished_at = time.time()
+            self.finished.set()
+        self.status_label.value = self.status_html()
+    
+    @property
+    def duration(self):
+        """Seconds spent running (so far, if still active)."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+    
+    def status_html(self):
+        icon = self.STATE_ICONS[self.state]
+        detail = f" — {self.error}" if self.error else ""
+        return f"<b>{icon} {self.name}</b> <code>{self.state}</code> ({self.duration:.0f}s){detail}"
+    
+    def widget(self):
+        """Status line plus output channel for display in the UI."""
+        if self._widget is None:
+            self._widget = widgets.VBox([self.status_label, self.channel])
+        return self._widget
+
+class InstallationManager:
+    """Handle real app installation with actual SD-Pinnokio code."""
+    
+    # Installs run as an InstallGraph. Network-bound steps (fetch, wheels) and
+    # CPU/disk-bound steps (environment, link) are throttled separately; the
+    # executor is sized so both kinds can run at once. Each app installs into
+    # its own environment, so pip runs can proceed side by side.
+    DEFAULT_NETWORK_SLOTS = 4
+    DEFAULT_CPU_SLOTS = max(1, (os.cpu_count() or 2) // 2)
+    
+    # How long an install that does not fit yet waits for disk to free up
+    ADMISSION_WAIT = 600
+    
+    def __init__(self, output_widget, max_workers=None, network_slots=None, cpu_slots=None,
+                 environments=None, tracer=None, admission=None):
+        self.output_widget = output_widget
+        self.tracer = tracer or TRACER
+        self.components_available = False
+        self._shell_runner = None
+        self._installer = None
+        # Set when background setup has finished; installs wait for it
+        self.ready = threading.Event()
+        self.ready.set()
+        self.engine = command_engine()
+        self.clone_strategy = GitCloneStrategy()
+        self.wheel_cache = WheelCache()
+        self.environments = environments or AppEnvironments(wheel_cache=self.wheel_cache)
+        self.jobs = {}
+        network_slots = network_slots or self.DEFAULT_NETWORK_SLOTS
+        cpu_slots = cpu_slots or self.DEFAULT_CPU_SLOTS
+        # Slotted steps plus room for the quick unslotted ones (resolve, hooks)
+        self.max_workers = max_workers or network_slots + cpu_slots + 2
+        self.network_slots = threading.BoundedSemaphore(network_slots)
+        self.cpu_slots = threading.BoundedSemaphore(cpu_slots)
+        self.step_cache = StepCache()
+        # Checkpoints are stored once and hard-linked into every app that downloads them
+        self.downloader = ModelDownloader()
+        # Called as hook(job, context) after an app's requirements are linked;
+        # re-run only when the source revision or requirements change
+        self.post_install_hooks = []
+        # Optional AdmissionController; installs that would run out of disk are held or refused
+        self.admission = admission
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        
+    def setup_sd_pinnokio_components(self):
+        """Setup SD-Pinnokio components (imported on first use)."""
+        self.components_available = all(
+            module_available(name) for name in EnvironmentSetup.REQUIRED_MODULES
+        )
+        if self.components_available:
+            print("✅ SD-Pinnokio components available!")
+        else:
+            print("❌ Failed to initialize SD-Pinnokio components: modules not found")
+        return self.components_available
+    
+    @property
+    def shell_runner(self):
+        if self._shell_runner is None and self.components_available:
+            try:
+                self._shell_runner = lazy_import("environment_management.shell_runner", "ShellRunner")()
+            except Exception as e:
+                print(f"❌ Failed to initialize ShellRunner: {e}")
+        return self._shell_runner
+    
+    @shell_runner.setter
+    def shell_runner(self, value):
+        self._shell_runner = value
+    
+    @property
+    def installer(self):
+        if self._installer is None and self.components_available:
+            try:
+                self._installer = lazy_import("engine.installer", "ApplicationInstaller")()
+            except Exception as e:
+                print(f"❌ Failed to initialize ApplicationInstaller: {e}")
+        return self._installer
+    
+    @installer.setter
+    def installer(self, value):
+        self._installer = value
+    
+    def install_app(self, app_id, app_data):
+        """Install an app using real SD-Pinnokio code (blocking, shared output)."""
+        job = InstallJob(app_id, app_data, channel=self.output_widget)
+        return self.run_install_job(job)
+    
+    def install_batch(self, app_ids, apps_data):
+        """Queue several apps as one install graph and return their jobs immediately."""
+        batch = {}
+        queued = []
+        for app_id in app_ids:
+            active = self.jobs.get(app_id)
+            if active and not active.finished.is_set():
+                batch[app_id] = active
+                continue
+            app_data = apps_data.get(app_id)
+            job = InstallJob(app_id, app_data if isinstance(app_data, dict) else {})
+            if not isinstance(app_data, dict):
+                job.set_state('failed', error="unknown app id")
+            else:
+                queued.append(job)
+            self.jobs[app_id] = batch[app_id] = job
+        if queued:
+            threading.Thread(target=self.run_jobs, args=(queued,), daemon=True,
+                             name="sd-install-graph").start()
+        return batch
+    
+    def wait_for_batch(self, jobs, timeout=None):
+        """Block until every job in the batch has finished; returns True if all succeeded."""
+        deadline = None if timeout is None else time.time() + timeout
+        for job in jobs.values():
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            if not job.finished.wait(remaining):
+                return False
+        return all(job.state == 'done' for job in jobs.values())
+    
+    def run_install_job(self, job):
+        """Install one app (blocking); True on success."""
+        return self.run_jobs([job])
+    
+    def run_jobs(self, jobs):
+        """Install jobs as one graph (blocking); True if every job succeeded."""
+        for job in jobs:
+            job.emit(f"\n🚀 INSTALLING: {job.name}")
+            job.emit("=" * 60)
+        
+        setup_wait = None
+        if not self.ready.is_set():
+            for job in jobs:
+                job.emit("⏳ Waiting for background setup to finish...")
+            waited = time.time()
+            self.ready.wait()
+            setup_wait = (waited, time.time())
+        
+        if not self.installer:
+            for job in jobs:
+                job.emit("❌ Installer not initialized")
+                job.set_state('failed', error="installer not initialized")
+            return False
+        
+        if self.admission is None:
+            return self.run_graph(jobs, setup_wait)
+        
+        # Jobs that fit run as one graph; the rest follow as earlier rounds free disk
+        ok = True
+        pending = list(jobs)
+        queued = set()
+        while pending:
+            admitted, pending = self.admit_jobs(pending)
+            if not admitted and pending:
+                # Nothing left in this batch can start until other work frees disk
+                job = pending.pop(0)
+                ticket = self.admission.admit(job.app_id, job.app_data, 'install', wait=self.ADMISSION_WAIT,
+                                              on_wait=lambda reason: job.emit(f"⏳ Waiting for disk space: {reason}"))
+                if not ticket.admitted:
+                    self.refuse_job(job, ticket)
+                    continue
+                admitted = [(job, ticket)]
+            if not admitted:
+                continue
+            for job in pending:
+                if job.app_id not in queued:
+                    queued.add(job.app_id)
+                    job.emit("⏳ Queued until the installs ahead of it free disk space")
+            try:
+                ok = self.run_graph([job for job, ticket in admitted], setup_wait) and ok
+            finally:
+                for job, ticket in admitted:
+                    if job.state == 'done':
+                        self.record_disk_usage(job)
+                    ticket.release()
+        return ok and all(job.state == 'done' for job in jobs)
+    
+    def admit_jobs(self, jobs):
+        """([(job, ticket)] admitted now, [jobs] that may fit later); refused jobs fail."""
+        admitted, deferred = [], []
+        for job in jobs:
+            ticket = self.admission.admit(job.app_id, job.app_data, 'install')
+            if ticket.admitted:
+                admitted.append((job, ticket))
+            elif ticket.fits_later:
+                deferred.append(job)
+            else:
+                self.refuse_job(job, ticket)
+        return admitted, deferred
+    
+    def refuse_job(self, job, ticket):
+        job.emit(f"❌ Not installing {job.name}: {ticket.reason}")
+        job.set_state('failed', error=ticket.reason)
+    
+    def record_disk_usage(self, job):
+        """Store the app's measured footprint (source plus environment) for later estimates."""
+        disk_bytes = directory_bytes(Path("apps") / job.app_id)
+        if self.environments.exists(job.app_id):
+            disk_bytes += directory_bytes(self.environments.env_dir(job.app_id))
+        self.admission.history.observe(job.app_id, replace=True, disk_bytes=disk_bytes)
+    
+    def run_graph(self, jobs, setup_wait=None):
+        """Install jobs through one graph; True if every job succeeded."""
+        try:
+            graph = self.build_graph(jobs)
+            graph.setup_wait = setup_wait
+            return graph.run()
+        except Exception as e:
+            import traceback
+            for job in jobs:
+                if not job.finished.is_set():
+                    job.emit(f"❌ Installation failed with exception: {e}")
+                    job.emit(traceback.format_exc())
+                    job.set_state('failed', error=str(e))
+            return False
+    
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="sd-install"
+                )
+            return self._executor
+    
+    def build_graph(self, jobs):
+        """One InstallGraph holding the steps of every job."""
+        graph = InstallGraph(
+            self._get_executor(),
+            {'network': self.network_slots, 'cpu': self.cpu_slots},
+            cache=self.step_cache,
+            tracer=self.tracer
+        )
+        for job in jobs:
+            graph.add_job(job, self.install_steps(job))
+        return graph
+    
+    def install_steps(self, job):
+        """Steps for one app: fetch → resolve → wheels → link → hooks, with the
+        environment prepared alongside the fetch.
+        
+        Wheels are built with the kernel's interpreter, which app environments
+        are cloned from, so they do not wait for the environment. Linking has
+        no step cache of its own: the requirement fingerprints decide whether
+        pip needs to run.
+        """
+        app_dir = Path("apps") / job.app_id
+        if job.app_data.get('has_install_json') or job.app_data.get('has_install_js'):
+            # The script schedules and memoizes its own steps, so it is one graph step
+            return [
+                InstallStep(job.app_id, 'fetch', lambda context: self.fetch_source(job, app_dir),
+                            slot='network', phase='cloning'),
+                InstallStep(job.app_id, 'script', lambda context: self.run_install_script(job, app_dir),
+                            deps=['fetch']),
+                InstallStep(job.app_id, 'hooks', lambda context: self.run_post_install_hooks(job, context),
+                            deps=['script'],
+                            cache_key=lambda context: (f"{context.get('head')}:{context.get('script')}:"
+                                                       f"{len(self.post_install_hooks)}")),
+            ]
+        return [
+            InstallStep(job.app_id, 'fetch', lambda context: self.fetch_source(job, app_dir),
+                        slot='network', phase='cloning'),
+            InstallStep(job.app_id, 'environment', lambda context: self.prepare_environment(job),
+                        slot='cpu',
+                        cache_key=lambda context: self.environments.base_signature(),
+                        is_valid=lambda context, outputs: Path(outputs['python']).exists()),
+            InstallStep(job.app_id, 'resolve', lambda context: self.resolve_requirements(job, app_dir),
+                        deps=['fetch'],
+                        cache_key=lambda context: context.get('head'),
+                        is_valid=lambda context, outputs: (outputs['req_file'] is None
+                                                           or Path(outputs['req_file']).exists())),
+            InstallStep(job.app_id, 'wheels', lambda context: self.build_wheels(job, context),
+                        deps=['resolve'], slot='network',
+                        cache_key=lambda context: context.get('wheel_key'),
+                        is_valid=lambda context, outputs: (Path(outputs['wheelhouse']) / ".complete").exists()),
+            InstallStep(job.app_id, 'link', lambda context: self.link_environment(job, app_dir, context),
+                        deps=['wheels', 'environment'], slot='cpu'),
+            InstallStep(job.app_id, 'hooks', lambda context: self.run_post_install_hooks(job, context),
+                        deps=['link'],
+                        cache_key=lambda context: (f"{context.get('head')}:{context.get('requirements')}:"
+                                                   f"{len(self.post_install_hooks)}")),
+        ]
+    
+    # ---- steps ---------------------------------------------------------------------
+    
+    def fetch_source(self, job, app_dir):
+        """Clone or update the app repository; outputs the checked-out revision."""
+        repo_url = job.app_data.get('clone_url') or job.app_data.get('repo_url')
+        if not repo_url:
+            job.emit("❌ No repository URL available")
+            raise ValueError("no repository URL")
+        app_dir.parent.mkdir(exist_ok=True)
+        if not self.clone_repository(job, repo_url, app_dir):
+            raise RuntimeError("git clone failed")
+        span = self.tracer.current()
+        if span is not None:
+            span.set(repo_url=repo_url, bytes=directory_bytes(app_dir))
+        return {'head': self.engine.output(["git", "rev-parse", "HEAD"], cwd=str(app_dir)) or None}
+    
+    def prepare_environment(self, job):
+        """Create (or reuse) the app's own environment; outputs its interpreter."""
+        python = self.environments.ensure(
+            job.app_id,
+            run=lambda cmd, cwd=None: self.run_streamed(job, cmd, cwd=cwd),
+            emit=job.emit
+        )
+        if python is None:
+            raise RuntimeError("environment creation failed")
+        return {'python': python}
+    
+    def resolve_requirements(self, job, app_dir):
+        """Pick the requirements file and compute its wheel set key."""
+        req_file = self.find_requirements(app_dir)
+        if req_file is None:
+            job.emit("⚠️ No requirements file found, app may be ready to run")
+            return {'req_file': None, 'requirements': None, 'wheel_key': None}
+        
+        job.emit(f"\n📦 Requirements from: {req_file.name}")
+        try:
+            req_content = req_file.read_text()
+            job.emit("REQUIREMENTS CONTENT:")
+            job.emit(req_content[:300] + "..." if len(req_content) > 300 else req_content)
+        except Exception as e:
+            job.emit(f"⚠️ Could not read requirements: {e}")
+        
+        wheel_key, _ = self.wheel_cache.lookup(req_file)
+        return {
+            'req_file': str(req_file.resolve()),
+            'requirements': RequirementFingerprints.requirements_hash(req_file),
+            'wheel_key': wheel_key,
+        }
+    
+    def build_wheels(self, job, context):
+        """Download and build the requirement set into the shared wheel cache."""
+        if context.get('wheel_key') is None:
+            # Nothing cacheable to prebuild; the link step falls back to plain pip
+            return {'wheelhouse': None}
+        key, set_dir = self.wheel_cache.ensure_wheelhouse(
+            context['req_file'],
+            run=lambda cmd, cwd=None: self.run_streamed(job, cmd, cwd=cwd),
+            emit=job.emit
+        )
+        if set_dir is None:
+            raise RuntimeError("wheel build failed")
+        return {'wheelhouse': str(set_dir)}
+    
+    def link_environment(self, job, app_dir, context):
+        """Install the requirements into the app environment from the wheelhouse."""
+        if context.get('req_file') is None:
+            return {}
+        job.emit("PIP INSTALL OUTPUT:")
+        installed = RequirementFingerprints.for_interpreter(context['python']).install(
+            context['req_file'],
+            self.wheel_cache,
+            run=lambda cmd, cwd=None: self.run_streamed(job, cmd, cwd=cwd),
+            emit=job.emit,
+            python=context['python'],
+            cwd=str(app_dir)
+        )
+        if not installed:
+            job.emit("❌ Requirements installation failed")
+            raise RuntimeError("requirements install failed")
+        job.emit("✅ Requirements installed successfully!")
+        return {}
+    
+    def run_install_script(self, job, app_dir):
+        """Run the app's Pinokio install script; apps without one use the requirements steps."""
+        script = PinokioInterpreter.find_script(app_dir, job.app_data)
+        if script is None:
+            job.emit("⚠️ Catalog lists an install script but the repository has none; using requirements")
+            context = {**self.prepare_environment(job), **self.resolve_requirements(job, app_dir)}
+            context.update(self.build_wheels(job, context))
+            self.link_environment(job, app_dir, context)
+            return {'script': None}
+        
+        interpreter = PinokioInterpreter(job.app_id, app_dir, self.engine, self.environments,
+                                         self.step_cache, emit=job.emit, tracer=self.tracer,
+                                         downloader=self.downloader)
+        interpreter.run_script(script)
+        job.emit(f"✅ {script} finished")
+        return {'script': script}
+    
+    def run_post_install_hooks(self, job, context):
+        """Run the registered post-install hooks in order."""
+        for hook in self.post_install_hooks:
+            name = getattr(hook, '__name__', repr(hook))
+            job.emit(f"🪝 Post-install hook: {name}")
+            if hook(job, context) is False:
+                raise RuntimeError(f"post-install hook {name} failed")
+        return {}
+    
+    # ---- helpers -------------------------------------------------------------------
+    
+    def run_streamed(self, job, cmd, cwd=None):
+        """Run a command, streaming combined stdout/stderr lines into the job channel."""
+        argv = cmd if isinstance(cmd, str) else " ".join(str(part) for part in cmd)
+        with self.tracer.span("command", argv=argv[:200]) as span:
+            output = {'lines': 0, 'bytes': 0}
+            
+            def on_line(stream, line):
+                output['lines'] += 1
+                output['bytes'] += len(line) + 1
+                job.emit(line)
+            
+            return_code = self.engine.run(cmd, cwd=cwd, on_line=on_line)
+            span.set(exit_code=return_code, output_lines=output['lines'], output_bytes=output['bytes'])
+            if return_code != 0:
+                span.fail(f"exit code {return_code}")
+            return return_code
+    
+    def clone_repository(self, job, repo_url, app_dir):
+        """Clone (or update) the app repository into app_dir."""
+        job.emit(f"📥 Cloning repository: {repo_url}")
+        job.emit("GIT CLONE OUTPUT:")
+        ok = self.clone_strategy.checkout(
+            repo_url, app_dir,
+            run=lambda cmd, cwd=None: self.run_streamed(job, cmd, cwd=cwd),
+            emit=job.emit
+        )
+        
+        if not ok:
+            job.emit("❌ Git clone failed")
+            return False
+        
+        job.emit("✅ Repository cloned successfully!")
+        return True
+    
+    @staticmethod
+    def find_requirements(app_dir):
+        """The first requirements file present in app_dir, or None."""
+        for name in ("requirements.txt", "requirements.pip", "deps.txt"):
+            req_file = Path(app_dir) / name
+            if req_file.exists():
+                return req_file
+        return None
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           APP LOGS                                            ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class AppLog:
+    """Bounded log for one app process: ring buffer, rotating file and throttled view.
+    
+    Lines are numbered from 0 for the life of the log. The newest ``max_lines``
+    stay in memory; every line also goes to ``<log_dir>/<app_id>.log``, which
+    rotates to ``.1`` .. ``.N`` once it passes ``max_file_bytes``. Opening a
+    log shifts the previous run's file to ``.1`` the same way, so the output
+    of a run that crashed survives the restart. The view
+    widget only ever holds the last ``view_lines`` lines and is re-rendered
+    by the flusher, so the notebook's output state does not grow with the run.
+    """
+    
+    def __init__(self, app_id, log_dir, max_lines=5000, view_lines=200,
+                 max_file_bytes=10 * 1024 * 1024, backups=3):
+        self.app_id = app_id
+        self.lines = collections.deque(maxlen=max_lines)
+        self.view_lines = view_lines
+        self.max_file_bytes = max_file_bytes
+        self.backups = backups
+        self.total_lines = 0
+        self.path = Path(log_dir) / f"{app_id}.log"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            if backups and self.path.stat().st_size:
+                self._shift_backups()
+            else:
+                self.path.unlink()
+        self._file = open(self.path, "a", encoding="utf-8", buffering=64 * 1024)
+        self._file_bytes = 0
+        # First line number held by the live file, then by .1, .2, ...
+        self._file_starts = [0]
+        self._dirty = False
+        self._closed = False
+        self._lock = threading.Lock()
+        self.view = widgets.Output(layout=widgets.Layout(max_height='300px', overflow='auto'))
+    
+    def _backup(self, index):
+        return self.path.with_name(f"{self.path.name}.{index}")
+    
+    @property
+    def first_line(self):
+        """Number of the oldest line still held in memory."""
+        return self.total_lines - len(self.lines)
+    
+    def write(self, line):
+        """Record one output line (safe to call from the engine thread)."""
+        with self._lock:
+            self.lines.append(line)
+            self.total_lines += 1
+            self._dirty = True
+            if self._closed:
+                return
+            data = line + "\n"
+            self._file.write(data)
+            self._file_bytes += len(data.encode("utf-8", "replace"))
+            if self._file_bytes >= self.max_file_bytes:
+                self._rotate()
+    
+    def _shift_backups(self):
+        """Move the live file to .1, .1 to .2 and so on; the oldest backup is dropped."""
+        for index in range(self.backups, 0, -1):
+            source = self.path if index == 1 else self._backup(index - 1)
+            if source.exists():
+                os.replace(source, self._backup(index))
+    
+    def _rotate(self):
+        self._file.close()
+        self._shift_backups()
+        self._file = open(self.path, "a", encoding="utf-8", buffering=64 * 1024)
+        self._file_bytes = 0
+        self._file_starts = ([self.total_lines] + self._file_starts)[:self.backups + 1]
+    
+    def tail(self, count=50):
+        """The newest ``count`` lines held in memory."""
+        with self._lock:
+            return list(self.lines)[-count:] if count else []
+    
+    def seek(self, line_number, count=100):
+        """Up to ``count`` lines starting at ``line_number``.
+        
+        Served from memory when possible, otherwise from the log files on
+        disk. Lines rotated out of the last backup are gone; reading starts
+        at the oldest line still available.
+        """
+        with self._lock:
+            if line_number >= self.first_line:
+                start = line_number - self.first_line
+                return list(itertools.islice(self.lines, start, start + count))
+            self._file.flush()
+            starts = list(reversed(self._file_starts))
+            paths = [self._backup(i) for i in range(len(starts) - 1, 0, -1)] + [self.path]
+            ends = starts[1:] + [self.total_lines]
+        result = []
+        for path, first, end in zip(paths, starts, ends):
+            if end <= line_number or len(result) >= count:
+                continue
+            try:
+                with open(path, encoding="utf-8", errors="replace") as handle:
+                    for offset, line in enumerate(handle):
+                        if first + offset >= line_number:
+                            result.append(line.rstrip("\n"))
+                            if len(result) >= count:
+                                break
+            except FileNotFoundError:
+                continue
+        return result
+    
+    def since(self, line_number):
+        """Lines after ``line_number`` still in memory, plus the next line number."""
+        with self._lock:
+            start = max(line_number, self.first_line) - self.first_line
+            return list(itertools.islice(self.lines, start, None)), self.total_lines
+    
+    def flush(self):
+        """Re-render the view with the latest lines if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            self._dirty = False
+            shown = list(self.lines)[-self.view_lines:]
+            hidden = self.total_lines - len(shown)
+            if not self._closed:
+                self._file.flush()
+        text = "\n".join(shown) + "\n" if shown else ""
+        if hidden:
+            text = f"… {hidden} earlier lines in {self.path}\n" + text
+        self.view.outputs = ({'output_type': 'stream', 'name': 'stdout', 'text': text},)
+        return True
+    
+    def close(self):
+        """Final flush; the file is closed but tail/seek keep working."""
+        with self._lock:
+            if not self._closed:
+                self._file.close()
+                self._closed = True
+            self._dirty = True
+        self.flush()
+
+class AppLogs:
+    """Per-app logs with one shared flusher thread that caps UI update rate."""
+    
+    def __init__(self, log_dir=None, flush_interval=0.5, **log_options):
+        self.log_dir = Path(log_dir or Path("apps") / ".logs")
+        self.flush_interval = flush_interval
+        self.log_options = log_options
+        self.logs = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+    
+    def open(self, app_id):
+        """Start a fresh log for an app run, closing any previous one.
+        
+        The previous run's file is kept as the first backup (see AppLog).
+        """
+        previous = self.logs.get(app_id)
+        if previous is not None:
+            previous.close()
+        log = AppLog(app_id, self.log_dir, **self.log_options)
+        with self._lock:
+            self.logs[app_id] = log
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name="sd-log-flusher")
+                self._flusher.start()
+        return log
+    
+    def get(self, app_id):
+        return self.logs.get(app_id)
+    
+    def tail(self, app_id, count=50):
+        log = self.logs.get(app_id)
+        return log.tail(count) if log else []
+    
+    def seek(self, app_id, line_number, count=100):
+        log = self.logs.get(app_id)
+        return log.seek(line_number, count) if log else []
+    
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            for log in list(self.logs.values()):
+                try:
+                    log.flush()
+                except Exception:
+                    pass
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           APP READINESS                                       ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+# Gradio ("Running on local URL:  http://127.0.0.1:7860"), Streamlit ("Local URL:
+# http://localhost:8501"), uvicorn ("Uvicorn running on http://0.0.0.0:8000"),
+# ComfyUI ("To see the GUI go to: http://127.0.0.1:8188") and friends
+_BANNER_URL_PATTERN = re.compile(
+    r"https?://(?:localhost|127\.0\.0\.1|0\.0\.0\.0|\[::1?\]|[\w.-]+):(\d{2,5})\b", re.IGNORECASE
+)
+
+def port_from_banner(line):
+    """The port of the first local server URL in an output line, or None."""
+    match = _BANNER_URL_PATTERN.search(line)
+    if match and "trycloudflare.com" not in line:
+        port = int(match.group(1))
+        if 0 < port < 65536:
+            return port
+    return None
+
+def process_group_pids(pgid):
+    """PIDs in a process group, read from /proc (empty where /proc is missing)."""
+    pids = []
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return pids
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as handle:
+                fields = handle.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[2]) == pgid:
+            pids.append(int(entry))
+    return pids
+
+def listening_ports(pids):
+    """TCP ports the given processes are listening on, via /proc socket tables."""
+    inodes = set()
+    for pid in pids:
+        try:
+            for fd in os.listdir(f"/proc/{pid}/fd"):
+                try:
+                    target = os.readlink(f"/proc/{pid}/fd/{fd}")
+                except OSError:
+                    continue
+                if target.startswith("socket:["):
+                    inodes.add(target[8:-1])
+        except OSError:
+            continue
+    ports = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as handle:
+                next(handle, None)
+                for row in handle:
+                    fields = row.split()
+                    # st 0A is LISTEN
+                    if len(fields) > 9 and fields[3] == "0A" and fields[9] in inodes:
+                        ports.add(int(fields[1].rsplit(":", 1)[1], 16))
+        except OSError:
+            continue
+    return sorted(ports)
+
+def established_connections(port):
+    """Number of ESTABLISHED TCP connections to a local port, via /proc."""
+    count = 0
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as handle:
+                next(handle, None)
+                for row in handle:
+                    fields = row.split()
+                    # st 01 is ESTABLISHED
+                    if len(fields) > 3 and fields[3] == "01" and int(fields[1].rsplit(":", 1)[1], 16) == port:
+                        count += 1
+        except OSError:
+            continue
+    return count
+
+class AppReadiness:
+    """Port discovery and HTTP readiness probing for one launched app.
+    
+    The port comes from whichever is seen first: a server URL in the app's
+    output, or a listening socket owned by its process group. Once known,
+    the port is probed with a plain HTTP request, backing off between
+    attempts, until any HTTP response comes back. Everything runs as one
+    coroutine on the command engine loop.
+    """
+    
+    def __init__(self, app_id, handle, engine, timeout=900, initial_delay=0.1, max_delay=2.0):
+        self.app_id = app_id
+        self.handle = handle
+        self.engine = engine
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.started_at = time.time()
+        self.port = None
+        self.port_source = None
+        self.port_found_at = None
+        self.ready_at = None
+        self.probes = 0
+        self.state = 'starting'
+        self.ready = threading.Event()
+        self.listeners = []
+    
+    def start(self):
+        self.engine.call_soon(self._watch())
+        return self
+    
+    def observe_line(self, line):
+        """Feed one output line (engine thread); picks up banner URLs."""
+        if self.port is None:
+            port = port_from_banner(line)
+            if port:
+                self._found(port, 'banner')
+    
+    def _found(self, port, source):
+        self.port = port
+        self.port_source = source
+        self.port_found_at = time.time()
+    
+    @property
+    def time_to_port(self):
+        return self.port_found_at - self.started_at if self.port_found_at else None
+    
+    @property
+    def time_to_ready(self):
+        return self.ready_at - self.started_at if self.ready_at else None
+    
+    def metrics(self):
+        return {
+            'port': self.port,
+            'port_source': self.port_source,
+            'state': self.state,
+            'time_to_port': self.time_to_port,
+            'time_to_ready': self.time_to_ready,
+            'probes': self.probes,
+        }
+    
+    def wait(self, timeout=None):
+        """Block until ready; returns the port, or None if the app never got there."""
+        self.ready.wait(timeout)
+        return self.port if self.state == 'ready' else None
+    
+    async def _watch(self):
+        delay = self.initial_delay
+        deadline = self.started_at + self.timeout
+        while not self.handle.done() and time.time() < deadline:
+            if self.port is None and self.handle.pid:
+                loop = asyncio.get_running_loop()
+                pids = await loop.run_in_executor(None, process_group_pids, self.handle.pid)
+                ports = await loop.run_in_executor(None, listening_ports, pids or [self.handle.pid])
+                if ports and self.port is None:
+                    self._found(ports[0], 'socket')
+            if self.port is not None:
+                self.probes += 1
+                if await self._probe(self.port):
+                    self.state = 'ready'
+                    self.ready_at = time.time()
+                    break
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, self.max_delay)
+        else:
+            self.state = 'exited' if self.handle.done() else 'timeout'
+        self.ready.set()
+        for listener in self.listeners:
+            try:
+                listener(self)
+            except Exception:
+                pass
+    
+    @staticmethod
+    async def _probe(port, timeout=2.0):
+        """True if something answers an HTTP request on the port."""
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+            writer.write(f"GET / HTTP/1.0\r\nHost: 127.0.0.1:{port}\r\n\r\n".encode())
+            await writer.drain()
+            status = await asyncio.wait_for(reader.readline(), timeout)
+            return status.startswith(b"HTTP/")
+        except (OSError, asyncio.TimeoutError):
+            return False
+        finally:
+            if writer is not None:
+                writer.close()
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           APP RUNNER                                          ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class AppRunner:
+    """Handle running applications with real process monitoring."""
+    
+    # How long a launch that does not fit yet waits for RAM/VRAM (e.g. an idle app hibernating)
+    ADMISSION_WAIT = 300
+    
+    def __init__(self, output_widget, environments=None, logs=None, tracer=None, admission=None):
+        self.output_widget = output_widget
+        self.tracer = tracer or TRACER
+        self.running_processes = {}
+        self.environments = environments or AppEnvironments()
+        self.logs = logs or AppLogs()
+        self.engine = command_engine()
+        self.readiness = {}
+        # Latest handle and launch spec per app, kept after exit for supervisors
+        self.latest_processes = {}
+        self.launch_specs = {}
+        # Set once _on_exit has cleaned up after a handle (see wait_for_exit)
+        self.exit_events = {}
+        # Called with the app id whenever an app's process exits
+        self.exit_callbacks = []
+        # Optional AdmissionController; launches reserve RAM/VRAM until they exit
+        self.admission = admission
+        
+    def run_app(self, app_id, app_data, env=None):
+        """Run an application with real process monitoring.
+        
+        ``env`` adds variables on top of the notebook's environment (used to
+        bring a resumed app back on its previous port).
+        """
+        with self.output_widget:
+            print(f"\n▶️ RUNNING: {app_data.get('name', app_id)}")
+            print("=" * 50)
+            
             app_dir = Path("apps") / app_id
             if not app_dir.exists():
                 print(f"❌ App directory not found: {app_dir}")
@@ -344,84 +5497,1691 @@ class AppRunner:
                 print(f"📁 Available files: {list(app_dir.iterdir())}")
                 return False
             
+            ticket = None
+            if self.admission is not None:
+                ticket = self.admission.admit(app_id, app_data, 'launch', wait=self.ADMISSION_WAIT,
+                                              on_wait=lambda reason: print(f"⏳ Waiting for resources: {reason}"))
+                if not ticket.admitted:
+                    print(f"❌ Not starting {app_data.get('name', app_id)}: {ticket.reason}")
+                    return False
+                if ticket.reason:
+                    print(f"⚠️ {ticket.reason}")
+                if ticket.gpu is not None:
+                    print(f"🎮 Packed onto GPU {ticket.gpu}")
+            
+            try:
+                python = self.environments.python_for(app_id)
+                print(f"🚀 Starting: {main_script}")
+                print(f"🐍 Interpreter: {python}")
+                log = self.logs.open(app_id)
+                print(f"📝 Full log: {log.path}")
+                print("📊 Latest process output will appear below:")
+                print("-" * 40)
+                display(log.view)
+                
+                # Start the process with the app's own environment; output goes
+                # into the app's bounded log, which the flusher renders in batches
+                readiness = None
+                output = {'lines': 0, 'bytes': 0}
+                
+                def on_line(stream, line):
+                    output['lines'] += 1
+                    output['bytes'] += len(line) + 1
+                    log.write(line)
+                    if readiness is not None:
+                        readiness.observe_line(line)
+                
+                command = [python, "-u", main_script]
+                self.launch_specs[app_id] = {
+                    'app_data': app_data, 'command': command, 'cwd': str(app_dir), 'env': dict(env or {})
+                }
+                if ticket is not None and ticket.env:
+                    env = {**ticket.env, **(env or {})}
+                launch = self.tracer.start_span("launch", app_id=app_id, script=main_script)
+                process = self.engine.submit(
+                    command,
+                    cwd=str(app_dir),
+                    env={**os.environ, **env} if env else None,
+                    merge_stderr=True,
+                    on_line=on_line
+                )
+                readiness = AppReadiness(app_id, process, self.engine)
+                readiness.listeners.append(self._report_ready)
+                readiness.listeners.append(lambda readiness: self._trace_ready(launch, readiness))
+                self.readiness[app_id] = readiness.start()
+                # Registered before the exit hook, which may run at once for a quick exit
+                self.running_processes[app_id] = process
+                self.latest_processes[app_id] = process
+                self.exit_events[process] = threading.Event()
+                process.future.add_done_callback(
+                    lambda future: self._on_exit(app_id, process, log, launch, output, ticket)
+                )
+                
+                # Wait briefly for the spawn so the PID (or a start failure) can be shown
+                deadline = time.time() + 5
+                while process.pid is None and not process.done() and time.time() < deadline:
+                    time.sleep(0.01)
+                if process.done() and process.pid is None:
+                    print(f"❌ Failed to start app: {process.wait().error_message}")
+                    self.tracer.record("spawn", launch.start, time.time(), parent=launch).fail("spawn failed")
+                    launch.fail("spawn failed").end()
+                    if ticket is not None:
+                        ticket.release()
+                    return False
+                self.tracer.record("spawn", launch.start, time.time(), parent=launch, pid=process.pid)
+                
+                print(f"✅ Process started with PID: {process.pid}")
+                print("🔎 Detecting the app's port; tunnels will use it automatically")
+                return True
+                
+            except Exception as e:
+                print(f"❌ Failed to start app: {e}")
+                import traceback
+                traceback.print_exc()
+                if ticket is not None:
+                    ticket.release()
+                return False
+    
+    def _on_exit(self, app_id, process, log, launch=None, output=None, ticket=None):
+        """Engine-thread hook: close the log, release the launch's reservation, notify listeners."""
+        log.close()
+        if ticket is not None:
+            ticket.release()
+        if launch is not None:
+            self.tracer.record("process", launch.start, time.time(), parent=launch,
+                               exit_code=process.returncode, status=process.status.value,
+                               output_lines=(output or {}).get('lines'),
+                               output_bytes=(output or {}).get('bytes'))
+        if self.running_processes.get(app_id) is process:
+            del self.running_processes[app_id]
+            threading.Thread(target=self._notify_exit, args=(app_id,), daemon=True).start()
+        exited = self.exit_events.pop(process, None)
+        if exited is not None:
+            exited.set()
+    
+    def wait_for_exit(self, process, timeout=None):
+        """Wait until a launched process has exited and _on_exit has run for it."""
+        exited = self.exit_events.get(process)
+        if exited is None:
+            # Never launched here, or already cleaned up
+            process.wait(timeout)
+            return process.done()
+        return exited.wait(timeout)
+    
+    def _notify_exit(self, app_id):
+        for callback in self.exit_callbacks:
+            try:
+                callback(app_id)
+            except Exception as e:
+                print(f"⚠️ Exit callback failed for {app_id}: {e}")
+    
+    def _trace_ready(self, launch, readiness):
+        """Close the launch span with port discovery and HTTP readiness as children."""
+        if readiness.port_found_at:
+            self.tracer.record("port", readiness.started_at, readiness.port_found_at, parent=launch,
+                               port=readiness.port, source=readiness.port_source)
+        if readiness.ready_at:
+            self.tracer.record("http ready", readiness.port_found_at, readiness.ready_at, parent=launch,
+                               probes=readiness.probes)
+        else:
+            launch.fail(f"never ready ({readiness.state})")
+        launch.end(state=readiness.state, port=readiness.port)
+    
+    def _report_ready(self, readiness):
+        if readiness.state == 'ready':
+            self.output_widget.append_stdout(
+                f"🌐 {readiness.app_id} ready on http://127.0.0.1:{readiness.port} "
+                f"(port via {readiness.port_source} after {readiness.time_to_port:.1f}s, "
+                f"ready after {readiness.time_to_ready:.1f}s)\n"
+            )
+        else:
+            self.output_widget.append_stdout(f"⚠️ {readiness.app_id} never became ready ({readiness.state})\n")
+    
+    def port_for(self, app_id):
+        """The discovered port of a running app, or None."""
+        readiness = self.readiness.get(app_id)
+        return readiness.port if readiness else None
+    
+    def wait_until_ready(self, app_id, timeout=None):
+        """Block until the app answers HTTP; returns its port, or None."""
+        readiness = self.readiness.get(app_id)
+        return readiness.wait(timeout) if readiness else None
+    
+    def startup_metrics(self):
+        """Time-to-port and time-to-ready for every launched app."""
+        return {app_id: readiness.metrics() for app_id, readiness in self.readiness.items()}
+    
+    def stop_app(self, app_id):
+        """Stop a running app's whole process group."""
+        process = self.running_processes.get(app_id)
+        if process is None or process.done():
+            return False
+        process.cancel()
+        return True
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           PROCESS SUPERVISOR                                  ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+def read_meminfo():
+    """/proc/meminfo as a dict of byte counts (empty where /proc is missing)."""
+    info = {}
+    try:
+        with open("/proc/meminfo") as handle:
+            for row in handle:
+                key, _, value = row.partition(":")
+                parts = value.split()
+                if parts:
+                    info[key] = int(parts[0]) * (1024 if parts[1:] == ["kB"] else 1)
+    except OSError:
+        pass
+    return info
+
+def _format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(count) < 1024 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
+class SupervisedApp:
+    """Supervision state, limits and resource history for one app."""
+    
+    HISTORY = 120
+    
+    def __init__(self, app_id, app_data, max_rss_bytes=None, max_cpu_percent=None,
+                 restart=True, max_restarts=3, env=None):
+        self.app_id = app_id
+        self.app_data = app_data
+        self.env = env
+        self.max_rss_bytes = max_rss_bytes
+        self.max_cpu_percent = max_cpu_percent
+        self.restart = restart
+        self.max_restarts = max_restarts
+        self.handle = None
+        self.state = 'running'
+        self.restarts = 0
+        self.last_exit_code = None
+        self.limit_reason = None
+        self.stop_requested = False
+        self.stop_state = 'stopped'
+        self.exit_handled_for = None
+        self.cpu_over = 0
+        self.pids = []
+        self.cpu_percent = 0.0
+        self.rss_bytes = 0
+        self.peak_rss_bytes = 0
+        self.peak_vram_bytes = 0
+        self.fds = 0
+        self.history = collections.deque(maxlen=self.HISTORY)
+        self._last_ticks = None
+        self._last_time = None
+    
+    def usage(self):
+        return {
+            'state': self.state,
+            'pid': self.handle.pid if self.handle else None,
+            'pids': list(self.pids),
+            'cpu_percent': self.cpu_percent,
+            'rss_bytes': self.rss_bytes,
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'peak_vram_bytes': self.peak_vram_bytes,
+            'fds': self.fds,
+            'restarts': self.restarts,
+            'last_exit_code': self.last_exit_code,
+            'limit_reason': self.limit_reason,
+        }
+
+class ProcessSupervisor:
+    """Resource accounting, limits and crash restarts for apps run by an AppRunner.
+    
+    One sampler thread walks /proc once per interval, groups processes by
+    process group (every app runs in its own), and records CPU, RSS and
+    open descriptors per app. Apps over their memory limit, or over their
+    CPU limit for ``cpu_grace`` samples in a row, are stopped by process
+    group. Crashes (non-zero exits, limit kills) are restarted with
+    exponential backoff up to ``max_restarts``; an app that stayed up for
+    ``stable_seconds`` gets its restart budget back.
+    """
+    
+    CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+    
+    def __init__(self, app_runner, interval=2.0, cpu_grace=3, backoff_base=2.0, backoff_max=60.0,
+                 stable_seconds=120):
+        self.app_runner = app_runner
+        self.interval = interval
+        self.cpu_grace = cpu_grace
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stable_seconds = stable_seconds
+        self.apps = {}
+        self.host_memory = {}
+        self._lock = threading.Lock()
+        # Serializes launches with exit handling, so a fast crash is never missed
+        self._launch_lock = threading.RLock()
+        self._sampler = None
+        self._dashboard = None
+        app_runner.exit_callbacks.append(self._on_exit)
+    
+    # ---- control -------------------------------------------------------------------
+    
+    def start(self, app_id, app_data, max_rss_mb=None, max_cpu_percent=None, restart=True, max_restarts=3):
+        """Run an app under supervision with optional limits."""
+        with self._lock:
+            entry = SupervisedApp(
+                app_id, app_data,
+                max_rss_bytes=max_rss_mb * 1024 * 1024 if max_rss_mb else None,
+                max_cpu_percent=max_cpu_percent,
+                restart=restart, max_restarts=max_restarts
+            )
+            self.apps[app_id] = entry
+        self._launch(entry)
+        self._ensure_sampler()
+        return entry.state == 'running'
+    
+    def stop(self, app_id, final_state='stopped'):
+        """Stop an app's process group without restarting it."""
+        entry = self.apps.get(app_id)
+        if entry is not None:
+            entry.stop_requested = True
+            entry.stop_state = final_state
+            if entry.state == 'restarting':
+                entry.state = final_state
+        return self.app_runner.stop_app(app_id)
+    
+    def restart(self, app_id, env=None):
+        """Stop (if running) and start an app again, keeping its limits."""
+        entry = self.apps.get(app_id)
+        if entry is None:
+            return False
+        if env is not None:
+            entry.env = env
+        handle = entry.handle
+        if handle is not None and not handle.done():
+            entry.stop_requested = True
+            self.app_runner.stop_app(app_id)
+            handle.wait()
+        with self._launch_lock:
+            entry.exit_handled_for = handle
+            entry.stop_requested = False
+            self._launch(entry)
+        return entry.state == 'running'
+    
+    def _launch(self, entry):
+        with self._launch_lock:
+            entry.limit_reason = None
+            entry.cpu_over = 0
+            entry._last_ticks = None
+            if self.app_runner.run_app(entry.app_id, entry.app_data, env=entry.env):
+                entry.handle = self.app_runner.latest_processes.get(entry.app_id)
+                entry.state = 'running'
+            else:
+                entry.state = 'failed'
+    
+    def _on_exit(self, app_id):
+        """AppRunner exit callback: record the exit and maybe schedule a restart."""
+        with self._launch_lock:
+            entry = self.apps.get(app_id)
+            handle = entry.handle if entry else None
+            if handle is None or not handle.done() or entry.exit_handled_for is handle:
+                return
+            entry.exit_handled_for = handle
+            self._record_exit(entry, handle)
+    
+    def _record_exit(self, entry, handle):
+        app_id = entry.app_id
+        entry.last_exit_code = handle.returncode
+        entry.pids = []
+        entry.cpu_percent = 0.0
+        entry.rss_bytes = 0
+        entry.fds = 0
+        if entry.stop_requested:
+            entry.state = entry.stop_state
+            return
+        if entry.limit_reason is None and handle.returncode == 0:
+            entry.state = 'exited'
+            return
+        
+        entry.state = 'crashed'
+        cause = entry.limit_reason or f"exit {handle.returncode}"
+        if handle.start_time and handle.end_time and handle.end_time - handle.start_time >= self.stable_seconds:
+            entry.restarts = 0
+        if not entry.restart or entry.restarts >= entry.max_restarts:
+            self._notify(f"💥 {app_id} crashed ({cause}); not restarting")
+            return
+        delay = min(self.backoff_base * 2 ** entry.restarts, self.backoff_max)
+        entry.restarts += 1
+        entry.state = 'restarting'
+        self._notify(f"🔁 {app_id} crashed ({cause}); restart {entry.restarts} in {delay:.0f}s")
+        timer = threading.Timer(delay, self._restart_after_crash, args=(entry,))
+        timer.daemon = True
+        timer.start()
+    
+    def _restart_after_crash(self, entry):
+        if entry.state == 'restarting' and not entry.stop_requested and self.apps.get(entry.app_id) is entry:
+            self._launch(entry)
+    
+    def _notify(self, message):
+        self.app_runner.output_widget.append_stdout(message + "\n")
+    
+    # ---- sampling ------------------------------------------------------------------
+    
+    def _ensure_sampler(self):
+        with self._lock:
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_loop, daemon=True, name="sd-supervisor")
+                self._sampler.start()
+    
+    def _sample_loop(self):
+        while True:
+            try:
+                self.sample()
+            except Exception:
+                pass
+            time.sleep(self.interval)
+    
+    def _adopt_unsupervised(self):
+        """Track apps started directly through the runner with default policy."""
+        for app_id, handle in list(self.app_runner.running_processes.items()):
+            entry = self.apps.get(app_id)
+            if entry is None or (entry.handle is not handle and entry.state != 'restarting'):
+                with self._lock:
+                    entry = self.apps.get(app_id) or SupervisedApp(app_id, {'name': app_id})
+                    entry.handle = handle
+                    entry.state = 'running'
+                    entry.stop_requested = False
+                    self.apps[app_id] = entry
+    
+    def sample(self):
+        """Take one sample of every supervised app and enforce limits."""
+        self._adopt_unsupervised()
+        now = time.time()
+        groups = {}
+        wanted = {entry.handle.pid: entry for entry in self.apps.values()
+                  if entry.handle is not None and entry.handle.pid and not entry.handle.done()}
+        try:
+            entries = os.listdir("/proc")
+        except OSError:
+            entries = []
+        for name in entries:
+            if not name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{name}/stat") as handle:
+                    fields = handle.read().rsplit(")", 1)[1].split()
+            except (OSError, IndexError):
+                continue
+            pgid = int(fields[2])
+            if pgid in wanted:
+                # utime, stime (ticks) and rss (pages) follow the state field
+                groups.setdefault(pgid, []).append((int(name), int(fields[11]) + int(fields[12]), int(fields[21])))
+        
+        for pgid, entry in wanted.items():
+            members = groups.get(pgid, [])
+            ticks = sum(member[1] for member in members)
+            entry.pids = [member[0] for member in members]
+            entry.rss_bytes = sum(member[2] for member in members) * self.PAGE_SIZE
+            entry.peak_rss_bytes = max(entry.peak_rss_bytes, entry.rss_bytes)
+            fds = 0
+            for pid in entry.pids:
+                try:
+                    fds += len(os.listdir(f"/proc/{pid}/fd"))
+                except OSError:
+                    pass
+            entry.fds = fds
+            if entry._last_ticks is not None and now > entry._last_time:
+                entry.cpu_percent = 100.0 * (ticks - entry._last_ticks) / self.CLOCK_TICKS / (now - entry._last_time)
+            entry._last_ticks = ticks
+            entry._last_time = now
+            entry.history.append((now, entry.cpu_percent, entry.rss_bytes))
+            self._enforce(entry)
+        
+        admission = getattr(self.app_runner, 'admission', None)
+        if admission is not None and wanted:
+            self._record_peaks(admission, wanted.values())
+        self.host_memory = read_meminfo()
+        self._refresh_dashboard()
+    
+    def _record_peaks(self, admission, entries):
+        """Feed measured peak RAM/VRAM back into the admission estimates."""
+        gpu_memory = admission.gpu_process_memory()
+        for entry in entries:
+            vram = sum(gpu_memory.get(pid, 0) for pid in entry.pids)
+            entry.peak_vram_bytes = max(entry.peak_vram_bytes, vram)
+            admission.history.observe(entry.app_id, ram_bytes=entry.peak_rss_bytes,
+                                      vram_bytes=entry.peak_vram_bytes)
+    
+    def _enforce(self, entry):
+        if entry.max_cpu_percent is not None and entry.cpu_percent > entry.max_cpu_percent:
+            entry.cpu_over += 1
+        else:
+            entry.cpu_over = 0
+        reason = None
+        if entry.max_rss_bytes is not None and entry.rss_bytes > entry.max_rss_bytes:
+            reason = f"RSS {_format_bytes(entry.rss_bytes)} over {_format_bytes(entry.max_rss_bytes)}"
+        elif entry.cpu_over >= self.cpu_grace:
+            reason = f"CPU {entry.cpu_percent:.0f}% over {entry.max_cpu_percent:.0f}% for {entry.cpu_over} samples"
+        if reason and entry.limit_reason is None:
+            entry.limit_reason = reason
+            self._notify(f"🛑 Stopping {entry.app_id}: {reason}")
+            self.app_runner.stop_app(entry.app_id)
+    
+    def usage(self, app_id=None):
+        """Latest resource usage for one app, or for all of them."""
+        if app_id is not None:
+            entry = self.apps.get(app_id)
+            return entry.usage() if entry else None
+        return {app_id: entry.usage() for app_id, entry in self.apps.items()}
+    
+    # ---- dashboard -----------------------------------------------------------------
+    
+    def dashboard(self):
+        """Compact table of running apps, refreshed by the sampler."""
+        if self._dashboard is None:
+            self._dashboard = widgets.HTML(value="")
+            self._refresh_dashboard()
+        return self._dashboard
+    
+    def dashboard_html(self):
+        available = self.host_memory.get("MemAvailable")
+        total = self.host_memory.get("MemTotal")
+        header = (f"<b>Host memory:</b> {_format_bytes(available)} free of {_format_bytes(total)}"
+                  if available and total else "")
+        rows = []
+        for app_id, entry in sorted(self.apps.items(), key=lambda item: -item[1].rss_bytes):
+            limit = f" / {_format_bytes(entry.max_rss_bytes)}" if entry.max_rss_bytes else ""
+            rows.append(
+                f"<tr><td>{html.escape(str(entry.app_data.get('name', app_id)))}</td><td>{entry.state}</td>"
+                f"<td>{entry.cpu_percent:.0f}%</td><td>{_format_bytes(entry.rss_bytes)}{limit}</td>"
+                f"<td>{entry.fds}</td><td>{len(entry.pids)}</td><td>{entry.restarts}</td></tr>"
+            )
+        if not rows:
+            return header + "<p>No apps running.</p>"
+        return (
+            header + "<table style='font-size: 12px;'><tr><th>App</th><th>State</th><th>CPU</th>"
+            "<th>RSS</th><th>FDs</th><th>Procs</th><th>Restarts</th></tr>" + "".join(rows) + "</table>"
+        )
+    
+    def _refresh_dashboard(self):
+        if self._dashboard is not None:
+            markup = self.dashboard_html()
+            if self._dashboard.value != markup:
+                self._dashboard.value = markup
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           ADMISSION CONTROL                                   ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+def _nvidia_smi_rows(query):
+    if not shutil.which("nvidia-smi"):
+        return []
+    output = command_engine().output(["nvidia-smi", f"--query-{query}", "--format=csv,noheader,nounits"],
+                                     timeout=10)
+    return [[part.strip() for part in row.split(",")] for row in (output or "").splitlines() if row.strip()]
+
+def _rocm_smi_memory():
+    """AMD GPUs as reported by ``rocm-smi --showmeminfo vram --json``."""
+    if not shutil.which("rocm-smi"):
+        return []
+    output = command_engine().output(["rocm-smi", "--showmeminfo", "vram", "--json"], timeout=10)
+    try:
+        cards = json.loads(output or "{}")
+    except ValueError:
+        return []
+    gpus = []
+    for card, fields in sorted(cards.items()):
+        index = re.sub(r"\D", "", card)
+        try:
+            gpus.append({'index': int(index), 'name': f"AMD {card}",
+                         'total': int(fields["VRAM Total Memory (B)"]),
+                         'used': int(fields["VRAM Total Used Memory (B)"])})
+        except (KeyError, TypeError, ValueError):
+            continue
+    return gpus
+
+def read_gpu_memory():
+    """Memory of each GPU, as [{'index', 'name', 'total', 'used'}] in bytes.
+    
+    Reads nvidia-smi, else rocm-smi; empty where neither answers. Any
+    callable returning the same list can replace it as an
+    AdmissionController's ``gpu_probe``.
+    """
+    gpus = []
+    for row in _nvidia_smi_rows("gpu=index,name,memory.total,memory.used"):
+        try:
+            gpus.append({'index': int(row[0]), 'name': row[1],
+                         'total': int(float(row[2])) * 1024 * 1024, 'used': int(float(row[3])) * 1024 * 1024})
+        except (IndexError, ValueError):
+            continue
+    return gpus or _rocm_smi_memory()
+
+def read_gpu_process_memory():
+    """GPU memory in bytes per process id (empty where nvidia-smi is missing)."""
+    usage = {}
+    for row in _nvidia_smi_rows("compute-apps=pid,used_memory"):
+        try:
+            usage[int(row[0])] = usage.get(int(row[0]), 0) + int(float(row[1])) * 1024 * 1024
+        except (IndexError, ValueError):
+            continue
+    return usage
+
+class ResourceHistory:
+    """Measured disk, peak RAM and peak VRAM per app, kept across sessions."""
+    
+    DEFAULT_PATH = Path("apps") / ".resource-history.json"
+    
+    def __init__(self, path=None):
+        self.path = Path(path) if path else self.DEFAULT_PATH
+        self._lock = threading.Lock()
+        self._data = None
+    
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+    
+    def get(self, app_id):
+        with self._lock:
+            return dict(self._load().get(app_id, {}))
+    
+    def observe(self, app_id, replace=False, **measurements):
+        """Record byte counts (disk_bytes, ram_bytes, vram_bytes); True if anything changed.
+        
+        RAM and VRAM keep their peak; ``replace`` overwrites (disk after a reinstall).
+        """
+        with self._lock:
+            record = self._load().setdefault(app_id, {})
+            changed = False
+            for key, value in measurements.items():
+                if value and (replace or value > record.get(key, 0)) and record.get(key) != int(value):
+                    record[key] = int(value)
+                    changed = True
+            if changed:
+                record['measured_at'] = time.time()
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_name(self.path.name + f".tmp{os.getpid()}")
+                with open(tmp_path, 'w') as f:
+                    json.dump(self._data, f, indent=1)
+                os.replace(tmp_path, self.path)
+            return changed
+
+class AdmissionTicket:
+    """Outcome of an admission request; an admitted ticket reserves its needs until released."""
+    
+    def __init__(self, controller, app_id, kind, needs, admitted, reason=None, fits_later=False, gpu=None):
+        self.controller = controller
+        self.app_id = app_id
+        self.kind = kind
+        self.needs = needs
+        self.admitted = admitted
+        self.reason = reason
+        self.fits_later = fits_later
+        self.gpu = gpu
+        self.gpu_count = 0
+    
+    @property
+    def env(self):
+        """Variables pinning a launch to the GPU it was packed onto (multi-GPU hosts only)."""
+        if self.gpu is None or self.gpu_count < 2:
+            return {}
+        return {'CUDA_VISIBLE_DEVICES': str(self.gpu)}
+    
+    def release(self):
+        if self.admitted:
+            self.controller.release(self.app_id, self.kind, self)
+
+class AdmissionController:
+    """Start installs and launches only when the host can hold them.
+    
+    An app's needs come from what it measurably used before (see
+    ResourceHistory), else from its catalog tags ("12GB-VRAM", "low-vram",
+    "32GB-RAM"), the enrichment's requirement size estimate and per-category
+    disk defaults. Capacity is read locally: statvfs for disk, /proc/meminfo
+    for RAM and ``gpu_probe`` for GPUs. Admitted work keeps a reservation
+    until it finishes, so apps that have not allocated yet still count, and
+    each launch goes to the GPU it fits most tightly. Requests that would
+    fit once other work finishes wait up to ``wait`` seconds; requests that
+    exceed the host are rejected at once. A GPU probe that finds nothing (or
+    fails) means VRAM is unknown, not absent: such launches are admitted
+    with a warning in the ticket's ``reason``.
+    """
+    
+    GIB = 1024 ** 3
+    # Installed size with models; the guides put complete installs at up to 50GB+
+    DEFAULT_DISK_GB = {'IMAGE': 15, 'VIDEO': 20, '3D': 15, 'LLM': 20, 'AUDIO': 10, 'UTILITY': 4}
+    FALLBACK_DISK_GB = 10
+    DEFAULT_RAM_GB = 4
+    # Measured peaks get this much headroom before they are trusted as needs
+    MEASURED_HEADROOM = 1.15
+    _RAM_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*gb[-_ ]?ram$", re.IGNORECASE)
+    
+    def __init__(self, root=".", gpu_probe=read_gpu_memory, gpu_process_probe=read_gpu_process_memory,
+                 meminfo=read_meminfo, history=None, disk_reserve_gb=2, ram_reserve_gb=1, poll_interval=5.0):
+        self.root = Path(root)
+        self.gpu_probe = gpu_probe
+        self.gpu_process_probe = gpu_process_probe
+        self.meminfo = meminfo
+        self.history = history or ResourceHistory()
+        self.disk_reserve = int(disk_reserve_gb * self.GIB)
+        self.ram_reserve = int(ram_reserve_gb * self.GIB)
+        self.poll_interval = poll_interval
+        self.reservations = {}
+        self._condition = threading.Condition()
+    
+    # ---- needs and capacity --------------------------------------------------------
+    
+    def estimate(self, app_id, app_data):
+        """Expected disk, RAM and VRAM needs of an app, in bytes."""
+        tags = [tag for tag in app_data.get('tags', []) or [] if isinstance(tag, str)]
+        measured = self.history.get(app_id)
+        
+        if measured.get('disk_bytes'):
+            disk = measured['disk_bytes'] * self.MEASURED_HEADROOM
+        else:
+            disk = max(self.DEFAULT_DISK_GB.get(app_data.get('category'), self.FALLBACK_DISK_GB) * self.GIB,
+                       app_data.get('estimated_install_bytes') or 0)
+        
+        ram_tags = [float(match.group(1)) for match in map(self._RAM_PATTERN.match, tags) if match]
+        if measured.get('ram_bytes'):
+            ram = measured['ram_bytes'] * self.MEASURED_HEADROOM
+        else:
+            ram = (max(ram_tags) if ram_tags else self.DEFAULT_RAM_GB) * self.GIB
+        
+        vram_gb = FacetIndex.vram_gb(tags)
+        if measured.get('vram_bytes'):
+            vram = measured['vram_bytes'] * self.MEASURED_HEADROOM
+        else:
+            vram = (vram_gb or 0) * self.GIB
+        return {'disk': int(disk), 'ram': int(ram), 'vram': int(vram)}
+    
+    def capacity(self):
+        """Free disk under root, RAM and per-GPU memory, in bytes."""
+        path = self.root.resolve()
+        while not path.exists() and path != path.parent:
+            path = path.parent
+        stat = os.statvfs(path)
+        meminfo = self.meminfo()
+        return {
+            'disk_free': stat.f_bavail * stat.f_frsize,
+            'ram_total': meminfo.get('MemTotal'),
+            'ram_free': meminfo.get('MemAvailable'),
+            'gpus': self._probe_gpus(),
+        }
+    
+    def _probe_gpus(self):
+        try:
+            return self.gpu_probe() or []
+        except Exception:
+            return []
+    
+    def gpu_process_memory(self):
+        try:
+            return self.gpu_process_probe() or {}
+        except Exception:
+            return {}
+    
+    # ---- admission -----------------------------------------------------------------
+    
+    def _check(self, app_id, kind, needs):
+        """(admitted, reason, fits later, gpu index, gpu count) against capacity and reservations."""
+        capacity = self.capacity()
+        others = [ticket for key, ticket in self.reservations.items() if key != (app_id, kind)]
+        gpus = capacity['gpus']
+        
+        if kind == 'install':
+            # Installed apps already show in the free space; running installs may not yet
+            pending = sum(ticket.needs['disk'] for ticket in others if ticket.kind == 'install')
+            free = capacity['disk_free'] - self.disk_reserve - pending
+            if needs['disk'] > free:
+                reason = f"needs ~{_format_bytes(needs['disk'])} of disk, {_format_bytes(max(0, free))} free"
+                return False, reason, needs['disk'] <= capacity['disk_free'] - self.disk_reserve, None, len(gpus)
+            return True, None, False, None, len(gpus)
+        
+        launches = [ticket for ticket in others if ticket.kind == 'launch']
+        if capacity['ram_total'] and capacity['ram_free'] is not None:
+            # Started apps may not have allocated yet: trust the smaller of measured and reserved
+            reserved = sum(ticket.needs['ram'] for ticket in launches)
+            free = min(capacity['ram_free'], capacity['ram_total'] - reserved) - self.ram_reserve
+            if needs['ram'] > free:
+                reason = f"needs ~{_format_bytes(needs['ram'])} of RAM, {_format_bytes(max(0, free))} available"
+                return False, reason, needs['ram'] <= capacity['ram_total'] - self.ram_reserve, None, len(gpus)
+        
+        if not needs['vram']:
+            return True, None, False, None, len(gpus)
+        if not gpus:
+            # No readable GPU is unknown capacity: only a probe reporting too little refuses
+            reason = f"needs ~{_format_bytes(needs['vram'])} of VRAM; GPU memory could not be read, starting anyway"
+            return True, reason, False, None, 0
+        best = None
+        largest = 0
+        for gpu in gpus:
+            reserved = sum(ticket.needs['vram'] for ticket in launches if ticket.gpu == gpu['index'])
+            free = min(gpu['total'] - gpu['used'], gpu['total'] - reserved)
+            largest = max(largest, free)
+            if free >= needs['vram'] and (best is None or free < best[1]):
+                best = (gpu['index'], free)
+        if best is None:
+            reason = f"needs ~{_format_bytes(needs['vram'])} of VRAM, {_format_bytes(max(0, largest))} free"
+            return False, reason, any(needs['vram'] <= gpu['total'] for gpu in gpus), None, len(gpus)
+        return True, None, False, best[0], len(gpus)
+    
+    def admit(self, app_id, app_data, kind, wait=0, on_wait=None):
+        """Reserve resources for an 'install' or 'launch'; returns an AdmissionTicket.
+        
+        When the request could fit later, it waits up to ``wait`` seconds
+        (None waits indefinitely), calling ``on_wait(reason)`` once.
+        """
+        needs = self.estimate(app_id, app_data)
+        deadline = None if wait is None else time.time() + wait
+        notified = False
+        with self._condition:
+            while True:
+                admitted, reason, fits_later, gpu, gpu_count = self._check(app_id, kind, needs)
+                ticket = AdmissionTicket(self, app_id, kind, needs, admitted, reason, fits_later, gpu)
+                ticket.gpu_count = gpu_count
+                if admitted:
+                    self.reservations[(app_id, kind)] = ticket
+                    return ticket
+                remaining = None if deadline is None else deadline - time.time()
+                if not fits_later or (remaining is not None and remaining <= 0):
+                    return ticket
+                if on_wait is not None and not notified:
+                    on_wait(reason)
+                    notified = True
+                # Releases wake the queue; polling picks up capacity freed outside it
+                self._condition.wait(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+    
+    def release(self, app_id, kind, ticket=None):
+        """Drop a reservation (only if it is still ``ticket``, when given) and wake queued requests."""
+        with self._condition:
+            held = self.reservations.get((app_id, kind))
+            if held is not None and (ticket is None or held is ticket):
+                del self.reservations[(app_id, kind)]
+                self._condition.notify_all()
+
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           APP HIBERNATION                                     ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class AppHibernator:
+    """Stops idle apps to free memory and brings them back on demand.
+    
+    Activity is the latest of: the app becoming ready, bytes through its
+    tunnel's forwarder, and established TCP connections to its port (seen
+    in /proc/net/tcp, so direct browser traffic counts too). An app idle
+    for ``idle_seconds`` is stopped and its resume state recorded; its
+    tunnel is held open with a wake hook, so the next request through the
+    tunnel, or a Run click, resumes it on the same port and the same URL.
+    """
+    
+    def __init__(self, app_runner, tunnel_manager=None, supervisor=None, idle_seconds=1800,
+                 interval=30, resume_timeout=600):
+        self.app_runner = app_runner
+        self.tunnel_manager = tunnel_manager
+        self.supervisor = supervisor
+        self.idle_seconds = idle_seconds
+        self.interval = interval
+        self.resume_timeout = resume_timeout
+        self.last_activity = {}
+        self.hibernated = {}
+        self.resume_count = collections.Counter()
+        self._resume_locks = collections.defaultdict(threading.Lock)
+        self._thread = None
+    
+    def start(self):
+        """Start the idle checker thread."""
+        if self._thread is None and self.idle_seconds:
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="sd-hibernator")
+            self._thread.start()
+        return self
+    
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check_idle()
+            except Exception:
+                pass
+    
+    def is_hibernated(self, app_id):
+        return app_id in self.hibernated
+    
+    def activity(self, app_id):
+        """Latest activity time for a running app, refreshing the socket check."""
+        readiness = self.app_runner.readiness.get(app_id)
+        latest = max(self.last_activity.get(app_id, 0), (readiness.ready_at or 0) if readiness else 0)
+        tunnel = self.tunnel_manager.tunnels.get(app_id) if self.tunnel_manager else None
+        if tunnel is not None:
+            latest = max(latest, tunnel.forwarder.last_activity)
+        proxy = getattr(self.tunnel_manager, 'proxy', None)
+        if proxy is not None:
+            latest = max(latest, proxy.last_activity.get(app_id, 0))
+        if readiness is not None and readiness.port and established_connections(readiness.port):
+            latest = time.time()
+        self.last_activity[app_id] = latest
+        return latest
+    
+    def check_idle(self, now=None):
+        """Hibernate every ready app idle for longer than idle_seconds."""
+        now = now or time.time()
+        hibernated = []
+        for app_id in list(self.app_runner.running_processes):
+            readiness = self.app_runner.readiness.get(app_id)
+            if readiness is None or readiness.state != 'ready':
+                continue
+            if now - self.activity(app_id) >= self.idle_seconds:
+                if self.hibernate(app_id):
+                    hibernated.append(app_id)
+        return hibernated
+    
+    def hibernate(self, app_id):
+        """Stop an app, keeping what is needed to resume it."""
+        handle = self.app_runner.running_processes.get(app_id)
+        if handle is None or handle.done():
+            return False
+        readiness = self.app_runner.readiness.get(app_id)
+        tunnel = self.tunnel_manager.tunnels.get(app_id) if self.tunnel_manager else None
+        spec = self.app_runner.launch_specs.get(app_id, {})
+        entry = self.supervisor.apps.get(app_id) if self.supervisor else None
+        record = {
+            'app_data': spec.get('app_data') or {'name': app_id},
+            'command': spec.get('command'),
+            'cwd': spec.get('cwd'),
+            'env': dict(spec.get('env') or {}),
+            'port': readiness.port if readiness else None,
+            'tunnel_url': self.tunnel_manager.url_for(app_id) if self.tunnel_manager else None,
+            'hibernated_at': time.time(),
+        }
+        self.hibernated[app_id] = record
+        if tunnel is not None:
+            self.tunnel_manager.held.add(app_id)
+            tunnel.forwarder.wake = lambda: self.resume(app_id)
+        elif self.tunnel_manager and app_id in self.tunnel_manager.proxied:
+            # The proxy wakes it; keep its path published on the shared tunnel
+            self.tunnel_manager.held.add(app_id)
+        
+        if self.supervisor:
+            stopped = self.supervisor.stop(app_id, final_state='hibernated')
+        else:
+            stopped = self.app_runner.stop_app(app_id)
+        # Not handle.wait(): the exit hook runs after the future resolves
+        self.app_runner.wait_for_exit(handle)
+        self.app_runner.output_widget.append_stdout(
+            f"💤 {app_id} hibernated after {self.idle_seconds:.0f}s idle"
+            f"{' (tunnel kept at ' + record['tunnel_url'] + ')' if record['tunnel_url'] else ''}\n"
+        )
+        return stopped
+    
+    def resume(self, app_id):
+        """Bring a hibernated app back; returns its port once ready, or None.
+        
+        Safe to call from several threads at once (e.g. concurrent requests
+        through the tunnel): they share one restart.
+        """
+        with self._resume_locks[app_id]:
+            record = self.hibernated.get(app_id)
+            if record is None:
+                return self.app_runner.port_for(app_id)
+            env = dict(record['env'])
+            if record['port']:
+                # Ask common frameworks for the same port as before
+                env.update({
+                    'GRADIO_SERVER_PORT': str(record['port']),
+                    'PORT': str(record['port']),
+                    'STREAMLIT_SERVER_PORT': str(record['port']),
+                })
+            self.app_runner.output_widget.append_stdout(f"⏰ Resuming {app_id}...\n")
+            if self.supervisor and app_id in self.supervisor.apps:
+                started = self.supervisor.restart(app_id, env=env)
+            else:
+                started = self.app_runner.run_app(app_id, record['app_data'], env=env)
+            port = self.app_runner.wait_until_ready(app_id, self.resume_timeout) if started else None
+            if port is None:
+                return None
+            
+            del self.hibernated[app_id]
+            self.resume_count[app_id] += 1
+            self.last_activity[app_id] = time.time()
+            tunnel = self.tunnel_manager.tunnels.get(app_id) if self.tunnel_manager else None
+            if tunnel is not None:
+                tunnel.forwarder.target_port = port
+                tunnel.forwarder.wake = None
+            if self.tunnel_manager:
+                self.tunnel_manager.held.discard(app_id)
+            return port
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           APP PROXY                                           ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+class AppProxy:
+    """One-port HTTP and WebSocket reverse proxy in front of every running app.
+    
+    Requests are routed by path prefix (``/<app_id>/...``, stripped before
+    forwarding) or host name (``<app_id>.<domain>``). Apps that emit
+    absolute paths (``/assets/...``) still work: such requests go to the app
+    named by the Referer, or by the ``sd-app`` cookie set on prefixed
+    responses. Bodies stream through in both directions, upstream
+    connections are pooled per port, and WebSocket upgrades become raw
+    byte relays. Like PortForwarder it runs on the command engine's loop,
+    so a single tunnel pointed at it serves every app.
+    """
+    
+    HOP_HEADERS = frozenset({'connection', 'keep-alive', 'proxy-connection', 'proxy-authenticate',
+                             'proxy-authorization', 'te', 'trailer', 'transfer-encoding', 'upgrade'})
+    COOKIE = "sd-app"
+    MAX_HEAD = 64 * 1024
+    READ_SIZE = 64 * 1024
+    IDLE_PER_PORT = 8
+    IDLE_SECONDS = 30
+    # Pooled connections past IDLE_SECONDS are closed on this timer, not only on the next
+    # request, so they do not keep counting as traffic on the app's port (see AppHibernator)
+    REAP_SECONDS = 5
+    
+    def __init__(self, engine, resolve, apps=None, wake=None, host="127.0.0.1", port=0):
+        self.engine = engine
+        # resolve(app_id) -> port or None; apps() -> routable app ids
+        self.resolve = resolve
+        self.apps = apps or (lambda: ())
+        # Optional blocking wake(app_id) -> port, tried when an app refuses connections
+        self.wake = wake
+        self.host = host
+        self.port = port or None
+        self._bind_port = port
+        self.last_activity = {}
+        self.requests = collections.Counter()
+        self.upstream_opened = 0
+        self.upstream_reused = 0
+        self._idle = collections.defaultdict(list)
+        self._server = None
+        self._reaper = None
+    
+    def start(self):
+        """Start serving (once); returns the bound port."""
+        if self._server is None:
+            self.engine.call_soon(self._start()).result()
+        return self.port
+    
+    def stop(self):
+        if self._server is not None:
+            self.engine.call_soon(self._stop()).result()
+    
+    def url_path(self, app_id):
+        return f"/{urllib.parse.quote(app_id, safe='')}/"
+    
+    async def _start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self._bind_port, limit=self.MAX_HEAD)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._reaper = asyncio.ensure_future(self._reap_idle())
+    
+    async def _stop(self):
+        self._reaper.cancel()
+        self._reaper = None
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        for idle in self._idle.values():
+            for reader, writer, since in idle:
+                writer.close()
+        self._idle.clear()
+    
+    # ---- HTTP/1.1 framing ----------------------------------------------------------
+    
+    @staticmethod
+    def _header(headers, name):
+        name = name.lower()
+        for key, value in headers:
+            if key.lower() == name:
+                return value
+        return None
+    
+    @staticmethod
+    async def _read_head(reader):
+        """(start line, [(name, value)]) of the next message, or None at EOF."""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        lines = head.decode('latin-1').split("\r\n")
+        headers = []
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers.append((name.strip(), value.strip()))
+        return lines[0], headers
+    
+    @staticmethod
+    def _encode_head(start_line, headers):
+        lines = [start_line] + [f"{name}: {value}" for name, value in headers]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+    
+    async def _copy_length(self, reader, writer, length):
+        while length > 0:
+            data = await reader.read(min(self.READ_SIZE, length))
+            if not data:
+                raise ConnectionResetError("body ended early")
+            writer.write(data)
+            await writer.drain()
+            length -= len(data)
+    
+    async def _copy_chunked(self, reader, writer):
+        """Relay a chunked body frame by frame, trailers included."""
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            writer.write(size_line)
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                while True:
+                    trailer = await reader.readuntil(b"\r\n")
+                    writer.write(trailer)
+                    if trailer == b"\r\n":
+                        await writer.drain()
+                        return
+            await self._copy_length(reader, writer, size + 2)
+    
+    async def _copy_until_eof(self, reader, writer):
+        while True:
+            data = await reader.read(self.READ_SIZE)
+            if not data:
+                return
+            writer.write(data)
+            await writer.drain()
+    
+    async def _pipe(self, app_id, reader, writer):
+        try:
+            while True:
+                data = await reader.read(self.READ_SIZE)
+                if not data:
+                    break
+                self.last_activity[app_id] = time.time()
+                writer.write(data)
+                await writer.drain()
+        finally:
+            writer.close()
+    
+    async def _respond(self, writer, code, reason, body, content_type="text/plain; charset=utf-8", extra=()):
+        data = body.encode('utf-8')
+        writer.write(self._encode_head(f"HTTP/1.1 {code} {reason}", [
+            ("Content-Type", content_type), ("Content-Length", str(len(data))), *extra
+        ]) + data)
+        await writer.drain()
+    
+    # ---- routing -------------------------------------------------------------------
+    
+    def route(self, target, headers):
+        """(app_id, upstream target, prefixed) for a request; app_id is None if unrouted."""
+        apps = set(self.apps())
+        path, _, query = target.partition("?")
+        parts = path.split("/", 2)
+        if len(parts) > 1 and urllib.parse.unquote(parts[1]) in apps:
+            rest = "/" + (parts[2] if len(parts) > 2 else "")
+            return urllib.parse.unquote(parts[1]), rest + (f"?{query}" if query else ""), True
+        
+        host = (self._header(headers, "Host") or "").rsplit(":", 1)[0]
+        if "." in host and host.split(".", 1)[0] in apps:
+            return host.split(".", 1)[0], target, False
+        
+        referer = self._header(headers, "Referer")
+        if referer:
+            referer_parts = urllib.parse.urlparse(referer).path.split("/")
+            if len(referer_parts) > 1 and urllib.parse.unquote(referer_parts[1]) in apps:
+                return urllib.parse.unquote(referer_parts[1]), target, False
+        
+        for cookie in (self._header(headers, "Cookie") or "").split(";"):
+            name, _, value = cookie.strip().partition("=")
+            value = urllib.parse.unquote(value)
+            if name == self.COOKIE and value in apps and path != "/":
+                return value, target, False
+        return None, target, False
+    
+    def index_html(self):
+        links = "".join(
+            f'<li><a href="{html.escape(self.url_path(app_id))}">{html.escape(app_id)}</a>'
+            f'{"" if self.resolve(app_id) else " (not running)"}</li>'
+            for app_id in sorted(self.apps())
+        )
+        return f"<html><body><h3>🚀 SD-Pinnokio apps</h3><ul>{links or '<li>No apps running</li>'}</ul></body></html>"
+    
+    # ---- connections ---------------------------------------------------------------
+    
+    async def _connect(self, app_id, fresh=False):
+        """(reader, writer, port, reused) for the app, waking it if it is not answering."""
+        port = self.resolve(app_id)
+        if port and not fresh:
+            idle = self._idle[port]
+            while idle:
+                reader, writer, since = idle.pop()
+                if time.monotonic() - since < self.IDLE_SECONDS and not reader.at_eof() and not writer.is_closing():
+                    self.upstream_reused += 1
+                    return reader, writer, port, True
+                writer.close()
+        try:
+            if not port:
+                raise ConnectionRefusedError(f"{app_id} has no port")
+            reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=self.MAX_HEAD)
+        except OSError:
+            if self.wake is None:
+                raise
+            port = await asyncio.get_running_loop().run_in_executor(None, self.wake, app_id)
+            if not port:
+                raise
+            reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=self.MAX_HEAD)
+        self.upstream_opened += 1
+        return reader, writer, port, False
+    
+    async def _reap_idle(self):
+        while True:
+            await asyncio.sleep(self.REAP_SECONDS)
+            self.close_expired()
+    
+    def close_expired(self, now=None):
+        """Close pooled upstream connections idle for IDLE_SECONDS (call on the engine loop)."""
+        now = time.monotonic() if now is None else now
+        for idle in self._idle.values():
+            keep = []
+            for reader, writer, since in idle:
+                if now - since < self.IDLE_SECONDS and not reader.at_eof() and not writer.is_closing():
+                    keep.append((reader, writer, since))
+                else:
+                    writer.close()
+            idle[:] = keep
+    
+    def _release(self, port, reader, writer):
+        idle = self._idle[port]
+        if len(idle) < self.IDLE_PER_PORT and not reader.at_eof() and not writer.is_closing():
+            idle.append((reader, writer, time.monotonic()))
+        else:
+            writer.close()
+    
+    # ---- request handling ----------------------------------------------------------
+    
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                head = await self._read_head(reader)
+                if head is None:
+                    break
+                request_line, headers = head
+                parts = request_line.split(" ")
+                if len(parts) != 3:
+                    await self._respond(writer, 400, "Bad Request", "Malformed request line")
+                    break
+                if not await self._serve(*parts, headers, reader, writer):
+                    break
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _serve(self, method, target, version, headers, reader, writer):
+        """Proxy one request; returns True if the client connection can be reused."""
+        has_body = self._header(headers, "Content-Length") not in (None, "0") \
+            or self._header(headers, "Transfer-Encoding") is not None
+        app_id, upstream_target, prefixed = self.route(target, headers)
+        if app_id is None:
+            if target.split("?")[0] == "/":
+                await self._respond(writer, 200, "OK", self.index_html(), "text/html; charset=utf-8")
+            else:
+                await self._respond(writer, 404, "Not Found", f"No running app serves {target}")
+            return not has_body
+        if prefixed and urllib.parse.unquote(target.split("?")[0]) == f"/{app_id}":
+            await self._respond(writer, 301, "Moved Permanently", "", extra=[("Location", self.url_path(app_id))])
+            return not has_body
+        
+        self.requests[app_id] += 1
+        self.last_activity[app_id] = time.time()
+        websocket = "websocket" in (self._header(headers, "Upgrade") or "").lower()
+        connection = (self._header(headers, "Connection") or "").lower()
+        client_keep_alive = version == "HTTP/1.1" and "close" not in connection
+        
+        forwarded = [(name, value) for name, value in headers
+                     if name.lower() not in self.HOP_HEADERS and name.lower() != "expect"]
+        peer = writer.get_extra_info("peername")
+        forwarded += [
+            ("X-Forwarded-For", peer[0] if peer else "unknown"),
+            ("X-Forwarded-Proto", self._header(headers, "X-Forwarded-Proto") or "http"),
+            ("X-Forwarded-Host", self._header(headers, "Host") or ""),
+        ]
+        if prefixed:
+            forwarded.append(("X-Forwarded-Prefix", self.url_path(app_id)[:-1]))
+        chunked = "chunked" in (self._header(headers, "Transfer-Encoding") or "").lower()
+        if chunked:
+            forwarded.append(("Transfer-Encoding", "chunked"))
+        if websocket:
+            forwarded += [("Connection", "Upgrade"), ("Upgrade", self._header(headers, "Upgrade"))]
+        else:
+            forwarded.append(("Connection", "keep-alive"))
+        request_head = self._encode_head(f"{method} {upstream_target} HTTP/1.1", forwarded)
+        if "100-continue" in (self._header(headers, "Expect") or "").lower():
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        
+        response = None
+        for attempt in range(2):
             try:
-                print(f"🚀 Starting: {main_script}")
-                print("📊 Process output will appear below:")
-                print("-" * 40)
-                
-                # Start the process
-                process = subprocess.Popen(
-                    [sys.executable, main_script],
-                    cwd=str(app_dir),
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1,
-                    universal_newlines=True
-                )
-                
-                self.running_processes[app_id] = process
-                
-                # Stream output in a separate thread
-                def stream_output():
-                    for line in process.stdout:
-                        with self.output_widget:
-                            print(line.rstrip())
-                
-                output_thread = threading.Thread(target=stream_output, daemon=True)
-                output_thread.start()
-                
-                print(f"✅ Process started with PID: {process.pid}")
-                print("🌐 App is running - check output above for web URL")
-                return True
-                
-            except Exception as e:
-                print(f"❌ Failed to start app: {e}")
-                import traceback
-                traceback.print_exc()
-                return False
+                up_reader, up_writer, port, reused = await self._connect(app_id, fresh=websocket or attempt > 0)
+            except OSError:
+                await self._respond(writer, 502, "Bad Gateway", f"{app_id} is not running")
+                return not has_body
+            up_writer.write(request_head)
+            if chunked:
+                await self._copy_chunked(reader, up_writer)
+            elif has_body:
+                await self._copy_length(reader, up_writer, int(self._header(headers, "Content-Length")))
+            await up_writer.drain()
+            try:
+                response = await self._read_head(up_reader)
+            except (OSError, asyncio.LimitOverrunError):
+                response = None
+            if response is not None or not reused or has_body:
+                break
+            up_writer.close()  # a pooled connection the app had already closed; retry once
+        if response is None:
+            up_writer.close()
+            await self._respond(writer, 502, "Bad Gateway", f"{app_id} closed the connection")
+            return False
+        
+        status_line, response_headers = response
+        code = int(status_line.split(" ", 2)[1])
+        if websocket and code == 101:
+            writer.write(self._encode_head(status_line, response_headers))
+            await writer.drain()
+            await asyncio.gather(self._pipe(app_id, reader, up_writer), self._pipe(app_id, up_reader, writer),
+                                 return_exceptions=True)
+            return False
+        
+        length = self._header(response_headers, "Content-Length")
+        response_chunked = "chunked" in (self._header(response_headers, "Transfer-Encoding") or "").lower()
+        bodiless = method == "HEAD" or code in (204, 304) or 100 <= code < 200
+        framed = bodiless or response_chunked or length is not None
+        upstream_keep_alive = framed and "close" not in (self._header(response_headers, "Connection") or "").lower()
+        keep_alive = client_keep_alive and framed
+        
+        out = []
+        for name, value in response_headers:
+            if name.lower() in self.HOP_HEADERS:
+                continue
+            if prefixed and name.lower() == "location":
+                local = f"http://127.0.0.1:{port}"
+                value = value[len(local):] if value.startswith(local) else value
+                if value.startswith("/"):
+                    value = self.url_path(app_id)[:-1] + value
+            out.append((name, value))
+        if response_chunked and not bodiless:
+            out.append(("Transfer-Encoding", "chunked"))
+        if prefixed:
+            out.append(("Set-Cookie", f"{self.COOKIE}={urllib.parse.quote(app_id, safe='')}; Path=/; SameSite=Lax"))
+        out.append(("Connection", "keep-alive" if keep_alive else "close"))
+        writer.write(self._encode_head(status_line, out))
+        
+        if bodiless:
+            pass
+        elif response_chunked:
+            await self._copy_chunked(up_reader, writer)
+        elif length is not None:
+            await self._copy_length(up_reader, writer, int(length))
+        else:
+            await self._copy_until_eof(up_reader, writer)
+        await writer.drain()
+        
+        if upstream_keep_alive:
+            self._release(port, up_reader, up_writer)
+        else:
+            up_writer.close()
+        self.last_activity[app_id] = time.time()
+        return keep_alive
 
 # ╔═══════════════════════════════════════════════════════════════════════════════╗
 # ║                           TUNNEL MANAGER                                     ║
 # ╚═══════════════════════════════════════════════════════════════════════════════╝
 
+class PortForwarder:
+    """Loopback TCP relay in front of a tunnel, so its target port can change.
+    
+    A quick tunnel's origin is fixed when cloudflared starts. Pointing it at
+    this relay instead of the app lets warm tunnels start before any app is
+    known and keeps a tunnel's URL when its app moves to another port.
+    """
+    
+    def __init__(self, engine, target_port=None):
+        self.engine = engine
+        self.target_port = target_port
+        self.port = None
+        self.connections = 0
+        self.last_activity = time.time()
+        # Optional blocking callable returning a fresh target port (wakes hibernated apps)
+        self.wake = None
+        self._server = None
+    
+    def start(self):
+        """Bind a free loopback port and start relaying; returns the port."""
+        self.engine.call_soon(self._start()).result()
+        return self.port
+    
+    def stop(self):
+        if self._server is not None:
+            self.engine.call_soon(self._stop()).result()
+    
+    async def _start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+    
+    async def _stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+    
+    async def _handle(self, reader, writer):
+        self.last_activity = time.time()
+        if self.wake is not None:
+            port = await asyncio.get_running_loop().run_in_executor(None, self.wake)
+            self.target_port = port or self.target_port
+        target = self.target_port
+        try:
+            if target is None:
+                raise ConnectionRefusedError("No app attached to this tunnel")
+            upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", target)
+        except OSError:
+            writer.close()
+            return
+        self.connections += 1
+        await asyncio.gather(
+            self._pipe(reader, upstream_writer),
+            self._pipe(upstream_reader, writer),
+            return_exceptions=True
+        )
+    
+    async def _pipe(self, reader, writer):
+        try:
+            while True:
+                data = await reader.read(64 * 1024)
+                if not data:
+                    break
+                self.last_activity = time.time()
+                writer.write(data)
+                await writer.drain()
+        finally:
+            writer.close()
+
+class QuickTunnel:
+    """One cloudflared quick tunnel: process handle, public URL and readiness."""
+    
+    URL_PATTERN = re.compile(r"https://[-a-z0-9]+\.trycloudflare\.com")
+    READY_PATTERN = re.compile(r"Registered tunnel connection|Connection [0-9a-f-]+ registered", re.IGNORECASE)
+    
+    def __init__(self, forwarder):
+        self.forwarder = forwarder
+        self.app_id = None
+        self.url = None
+        self.state = 'starting'
+        self.handle = None
+        self.lines = collections.deque(maxlen=200)
+        self.started_at = time.time()
+        self.ready_at = None
+        self.ready = threading.Event()
+    
+    def on_line(self, stream, line):
+        """Parse cloudflared's log stream (runs on the engine thread)."""
+        self.lines.append(line)
+        if self.url is None:
+            match = self.URL_PATTERN.search(line)
+            if match:
+                self.url = match.group(0)
+        if self.url and self.state == 'starting' and self.READY_PATTERN.search(line):
+            self.state = 'ready'
+            self.ready_at = time.time()
+            self.ready.set()
+    
+    def on_exit(self, future):
+        if self.state != 'closed':
+            self.state = 'failed'
+        self.ready.set()
+    
+    @property
+    def alive(self):
+        return self.handle is not None and not self.handle.done()
+    
+    @property
+    def startup_seconds(self):
+        return self.ready_at - self.started_at if self.ready_at else None
+    
+    def wait_ready(self, timeout=None):
+        """Block until the tunnel is registered; False if it failed or timed out."""
+        self.ready.wait(timeout)
+        return self.state == 'ready'
+    
+    def close(self):
+        self.state = 'closed'
+        if self.handle is not None:
+            self.handle.cancel()
+        self.forwarder.stop()
+
 class TunnelManager:
-    """Handle Cloudflare tunneling for applications."""
+    """Handle Cloudflare tunneling for applications.
+    
+    Every tunnel is a real ``cloudflared tunnel --url`` quick tunnel run by the
+    command engine and pointed at a PortForwarder. A small pool of warm
+    tunnels is kept registered ahead of time; creating a tunnel for an app
+    just attaches a warm one to the app's port, so the URL is ready without
+    cloudflared's cold start.
+    
+    With a ``proxy`` (AppProxy), one shared tunnel points at the proxy and
+    every app is published under its path on that tunnel's URL, so later
+    apps need no cloudflared process at all.
+    """
     
-    def __init__(self, output_widget):
+    BINARY_NAMES = ("usr/bin/cloudflared", "usr/local/bin/cloudflared")
+    
+    def __init__(self, output_widget, binary=None, pool_size=1, ready_timeout=60, tracer=None, proxy=None):
         self.output_widget = output_widget
-        self.cloudflare_manager = None
-        
+        self.tracer = tracer or TRACER
+        self.binary = binary
+        self.pool_size = pool_size
+        self.ready_timeout = ready_timeout
+        self.engine = command_engine()
+        self.tunnels = {}
+        self.pool = collections.deque()
+        # App ids whose tunnels survive the app exiting (hibernated apps)
+        self.held = set()
+        self.proxy = proxy
+        self.shared_tunnel = None
+        # Apps published through the shared tunnel
+        self.proxied = set()
+        self._lock = threading.Lock()
+        self._replenishing = False
+    
     def setup_cloudflare(self):
         """Setup Cloudflare tunneling."""
+        self.binary = self.binary or self.find_cloudflared()
+        if not self.binary:
+            print("❌ cloudflared not found; install it or provide a complete cloudflared.deb")
+            return False
+        print(f"✅ cloudflared ready: {self.binary}")
+        return True
+    
+    @classmethod
+    def find_cloudflared(cls, deb_path="cloudflared.deb", install_dir=None):
+        """Locate cloudflared on PATH, or unpack it from the bundled .deb."""
+        found = shutil.which("cloudflared")
+        if found:
+            return found
+        install_dir = Path(install_dir or Path("tools") / "bin")
+        target = install_dir / "cloudflared"
+        if target.exists():
+            return str(target)
+        if not Path(deb_path).exists():
+            return None
         try:
-            from tunneling.cloudflare_manager import CloudflareManager
-            self.cloudflare_manager = CloudflareManager()
-            print("✅ Cloudflare manager initialized!")
-            return True
+            # A .deb is an ar archive; the binary lives in its data.tar.* member
+            with open(deb_path, "rb") as deb:
+                if deb.read(8) != b"!<arch>\n":
+                    raise ValueError("not an ar archive")
+                while True:
+                    header = deb.read(60)
+                    if len(header) < 60:
+                        raise ValueError("no data archive in package")
+                    name = header[:16].decode().strip().rstrip("/")
+                    size = int(header[48:58])
+                    if name.startswith("data.tar"):
+                        break
+                    deb.seek(size + size % 2, os.SEEK_CUR)
+                with tarfile.open(fileobj=deb, mode="r|*") as archive:
+                    for member in archive:
+                        if member.name.lstrip("./") in cls.BINARY_NAMES:
+                            install_dir.mkdir(parents=True, exist_ok=True)
+                            partial = target.with_suffix(".partial")
+                            with archive.extractfile(member) as source, open(partial, "wb") as out:
+                                shutil.copyfileobj(source, out)
+                            partial.chmod(0o755)
+                            os.replace(partial, target)
+                            return str(target)
+            raise ValueError("cloudflared binary not found in package")
         except Exception as e:
-            print(f"❌ Failed to initialize Cloudflare: {e}")
-            return False
+            print(f"⚠️ Could not unpack {deb_path}: {e}")
+            return None
+    
+    # ---- tunnel lifecycle ----------------------------------------------------------
+    
+    def launch(self):
+        """Start a new quick tunnel in front of an unattached forwarder."""
+        forwarder = PortForwarder(self.engine)
+        port = forwarder.start()
+        tunnel = QuickTunnel(forwarder)
+        tunnel.handle = self.engine.submit(
+            [self.binary, "tunnel", "--no-autoupdate", "--url", f"http://127.0.0.1:{port}"],
+            merge_stderr=True,
+            on_line=tunnel.on_line
+        )
+        tunnel.handle.future.add_done_callback(tunnel.on_exit)
+        return tunnel
+    
+    def replenish(self):
+        """Top the warm pool up to pool_size, dropping dead tunnels."""
+        try:
+            while self.binary:
+                with self._lock:
+                    for dead in [tunnel for tunnel in self.pool if tunnel.state in ('failed', 'closed')]:
+                        self.pool.remove(dead)
+                        dead.close()
+                    if len(self.pool) >= self.pool_size:
+                        return
+                tunnel = self.launch()
+                with self._lock:
+                    if self.pool_size <= 0:
+                        tunnel.close()
+                        return
+                    self.pool.append(tunnel)
+                if not tunnel.wait_ready(self.ready_timeout):
+                    return
+        finally:
+            with self._lock:
+                self._replenishing = False
+    
+    def replenish_in_background(self):
+        """Refill the warm pool on a daemon thread."""
+        with self._lock:
+            if self._replenishing or self.pool_size <= 0 or not self.binary:
+                return
+            self._replenishing = True
+        threading.Thread(target=self.replenish, daemon=True, name="sd-tunnel-pool").start()
+    
+    def _take_warm(self):
+        with self._lock:
+            while self.pool:
+                tunnel = self.pool.popleft()
+                if tunnel.alive and tunnel.state in ('starting', 'ready'):
+                    return tunnel
+                tunnel.close()
+        return None
+    
+    def url_for(self, app_id):
+        if app_id in self.proxied:
+            shared = self.shared_tunnel
+            return shared.url + self.proxy.url_path(app_id) if shared and shared.alive and shared.url else None
+        tunnel = self.tunnels.get(app_id)
+        return tunnel.url if tunnel and tunnel.alive else None
+    
+    def _ensure_shared(self, span):
+        """The tunnel in front of the proxy, started (or taken warm) on first use."""
+        with self._lock:
+            tunnel = self.shared_tunnel
+            if tunnel is not None and tunnel.alive:
+                span.set(warm=True, shared=True)
+                return tunnel
+        if tunnel is not None:
+            tunnel.close()
+        self.proxy.start()
+        tunnel = self._take_warm()
+        print("♨️ Using a warm tunnel for the shared proxy" if tunnel else "🧊 Starting the shared cloudflared tunnel")
+        span.set(warm=tunnel is not None, shared=True)
+        if tunnel is None:
+            with self.tracer.span("cloudflared start"):
+                tunnel = self.launch()
+        tunnel.app_id = None
+        tunnel.forwarder.target_port = self.proxy.port
+        with self._lock:
+            self.shared_tunnel = tunnel
+        self.replenish_in_background()
+        return tunnel
     
     def create_tunnel(self, app_id, app_data, port=7860):
-        """Create a tunnel for the application."""
+        """Create a tunnel for the application inside a ``tunnel`` trace span."""
+        with self.tracer.span("tunnel", app_id=app_id, port=port) as span:
+            ok = self._create_tunnel(app_id, app_data, port, span)
+            if not ok:
+                span.fail("tunnel not created")
+            return ok
+    
+    def _create_tunnel(self, app_id, app_data, port, span):
         with self.output_widget:
             print(f"\n🌐 CREATING TUNNEL: {app_data.get('name', app_id)}")
             print("=" * 50)
             
-            if not self.cloudflare_manager:
+            if not self.binary:
                 print("❌ Cloudflare manager not initialized")
                 return False
             
             try:
                 print(f"🔗 Creating tunnel for port {port}...")
                 
-                # Create tunnel (this would use the real CloudflareManager)
-                # For now, simulate the tunnel creation
-                tunnel_url = f"https://{app_id}-{port}.trycloudflare.com"
+                if self.proxy is not None:
+                    tunnel = self._ensure_shared(span)
+                    self.proxied.add(app_id)
+                else:
+                    tunnel = self.tunnels.get(app_id)
+                    if tunnel is not None and not tunnel.alive:
+                        self.close_tunnel(app_id)
+                        tunnel = None
+                    if tunnel is None:
+                        tunnel = self._take_warm()
+                        print("♨️ Using a warm tunnel from the pool" if tunnel else "🧊 Starting a new cloudflared tunnel")
+                        span.set(warm=tunnel is not None)
+                        if tunnel is None:
+                            with self.tracer.span("cloudflared start"):
+                                tunnel = self.launch()
+                        tunnel.app_id = app_id
+                        self.tunnels[app_id] = tunnel
+                        self.replenish_in_background()
+                    tunnel.forwarder.target_port = port
+                
+                with self.tracer.span("tunnel ready") as ready_span:
+                    ready = tunnel.wait_ready(self.ready_timeout)
+                    ready_span.set(state=tunnel.state, url=tunnel.url)
+                    if not ready:
+                        ready_span.fail(f"tunnel {tunnel.state}")
+                if not ready:
+                    print(f"❌ Tunnel did not become ready ({tunnel.state})")
+                    for line in list(tunnel.lines)[-5:]:
+                        print(f"   {line}")
+                    self.close_tunnel(app_id)
+                    return False
                 
                 print(f"✅ Tunnel created successfully!")
-                print(f"🔗 Public URL: {tunnel_url}")
+                print(f"🔗 Public URL: {self.url_for(app_id)}")
                 print(f"📡 Local port: {port}")
                 print(f"🌐 Your app is now accessible publicly!")
                 
@@ -432,23 +7192,260 @@ class TunnelManager:
                 import traceback
                 traceback.print_exc()
                 return False
+    
+    def close_tunnel(self, app_id, force=False):
+        """Tear down an app's tunnel; returns False if it had none or it is held."""
+        if app_id in self.held and not force:
+            return False
+        self.held.discard(app_id)
+        if app_id in self.proxied:
+            # The shared tunnel stays up for the other apps
+            self.proxied.discard(app_id)
+            return True
+        tunnel = self.tunnels.pop(app_id, None)
+        if tunnel is None:
+            return False
+        tunnel.close()
+        return True
+    
+    def shutdown(self):
+        """Close every app tunnel and the warm pool."""
+        self.pool_size = 0
+        for app_id in list(self.tunnels) + list(self.proxied):
+            self.close_tunnel(app_id, force=True)
+        with self._lock:
+            while self.pool:
+                self.pool.popleft().close()
+            shared, self.shared_tunnel = self.shared_tunnel, None
+        if shared is not None:
+            shared.close()
+        if self.proxy is not None:
+            self.proxy.stop()
 
 # ╔═══════════════════════════════════════════════════════════════════════════════╗
 # ║                           UI COMPONENTS                                       ║
 # ╚═══════════════════════════════════════════════════════════════════════════════╝
 
+class AppCard:
+    """Reusable app card: widgets are built once and rebound to different apps."""
+    
+    def __init__(self, on_install, on_run, on_tunnel, on_stop):
+        self.app_id = None
+        self.app_data = None
+        self.info_html = widgets.HTML()
+        
+        # Action buttons
+        install_btn = widgets.Button(
+            description='📥 Install',
+            button_style='success',
+            layout=widgets.Layout(width='100px')
+        )
+        
+        run_btn = widgets.Button(
+            description='▶️ Run',
+            button_style='primary',
+            layout=widgets.Layout(width='80px')
+        )
+        
+        tunnel_btn = widgets.Button(
+            description='🌐 Tunnel',
+            button_style='info',
+            layout=widgets.Layout(width='100px')
+        )
+        
+        stop_btn = widgets.Button(
+            description='⏹️ Stop',
+            button_style='danger',
+            layout=widgets.Layout(width='80px')
+        )
+        
+        # Handlers read the card's current app, so rebinding needs no new callbacks
+        install_btn.on_click(lambda b: on_install(self.app_id, self.app_data))
+        run_btn.on_click(lambda b: on_run(self.app_id, self.app_data))
+        tunnel_btn.on_click(lambda b: on_tunnel(self.app_id, self.app_data))
+        stop_btn.on_click(lambda b: on_stop(self.app_id, self.app_data))
+        
+        self.widget = widgets.VBox(
+            [self.info_html, widgets.HBox([install_btn, run_btn, tunnel_btn, stop_btn])],
+            layout=widgets.Layout(display='none')
+        )
+    
+    def bind(self, app_id, app_data):
+        """Show this card for another app; unchanged cards send no updates."""
+        if app_id != self.app_id or app_data is not self.app_data:
+            self.app_id = app_id
+            self.app_data = app_data
+            self.info_html.value = self.render_html(app_id, app_data)
+        if self.widget.layout.display != '':
+            self.widget.layout.display = ''
+    
+    def hide(self):
+        if self.widget.layout.display != 'none':
+            self.widget.layout.display = 'none'
+    
+    @staticmethod
+    def render_html(app_id, app_data):
+        name = app_data.get('name', app_id)
+        category = app_data.get('category', 'Unknown')
+        description = (app_data.get('description') or 'No description')[:80]
+        tags = app_data.get('tags', [])
+        
+        # Check for VRAM info in tags
+        vram_info = ''
+        for tag in tags:
+            if 'GB-VRAM' in tag or 'VRAM' in tag:
+                vram_info = f' | 💾 {tag}'
+                break
+        
+        return f"""
+        <div style='border: 1px solid #ddd; padding: 10px; margin: 5px 0; 
+                   background: white; border-radius: 5px;'>
+            <h4 style='margin: 0; color: #333;'>📱 {name}</h4>
+            <p style='margin: 2px 0; color: #666; font-size: 12px;'>
+                📂 {category}{vram_info}
+            </p>
+            <p style='margin: 2px 0; color: #555; font-size: 11px;'>
+                {description}{'...' if len(description) >= 80 else ''}
+            </p>
+        </div>
+        """
+
+class AppListView:
+    """Virtualized, paginated app list backed by a fixed pool of AppCards.
+    
+    Only one window of results is ever bound to widgets. Changing the result
+    set, page or page size rebinds the pooled cards instead of rebuilding
+    them; the pool only grows when the window gets larger than it has been.
+    "Show more" extends the window a page at a time, up to ``max_window``,
+    and Next continues after the last app shown.
+    """
+    
+    def __init__(self, apps_data, page_size, on_install, on_run, on_tunnel, on_stop, max_window=500):
+        self.apps_data = apps_data
+        self.page_size = page_size
+        self.max_window = max_window
+        self.callbacks = (on_install, on_run, on_tunnel, on_stop)
+        self.app_ids = []
+        # Index of the first visible app; pages are page_size apps from here
+        self.start = 0
+        self.window = page_size
+        self.cards = []
+        
+        self.cards_box = widgets.VBox()
+        self.status_label = widgets.HTML()
+        self.prev_btn = widgets.Button(description='◀ Prev', layout=widgets.Layout(width='90px'))
+        self.next_btn = widgets.Button(description='Next ▶', layout=widgets.Layout(width='90px'))
+        self.more_btn = widgets.Button(description='⬇️ Show more', layout=widgets.Layout(width='130px'))
+        self.prev_btn.on_click(lambda b: self.previous_page())
+        self.next_btn.on_click(lambda b: self.next_page())
+        self.more_btn.on_click(lambda b: self.show_more())
+        
+        self.widget = widgets.VBox([
+            self.cards_box,
+            widgets.HBox([self.prev_btn, self.status_label, self.next_btn, self.more_btn])
+        ])
+    
+    @property
+    def page_count(self):
+        return max(1, math.ceil(len(self.app_ids) / self.page_size))
+    
+    @property
+    def page(self):
+        """Page holding the first visible app."""
+        return self.start // self.page_size
+    
+    def set_app_ids(self, app_ids):
+        """Show a new result set from its first page."""
+        self.app_ids = list(app_ids)
+        self.start = 0
+        self.window = self.page_size
+        self.render()
+    
+    def set_page_size(self, page_size):
+        """Change the page size, keeping the first visible app on screen."""
+        self.page_size = page_size
+        self.window = page_size
+        self.render()
+    
+    def go_to(self, page):
+        self.start = min(max(page, 0), self.page_count - 1) * self.page_size
+        self.window = self.page_size
+        self.render()
+    
+    def next_page(self):
+        """The page after the last app shown, also after "Show more"."""
+        if self.start + self.window < len(self.app_ids):
+            self.start += self.window
+        self.window = self.page_size
+        self.render()
+    
+    def previous_page(self):
+        self.start = max(self.start - self.page_size, 0)
+        self.window = self.page_size
+        self.render()
+    
+    def show_more(self):
+        """Extend the current window by one page (infinite-scroll style)."""
+        self.window = min(self.window + self.page_size, self.max_window)
+        self.render()
+    
+    def visible_ids(self):
+        return self.app_ids[self.start:self.start + self.window]
+    
+    def _ensure_pool(self, size):
+        if size > len(self.cards):
+            self.cards.extend(AppCard(*self.callbacks) for _ in range(size - len(self.cards)))
+            self.cards_box.children = [card.widget for card in self.cards]
+    
+    def render(self):
+        """Bind the visible window of results to the card pool."""
+        visible = [(app_id, self.apps_data.get(app_id)) for app_id in self.visible_ids()]
+        visible = [(app_id, data) for app_id, data in visible if isinstance(data, dict)]
+        self._ensure_pool(len(visible))
+        for index, card in enumerate(self.cards):
+            if index < len(visible):
+                card.bind(*visible[index])
+            else:
+                card.hide()
+        
+        shown_end = min(self.start + self.window, len(self.app_ids))
+        if self.app_ids:
+            self.status_label.value = (
+                f"&nbsp;{self.start + 1}–{shown_end} of {len(self.app_ids)} "
+                f"(page {self.page + 1}/{self.page_count})&nbsp;"
+            )
+        else:
+            self.status_label.value = "&nbsp;No matching apps&nbsp;"
+        self.prev_btn.disabled = self.start == 0
+        self.next_btn.disabled = shown_end >= len(self.app_ids)
+        self.more_btn.disabled = self.next_btn.disabled or self.window >= self.max_window
+
 class CompleteUI:
     """Create the complete user interface."""
     
-    def __init__(self, apps_db, installation_manager, app_runner, tunnel_manager):
+    # GPU memory sizes offered by the VRAM filter ("fits in N GB")
+    VRAM_CHOICES = (6, 8, 12, 16, 24)
+    
+    def __init__(self, apps_db, installation_manager, app_runner, tunnel_manager, supervisor=None,
+                 hibernator=None, output_widget=None, tracer=None):
         self.apps_db = apps_db
+        self.tracer = tracer or TRACER
         self.installation_manager = installation_manager
         self.app_runner = app_runner
         self.tunnel_manager = tunnel_manager
-        self.filtered_apps = apps_db.apps_data.copy()
+        self.supervisor = supervisor
+        self.hibernator = hibernator
+        self.filtered_app_ids = apps_db.search("")
+        self.search_debounce = 0.3
+        self._search_timer = None
+        self._search_generation = 0
+        # Debounced searches run on timer threads; filtering and the list share this lock
+        self._filter_lock = threading.RLock()
+        # Set while facet options are relabelled, so the dropdowns' observers stay quiet
+        self._refreshing_facets = False
         
-        # Create output widget
-        self.output_widget = widgets.Output(
+        # Share the managers' output widget so their output is what gets displayed
+        self.output_widget = output_widget or widgets.Output(
             layout=widgets.Layout(height='400px', overflow='scroll')
         )
         
@@ -477,19 +7474,37 @@ class CompleteUI:
         """)
         
         # Search and filter controls
-        search_box = widgets.Text(
+        self.search_box = widgets.Text(
             placeholder=f'🔍 Search ALL {len(self.apps_db.apps_data)} applications...',
             layout=widgets.Layout(width='400px')
         )
         
-        category_filter = widgets.Dropdown(
-            options=['All Categories'] + self.apps_db.categories,
+        # Facet dropdowns are labelled with live counts; values stay plain
+        self.category_filter = widgets.Dropdown(
+            options=[('All Categories', 'All Categories')] + [
+                (f"{category} ({self.apps_db.category_counts[category]})", category)
+                for category in self.apps_db.categories
+            ],
             value='All Categories',
             description='Category:',
             layout=widgets.Layout(width='200px')
         )
         
-        apps_per_page = widgets.Dropdown(
+        self.installer_filter = widgets.Dropdown(
+            options=[('Any installer', None), ('install.js', 'js'), ('install.json', 'json')],
+            value=None,
+            description='Installer:',
+            layout=widgets.Layout(width='200px')
+        )
+        
+        self.vram_filter = widgets.Dropdown(
+            options=[('Any VRAM', None)] + [(f"≤{tier}GB VRAM", tier) for tier in self.VRAM_CHOICES],
+            value=None,
+            description='VRAM:',
+            layout=widgets.Layout(width='200px')
+        )
+        
+        self.apps_per_page = widgets.Dropdown(
             options=[10, 20, 50, 100],
             value=20,
             description='Show:',
@@ -497,16 +7512,50 @@ class CompleteUI:
         )
         
         # Filter controls
-        filter_controls = widgets.HBox([search_box, category_filter, apps_per_page])
+        filter_controls = widgets.VBox([
+            widgets.HBox([self.search_box, self.category_filter, self.apps_per_page]),
+            widgets.HBox([self.installer_filter, self.vram_filter]),
+        ])
         
-        # Apps container
-        self.apps_container = widgets.VBox()
+        # Apps list: a fixed pool of cards rebound page by page
+        self.app_list = AppListView(
+            self.apps_db.apps_data, self.apps_per_page.value,
+            on_install=self.install_app, on_run=self.run_app, on_tunnel=self.create_tunnel,
+            on_stop=self.stop_app
+        )
+        self.apps_container = self.app_list.widget
         self.update_apps_display()
         
-        # Bind filter events
-        search_box.observe(self.on_filter_change, names='value')
-        category_filter.observe(self.on_filter_change, names='value')
-        apps_per_page.observe(self.on_filter_change, names='value')
+        # Batch install controls; every job gets its own status line and output channel
+        self.batch_box = widgets.Text(
+            placeholder='📦 App ids to install, comma separated...',
+            layout=widgets.Layout(width='400px')
+        )
+        batch_btn = widgets.Button(
+            description='📦 Install All',
+            button_style='success',
+            layout=widgets.Layout(width='120px')
+        )
+        batch_btn.on_click(lambda b: self.install_batch(self.batch_box.value))
+        self.install_jobs_container = widgets.VBox()
+        self.shown_jobs = {}
+        
+        # Per-app timeline of the latest install/launch/tunnel traces, refreshed as traces finish
+        self.timeline_app = widgets.Text(
+            placeholder='⏱️ App id (empty for all apps)',
+            layout=widgets.Layout(width='300px')
+        )
+        self.timeline_app.observe(lambda change: self.refresh_timeline(), names='value')
+        self.timeline = widgets.HTML(value=self.tracer.timeline_html())
+        self.phase_summary = widgets.HTML(value="")
+        self.tracer.listeners.append(lambda span: self.refresh_timeline())
+        
+        # Bind filter events; typing is debounced, the dropdowns apply at once
+        self.search_box.observe(self.on_search_typed, names='value')
+        self.category_filter.observe(self.on_filter_change, names='value')
+        self.installer_filter.observe(self.on_filter_change, names='value')
+        self.vram_filter.observe(self.on_filter_change, names='value')
+        self.apps_per_page.observe(self.on_page_size_change, names='value')
         
         # Complete interface
         return widgets.VBox([
@@ -514,165 +7563,261 @@ class CompleteUI:
             filter_controls,
             widgets.HTML(value="<h3>📱 Applications:</h3>"),
             self.apps_container,
+            widgets.HTML(value="<h3>⚙️ Install Queue:</h3>"),
+            widgets.HBox([self.batch_box, batch_btn]),
+            self.install_jobs_container,
+            widgets.HTML(value="<h3>📊 Running Apps:</h3>"),
+            self.supervisor.dashboard() if self.supervisor else widgets.HTML(),
+            widgets.HTML(value="<h3>⏱️ Provisioning Timeline:</h3>"),
+            self.timeline_app,
+            self.timeline,
+            self.phase_summary,
             widgets.HTML(value="<h3>📦 REAL Installation & Execution Output:</h3>"),
             self.output_widget
         ])
     
     def update_apps_display(self):
         """Update the apps display."""
-        app_widgets = []
-        
-        for app_id, app_data in list(self.filtered_apps.items())[:20]:  # Show 20 apps
-            if isinstance(app_data, dict):
-                app_widget = self.create_app_widget(app_id, app_data)
-                app_widgets.append(app_widget)
-        
-        self.apps_container.children = app_widgets
+        self.app_list.set_app_ids(self.filtered_app_ids)
     
-    def create_app_widget(self, app_id, app_data):
-        """Create an individual app widget."""
-        
-        name = app_data.get('name', app_id)
-        category = app_data.get('category', 'Unknown')
-        description = app_data.get('description', 'No description')[:80]
-        tags = app_data.get('tags', [])
-        
-        # Check for VRAM info in tags
-        vram_info = ''
-        for tag in tags:
-            if 'GB-VRAM' in tag or 'VRAM' in tag:
-                vram_info = f' | 💾 {tag}'
-                break
-        
-        # App info
-        info_html = widgets.HTML(value=f"""
-        <div style='border: 1px solid #ddd; padding: 10px; margin: 5px 0; 
-                   background: white; border-radius: 5px;'>
-            <h4 style='margin: 0; color: #333;'>📱 {name}</h4>
-            <p style='margin: 2px 0; color: #666; font-size: 12px;'>
-                📂 {category}{vram_info}
-            </p>
-            <p style='margin: 2px 0; color: #555; font-size: 11px;'>
-                {description}{'...' if len(description) >= 80 else ''}
-            </p>
-        </div>
-        """)
-        
-        # Action buttons
-        install_btn = widgets.Button(
-            description='📥 Install',
-            button_style='success',
-            layout=widgets.Layout(width='100px')
-        )
-        
-        run_btn = widgets.Button(
-            description='▶️ Run',
-            button_style='primary',
-            layout=widgets.Layout(width='80px')
-        )
-        
-        tunnel_btn = widgets.Button(
-            description='🌐 Tunnel',
-            button_style='info',
-            layout=widgets.Layout(width='100px')
-        )
-        
-        # Bind actions
-        install_btn.on_click(lambda b: self.install_app(app_id, app_data))
-        run_btn.on_click(lambda b: self.run_app(app_id, app_data))
-        tunnel_btn.on_click(lambda b: self.create_tunnel(app_id, app_data))
-        
-        actions = widgets.HBox([install_btn, run_btn, tunnel_btn])
-        
-        return widgets.VBox([info_html, actions])
+    def on_catalog_updated(self):
+        """Pick up synced catalog changes: category choices, counts and the current results."""
+        self.on_filter_change(None)
+    
+    def _set_options(self, dropdown, options, default):
+        """Relabel a dropdown, keeping its selection if the value is still offered."""
+        if list(dropdown.options) == options:
+            return
+        selected = dropdown.value
+        dropdown.options = options
+        dropdown.value = selected if selected in [value for _, value in options] else default
+    
+    def refresh_facet_counts(self, search_term, filters):
+        """Relabel the facet dropdowns with the counts each choice would give."""
+        counts = self.apps_db.facet_counts(search_term, filters=filters,
+                                           facets=('category', 'installer_type', 'vram'))
+        categories = counts['category']
+        vram = counts['vram']
+        self._refreshing_facets = True
+        try:
+            self._set_options(self.category_filter, [('All Categories', 'All Categories')] + [
+                (f"{category} ({categories[category]})", category) for category in sorted(categories)
+            ], 'All Categories')
+            self._set_options(self.installer_filter, [('Any installer', None)] + [
+                (f"install.{kind} ({counts['installer_type'].get(kind, 0)})", kind) for kind in ('js', 'json')
+            ], None)
+            self._set_options(self.vram_filter, [('Any VRAM', None)] + [
+                (f"≤{tier}GB VRAM ({sum(vram.get(label, 0) for label in FacetIndex.tiers_within(tier))})", tier)
+                for tier in self.VRAM_CHOICES
+            ], None)
+        finally:
+            self._refreshing_facets = False
+    
+    def refresh_timeline(self):
+        """Redraw the timeline for the chosen app and the cross-install phase summary."""
+        app_id = self.timeline_app.value.strip() or None
+        self.timeline.value = self.tracer.timeline_html(app_id)
+        self.phase_summary.value = (f"<details><summary>Where provisioning time goes</summary>"
+                                    f"{self.tracer.summary_html()}</details>")
     
     def install_app(self, app_id, app_data):
-        """Install an app."""
-        self.installation_manager.install_app(app_id, app_data)
+        """Install an app in the background."""
+        self.start_installs([app_id])
+    
+    def install_batch(self, text):
+        """Install every app id listed in the batch box."""
+        app_ids = [app_id.strip() for app_id in text.split(',') if app_id.strip()]
+        if app_ids:
+            self.start_installs(app_ids)
+    
+    def start_installs(self, app_ids):
+        """Queue installs and show each job's status and output channel."""
+        jobs = self.installation_manager.install_batch(app_ids, self.apps_db.apps_data)
+        for app_id, job in jobs.items():
+            if self.shown_jobs.get(app_id) is not job:
+                self.shown_jobs[app_id] = job
+                self.install_jobs_container.children = [
+                    shown.widget() for shown in self.shown_jobs.values()
+                ]
     
     def run_app(self, app_id, app_data):
-        """Run an app."""
-        self.app_runner.run_app(app_id, app_data)
+        """Run an app (supervised when a supervisor is available).
+        
+        Launches start off the UI thread, since admission may queue them
+        until RAM or VRAM frees up.
+        """
+        if self.hibernator and self.hibernator.is_hibernated(app_id):
+            target, args = self.hibernator.resume, (app_id,)
+        elif self.supervisor:
+            target, args = self.supervisor.start, (app_id, app_data)
+        else:
+            target, args = self.app_runner.run_app, (app_id, app_data)
+        threading.Thread(target=target, args=args, daemon=True).start()
+    
+    def stop_app(self, app_id, app_data):
+        """Stop an app's process group."""
+        stopped = self.supervisor.stop(app_id) if self.supervisor else self.app_runner.stop_app(app_id)
+        with self.output_widget:
+            print(f"⏹️ Stopping {app_data.get('name', app_id)}" if stopped else f"ℹ️ {app_data.get('name', app_id)} is not running")
     
     def create_tunnel(self, app_id, app_data):
-        """Create a tunnel for an app."""
-        self.tunnel_manager.create_tunnel(app_id, app_data)
+        """Create a tunnel for an app once its port is known."""
+        if app_id not in self.app_runner.readiness:
+            with self.output_widget:
+                print(f"▶️ Run {app_data.get('name', app_id)} first; its tunnel follows the app's real port")
+            return
+        
+        def tunnel_when_ready():
+            port = self.app_runner.wait_until_ready(app_id)
+            if port is None:
+                with self.output_widget:
+                    print(f"❌ {app_data.get('name', app_id)} is not serving HTTP; no tunnel created")
+                return
+            self.tunnel_manager.create_tunnel(app_id, app_data, port=port)
+        
+        threading.Thread(target=tunnel_when_ready, daemon=True).start()
+    
+    def on_search_typed(self, change):
+        """Restart the debounce timer; the search runs once typing pauses."""
+        with self._filter_lock:
+            if self._search_timer is not None:
+                self._search_timer.cancel()
+            self._search_generation += 1
+            self._search_timer = threading.Timer(self.search_debounce, self._run_debounced_search,
+                                                 args=(self._search_generation, change))
+            self._search_timer.daemon = True
+            self._search_timer.start()
+    
+    def _run_debounced_search(self, generation, change):
+        with self._filter_lock:
+            # A timer that fired while a newer keystroke was being handled is stale
+            if generation == self._search_generation:
+                self.on_filter_change(change)
+    
+    def on_page_size_change(self, change):
+        """Apply a new page size to the current results."""
+        with self._filter_lock:
+            self.app_list.set_page_size(change['new'])
     
     def on_filter_change(self, change):
         """Handle filter changes."""
-        # Get current filter values
-        search_term = ""
-        category = "All Categories"
-        
-        # Update filtered apps
-        if category == "All Categories":
-            self.filtered_apps = self.apps_db.apps_data.copy()
-        else:
-            self.filtered_apps = {
-                k: v for k, v in self.apps_db.apps_data.items()
-                if isinstance(v, dict) and v.get('category') == category
+        with self._filter_lock:
+            # Relabelling the facets fires their observers on this thread; ignore those
+            if self._refreshing_facets:
+                return
+            # Get current filter values
+            search_term = self.search_box.value.strip()
+            category = self.category_filter.value
+            filters = {
+                'category': None if category == "All Categories" else category,
+                'installer_type': self.installer_filter.value,
+                'vram': self.vram_filter.value,
             }
-        
-        # Apply search filter
-        if search_term:
-            search_filtered = {}
-            for app_id, app_data in self.filtered_apps.items():
-                if isinstance(app_data, dict):
-                    searchable = f"{app_data.get('name', '')} {app_data.get('description', '')} {app_id}".lower()
-                    if search_term.lower() in searchable:
-                        search_filtered[app_id] = app_data
-            self.filtered_apps = search_filtered
-        
-        self.update_apps_display()
+            
+            # Ranked ids from the inverted index; records stay in apps_db
+            self.filtered_app_ids = self.apps_db.search(search_term, filters=filters)
+            self.refresh_facet_counts(search_term, filters)
+            
+            self.update_apps_display()
 
 # ╔═══════════════════════════════════════════════════════════════════════════════╗
 # ║                           MAIN EXECUTION                                      ║
 # ╚═══════════════════════════════════════════════════════════════════════════════╝
 
 def launch_sd_pinnokio_interface():
-    """Launch the complete SD-Pinnokio interface."""
+    """Launch the complete SD-Pinnokio interface.
+    
+    Startup is staged: the catalog is opened from its snapshot and the UI is
+    displayed first; repository setup, requirement installs, the search
+    index, cloudflared and the venv pool then run in the background with
+    progress shown above the interface. Installs wait for that setup.
+    """
+    launch_started = time.perf_counter()
+    profile = STARTUP_PROFILE
+    profile.add("cell definitions", _WIDGETS_IMPORTED, launch_started)
     
     print("🚀 LAUNCHING SD-PINNOKIO COMPLETE INTERFACE...")
     print("=" * 70)
     
-    # Step 1: Environment Setup
-    print("🔧 Step 1: Setting up environment...")
-    env_setup = EnvironmentSetup()
-    if not env_setup.setup_environment():
-        print("❌ Environment setup failed!")
-        return
+    # Step 1: Load Apps Database (snapshot only; the index is built in the background)
+    print("📚 Step 1: Loading apps database...")
+    apps_db = AppsDatabase()
+    with profile.stage("catalog snapshot"):
+        if not apps_db.load_apps_database(build_index=False):
+            print("❌ Failed to load apps database!")
+            return
+    
+    # Step 2: Initialize Managers (constructors only; nothing heavy runs yet)
+    print("⚙️ Step 2: Initializing managers...")
+    with profile.stage("managers"):
+        # Create output widget
+        output_widget = widgets.Output(layout=widgets.Layout(height='400px', overflow='scroll'))
+        
+        environments = AppEnvironments()
+        # Installs and launches check disk/RAM/VRAM against the host before starting
+        admission = AdmissionController()
+        installation_manager = InstallationManager(output_widget, environments=environments, admission=admission)
+        installation_manager.ready.clear()
+        app_runner = AppRunner(output_widget, environments=environments, admission=admission)
+        # One tunnel in front of the proxy publishes every app under /<app_id>/
+        proxy = AppProxy(command_engine(), app_runner.port_for, apps=lambda: list(app_runner.readiness))
+        tunnel_manager = TunnelManager(output_widget, proxy=proxy)
+        app_runner.exit_callbacks.append(tunnel_manager.close_tunnel)
+        supervisor = ProcessSupervisor(app_runner)
+        hibernator = AppHibernator(app_runner, tunnel_manager, supervisor).start()
+        proxy.wake = hibernator.resume
     
-    if not env_setup.verify_imports():
-        print("❌ Module verification failed!")
-        return
+    # Step 3: Create and Launch UI
+    print("🎨 Step 3: Creating user interface...")
+    with profile.stage("user interface"):
+        ui = CompleteUI(apps_db, installation_manager, app_runner, tunnel_manager,
+                        supervisor=supervisor, hibernator=hibernator, output_widget=output_widget)
+        complete_interface = ui.create_complete_interface()
     
-    # Step 2: Load Apps Database
-    print("📚 Step 2: Loading apps database...")
-    apps_db = AppsDatabase()
-    if not apps_db.load_apps_database():
-        print("❌ Failed to load apps database!")
-        return
+    # Step 4: Everything the first screen does not need runs in the background
+    env_setup = EnvironmentSetup()
+    
+    def setup_repository():
+        return env_setup.setup_environment() and env_setup.verify_imports()
     
-    # Step 3: Initialize Managers
-    print("⚙️ Step 3: Initializing managers...")
+    def setup_installer():
+        try:
+            return installation_manager.setup_sd_pinnokio_components()
+        finally:
+            # Queued installs proceed (or fail with a clear message) either way
+            installation_manager.ready.set()
     
-    # Create output widget
-    output_widget = widgets.Output(layout=widgets.Layout(height='400px', overflow='scroll'))
+    def setup_tunnels():
+        if tunnel_manager.setup_cloudflare():
+            tunnel_manager.replenish_in_background()
+            return True
+        return False
     
-    # Initialize managers
-    installation_manager = InstallationManager(output_widget)
-    if not installation_manager.setup_sd_pinnokio_components():
-        print("❌ Failed to initialize installation manager!")
-        return
+    def setup_environments():
+        environments.replenish_in_background()
+        return True
     
-    app_runner = AppRunner(output_widget)
-    tunnel_manager = TunnelManager(output_widget)
-    tunnel_manager.setup_cloudflare()
+    def sync_catalog():
+        # Runs before the index build, so the index starts from the synced records
+        result = CatalogSync(apps_db).sync()
+        if result['changed']:
+            ui.on_catalog_updated()
+        return result['status'] != 'failed'
     
-    # Step 4: Create and Launch UI
-    print("🎨 Step 4: Creating user interface...")
-    ui = CompleteUI(apps_db, installation_manager, app_runner, tunnel_manager)
-    complete_interface = ui.create_complete_interface()
+    tasks = [
+        ("catalog sync", sync_catalog),
+        ("search index", lambda: apps_db.build_search_index() or True),
+        ("repository setup", setup_repository),
+        ("installer components", setup_installer),
+        ("cloudflared", setup_tunnels),
+        ("venv pool", setup_environments),
+    ]
+    # Opt-in (SD_PINNOKIO_ENRICH_CATALOG): probes every app's repo, so it goes last;
+    # the index picks up the refreshed records through apply_delta
+    enrichment = CatalogEnricher.startup_task(apps_db, on_changed=ui.on_catalog_updated)
+    if enrichment is not None:
+        tasks.append(enrichment)
+    startup = BackgroundStartup(tasks, profile)
     
     # Display the interface
     print("✅ INTERFACE READY!")
@@ -685,7 +7830,10 @@ def launch_sd_pinnokio_interface():
     print("   📊 See real-time installation progress")
     print("=" * 70)
     
+    display(startup.widget)
     display(complete_interface)
+    profile.mark("first interactive")
+    startup.start()
     
     return complete_interface
 
@@ -693,8 +7841,10 @@ def launch_sd_pinnokio_interface():
 # ║                           LAUNCH THE INTERFACE                               ║
 # ╚═══════════════════════════════════════════════════════════════════════════════╝
 
-# Launch the complete interface
-interface = launch_sd_pinnokio_interface()
+# Launch the complete interface (a notebook cell always runs as __main__;
+# importing this file from tests only defines the classes)
+if __name__ == "__main__":
+    interface = launch_sd_pinnokio_interface()
 
 # ╔═══════════════════════════════════════════════════════════════════════════════╗
 # ║                          SINGLE MEGA CELL END                                ║
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Headless benchmark suite for the SD-Pinnokio notebook interface.
+
+Measures the startup and hot paths of SINGLE_MEGA_CELL_NOTEBOOK.py without a
+Jupyter front end (ipywidgets objects are created but never rendered):
+
+  catalog    AppsDatabase load time (cold snapshot compile, warm snapshot
+             open), search index build, and memory allocated by the load
+  search     CompleteUI.on_filter_change latency over a fixed query set
+  display    CompleteUI.update_apps_display rebuild and page flip cost
+  commands   AsyncCommandEngine.run_command overhead per call, next to a bare
+             subprocess.run of the same command
+  e2e        install and run cycles against local fixture git repositories
+             and a local PEP 503 package index served over HTTP
+  proxy      request latency through AppProxy next to direct access to the
+             same local app, and a large response streamed through it
+
+Results are written as JSON and compared against a stored baseline; any
+metric slower than its baseline by more than the tolerance fails the run, as
+does a missing baseline (record one per machine with --update-baseline):
+
+  python benchmark_sd_pinnokio.py                     # run and compare
+  python benchmark_sd_pinnokio.py --update-baseline   # record a new baseline
+  python benchmark_sd_pinnokio.py --only catalog,search --output out.json
+"""
+
+import argparse
+import base64
+import contextlib
+import functools
+import hashlib
+import http.server
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import traceback
+import zipfile
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+REPO_ROOT = Path(__file__).parent.resolve()
+sys.path.insert(0, str(REPO_ROOT))
+
+CATALOG_JSON = REPO_ROOT / "cleaned_pinokio_apps.json"
+DEFAULT_BASELINE = REPO_ROOT / "benchmark_baseline.json"
+DEFAULT_OUTPUT = REPO_ROOT / "bench_results.json"
+DEFAULT_TOLERANCE = 0.5
+# Absolute slack per unit so timer noise on sub-millisecond metrics is not a regression
+NOISE_FLOOR = {"ms": 0.5, "s": 0.05, "KiB": 64}
+
+SEARCH_QUERIES = ["", "stable diffusion", "video", "audio", "llm chat", "upscale", "comfy", "xyzzy"]
+
+SUITES = ("catalog", "search", "display", "commands", "e2e", "proxy")
+
+def quiet():
+    """Swallow the cell's progress prints so they are not part of the timings."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+def timed(fn, repeat):
+    """Run fn repeat times; returns the list of durations in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+def summarize(samples):
+    """Median and p95 of a list of millisecond samples."""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return statistics.median(ordered), p95
+
+def metric(value, unit="ms", lower_is_better=True):
+    return {"value": round(value, 3), "unit": unit, "lower_is_better": lower_is_better}
+
+@contextlib.contextmanager
+def workspace():
+    """A scratch working directory holding a copy of the catalog JSON."""
+    previous = os.getcwd()
+    root = Path(tempfile.mkdtemp(prefix="sd-bench-"))
+    try:
+        shutil.copy2(CATALOG_JSON, root / CATALOG_JSON.name)
+        os.chdir(root)
+        yield root
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(root, ignore_errors=True)
+
+def loaded_ui(build_index=True):
+    """An AppsDatabase and a built CompleteUI with no managers attached."""
+    from SINGLE_MEGA_CELL_NOTEBOOK import AppsDatabase, CompleteUI
+    
+    apps_db = AppsDatabase()
+    with quiet():
+        apps_db.load_apps_database(build_index=build_index)
+        ui = CompleteUI(apps_db, None, None, None)
+        ui.create_complete_interface()
+    return apps_db, ui
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           BENCHMARKS                                          ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+def bench_catalog(repeat):
+    """Catalog load time (cold compile, warm open, index build) and memory."""
+    from SINGLE_MEGA_CELL_NOTEBOOK import AppsDatabase, CatalogSnapshot
+    
+    results = {}
+    with workspace() as root:
+        snapshot = CatalogSnapshot.snapshot_path_for(root / CATALOG_JSON.name)
+        
+        def cold():
+            snapshot.unlink(missing_ok=True)
+            AppsDatabase().load_apps_database(build_index=False)
+        
+        with quiet():
+            cold_ms = timed(cold, max(1, repeat // 2))
+            warm_ms = timed(lambda: AppsDatabase().load_apps_database(build_index=False), repeat)
+            apps_db = AppsDatabase()
+            apps_db.load_apps_database(build_index=False)
+            index_ms = timed(apps_db.build_search_index, max(1, repeat // 2))
+        
+        # Memory is measured on separate runs; tracemalloc distorts the timings
+        with quiet():
+            tracemalloc.start()
+            apps_db = AppsDatabase()
+            apps_db.load_apps_database(build_index=False)
+            loaded_current, loaded_peak = tracemalloc.get_traced_memory()
+            apps_db.build_search_index()
+            indexed_current, indexed_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        
+        results["catalog.apps"] = metric(len(apps_db.apps_data), unit="count", lower_is_better=None)
+        results["catalog.cold_load_ms"] = metric(statistics.median(cold_ms))
+        results["catalog.warm_load_ms"] = metric(statistics.median(warm_ms))
+        results["catalog.index_build_ms"] = metric(statistics.median(index_ms))
+        results["catalog.load_retained_kb"] = metric(loaded_current / 1024, unit="KiB")
+        results["catalog.load_peak_kb"] = metric(loaded_peak / 1024, unit="KiB")
+        results["catalog.indexed_retained_kb"] = metric(indexed_current / 1024, unit="KiB")
+        results["catalog.index_peak_kb"] = metric(max(loaded_peak, indexed_peak) / 1024, unit="KiB")
+    return results
+
+def bench_search(repeat):
+    """on_filter_change latency across the query set and a category filter."""
+    results = {}
+    with workspace():
+        apps_db, ui = loaded_ui()
+        category = next((c for c in apps_db.categories if c != 'Unknown'), None)
+        
+        def run_filter(query, selected):
+            # Set the dropdown without firing its observer, then run the handler directly
+            ui.category_filter.unobserve(ui.on_filter_change, names='value')
+            ui.search_box.unobserve(ui.on_search_typed, names='value')
+            try:
+                ui.search_box.value = query
+                ui.category_filter.value = selected
+            finally:
+                ui.search_box.observe(ui.on_search_typed, names='value')
+                ui.category_filter.observe(ui.on_filter_change, names='value')
+            ui.on_filter_change(None)
+        
+        samples = []
+        for query in SEARCH_QUERIES:
+            samples += timed(lambda: run_filter(query, 'All Categories'), repeat)
+        median, p95 = summarize(samples)
+        results["search.filter_median_ms"] = metric(median)
+        results["search.filter_p95_ms"] = metric(p95)
+        
+        if category:
+            category_ms = timed(lambda: run_filter("", category), repeat)
+            results["search.category_median_ms"] = metric(statistics.median(category_ms))
+            # IMAGE-style category, fits in 8GB of VRAM, install.json: bit operations only
+            facets = apps_db.search_index.facets
+            combined = [('category', category), ('vram', 8), ('installer_type', 'json')]
+            facet_ms = timed(lambda: facets.select(combined), repeat * 100)
+            results["search.facet_filter_us"] = metric(statistics.median(facet_ms) * 1000, unit="µs")
+            counts_ms = timed(lambda: apps_db.facet_counts("", filters=dict(combined)), repeat)
+            results["search.facet_counts_median_ms"] = metric(statistics.median(counts_ms))
+        run_filter("", 'All Categories')
+    return results
+
+def bench_display(repeat):
+    """Rebuild cost of update_apps_display and of flipping pages."""
+    results = {}
+    with workspace():
+        apps_db, ui = loaded_ui()
+        all_ids = apps_db.search("")
+        subset = all_ids[: max(1, len(all_ids) // 10)]
+        
+        def rebuild():
+            ui.filtered_app_ids = subset if ui.filtered_app_ids is all_ids else all_ids
+            ui.update_apps_display()
+        
+        rebuild_ms = timed(rebuild, repeat * 4)
+        results["display.rebuild_median_ms"] = metric(statistics.median(rebuild_ms))
+        
+        ui.filtered_app_ids = all_ids
+        ui.update_apps_display()
+        pages = max(1, ui.app_list.page_count)
+        flip = iter(range(10 ** 9))
+        flip_ms = timed(lambda: ui.app_list.go_to(next(flip) % pages), repeat * 4)
+        results["display.page_flip_median_ms"] = metric(statistics.median(flip_ms))
+        
+        sizes = iter([100, 20] * repeat * 2)
+        resize_ms = timed(lambda: ui.app_list.set_page_size(next(sizes)), repeat * 4)
+        results["display.page_size_median_ms"] = metric(statistics.median(resize_ms))
+    return results
+
+def bench_commands(repeat):
+    """run_command overhead per call against a bare subprocess.run."""
+    from SINGLE_MEGA_CELL_NOTEBOOK import command_engine
+    
+    engine = command_engine()
+    calls = repeat * 10
+    engine.run_command("true")
+    engine_ms = timed(lambda: engine.run_command("true"), calls)
+    bare_ms = timed(lambda: subprocess.run("true", shell=True, capture_output=True), calls)
+    
+    engine_median = statistics.median(engine_ms)
+    bare_median = statistics.median(bare_ms)
+    return {
+        "commands.run_command_median_ms": metric(engine_median),
+        "commands.subprocess_median_ms": metric(bare_median, lower_is_better=None),
+        "commands.overhead_ms": metric(max(0.0, engine_median - bare_median)),
+    }
+
+# ---- end-to-end fixtures --------------------------------------------------------
+
+FIXTURE_PACKAGES = {"sdbench-alpha": "1.0", "sdbench-beta": "2.1"}
+
+FIXTURE_APP = '''import http.server, os, socketserver
+import sdbench_alpha, sdbench_beta
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"ok")
+    def log_message(self, *args):
+        pass
+
+port = int(os.environ.get("PORT", "0"))
+with socketserver.TCPServer(("127.0.0.1", port), Handler) as server:
+    print(f"Running on local URL:  http://127.0.0.1:{server.server_address[1]}", flush=True)
+    server.serve_forever()
+'''
+
+def build_wheel(directory, name, version):
+    """Write a minimal pure-Python wheel for name==version into directory."""
+    module = name.replace("-", "_")
+    dist_info = f"{module}-{version}.dist-info"
+    files = {
+        f"{module}/__init__.py": f"__version__ = {version!r}\n",
+        f"{dist_info}/METADATA": f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n",
+        f"{dist_info}/WHEEL": "Wheel-Version: 1.0\nGenerator: sd-bench\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+    }
+    record = []
+    for path, content in files.items():
+        digest = base64.urlsafe_b64encode(hashlib.sha256(content.encode()).digest()).rstrip(b"=").decode()
+        record.append(f"{path},sha256={digest},{len(content.encode())}")
+    record.append(f"{dist_info}/RECORD,,")
+    files[f"{dist_info}/RECORD"] = "\n".join(record) + "\n"
+    
+    wheel = Path(directory) / f"{module}-{version}-py3-none-any.whl"
+    with zipfile.ZipFile(wheel, "w") as archive:
+        for path, content in files.items():
+            archive.writestr(path, content)
+    return wheel
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+@contextlib.contextmanager
+def package_index(root):
+    """Serve the fixture wheels as a PEP 503 simple index; yields its URL."""
+    files = root / "files"
+    files.mkdir(parents=True)
+    for name, version in FIXTURE_PACKAGES.items():
+        wheel = build_wheel(files, name, version)
+        project = root / "simple" / name
+        project.mkdir(parents=True)
+        (project / "index.html").write_text(f'<a href="../../files/{wheel.name}">{wheel.name}</a>\n')
+    
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(root)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/simple/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def fixture_repos(root, count):
+    """Create count local git repositories shaped like catalog apps."""
+    apps = {}
+    for i in range(count):
+        repo = root / f"bench-app-{i}"
+        repo.mkdir(parents=True)
+        (repo / "requirements.txt").write_text(
+            "".join(f"{name}=={version}\n" for name, version in FIXTURE_PACKAGES.items())
+        )
+        (repo / "app.py").write_text(FIXTURE_APP)
+        for cmd in (["git", "init", "-q"], ["git", "add", "."],
+                    ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost",
+                     "commit", "-q", "-m", "fixture"]):
+            subprocess.run(cmd, cwd=repo, check=True, capture_output=True)
+        apps[f"bench-app-{i}"] = {
+            "name": f"Bench App {i}",
+            "clone_url": repo.resolve().as_uri(),
+            "category": "Benchmark",
+        }
+    return apps
+
+def bench_e2e(repeat, apps=3):
+    """Install (cold and warm) and run cycles against local fixtures."""
+    from SINGLE_MEGA_CELL_NOTEBOOK import (
+        AppEnvironments, AppRunner, InstallationManager, widgets
+    )
+    
+    results = {}
+    saved_env = {key: os.environ.get(key) for key in ("PIP_INDEX_URL", "PIP_DISABLE_PIP_VERSION_CHECK")}
+    with workspace() as root, package_index(root / "index") as index_url:
+        os.environ["PIP_INDEX_URL"] = index_url
+        os.environ["PIP_DISABLE_PIP_VERSION_CHECK"] = "1"
+        try:
+            apps_data = fixture_repos(root / "repos", apps)
+            output = widgets.Output()
+            environments = AppEnvironments(pool_size=0)
+            manager = InstallationManager(output, environments=environments)
+            # The clone/pip path never calls into ApplicationInstaller; it only gates on it
+            manager.installer = "benchmark"
+            
+            def install_all():
+                jobs = manager.install_batch(list(apps_data), apps_data)
+                if not manager.wait_for_batch(jobs, timeout=600):
+                    failed = {app_id: job.error for app_id, job in jobs.items() if job.state != 'done'}
+                    raise RuntimeError(f"fixture installs failed: {failed}")
+            
+            results["e2e.install_cold_s"] = metric(timed(install_all, 1)[0] / 1000, unit="s")
+            warm_ms = timed(install_all, max(1, repeat // 2))
+            results["e2e.install_warm_s"] = metric(statistics.median(warm_ms) / 1000, unit="s")
+            
+            runner = AppRunner(output, environments=environments)
+            app_id = next(iter(apps_data))
+            ready_ms = []
+            for _ in range(max(1, repeat // 2)):
+                started = time.perf_counter()
+                with quiet():
+                    if not runner.run_app(app_id, apps_data[app_id]):
+                        raise RuntimeError("fixture app failed to start")
+                port = runner.wait_until_ready(app_id, timeout=60)
+                ready_ms.append((time.perf_counter() - started) * 1000)
+                runner.stop_app(app_id)
+                runner.latest_processes[app_id].wait(10)
+                if port is None:
+                    raise RuntimeError("fixture app never became ready")
+            results["e2e.run_to_ready_ms"] = metric(statistics.median(ready_ms))
+        finally:
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+    return results
+
+def bench_proxy(repeat):
+    """Added latency of AppProxy over direct keep-alive requests to one app."""
+    import http.client
+    from SINGLE_MEGA_CELL_NOTEBOOK import AppProxy, command_engine
+    
+    large = b"x" * (8 * 1024 * 1024)
+    
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; without this, delayed ACKs dominate both paths
+        disable_nagle_algorithm = True
+        
+        def do_GET(self):
+            body = large if self.path == "/large" else b'{"ok": true}'
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    app_port = server.server_address[1]
+    proxy = AppProxy(command_engine(), {"app": app_port}.get, apps=lambda: ["app"])
+    proxy_port = proxy.start()
+    
+    def requester(port, path):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        
+        def request():
+            connection.request("GET", path)
+            connection.getresponse().read()
+        return request
+    
+    try:
+        calls = repeat * 100
+        direct, proxied = requester(app_port, "/"), requester(proxy_port, "/app/")
+        direct()
+        proxied()
+        direct_ms = timed(direct, calls)
+        proxied_ms = timed(proxied, calls)
+        large_ms = timed(requester(proxy_port, "/app/large"), repeat * 2)
+    finally:
+        proxy.stop()
+        server.shutdown()
+    
+    direct_median, direct_p95 = summarize(direct_ms)
+    proxied_median, proxied_p95 = summarize(proxied_ms)
+    return {
+        "proxy.direct_median_ms": metric(direct_median, lower_is_better=None),
+        "proxy.proxied_median_ms": metric(proxied_median),
+        "proxy.added_median_ms": metric(max(0.0, proxied_median - direct_median)),
+        "proxy.added_p95_ms": metric(max(0.0, proxied_p95 - direct_p95)),
+        "proxy.large_8mib_median_ms": metric(statistics.median(large_ms)),
+    }
+
+BENCHMARKS = {
+    "catalog": bench_catalog,
+    "search": bench_search,
+    "display": bench_display,
+    "commands": bench_commands,
+    "e2e": bench_e2e,
+    "proxy": bench_proxy,
+}
+
+# ╔═══════════════════════════════════════════════════════════════════════════════╗
+# ║                           BASELINE COMPARISON                                 ║
+# ╚═══════════════════════════════════════════════════════════════════════════════╝
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(results, baseline, default_tolerance=DEFAULT_TOLERANCE):
+    """Return (regressions, lines) comparing results against a baseline document."""
+    regressions = []
+    lines = []
+    tolerances = baseline.get("tolerances", {})
+    for name, base in sorted(baseline.get("results", {}).items()):
+        current = results.get(name)
+        if current is None or base.get("lower_is_better") is not True:
+            continue
+        tolerance = tolerances.get(name, default_tolerance)
+        limit = max(base["value"] * (1 + tolerance), base["value"] + NOISE_FLOOR.get(base.get("unit"), 0))
+        change = (current["value"] / base["value"] - 1) * 100 if base["value"] else 0.0
+        regressed = current["value"] > limit
+        icon = "❌" if regressed else "✅"
+        lines.append(f"{icon} {name}: {current['value']:.3f} {current['unit']} "
+                     f"(baseline {base['value']:.3f}, {change:+.1f}%, limit +{tolerance * 100:.0f}%)")
+        if regressed:
+            regressions.append(name)
+    return regressions, lines
+
+def main(argv=None):
+    """Run the selected benchmarks, write JSON and compare with the baseline."""
+    parser = argparse.ArgumentParser(description="SD-Pinnokio headless benchmark suite")
+    parser.add_argument("--only", default=",".join(SUITES),
+                        help=f"comma separated suites to run ({', '.join(SUITES)})")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per measurement")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="where to write the results JSON")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown as a fraction when the baseline sets none")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args(argv)
+    
+    suites = [suite.strip() for suite in args.only.split(",") if suite.strip()]
+    unknown = [suite for suite in suites if suite not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+    
+    print("⏱️ SD-PINNOKIO BENCHMARKS")
+    print("=" * 80)
+    
+    results = {}
+    failed = []
+    for suite in suites:
+        print(f"▶️ {suite}...")
+        started = time.perf_counter()
+        try:
+            # Suites run from a scratch directory, so nothing they log or trace lands under apps/
+            with workspace():
+                suite_results = BENCHMARKS[suite](args.repeat)
+        except Exception as e:
+            print(f"❌ {suite} failed: {e}")
+            traceback.print_exc()
+            failed.append(suite)
+            continue
+        results.update(suite_results)
+        for name, value in suite_results.items():
+            print(f"   {name}: {value['value']} {value['unit']}")
+        print(f"   ({time.perf_counter() - started:.1f}s)")
+    
+    document = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "suites": suites,
+            "failed_suites": failed,
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(document, indent=2) + "\n")
+    print(f"\n📄 Results written to {args.output}")
+    
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        if failed:
+            print("❌ Not updating the baseline: some suites failed")
+            return False
+        previous = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        document["tolerances"] = previous.get("tolerances", {})
+        baseline_path.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"📌 Baseline updated: {baseline_path}")
+        return True
+    
+    print("\n" + "=" * 80)
+    print("🏁 BASELINE COMPARISON")
+    print("=" * 80)
+    if not baseline_path.exists():
+        # Nothing to compare against would pass every regression silently
+        print(f"❌ No baseline at {baseline_path}; record one with --update-baseline")
+        return False
+    
+    regressions, lines = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+    for line in lines:
+        print(line)
+    
+    if failed:
+        print(f"\n⚠️ Suites failed to run: {', '.join(failed)}")
+    if regressions:
+        print(f"\n❌ {len(regressions)} metrics regressed: {', '.join(regressions)}")
+    if failed or regressions:
+        return False
+    print("\n🎉 NO REGRESSIONS against the baseline.")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Test script to verify install and launch admission control.
+
+Uses stubbed GPU and memory probes to check need estimates, best-fit GPU
+packing, queueing until a reservation is released and immediate rejection
+of apps larger than the host, and that unknown GPU memory admits with a
+warning. Real installs and launches check that a refused install never
+starts cloning, and that launches release their reservation on exit and
+feed measured peaks back into the estimates.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import subprocess
+import traceback
+import contextlib
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+GIB = 1024 ** 3
+
+class QuietOutput:
+    """Stand-in for the output widget that collects notices."""
+    
+    def __init__(self):
+        self.lines = []
+    
+    def append_stdout(self, text):
+        self.lines.append(text)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        return False
+
+def make_controller(tmp, gpus=(), ram_gb=64, **kwargs):
+    from SINGLE_MEGA_CELL_NOTEBOOK import AdmissionController, ResourceHistory
+    
+    meminfo = {'MemTotal': ram_gb * GIB, 'MemAvailable': ram_gb * GIB}
+    return AdmissionController(
+        root=tmp, gpu_probe=lambda: [dict(gpu) for gpu in gpus], meminfo=lambda: dict(meminfo),
+        history=ResourceHistory(Path(tmp) / "history.json"), poll_interval=0.1, **kwargs)
+
+def app(vram=None, **fields):
+    tags = [f"{vram}GB-VRAM"] if vram else []
+    return dict({'name': 'App', 'category': 'IMAGE', 'tags': tags}, **fields)
+
+def test_estimates_and_packing():
+    """Test need estimates and best-fit GPU packing."""
+    print("=" * 60)
+    print("TESTING: Estimates and GPU packing")
+    print("=" * 60)
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            gpus = [{'index': 0, 'name': 'big', 'total': 24 * GIB, 'used': 0},
+                    {'index': 1, 'name': 'small', 'total': 12 * GIB, 'used': 0}]
+            controller = make_controller(tmp, gpus)
+            
+            needs = controller.estimate("demo", app(12, tags=["12GB-VRAM", "32GB-RAM"]))
+            controller.history.observe("measured", vram_bytes=2 * GIB, ram_bytes=GIB)
+            measured = controller.estimate("measured", app(12))
+            print(f"   tagged: {needs}")
+            print(f"   measured: {measured}")
+            if needs != {'disk': 15 * GIB, 'ram': 32 * GIB, 'vram': 12 * GIB}:
+                print("❌ FAIL: Tag estimates are wrong")
+                return False
+            if not GIB < measured['vram'] < 3 * GIB or measured['ram'] > 2 * GIB:
+                print("❌ FAIL: Measured history should replace tag estimates")
+                return False
+            
+            placed = [controller.admit(f"app-{index}", app(8), 'launch') for index in range(3)]
+            print(f"   8GB apps placed on GPUs {[ticket.gpu for ticket in placed]}")
+            if [ticket.gpu for ticket in placed] != [1, 0, 0]:
+                print("❌ FAIL: Apps were not packed best-fit")
+                return False
+            if placed[0].env != {'CUDA_VISIBLE_DEVICES': '1'}:
+                print("❌ FAIL: Launch is not pinned to its GPU")
+                return False
+            
+            cpu_only = controller.admit("cpu-app", app(), 'launch')
+            if not cpu_only.admitted or cpu_only.gpu is not None:
+                print("❌ FAIL: Apps without VRAM needs should not take a GPU")
+                return False
+        
+        print("✅ PASS: Needs come from tags or history and launches pack onto GPUs")
+        return True
+        
+    except Exception as e:
+        print(f"❌ PACKING TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_queue_and_reject():
+    """Test queueing until a release and rejecting what can never fit."""
+    print("\n" + "=" * 60)
+    print("TESTING: Queueing and rejection")
+    print("=" * 60)
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            gpus = [{'index': 0, 'name': 'gpu', 'total': 16 * GIB, 'used': 2 * GIB}]
+            controller = make_controller(tmp, gpus, ram_gb=16)
+            
+            first = controller.admit("first", app(12), 'launch')
+            busy = controller.admit("second", app(12), 'launch')
+            print(f"   second while busy: {busy.reason} (fits later: {busy.fits_later})")
+            if not first.admitted or busy.admitted or not busy.fits_later:
+                print("❌ FAIL: A launch that fits later should be held, not admitted")
+                return False
+            
+            waits = []
+            threading.Timer(0.5, first.release).start()
+            started = time.time()
+            queued = controller.admit("second", app(12), 'launch', wait=10, on_wait=waits.append)
+            waited = time.time() - started
+            print(f"   queued launch admitted after {waited:.2f}s")
+            if not queued.admitted or not 0.4 < waited < 5 or len(waits) != 1:
+                print("❌ FAIL: Queued launch was not admitted on release")
+                return False
+            
+            started = time.time()
+            huge = controller.admit("huge", app(48), 'launch', wait=10)
+            ram_hog = controller.admit("hog", app(tags=["32GB-RAM"]), 'launch', wait=10)
+            print(f"   rejected: {huge.reason}; {ram_hog.reason}")
+            if huge.admitted or huge.fits_later or ram_hog.admitted or time.time() - started > 1:
+                print("❌ FAIL: Apps larger than the host should be rejected at once")
+                return False
+            
+            # An empty or failing probe is unknown VRAM: admit, but say so
+            no_gpu = make_controller(tmp).admit("gpu-app", app(8), 'launch')
+            failing = make_controller(tmp)
+            failing.gpu_probe = lambda: 1 / 0
+            broken_probe = failing.admit("gpu-app", app(8), 'launch')
+            print(f"   unreadable GPU: {no_gpu.reason}")
+            if not no_gpu.admitted or not no_gpu.reason or not broken_probe.admitted:
+                print("❌ FAIL: VRAM apps should be admitted with a warning when GPU memory is unknown")
+                return False
+        
+        print("✅ PASS: Launches queue behind reservations and oversize apps are rejected")
+        return True
+        
+    except Exception as e:
+        print(f"❌ QUEUE TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def make_repo(root, name):
+    repo = Path(root) / name
+    repo.mkdir(parents=True)
+    (repo / "app.py").write_text("import time\nblock = bytearray(64 * 1024 * 1024)\ntime.sleep(60)\n")
+    for cmd in (["git", "init", "-q"], ["git", "add", "."],
+                ["git", "-c", "user.name=test", "-c", "user.email=test@localhost", "commit", "-q", "-m", "init"]):
+        subprocess.run(cmd, cwd=repo, check=True, capture_output=True)
+    return repo.resolve().as_uri()
+
+def test_install_and_launch():
+    """Test admission on real installs and launches."""
+    print("\n" + "=" * 60)
+    print("TESTING: Admission on installs and launches")
+    print("=" * 60)
+    
+    previous = os.getcwd()
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import (AppEnvironments, AppRunner, InstallationManager,
+                                               ProcessSupervisor, Tracer, widgets)
+        
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(open(os.devnull, "w")):
+            os.chdir(tmp)
+            try:
+                apps = {"demo": {"name": "Demo", "category": "UTILITY", "clone_url": make_repo(tmp, "src/demo")}}
+                environments = AppEnvironments(root=Path(tmp) / "envs", pool_size=0)
+                tracer = Tracer(path=Path(tmp) / "spans.jsonl")
+                
+                full = make_controller(tmp, disk_reserve_gb=10 ** 6)
+                manager = InstallationManager(widgets.Output(), environments=environments, admission=full,
+                                              tracer=tracer)
+                manager.installer = "test"
+                jobs = manager.install_batch(["demo"], apps)
+                manager.wait_for_batch(jobs, timeout=60)
+                refused = jobs["demo"]
+                
+                controller = make_controller(tmp, gpus=[{'index': 0, 'name': 'gpu', 'total': 8 * GIB, 'used': 0}])
+                controller.history.observe("demo", disk_bytes=1024 * 1024)
+                manager.admission = controller
+                jobs = manager.install_batch(["demo"], apps)
+                manager.wait_for_batch(jobs, timeout=300)
+                installed = jobs["demo"]
+                # The footprint is measured just after the job reports done
+                deadline = time.time() + 10
+                while time.time() < deadline and controller.reservations:
+                    time.sleep(0.1)
+                disk_bytes = controller.history.get("demo").get('disk_bytes')
+                
+                runner = AppRunner(QuietOutput(), environments=environments, admission=controller, tracer=tracer)
+                controller.gpu_process_probe = lambda: {process.pid: GIB for process in runner.running_processes.values()
+                                                        if process.pid}
+                supervisor = ProcessSupervisor(runner, interval=0.2)
+                refused_launch = runner.run_app("gpu-hungry", dict(apps["demo"], tags=["24GB-VRAM"]))
+                supervisor.start("demo", apps["demo"], restart=False)
+                deadline = time.time() + 15
+                while time.time() < deadline and (controller.history.get("demo").get('ram_bytes', 0) < 64 * 1024 * 1024
+                                                   or not controller.history.get("demo").get('vram_bytes')):
+                    time.sleep(0.1)
+                held = dict(controller.reservations)
+                supervisor.stop("demo")
+                deadline = time.time() + 10
+                while time.time() < deadline and controller.reservations:
+                    time.sleep(0.1)
+                measured = controller.history.get("demo")
+            finally:
+                os.chdir(previous)
+        
+        print(f"   refused install: {refused.state} ({refused.error})")
+        print(f"   admitted install: {installed.state}, measured disk {disk_bytes} bytes")
+        print(f"   measured launch: ram {measured.get('ram_bytes')}, vram {measured.get('vram_bytes')}")
+        if refused.state != 'failed' or "disk" not in (refused.error or ""):
+            print("❌ FAIL: Install over the disk budget was not refused")
+            return False
+        if installed.state != 'done' or not disk_bytes or disk_bytes == 1024 * 1024:
+            print("❌ FAIL: Installed footprint was not measured")
+            return False
+        if refused_launch or ("demo", 'launch') not in held or controller.reservations:
+            print("❌ FAIL: Launch reservations were not held and released")
+            return False
+        if measured.get('ram_bytes', 0) < 64 * 1024 * 1024 or measured.get('vram_bytes') != GIB:
+            print("❌ FAIL: Launch peaks were not recorded")
+            return False
+        
+        print("✅ PASS: Installs and launches are admitted, measured and released")
+        return True
+        
+    except Exception as e:
+        os.chdir(previous)
+        print(f"❌ INTEGRATION TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all admission control tests."""
+    print("🧪 TESTING SD-PINNOKIO ADMISSION CONTROL")
+    print("=" * 80)
+    
+    tests = [
+        test_estimates_and_packing,
+        test_queue_and_reject,
+        test_install_and_launch,
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Admission control is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
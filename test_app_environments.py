@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test script to verify per-app environments cloned from the base venv.
+
+Checks that app environments are hard-link clones of the base that run
+from their own prefix (shebangs, activate scripts and pyvenv.cfg
+relocated, the base left untouched), and that spare clones from the warm
+pool are claimed, relocated and replaced.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+import traceback
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def run(cmd, cwd=None):
+    return subprocess.run(cmd, cwd=cwd, capture_output=True).returncode
+
+def prefix_of(python):
+    return subprocess.run([python, "-c", "import sys; print(sys.prefix)"],
+                          capture_output=True, text=True).stdout.strip()
+
+def pip_module(env_dir):
+    return next(Path(env_dir).glob("lib/python*/site-packages/pip/__init__.py"))
+
+def test_clone_from_base():
+    """Test cloning an app environment from the base and relocating it."""
+    print("=" * 60)
+    print("TESTING: Clone from base and relocation")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppEnvironments
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            environments = AppEnvironments(root=Path(tmp) / "envs", pool_size=0)
+            messages = []
+            python = environments.ensure("demo", run, messages.append)
+            env_dir = environments.env_dir("demo").absolute()
+            base_dir = environments.base_dir.absolute()
+            print(f"   {messages[-1]}")
+            
+            if python is None or "base clone" not in messages[-1] or prefix_of(python) != str(env_dir):
+                print(f"❌ FAIL: Environment was not cloned from the base ({messages})")
+                return False
+            if os.stat(pip_module(env_dir)).st_ino != os.stat(pip_module(base_dir)).st_ino:
+                print("❌ FAIL: site-packages files are not hard links into the base")
+                return False
+            
+            pip_script = (env_dir / "bin" / "pip").read_text().splitlines()[0]
+            activate = (env_dir / "bin" / "activate").read_text()
+            config = (env_dir / "pyvenv.cfg").read_text()
+            print(f"   relocated pip shebang: {pip_script}")
+            if str(env_dir) not in pip_script or str(env_dir) not in activate or str(base_dir) in activate + pip_script:
+                print("❌ FAIL: Scripts still point at the base environment")
+                return False
+            if str(base_dir) in config:
+                print("❌ FAIL: pyvenv.cfg still names the base environment")
+                return False
+            if str(base_dir) not in (base_dir / "bin" / "pip").read_text().splitlines()[0]:
+                print("❌ FAIL: Relocating the clone rewrote the base's scripts")
+                return False
+            pip_version = subprocess.run([str(env_dir / "bin" / "pip"), "--version"], capture_output=True, text=True)
+            if pip_version.returncode != 0 or str(env_dir) not in pip_version.stdout:
+                print(f"❌ FAIL: Relocated pip does not run from the clone: {pip_version.stdout}{pip_version.stderr}")
+                return False
+            
+            again = []
+            if environments.ensure("demo", run, again.append) != python or "Using app environment" not in again[0]:
+                print("❌ FAIL: Existing environment was not reused")
+                return False
+        
+        print("✅ PASS: App environment cloned from the base and relocated to its own prefix")
+        return True
+        
+    except Exception as e:
+        print(f"❌ CLONE TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_spare_pool():
+    """Test claiming a spare clone from the warm pool and refilling it."""
+    print("\n" + "=" * 60)
+    print("TESTING: Spare environment pool")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppEnvironments
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            environments = AppEnvironments(root=Path(tmp) / "envs", pool_size=1)
+            environments.replenish(run)
+            spares = list(environments.spares_dir.iterdir())
+            if len(spares) != 1:
+                print(f"❌ FAIL: Pool holds {len(spares)} spares, expected 1")
+                return False
+            spare_prefix = str(spares[0].absolute())
+            
+            messages = []
+            python = environments.ensure("pooled", run, messages.append)
+            env_dir = environments.env_dir("pooled").absolute()
+            print(f"   {messages[-1]}")
+            if python is None or "warm pool" not in messages[-1] or prefix_of(python) != str(env_dir):
+                print(f"❌ FAIL: Environment did not come from the pool ({messages})")
+                return False
+            if spare_prefix in (env_dir / "bin" / "pip").read_text() or spare_prefix in (env_dir / "pyvenv.cfg").read_text():
+                print("❌ FAIL: Claimed spare still points at its pool path")
+                return False
+            
+            # ensure() refills the pool in the background
+            deadline = time.time() + 60
+            refilled = []
+            while time.time() < deadline:
+                refilled = [spare for spare in environments.spares_dir.iterdir() if ".tmp" not in spare.name]
+                if refilled and not environments._replenishing:
+                    break
+                time.sleep(0.1)
+            print(f"   spares after claim: {[spare.name for spare in refilled]}")
+            if len(refilled) != 1 or refilled[0].absolute() == Path(spare_prefix):
+                print("❌ FAIL: Pool was not refilled with a fresh spare")
+                return False
+            
+            # Spares of an outdated base are discarded rather than handed out
+            environments._write_marker(refilled[0], signature="stale")
+            environments.pool_size = 0
+            stale = []
+            environments.ensure("fresh", run, stale.append)
+            if "base clone" not in stale[-1] or refilled[0].exists():
+                print(f"❌ FAIL: Stale spare was used or kept ({stale})")
+                return False
+        
+        print("✅ PASS: Spares are claimed, relocated, refilled and dropped when stale")
+        return True
+        
+    except Exception as e:
+        print(f"❌ SPARE POOL TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all app environment tests."""
+    print("🧪 TESTING SD-PINNOKIO APP ENVIRONMENTS")
+    print("=" * 80)
+    
+    tests = [
+        test_clone_from_base,
+        test_spare_pool
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! App environments are working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
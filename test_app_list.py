@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the paginated app list and the debounced search.
+
+Checks that paging through AppListView shows every app exactly once, also
+when "Show more" widened the window, that the card pool is rebound rather
+than rebuilt, and that typing in the search box runs a single filter pass
+once typing pauses, never alongside another filter change.
+"""
+
+import sys
+import time
+import threading
+import traceback
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def make_list(count=55, page_size=10):
+    from SINGLE_MEGA_CELL_NOTEBOOK import AppListView
+    
+    apps_data = {f"app-{index:03d}": {"name": f"App {index}", "category": "Test"} for index in range(count)}
+    noop = lambda app_id, app_data: None
+    view = AppListView(apps_data, page_size, noop, noop, noop, noop)
+    view.set_app_ids(sorted(apps_data))
+    return view
+
+def shown(view):
+    return [card.app_id for card in view.cards if card.widget.layout.display != 'none']
+
+def test_pagination():
+    """Test that Next continues after the last shown app, including after Show more."""
+    print("=" * 60)
+    print("TESTING: Pagination and Show more")
+    print("=" * 60)
+    
+    try:
+        view = make_list()
+        ids = view.app_ids
+        if shown(view) != ids[0:10] or not view.prev_btn.disabled:
+            print("❌ FAIL: First page is wrong")
+            return False
+        
+        view.show_more()
+        pool = list(view.cards)
+        if shown(view) != ids[0:20]:
+            print("❌ FAIL: Show more did not extend the window")
+            return False
+        
+        view.next_page()
+        print(f"   after Show more + Next: {shown(view)[0]} … {shown(view)[-1]}, {view.status_label.value.strip()}")
+        if shown(view) != ids[20:30]:
+            print("❌ FAIL: Next after Show more overlapped the apps already shown")
+            return False
+        if view.cards[:len(pool)] != pool:
+            print("❌ FAIL: Paging rebuilt the card pool")
+            return False
+        
+        view.previous_page()
+        if shown(view) != ids[10:20]:
+            print("❌ FAIL: Prev did not go back one page")
+            return False
+        
+        view.set_page_size(25)
+        if shown(view) != ids[10:35]:
+            print("❌ FAIL: Changing the page size lost the first visible app")
+            return False
+        
+        # Walking forward from the start with mixed Show more / Next sees every app once
+        view.set_page_size(10)
+        view.go_to(0)
+        seen = list(shown(view))
+        steps = 0
+        while not view.next_btn.disabled and steps < 20:
+            if steps % 2 == 0:
+                before = shown(view)
+                view.show_more()
+                seen.extend(shown(view)[len(before):])
+            else:
+                view.next_page()
+                seen.extend(shown(view))
+            steps += 1
+        print(f"   walked {len(seen)} apps in {steps} steps")
+        if seen != ids or not view.more_btn.disabled:
+            print("❌ FAIL: Paging skipped or repeated apps")
+            return False
+        
+        print("✅ PASS: Pages follow the last shown app and reuse the card pool")
+        return True
+        
+    except Exception as e:
+        print(f"❌ PAGINATION TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_debounced_search():
+    """Test that typing runs one serialized filter pass after typing pauses."""
+    print("\n" + "=" * 60)
+    print("TESTING: Debounced search")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppsDatabase, CompleteUI
+        
+        apps_db = AppsDatabase()
+        if not apps_db.load_apps_database():
+            print("❌ FAIL: Catalog did not load")
+            return False
+        ui = CompleteUI(apps_db, None, None, None)
+        ui.create_complete_interface()
+        ui.search_debounce = 0.1
+        
+        lock = threading.Lock()
+        calls = {'active': 0, 'peak': 0, 'terms': []}
+        search = apps_db.search
+        
+        def slow_search(term, filters=None):
+            with lock:
+                calls['active'] += 1
+                calls['peak'] = max(calls['peak'], calls['active'])
+                calls['terms'].append(term)
+            # Slow enough that a concurrent filter change would overlap
+            time.sleep(0.1)
+            try:
+                return search(term, filters=filters)
+            finally:
+                with lock:
+                    calls['active'] -= 1
+        apps_db.search = slow_search
+        
+        for term in ("s", "st", "sta", "stable"):
+            ui.search_box.value = term
+            time.sleep(0.02)
+        if calls['terms']:
+            print("❌ FAIL: Search ran while still typing")
+            return False
+        time.sleep(0.5)
+        print(f"   searches after typing 'stable': {calls['terms']}")
+        if calls['terms'] != ["stable"] or ui.filtered_app_ids != search("stable"):
+            print("❌ FAIL: Typing did not result in exactly one search for the final text")
+            return False
+        
+        # A debounced search and a dropdown change on two threads run one after the other
+        calls['terms'].clear()
+        ui.search_box.value = "diffusion"
+        changer = threading.Thread(target=ui.on_filter_change, args=(None,))
+        time.sleep(ui.search_debounce + 0.02)
+        changer.start()
+        changer.join()
+        time.sleep(0.5)
+        print(f"   concurrent passes: {calls['terms']}, most at once: {calls['peak']}")
+        if len(calls['terms']) != 2 or calls['peak'] != 1:
+            print("❌ FAIL: Filter passes overlapped")
+            return False
+        
+        # A timer that already fired but lost the race to a newer keystroke does nothing
+        calls['terms'].clear()
+        ui._run_debounced_search(ui._search_generation - 1, None)
+        if calls['terms']:
+            print("❌ FAIL: A superseded search still ran")
+            return False
+        
+        print("✅ PASS: One search per pause, serialized with other filter changes")
+        return True
+        
+    except Exception as e:
+        print(f"❌ DEBOUNCE TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all app list tests."""
+    print("🧪 TESTING SD-PINNOKIO APP LIST")
+    print("=" * 80)
+    
+    tests = [
+        test_pagination,
+        test_debounced_search
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! App list is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
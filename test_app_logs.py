@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the bounded app log pipeline.
+
+Checks that memory stays capped by the ring buffer, that full output is
+rotated on disk, that tail/seek read from memory or from rotated files,
+that the rendered view only ever holds the last few lines, and that a
+restarted app's log keeps the previous run's output.
+"""
+
+import sys
+import tempfile
+import traceback
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def test_ring_buffer_and_tail():
+    """Test that the in-memory buffer and the view stay bounded."""
+    print("=" * 60)
+    print("TESTING: Ring buffer, tail and view")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppLog
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            log = AppLog("demo", tmp, max_lines=100, view_lines=10)
+            for i in range(5000):
+                log.write(f"line {i}")
+            log.flush()
+            view_text = log.view.outputs[0]["text"]
+            print(f"   kept {len(log.lines)} of {log.total_lines} lines, view has {len(view_text.splitlines())} lines")
+            
+            if len(log.lines) != 100 or log.first_line != 4900:
+                print("❌ FAIL: Ring buffer is not bounded")
+                return False
+            if log.tail(2) != ["line 4998", "line 4999"]:
+                print(f"❌ FAIL: Unexpected tail {log.tail(2)}")
+                return False
+            if len(view_text.splitlines()) != 11 or "4990 earlier lines" not in view_text:
+                print("❌ FAIL: View is not limited to the last lines")
+                return False
+            log.close()
+            
+            print("✅ PASS: Memory and view stay bounded")
+            return True
+        
+    except Exception as e:
+        print(f"❌ RING BUFFER TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_rotation_and_seek():
+    """Test on-disk rotation and seeking into rotated files."""
+    print("\n" + "=" * 60)
+    print("TESTING: Rotation and seek")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppLog
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            log = AppLog("demo", tmp, max_lines=100, max_file_bytes=4096, backups=2)
+            for i in range(2000):
+                log.write(f"line {i}")
+            files = sorted(p.name for p in Path(tmp).iterdir())
+            oldest = log.seek(0, 1)
+            print(f"   files: {files}, oldest available: {oldest}")
+            
+            if files != ["demo.log", "demo.log.1", "demo.log.2"]:
+                print("❌ FAIL: Log was not rotated")
+                return False
+            if log.seek(1950, 3) != ["line 1950", "line 1951", "line 1952"]:
+                print("❌ FAIL: Seek into memory returned wrong lines")
+                return False
+            boundary = log._file_starts[1]
+            expected = [f"line {n}" for n in range(boundary - 1, boundary + 2)]
+            if log.seek(boundary - 1, 3) != expected:
+                print("❌ FAIL: Seek across rotated files returned wrong lines")
+                return False
+            if not oldest or oldest[0] != f"line {log._file_starts[-1]}":
+                print("❌ FAIL: Seek before the oldest file should start at the oldest line")
+                return False
+            log.close()
+            
+            print("✅ PASS: Full output rotates on disk and seek reads across files")
+            return True
+        
+    except Exception as e:
+        print(f"❌ ROTATION TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_reopen_keeps_previous_run():
+    """Test that reopening an app's log keeps the previous run as a backup."""
+    print("\n" + "=" * 60)
+    print("TESTING: Reopening a log after a crash")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppLogs
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            logs = AppLogs(log_dir=tmp, max_lines=5, backups=2)
+            for run in range(1, 5):
+                log = logs.open("demo")
+                for i in range(20):
+                    log.write(f"run {run} line {i}")
+                log.write(f"RuntimeError: run {run} crashed")
+                if run == 4:
+                    own = log.seek(0, 2)
+                log.close()
+            
+            files = {path.name: path.read_text().splitlines() for path in Path(tmp).iterdir()}
+            print(f"   files: {sorted(files)}, last lines: {[files[name][-1] for name in sorted(files)]}")
+            
+            if sorted(files) != ["demo.log", "demo.log.1", "demo.log.2"]:
+                print("❌ FAIL: Unexpected log files")
+                return False
+            if files["demo.log.1"][-1] != "RuntimeError: run 3 crashed" or len(files["demo.log.1"]) != 21:
+                print("❌ FAIL: The previous run's output was not kept in .1")
+                return False
+            if files["demo.log.2"][0] != "run 2 line 0" or files["demo.log"][0] != "run 4 line 0":
+                print("❌ FAIL: Older runs were not shifted, or the oldest was not dropped")
+                return False
+            if own != ["run 4 line 0", "run 4 line 1"]:
+                print(f"❌ FAIL: Seek on the new run read another run's lines: {own}")
+                return False
+        
+        print("✅ PASS: Earlier runs survive a reopen as backups")
+        return True
+        
+    except Exception as e:
+        print(f"❌ REOPEN TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all app log tests."""
+    print("🧪 TESTING SD-PINNOKIO APP LOGS")
+    print("=" * 80)
+    
+    tests = [
+        test_ring_buffer_and_tail,
+        test_rotation_and_seek,
+        test_reopen_keeps_previous_run,
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! App log pipeline is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the single-port app proxy.
+
+Runs local upstream apps and checks path, host, Referer and cookie routing,
+redirect rewriting, escaped index links, streamed request and response
+bodies over pooled upstream connections that are closed once idle,
+WebSocket upgrade relaying, and waking an app that is not answering.
+"""
+
+import sys
+import json
+import time
+import socket
+import threading
+import traceback
+import http.client
+import http.server
+import socketserver
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+BIG = b"x" * (3 * 1024 * 1024)
+
+def start_app(name):
+    """An HTTP/1.1 keep-alive app that echoes what it received."""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def log_message(self, *args):
+            pass
+        
+        def reply(self, body, code=200, headers=()):
+            self.send_response(code)
+            for key, value in headers:
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def do_GET(self):
+            if self.path == "/big":
+                return self.reply(BIG)
+            if self.path == "/login":
+                return self.reply(b"", 302, [("Location", "/home")])
+            self.reply(json.dumps({"app": name, "path": self.path,
+                                   "prefix": self.headers.get("X-Forwarded-Prefix")}).encode())
+        
+        def do_POST(self):
+            if self.headers.get("Transfer-Encoding") == "chunked":
+                body = b""
+                while True:
+                    size = int(self.rfile.readline().strip(), 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        break
+                    body += self.rfile.read(size)
+                    self.rfile.readline()
+            else:
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+            self.reply(f"{name} got {len(body)}".encode())
+    
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_websocket_echo():
+    """Answers an upgrade with 101, then echoes raw bytes."""
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            data = b""
+            while b"\r\n\r\n" not in data:
+                data += self.request.recv(4096)
+            self.request.sendall(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n\r\n")
+            while True:
+                chunk = self.request.recv(4096)
+                if not chunk:
+                    break
+                self.request.sendall(chunk.upper())
+    
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def get(port, path, headers=None, method="GET", body=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response, data
+
+def test_routing():
+    """Test prefix, host, Referer and cookie routing plus redirects."""
+    print("=" * 60)
+    print("TESTING: Proxy routing")
+    print("=" * 60)
+    
+    one, two = start_app("one"), start_app("two")
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppProxy, AsyncCommandEngine
+        
+        ports = {"one": one.server_address[1], "two": two.server_address[1], "gone": None, 'x"&<y>': None}
+        proxy = AppProxy(AsyncCommandEngine(), ports.get, apps=lambda: list(ports))
+        port = proxy.start()
+        try:
+            response, body = get(port, "/one/hello?x=1")
+            routed = json.loads(body)
+            print(f"   /one/hello?x=1 -> {routed}")
+            if routed != {"app": "one", "path": "/hello?x=1", "prefix": "/one"}:
+                print("❌ FAIL: Path prefix routing is wrong")
+                return False
+            if "sd-app=one" not in (response.getheader("Set-Cookie") or ""):
+                print("❌ FAIL: Prefixed response did not set the app cookie")
+                return False
+            
+            checks = [
+                ("/assets/app.js", {"Referer": f"http://127.0.0.1:{port}/two/"}, "two"),
+                ("/config", {"Cookie": "theme=dark; sd-app=one"}, "one"),
+                ("/", {"Host": "two.apps.example.com"}, "two"),
+            ]
+            for path, headers, expected in checks:
+                response, body = get(port, path, headers)
+                if json.loads(body)["app"] != expected:
+                    print(f"❌ FAIL: {path} with {headers} went to {json.loads(body)['app']}")
+                    return False
+            
+            response, _ = get(port, "/one/login")
+            if response.status != 302 or response.getheader("Location") != "/one/home":
+                print(f"❌ FAIL: Redirect not rewritten: {response.getheader('Location')}")
+                return False
+            response, _ = get(port, "/one")
+            if response.status != 301 or response.getheader("Location") != "/one/":
+                print("❌ FAIL: Bare prefix should redirect to the trailing slash")
+                return False
+            
+            statuses = [get(port, path)[0].status for path in ("/gone/", "/nothing/here", "/x%22%26%3Cy%3E/")]
+            response, body = get(port, "/")
+            print(f"   not running / unknown / quoted id: {statuses}")
+            if statuses != [502, 404, 502] or b'href="/one/"' not in body:
+                print("❌ FAIL: Errors or index page are wrong")
+                return False
+            if b'href="/x%22%26%3Cy%3E/">x&quot;&amp;&lt;y&gt;</a>' not in body or b"<y>" in body:
+                print("❌ FAIL: Index page does not escape app ids")
+                return False
+        finally:
+            proxy.stop()
+        
+        print("✅ PASS: Requests reach the right app")
+        return True
+        
+    except Exception as e:
+        print(f"❌ ROUTING TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        one.shutdown()
+        two.shutdown()
+
+def test_streaming_and_pooling():
+    """Test request/response bodies and upstream connection reuse."""
+    print("\n" + "=" * 60)
+    print("TESTING: Streaming bodies and connection pooling")
+    print("=" * 60)
+    
+    app = start_app("one")
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppProxy, AsyncCommandEngine, established_connections
+        
+        proxy = AppProxy(AsyncCommandEngine(), {"one": app.server_address[1]}.get, apps=lambda: ["one"])
+        proxy.REAP_SECONDS = 0.1
+        port = proxy.start()
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            results = []
+            for _ in range(5):
+                connection.request("GET", "/one/big")
+                results.append(connection.getresponse().read())
+            connection.request("POST", "/one/upload", body=b"a" * 100000)
+            posted = connection.getresponse().read()
+            connection.request("POST", "/one/upload", body=iter([b"abc", b"defg"]),
+                               headers={"Transfer-Encoding": "chunked"}, encode_chunked=True)
+            chunked = connection.getresponse().read()
+            connection.close()
+            print(f"   posted: {posted!r}, chunked: {chunked!r}, upstream opened "
+                  f"{proxy.upstream_opened}, reused {proxy.upstream_reused}")
+            
+            if any(result != BIG for result in results):
+                print("❌ FAIL: Large responses were corrupted")
+                return False
+            if posted != b"one got 100000" or chunked != b"one got 7":
+                print("❌ FAIL: Request bodies were not forwarded")
+                return False
+            if proxy.upstream_opened != 1 or proxy.upstream_reused != 6:
+                print("❌ FAIL: Upstream connections were not pooled")
+                return False
+            
+            # Pooled connections count as traffic on the app's port until they are closed
+            pooled = established_connections(app.server_address[1])
+            proxy.IDLE_SECONDS = 0.3
+            deadline = time.time() + 5
+            while established_connections(app.server_address[1]) and time.time() < deadline:
+                time.sleep(0.05)
+            left = established_connections(app.server_address[1])
+            print(f"   upstream sockets pooled: {pooled}, after the idle timeout with no requests: {left}")
+            if not pooled or left:
+                print("❌ FAIL: Expired pooled connections were not closed in the background")
+                return False
+        finally:
+            proxy.stop()
+        
+        print("✅ PASS: Bodies stream through one pooled upstream connection")
+        return True
+        
+    except Exception as e:
+        print(f"❌ STREAMING TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        app.shutdown()
+
+def test_websocket_and_wake():
+    """Test WebSocket relaying and waking an app that is not answering."""
+    print("\n" + "=" * 60)
+    print("TESTING: WebSocket upgrade and wake")
+    print("=" * 60)
+    
+    echo, app = start_websocket_echo(), start_app("sleepy")
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppProxy, AsyncCommandEngine
+        
+        ports = {"ws": echo.server_address[1], "sleepy": None}
+        woken = []
+        
+        def wake(app_id):
+            woken.append(app_id)
+            ports[app_id] = app.server_address[1]
+            return ports[app_id]
+        
+        proxy = AppProxy(AsyncCommandEngine(), ports.get, apps=lambda: list(ports), wake=wake)
+        port = proxy.start()
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=10) as client:
+                client.sendall(b"GET /ws/queue/join HTTP/1.1\r\nHost: localhost\r\n"
+                               b"Upgrade: websocket\r\nConnection: Upgrade\r\n\r\n")
+                head = b""
+                while b"\r\n\r\n" not in head:
+                    head += client.recv(4096)
+                client.sendall(b"hello frames")
+                echoed = b""
+                while len(echoed) < len(b"hello frames"):
+                    echoed += client.recv(4096)
+            status_line = head.split(b"\r\n")[0]
+            print(f"   upgrade: {status_line!r}, echoed: {echoed!r}")
+            if not head.startswith(b"HTTP/1.1 101") or echoed != b"HELLO FRAMES":
+                print("❌ FAIL: WebSocket was not relayed")
+                return False
+            
+            response, body = get(port, "/sleepy/")
+            if woken != ["sleepy"] or json.loads(body)["app"] != "sleepy":
+                print("❌ FAIL: Sleeping app was not woken")
+                return False
+            if proxy.last_activity.get("ws") is None or proxy.requests["sleepy"] != 1:
+                print("❌ FAIL: Activity was not recorded")
+                return False
+        finally:
+            proxy.stop()
+        
+        print("✅ PASS: WebSockets relay and idle apps wake on request")
+        return True
+        
+    except Exception as e:
+        print(f"❌ WEBSOCKET TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        echo.shutdown()
+        app.shutdown()
+
+def main():
+    """Run all app proxy tests."""
+    print("🧪 TESTING SD-PINNOKIO APP PROXY")
+    print("=" * 80)
+    
+    tests = [
+        test_routing,
+        test_streaming_and_pooling,
+        test_websocket_and_wake,
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! App proxy is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
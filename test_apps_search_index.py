@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the AppsDatabase inverted search index.
+
+Checks tokenization, prefix/substring expansion, BM25 ranking and the
+category/tag filters against the bundled cleaned_pinokio_apps.json catalog.
+"""
+
+import sys
+import time
+import traceback
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def load_database():
+    """Build a small fixture catalog in an AppsDatabase."""
+    from SINGLE_MEGA_CELL_NOTEBOOK import AppsDatabase
+    
+    apps_db = AppsDatabase()
+    apps_db.apps_data = {
+        "vibevoice": {"name": "VibeVoice-Pinokio", "description": "Text-to-Speech voice generation",
+                      "category": "AUDIO", "tags": ["TTS", "voice-cloning"], "author": "SUP3RMASS1VE"},
+        "stable-diffusion-webui": {"name": "Stable Diffusion WebUI", "description": "Image generation UI",
+                                   "category": "IMAGE", "tags": ["stable-diffusion", "8GB-VRAM"],
+                                   "author": "automatic1111"},
+        "comfyui": {"name": "ComfyUI", "description": "Node based stable diffusion interface",
+                    "category": "IMAGE", "tags": ["UI"], "author": "comfyanonymous"},
+        "whisper": {"name": "Whisper WebUI", "description": "Speech to text transcription",
+                    "category": "AUDIO", "tags": ["STT"], "author": "jhj0517"},
+    }
+    apps_db.extract_categories()
+    apps_db.build_search_index()
+    return apps_db
+
+def test_tokenizer():
+    """Test that tokenization lowercases and splits camelCase names."""
+    print("=" * 60)
+    print("TESTING: Search tokenizer")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import tokenize_search_text
+        
+        tokens = tokenize_search_text("VibeVoice-Pinokio 12GB-VRAM")
+        expected = {"vibevoice", "vibe", "voice", "pinokio", "12gb", "vram"}
+        if not expected.issubset(tokens):
+            print(f"❌ FAIL: Missing tokens {expected - set(tokens)}")
+            return False
+        
+        print(f"✅ PASS: Tokens: {tokens}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ TOKENIZER TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_ranked_search():
+    """Test exact, prefix and substring queries return ranked ids."""
+    print("\n" + "=" * 60)
+    print("TESTING: Ranked search")
+    print("=" * 60)
+    
+    try:
+        apps_db = load_database()
+        
+        checks = [
+            ("voice", "vibevoice"),          # exact token
+            ("comf", "comfyui"),             # prefix while typing
+            ("diffus", "stable-diffusion-webui"),  # substring via n-grams
+            ("stable diffusion", "stable-diffusion-webui"),  # name beats description
+        ]
+        for query, expected_first in checks:
+            results = apps_db.search(query)
+            if not results or results[0] != expected_first:
+                print(f"❌ FAIL: {query!r} -> {results}, expected {expected_first} first")
+                return False
+            print(f"✅ PASS: {query!r} -> {results}")
+        
+        if apps_db.search("voice nonexistentterm"):
+            print("❌ FAIL: All query tokens must match")
+            return False
+        
+        if len(apps_db.search("", limit=2)) != 2:
+            print("❌ FAIL: limit not applied to empty query")
+            return False
+        
+        print("✅ PASS: Ranking, AND semantics and limit behave correctly")
+        return True
+        
+    except Exception as e:
+        print(f"❌ RANKED SEARCH TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_filters():
+    """Test category and tag filters combine with the query."""
+    print("\n" + "=" * 60)
+    print("TESTING: Category and tag filters")
+    print("=" * 60)
+    
+    try:
+        apps_db = load_database()
+        
+        audio = apps_db.search("", category="AUDIO")
+        if set(audio) != {"vibevoice", "whisper"}:
+            print(f"❌ FAIL: Category filter returned {audio}")
+            return False
+        
+        tagged = apps_db.search("", tags=["tts"])
+        if tagged != ["vibevoice"]:
+            print(f"❌ FAIL: Tag filter returned {tagged}")
+            return False
+        
+        combined = apps_db.search("diffusion", category="IMAGE", tags=["8GB-VRAM"])
+        if combined != ["stable-diffusion-webui"]:
+            print(f"❌ FAIL: Combined filter returned {combined}")
+            return False
+        
+        print("✅ PASS: Filters narrow results as expected")
+        return True
+        
+    except Exception as e:
+        print(f"❌ FILTER TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_full_catalog_latency():
+    """Test search latency over the bundled catalog."""
+    print("\n" + "=" * 60)
+    print("TESTING: Full catalog search latency")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppsDatabase
+        
+        apps_db = AppsDatabase()
+        if not apps_db.load_apps_database():
+            print("❌ FAIL: Could not load cleaned_pinokio_apps.json")
+            return False
+        
+        started = time.perf_counter()
+        for query in ["v", "vo", "voi", "voic", "voice"]:
+            apps_db.search(query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        print(f"✅ PASS: 5 keystroke queries in {elapsed_ms:.2f}ms")
+        return True
+        
+    except Exception as e:
+        print(f"❌ LATENCY TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all search index tests."""
+    print("🧪 TESTING SD-PINNOKIO APP SEARCH INDEX")
+    print("=" * 80)
+    
+    tests = [
+        test_tokenizer,
+        test_ranked_search,
+        test_filters,
+        test_full_catalog_latency
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Search index is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the staged startup.
+
+Checks that BackgroundStartup runs its steps in order on its own thread and
+records them in the startup profile, that a failing step is reported
+without stopping the steps after it, and that the interface paints its
+first page from the catalog before the search index has been built.
+"""
+
+import io
+import sys
+import threading
+import traceback
+import contextlib
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def test_step_ordering():
+    """Test that steps run in order on the startup thread and are profiled."""
+    print("=" * 60)
+    print("TESTING: Background step ordering")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import BackgroundStartup, StartupProfile, STARTUP_PROFILE, lazy_import
+        
+        ran = []
+        gate = threading.Event()
+        
+        def step(name):
+            def run():
+                if name == "first":
+                    # The caller returns from start() while steps are still running
+                    gate.wait(5)
+                ran.append((name, threading.current_thread().name))
+                return True
+            return run
+        
+        names = ["first", "second", "third"]
+        profile = StartupProfile()
+        startup = BackgroundStartup([(name, step(name)) for name in names], profile)
+        startup.start()
+        startup.start()
+        returned_early = not startup.done.is_set() and not ran
+        gate.set()
+        if not startup.done.wait(10):
+            print("❌ FAIL: Background setup did not finish")
+            return False
+        
+        print(f"   ran: {ran}")
+        if not returned_early:
+            print("❌ FAIL: start() blocked on the steps")
+            return False
+        if ran != [(name, "sd-startup") for name in names]:
+            print("❌ FAIL: Steps ran out of order, twice or off the startup thread")
+            return False
+        recorded = [record[0] for record in sorted(profile.records, key=lambda record: record[1])]
+        if recorded != names or "background setup complete" not in profile.marks:
+            print(f"❌ FAIL: Profile recorded {recorded}")
+            return False
+        if startup.progress.value != len(names) or "complete" not in startup.label.value:
+            print("❌ FAIL: Progress widget did not reach the end")
+            return False
+        if "<pre>" not in startup.report.value or "third" not in startup.report.value:
+            print("❌ FAIL: Startup profile report missing")
+            return False
+        
+        # lazy_import profiles a module's first import only
+        module_name = next(name for name in ("colorsys", "wave", "sched", "netrc") if name not in sys.modules)
+        before = len(STARTUP_PROFILE.records)
+        lazy_import(module_name)
+        lazy_import(module_name)
+        imports = [record[0] for record in STARTUP_PROFILE.records[before:]]
+        if imports != [f"import {module_name}"]:
+            print(f"❌ FAIL: lazy_import recorded {imports}")
+            return False
+        
+        print("✅ PASS: Steps run in order on one background thread and are profiled")
+        return True
+        
+    except Exception as e:
+        print(f"❌ ORDERING TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_failure_reporting():
+    """Test that failed steps are reported and later steps still run."""
+    print("\n" + "=" * 60)
+    print("TESTING: Background step failures")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import BackgroundStartup, StartupProfile
+        
+        def broken():
+            raise RuntimeError("cloudflared download refused")
+        
+        ran = []
+        startup = BackgroundStartup([
+            ("catalog sync", lambda: ran.append("catalog sync") or True),
+            ("cloudflared", broken),
+            ("installer components", lambda: False),
+            ("venv pool", lambda: ran.append("venv pool") or True),
+        ], StartupProfile())
+        printed = io.StringIO()
+        with contextlib.redirect_stdout(printed):
+            startup._run()
+        
+        print(f"   label: {startup.label.value}")
+        if ran != ["catalog sync", "venv pool"]:
+            print("❌ FAIL: A failed step stopped the steps after it")
+            return False
+        if startup.results != {"catalog sync": True, "cloudflared": False,
+                               "installer components": False, "venv pool": True}:
+            print(f"❌ FAIL: Unexpected results {startup.results}")
+            return False
+        if "failed: cloudflared, installer components" not in startup.label.value:
+            print("❌ FAIL: Failed steps are not named in the progress label")
+            return False
+        if "Background setup step 'cloudflared' failed: cloudflared download refused" not in printed.getvalue():
+            print("❌ FAIL: The exception was not reported")
+            return False
+        if not startup.done.is_set():
+            print("❌ FAIL: done was not set after failures")
+            return False
+        
+        print("✅ PASS: Failures are reported by name and do not stop later steps")
+        return True
+        
+    except Exception as e:
+        print(f"❌ FAILURE TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_first_paint_without_index():
+    """Test that the first page renders before the search index exists."""
+    print("\n" + "=" * 60)
+    print("TESTING: First paint before the search index")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppsDatabase, BackgroundStartup, CompleteUI, StartupProfile
+        
+        apps_db = AppsDatabase()
+        if not apps_db.load_apps_database(build_index=False):
+            print("❌ FAIL: Catalog did not load")
+            return False
+        ui = CompleteUI(apps_db, None, None, None)
+        ui.create_complete_interface()
+        shown = [card.app_id for card in ui.app_list.cards if card.widget.layout.display != 'none']
+        print(f"   first paint: {len(shown)} cards, index built: {apps_db.search_index is not None}")
+        
+        if apps_db.search_index is not None:
+            print("❌ FAIL: Painting the first page built the search index")
+            return False
+        if shown != list(apps_db.apps_data.keys())[:ui.apps_per_page.value]:
+            print("❌ FAIL: First page does not show the catalog in order")
+            return False
+        
+        startup = BackgroundStartup([("search index", lambda: apps_db.build_search_index() or True)],
+                                    StartupProfile()).start()
+        if not startup.done.wait(30) or apps_db.search_index is None:
+            print("❌ FAIL: Background step did not build the index")
+            return False
+        if not apps_db.search("stable diffusion"):
+            print("❌ FAIL: Search finds nothing once the index is built")
+            return False
+        
+        print("✅ PASS: Catalog paints without the index; the index follows in the background")
+        return True
+        
+    except Exception as e:
+        print(f"❌ FIRST PAINT TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all staged startup tests."""
+    print("🧪 TESTING SD-PINNOKIO STAGED STARTUP")
+    print("=" * 80)
+    
+    tests = [
+        test_step_ordering,
+        test_failure_reporting,
+        test_first_paint_without_index
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Staged startup is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Test script to verify catalog enrichment from app repositories.
+
+Probes local bare repositories over file:// URLs: installer and requirements
+fields are derived from a sparse read, unchanged repos are skipped by HEAD,
+probes run with bounded parallelism, enriched fields are saved back to
+the catalog, and the enrichment runs as an opt-in background startup step.
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+import subprocess
+import traceback
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def git(*args, cwd=None):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@localhost"] + list(args),
+                   cwd=cwd, check=True, capture_output=True)
+
+def make_bare_repo(root, name, files):
+    """A bare repo serving files, plus the work tree used to push changes."""
+    work = Path(root) / "work" / name
+    work.mkdir(parents=True)
+    git("init", "-q", cwd=work)
+    commit_files(work, files)
+    bare = Path(root) / "remote" / f"{name}.git"
+    git("clone", "-q", "--bare", str(work), str(bare))
+    git("config", "uploadpack.allowFilter", "true", cwd=bare)
+    git("remote", "add", "origin", str(bare), cwd=work)
+    return work, bare.resolve().as_uri()
+
+def commit_files(work, files):
+    for path, text in files.items():
+        (work / path).parent.mkdir(parents=True, exist_ok=True)
+        (work / path).write_text(text)
+    git("add", ".", cwd=work)
+    git("commit", "-q", "-m", "update", cwd=work)
+
+def test_sparse_probe():
+    """Test the fields derived from one repository."""
+    print("=" * 60)
+    print("TESTING: Sparse repository probe")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import CatalogEnricher
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            _, url = make_bare_repo(tmp, "demo", {
+                "install.js": 'module.exports = { run: [{ method: "shell.run", '
+                              'params: { message: "pip install torch==2.1.0 gradio" } }] }',
+                "pinokio.js": "module.exports = {}",
+                "app/requirements.txt": "transformers>=4.30\n# comment\nnumpy\ngit+https://example.com/x.git\n",
+                "weights/model.bin": "x" * 100000,
+                "deep/nested/requirements.txt": "ignored\n",
+            })
+            enricher = CatalogEnricher(cache_path=Path(tmp) / "probes.json", fetch_stars=False)
+            head, files = enricher.read_files(url)
+            fields = CatalogEnricher.fields_from_files(files)
+            print(f"   files: {sorted(files)}")
+            print(f"   fields: {fields}")
+            
+            if sorted(files) != ["app/requirements.txt", "install.js", "pinokio.js"] or len(head or "") != 40:
+                print("❌ FAIL: Sparse read returned the wrong files")
+                return False
+            if fields['installer_type'] != 'js' or not fields['has_pinokio_js'] or fields['has_install_json']:
+                print("❌ FAIL: Installer fields are wrong")
+                return False
+            if fields['requirements_count'] != 4 or fields['estimated_install_bytes'] < 2600 * 1024 * 1024:
+                print("❌ FAIL: Requirements were not estimated")
+                return False
+        
+        print("✅ PASS: Probes read only installer and requirements files")
+        return True
+        
+    except Exception as e:
+        print(f"❌ PROBE TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_enrich_catalog():
+    """Test concurrent enrichment, HEAD caching and writing fields back."""
+    print("\n" + "=" * 60)
+    print("TESTING: Concurrent enrichment with a HEAD cache")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppsDatabase, CatalogEnricher
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog, works = {}, {}
+            for index in range(6):
+                files = {"install.json": "{}"} if index % 2 else {"README.md": "no installer"}
+                works[f"app-{index}"], url = make_bare_repo(tmp, f"app-{index}", files)
+                catalog[f"app-{index}"] = {
+                    "name": f"App {index}", "category": "TOOLS", "clone_url": url, "repo_url": url,
+                    "stars": 0, "has_install_js": True, "has_install_json": False,
+                    "has_pinokio_js": True, "installer_type": "js",
+                }
+            catalog["gone"] = dict(catalog["app-0"], clone_url=Path(tmp, "missing.git").as_uri())
+            (Path(tmp) / "catalog.json").write_text(json.dumps(catalog))
+            apps_db = AppsDatabase(catalog_path=Path(tmp) / "catalog.json")
+            apps_db.load_apps_database()
+            
+            active, peak = [0], [0]
+            lock = threading.Lock()
+            
+            class CountingEnricher(CatalogEnricher):
+                def remote_head(self, clone_url):
+                    with lock:
+                        active[0] += 1
+                        peak[0] = max(peak[0], active[0])
+                    try:
+                        time.sleep(0.2)
+                        return super().remote_head(clone_url)
+                    finally:
+                        with lock:
+                            active[0] -= 1
+            
+            enricher = CountingEnricher(cache_path=Path(tmp) / "probes.json", parallel=3, fetch_stars=False)
+            first = enricher.enrich(apps_db)
+            print(f"   first: {first['probed']} probed, {first['failed']} failed, peak parallelism {peak[0]}")
+            
+            if first['probed'] != 6 or first['failed'] != 1 or peak[0] != 3:
+                print("❌ FAIL: Repos were not probed concurrently within the bound")
+                return False
+            saved = json.loads((Path(tmp) / "catalog.json").read_text())
+            if saved["app-1"]["installer_type"] != 'json' or saved["app-0"]["has_install_js"] \
+                    or saved["app-0"]["installer_type"] is not None:
+                print(f"❌ FAIL: Enriched fields were not saved: {saved['app-0']}")
+                return False
+            
+            commit_files(works["app-2"], {"install.js": "module.exports = { run: [] }"})
+            git("push", "-q", "origin", "HEAD", cwd=works["app-2"])
+            second = enricher.enrich(apps_db)
+            print(f"   second: {second['probed']} probed, {second['cached']} unchanged, "
+                  f"changed {second['changed']}")
+            if second['probed'] != 1 or second['cached'] != 5 or second['changed'] != ["app-2"]:
+                print("❌ FAIL: Unchanged repos were probed again")
+                return False
+            if apps_db.apps_data["app-2"]["installer_type"] != 'js':
+                print("❌ FAIL: Changed repo was not re-read")
+                return False
+        
+        print("✅ PASS: Only repos with a new HEAD are re-read")
+        return True
+        
+    except Exception as e:
+        print(f"❌ ENRICH TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_startup_task():
+    """Test the opt-in background startup step."""
+    print("\n" + "=" * 60)
+    print("TESTING: Catalog enrichment as a startup step")
+    print("=" * 60)
+    
+    previous = os.environ.pop("SD_PINNOKIO_ENRICH_CATALOG", None)
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppsDatabase, CatalogEnricher
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            work, url = make_bare_repo(tmp, "app", {"install.json": "{}"})
+            catalog = {"app": {"name": "App", "category": "TOOLS", "clone_url": url, "repo_url": url,
+                               "has_install_js": True, "has_install_json": False, "installer_type": "js"}}
+            (Path(tmp) / "catalog.json").write_text(json.dumps(catalog))
+            apps_db = AppsDatabase(catalog_path=Path(tmp) / "catalog.json")
+            apps_db.load_apps_database()
+            updates = []
+            options = dict(on_changed=lambda: updates.append(True),
+                           cache_path=Path(tmp) / "probes.json", fetch_stars=False)
+            
+            if CatalogEnricher.startup_task(apps_db, **options) is not None:
+                print("❌ FAIL: Enrichment is a startup step without the env flag")
+                return False
+            os.environ["SD_PINNOKIO_ENRICH_CATALOG"] = "0"
+            if CatalogEnricher.startup_task(apps_db, **options) is not None:
+                print("❌ FAIL: SD_PINNOKIO_ENRICH_CATALOG=0 still enabled the step")
+                return False
+            
+            os.environ["SD_PINNOKIO_ENRICH_CATALOG"] = "1"
+            name, task = CatalogEnricher.startup_task(apps_db, **options)
+            ok = task()
+            print(f"   {name}: ok={ok}, installer now {apps_db.apps_data['app']['installer_type']}, "
+                  f"UI refreshed {len(updates)}x")
+            if not ok or apps_db.apps_data["app"]["installer_type"] != 'json' or updates != [True]:
+                print("❌ FAIL: Startup step did not enrich the catalog and refresh the UI")
+                return False
+            if apps_db.search("", filters={'installer_type': 'json'}) != ["app"]:
+                print("❌ FAIL: Search index did not pick up the enriched record")
+                return False
+        
+        print("✅ PASS: SD_PINNOKIO_ENRICH_CATALOG adds an enrichment step to background startup")
+        return True
+        
+    except Exception as e:
+        print(f"❌ STARTUP STEP TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        if previous is None:
+            os.environ.pop("SD_PINNOKIO_ENRICH_CATALOG", None)
+        else:
+            os.environ["SD_PINNOKIO_ENRICH_CATALOG"] = previous
+
+def main():
+    """Run all catalog enrichment tests."""
+    print("🧪 TESTING SD-PINNOKIO CATALOG ENRICHMENT")
+    print("=" * 80)
+    
+    tests = [
+        test_sparse_probe,
+        test_enrich_catalog,
+        test_startup_task,
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Catalog enrichment is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the compiled catalog snapshot.
+
+Checks that the memory-mapped snapshot round-trips cleaned_pinokio_apps.json,
+materializes records lazily and is recompiled when the JSON source changes.
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import traceback
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+CATALOG_JSON = Path(__file__).parent / "cleaned_pinokio_apps.json"
+
+def test_snapshot_roundtrip():
+    """Test that every record reads back identical to the JSON source."""
+    print("=" * 60)
+    print("TESTING: Catalog snapshot round-trip")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import CatalogSnapshot
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = Path(tmp) / "apps.json"
+            shutil.copy(CATALOG_JSON, json_path)
+            
+            catalog = CatalogSnapshot.load(json_path)
+            with open(json_path) as f:
+                source = json.load(f)
+            
+            if list(catalog) != list(source):
+                print("❌ FAIL: App ids or order differ from the JSON source")
+                return False
+            
+            if catalog.materialized_count != 0:
+                print(f"❌ FAIL: {catalog.materialized_count} records materialized before access")
+                return False
+            
+            mismatched = [app_id for app_id, record in source.items() if catalog[app_id] != record]
+            if mismatched:
+                print(f"❌ FAIL: Records differ: {mismatched[:5]}")
+                return False
+            
+            print(f"✅ PASS: {len(catalog)} records round-trip through the snapshot")
+            return True
+        
+    except Exception as e:
+        print(f"❌ SNAPSHOT ROUND-TRIP TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_snapshot_rebuild_when_stale():
+    """Test that a newer JSON source triggers a recompile."""
+    print("\n" + "=" * 60)
+    print("TESTING: Catalog snapshot staleness")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import CatalogSnapshot
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = Path(tmp) / "apps.json"
+            with open(json_path, 'w') as f:
+                json.dump({"one": {"name": "One", "tags": ["TTS"], "stars": 3}}, f)
+            
+            catalog = CatalogSnapshot.load(json_path)
+            if catalog["one"]["name"] != "One":
+                print("❌ FAIL: Initial snapshot incorrect")
+                return False
+            
+            with open(json_path, 'w') as f:
+                json.dump({"one": {"name": "One v2"}, "two": {"name": "Two", "extra": [1]}}, f)
+            stat = json_path.stat()
+            os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            
+            catalog = CatalogSnapshot.load(json_path)
+            if catalog["one"] != {"name": "One v2"} or catalog["two"] != {"name": "Two", "extra": [1]}:
+                print(f"❌ FAIL: Snapshot not rebuilt: {dict(catalog)}")
+                return False
+            
+            print("✅ PASS: Snapshot recompiled after the JSON changed")
+            return True
+        
+    except Exception as e:
+        print(f"❌ SNAPSHOT STALENESS TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_categories_match_across_paths():
+    """Test that the snapshot and plain-dict paths bucket categories the same way."""
+    print("\n" + "=" * 60)
+    print("TESTING: Category extraction on both catalog paths")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import CatalogSnapshot, AppsDatabase
+        
+        records = {
+            "blank": {"name": "Blank", "category": ""},
+            "missing": {"name": "Missing"},
+            "none": {"name": "None", "category": None},
+            "audio": {"name": "Audio", "category": "AUDIO"}
+        }
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = Path(tmp) / "apps.json"
+            with open(json_path, 'w') as f:
+                json.dump(records, f)
+            
+            lazy_db = AppsDatabase()
+            lazy_db.apps_data = CatalogSnapshot.load(json_path)
+            lazy_db.extract_categories()
+            
+            dict_db = AppsDatabase()
+            dict_db.apps_data = json.loads(json_path.read_text())
+            dict_db.extract_categories()
+        
+        expected = {'Unknown': 3, 'AUDIO': 1}
+        if dict(lazy_db.category_counts) != expected or dict(dict_db.category_counts) != expected:
+            print(f"❌ FAIL: snapshot {dict(lazy_db.category_counts)} vs dict {dict(dict_db.category_counts)}")
+            return False
+        
+        print("✅ PASS: Empty and missing categories count as 'Unknown' on both paths")
+        return True
+        
+    except Exception as e:
+        print(f"❌ CATEGORY EXTRACTION TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all catalog snapshot tests."""
+    print("🧪 TESTING SD-PINNOKIO CATALOG SNAPSHOT")
+    print("=" * 80)
+    
+    tests = [
+        test_snapshot_roundtrip,
+        test_snapshot_rebuild_when_stale,
+        test_categories_match_across_paths
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Catalog snapshot is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Test script to verify catalog sync and incremental index updates.
+
+Checks that updating and removing single records in the search index gives
+the same results as a rebuild, and syncs against a local HTTP fixture
+server: conditional requests answered with 304, full catalogs diffed to
+per-record changes, and delta feeds requested with ?since=<version>.
+"""
+
+import sys
+import gzip
+import json
+import copy
+import tempfile
+import threading
+import traceback
+import http.server
+import urllib.parse
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+CATALOG = json.loads((Path(__file__).parent / "cleaned_pinokio_apps.json").read_text())
+SAMPLE = dict(list(CATALOG.items())[:40])
+QUERIES = ["", "voice", "stable diffusion", "diffus", "video upscale", "zzznewterm"]
+
+class CatalogServer:
+    """Serves a full catalog with ETags, or deltas when asked ?since=<version>."""
+    
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.etag = '"v1"'
+        self.deltas = {}
+        self.requests = []
+        server = self
+        
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                server.requests.append((self.path, self.headers.get("If-None-Match")))
+                if self.headers.get("If-None-Match") == server.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                since = query.get("since", [None])[0]
+                document = server.deltas.get(since, server.catalog)
+                body = gzip.compress(json.dumps(document).encode())
+                self.send_response(200)
+                self.send_header("ETag", server.etag)
+                self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/catalog.json"
+    
+    def close(self):
+        self.httpd.shutdown()
+
+def load_db(tmp, catalog):
+    from SINGLE_MEGA_CELL_NOTEBOOK import AppsDatabase
+    
+    path = Path(tmp) / "catalog.json"
+    if not path.exists():
+        path.write_text(json.dumps(catalog, indent=2))
+    apps_db = AppsDatabase(catalog_path=path)
+    if not apps_db.load_apps_database():
+        raise RuntimeError("catalog did not load")
+    return apps_db
+
+def same_results(left, right):
+    for query in QUERIES:
+        for category in (None, "AUDIO", "VIDEO", "NEWCAT"):
+            if left.search(query, category=category) != right.search(query, category=category):
+                print(f"   mismatch for {query!r} in {category}")
+                return False
+    return left.vocabulary == right.vocabulary and left.ngram_postings == right.ngram_postings
+
+def test_incremental_index():
+    """Test that per-record updates match a full rebuild."""
+    print("=" * 60)
+    print("TESTING: Incremental search index updates")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppSearchIndex
+        
+        records = copy.deepcopy(SAMPLE)
+        index = AppSearchIndex(records)
+        first, second = list(records)[:2]
+        
+        records[first] = dict(records[first], name="Zzznewterm Studio", category="NEWCAT", tags=["voice"])
+        index.update(first, records[first])
+        del records[second]
+        index.remove(second)
+        records["brand-new"] = {"name": "Brand New Diffusion", "category": "VIDEO", "tags": ["upscale"],
+                                "description": "video upscale with stable diffusion"}
+        index.update("brand-new", records["brand-new"])
+        rebuilt = AppSearchIndex(records)
+        
+        print(f"   {len(index.vocabulary)} terms after updates, {len(rebuilt.vocabulary)} after rebuild")
+        if not same_results(index, rebuilt):
+            print("❌ FAIL: Incremental index differs from a rebuild")
+            return False
+        if abs(index.average_length - rebuilt.average_length) > 1e-9 or second in index.doc_order:
+            print("❌ FAIL: Document statistics were not maintained")
+            return False
+        
+        print("✅ PASS: Updating single records matches a rebuild")
+        return True
+        
+    except Exception as e:
+        print(f"❌ INDEX TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_full_catalog_sync():
+    """Test conditional fetches and diffing a full catalog."""
+    print("\n" + "=" * 60)
+    print("TESTING: Conditional full-catalog sync")
+    print("=" * 60)
+    
+    remote = copy.deepcopy(SAMPLE)
+    changed_id, removed_id = list(remote)[3], list(remote)[5]
+    remote[changed_id]["description"] = "Now with zzznewterm support"
+    remote[changed_id]["category"] = "NEWCAT"
+    del remote[removed_id]
+    server = CatalogServer(remote)
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import CatalogSync
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            apps_db = load_db(tmp, SAMPLE)
+            result = CatalogSync(apps_db, source=server.url).sync()
+            print(f"   first sync: {result['status']}, {result['upserts']} updated, "
+                  f"{result['deletions']} removed, {result['bytes']} bytes")
+            
+            if result['status'] != 'updated' or result['upserts'] != 1 or result['deletions'] != 1:
+                print("❌ FAIL: Only the changed records should be applied")
+                return False
+            if apps_db.search("zzznewterm") != [changed_id] or "NEWCAT" not in apps_db.categories:
+                print("❌ FAIL: Index or categories were not updated")
+                return False
+            
+            again = CatalogSync(apps_db, source=server.url).sync()
+            if again['status'] != 'unchanged' or again['bytes'] != 0 or server.requests[-1][1] != '"v1"':
+                print(f"❌ FAIL: Second sync was not conditional: {again}")
+                return False
+            
+            reloaded = load_db(tmp, None)
+            if removed_id in reloaded.apps_data or "zzznewterm" not in reloaded.apps_data[changed_id]["description"]:
+                print("❌ FAIL: Local catalog was not saved")
+                return False
+        
+        print("✅ PASS: Unchanged catalogs cost a 304 and changes apply per record")
+        return True
+        
+    except Exception as e:
+        print(f"❌ FULL SYNC TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        server.close()
+
+def test_delta_feed():
+    """Test a source that serves deltas since the last version."""
+    print("\n" + "=" * 60)
+    print("TESTING: Delta feed sync")
+    print("=" * 60)
+    
+    server = CatalogServer({"version": "v1", "full": True, "upserts": SAMPLE})
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import CatalogSync
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            apps_db = load_db(tmp, SAMPLE)
+            apps_db.build_search_index()
+            first = CatalogSync(apps_db, source=server.url).sync()
+            
+            gone = list(SAMPLE)[0]
+            server.etag = '"v2"'
+            server.deltas["v1"] = {
+                "version": "v2",
+                "upserts": {"fresh-app": {"name": "Fresh App", "category": "NEWCAT", "tags": ["zzznewterm"]}},
+                "deletions": [gone],
+            }
+            second = CatalogSync(apps_db, source=server.url).sync()
+            print(f"   first: {first['status']}, second: {second['status']} via {server.requests[-1][0]}")
+            
+            if first['status'] != 'unchanged' or not server.requests[-1][0].endswith("?since=v1"):
+                print("❌ FAIL: Sync did not ask for changes since the last version")
+                return False
+            if second['changed'] != [gone, "fresh-app"] or apps_db.search("zzznewterm") != ["fresh-app"]:
+                print(f"❌ FAIL: Delta was not applied: {second}")
+                return False
+            if gone in apps_db.search("", category=SAMPLE[gone]["category"]):
+                print("❌ FAIL: Deleted record is still indexed")
+                return False
+        
+        print("✅ PASS: Delta feeds apply only the records that changed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ DELTA TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        server.close()
+
+def main():
+    """Run all catalog sync tests."""
+    print("🧪 TESTING SD-PINNOKIO CATALOG SYNC")
+    print("=" * 80)
+    
+    tests = [
+        test_incremental_index,
+        test_full_catalog_sync,
+        test_delta_feed,
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Catalog sync is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
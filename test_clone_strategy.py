@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the git clone strategy used by the installer.
+
+Runs entirely against local file:// repositories: shallow clones, the shared
+bare object cache with worktree checkouts, and updating existing checkouts
+with a fetch instead of failing on an existing directory.
+"""
+
+import sys
+import subprocess
+import tempfile
+import traceback
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def git(args, cwd):
+    """Run git quietly and return stdout."""
+    result = subprocess.run(
+        ["git", "-c", "user.email=test@example.com", "-c", "user.name=test"] + args,
+        cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, check=True
+    )
+    return result.stdout.strip()
+
+def make_source_repo(root, commits=3):
+    """Create a local repository with a few commits and return its file:// URL."""
+    source = Path(root) / "source"
+    source.mkdir()
+    git(["init", "-q"], source)
+    for i in range(commits):
+        add_commit(source, f"file{i}.txt")
+    return source, f"file://{source}"
+
+def add_commit(source, filename):
+    (Path(source) / filename).write_text(filename)
+    git(["add", "."], source)
+    git(["commit", "-qm", f"add {filename}"], source)
+
+def runner(log):
+    """Command runner in the shape GitCloneStrategy expects."""
+    def run(cmd, cwd=None):
+        result = subprocess.run(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        log.append(f"$ {' '.join(cmd)} -> {result.returncode}")
+        return result.returncode
+    return run
+
+def test_shallow_clone_and_update():
+    """Test shallow clones and fetch-based updates of an existing checkout."""
+    print("=" * 60)
+    print("TESTING: Shallow clone and update")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import GitCloneStrategy
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            source, url = make_source_repo(tmp)
+            dest = Path(tmp) / "apps" / "demo"
+            log = []
+            strategy = GitCloneStrategy(use_cache=False)
+            
+            if not strategy.checkout(url, dest, runner(log), log.append):
+                print(f"❌ FAIL: Shallow clone failed: {log}")
+                return False
+            
+            depth = git(["rev-list", "--count", "HEAD"], dest)
+            if depth != "1":
+                print(f"❌ FAIL: Expected depth 1, got {depth}")
+                return False
+            print("✅ PASS: Shallow clone has a single commit")
+            
+            add_commit(source, "new.txt")
+            if not strategy.checkout(url, dest, runner(log), log.append):
+                print(f"❌ FAIL: Update of existing checkout failed: {log}")
+                return False
+            if not (dest / "new.txt").exists():
+                print("❌ FAIL: Existing checkout was not updated")
+                return False
+            
+            print("✅ PASS: Existing checkout updated with a fetch")
+            return True
+        
+    except Exception as e:
+        print(f"❌ SHALLOW CLONE TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_object_cache_reuse():
+    """Test that installs of the same clone URL share one bare object cache."""
+    print("\n" + "=" * 60)
+    print("TESTING: Object cache reuse")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import GitCloneStrategy
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            source, url = make_source_repo(tmp)
+            strategy = GitCloneStrategy(cache_dir=Path(tmp) / "cache")
+            log = []
+            
+            first = Path(tmp) / "apps" / "first"
+            second = Path(tmp) / "apps" / "second"
+            if not strategy.checkout(url, first, runner(log), log.append):
+                print(f"❌ FAIL: First checkout failed: {log}")
+                return False
+            if not strategy.checkout(url + ".git", second, runner(log), log.append):
+                print(f"❌ FAIL: Second checkout failed: {log}")
+                return False
+            
+            caches = list((Path(tmp) / "cache").iterdir())
+            if len(caches) != 1:
+                print(f"❌ FAIL: Expected one cache repo, found {caches}")
+                return False
+            
+            worktrees = git(["worktree", "list"], caches[0])
+            if str(first) not in worktrees or str(second) not in worktrees:
+                print(f"❌ FAIL: Checkouts are not cache worktrees:\n{worktrees}")
+                return False
+            print("✅ PASS: Both checkouts share one bare object cache")
+            
+            add_commit(source, "later.txt")
+            if not strategy.checkout(url, first, runner(log), log.append) or not (first / "later.txt").exists():
+                print(f"❌ FAIL: Cache-backed checkout not updated: {log}")
+                return False
+            
+            print("✅ PASS: Cache refresh updates an existing checkout")
+            return True
+        
+    except Exception as e:
+        print(f"❌ OBJECT CACHE TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_refuses_foreign_directory():
+    """Test that a non-empty, non-git directory is reported instead of clobbered."""
+    print("\n" + "=" * 60)
+    print("TESTING: Existing non-git directory")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import GitCloneStrategy
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            _, url = make_source_repo(tmp, commits=1)
+            dest = Path(tmp) / "apps" / "occupied"
+            dest.mkdir(parents=True)
+            (dest / "user_file.txt").write_text("keep me")
+            log = []
+            
+            if GitCloneStrategy(use_cache=False).checkout(url, dest, runner(log), log.append):
+                print("❌ FAIL: Checkout into a foreign directory should fail")
+                return False
+            if not (dest / "user_file.txt").exists():
+                print("❌ FAIL: Existing files were removed")
+                return False
+            
+            print("✅ PASS: Foreign directory left untouched")
+            return True
+        
+    except Exception as e:
+        print(f"❌ FOREIGN DIRECTORY TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all clone strategy tests."""
+    print("🧪 TESTING SD-PINNOKIO CLONE STRATEGY")
+    print("=" * 80)
+    
+    tests = [
+        test_shallow_clone_and_update,
+        test_object_cache_reuse,
+        test_refuses_foreign_directory
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Clone strategy is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the asynchronous command engine.
+
+Checks the ShellRunner-style run_command contract (CommandResult fields and
+the returncode alias), timeouts that kill the whole process group, concurrent
+commands on the shared event loop, and bounded output buffers.
+"""
+
+import sys
+import time
+import traceback
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def test_run_command_contract():
+    """Test that run_command returns a complete CommandResult."""
+    print("=" * 60)
+    print("TESTING: run_command result contract")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AsyncCommandEngine, CommandStatus
+        
+        engine = AsyncCommandEngine()
+        result = engine.run_command("echo out; echo err >&2")
+        print(f"   status: {result.status}, returncode: {result.returncode}")
+        
+        if result.status != CommandStatus.COMPLETED or result.returncode != 0:
+            print("❌ FAIL: Command did not complete successfully")
+            return False
+        if result.stdout.strip() != "out" or result.stderr.strip() != "err":
+            print(f"❌ FAIL: Unexpected output {result.stdout!r} / {result.stderr!r}")
+            return False
+        
+        missing = engine.run_command(["sd-pinnokio-no-such-command"])
+        if missing.status != CommandStatus.FAILED or not missing.error_message:
+            print(f"❌ FAIL: Missing command reported as {missing.status}")
+            return False
+        
+        command_id = engine.run_command("true", capture_output=False)
+        if not isinstance(command_id, str):
+            print(f"❌ FAIL: capture_output=False returned {type(command_id)}")
+            return False
+        
+        print("✅ PASS: run_command matches the ShellRunner contract")
+        return True
+        
+    except Exception as e:
+        print(f"❌ CONTRACT TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_timeout_and_concurrency():
+    """Test timeouts and concurrent execution on the shared loop."""
+    print("\n" + "=" * 60)
+    print("TESTING: Timeouts and concurrency")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AsyncCommandEngine, CommandStatus
+        
+        engine = AsyncCommandEngine()
+        start = time.time()
+        result = engine.run_command("sleep 30 & sleep 30", timeout=0.5)
+        elapsed = time.time() - start
+        print(f"   timeout status: {result.status} after {elapsed:.2f}s")
+        
+        if result.status != CommandStatus.TIMEOUT or elapsed > 10:
+            print("❌ FAIL: Timed out command was not killed")
+            return False
+        
+        start = time.time()
+        handles = [engine.submit(["sleep", "0.5"]) for _ in range(10)]
+        results = [handle.wait(10) for handle in handles]
+        elapsed = time.time() - start
+        print(f"   10 x sleep 0.5 finished in {elapsed:.2f}s")
+        
+        if any(r.return_code != 0 for r in results) or elapsed > 3:
+            print("❌ FAIL: Commands did not run concurrently")
+            return False
+        
+        print("✅ PASS: Timeouts kill the process group and commands run concurrently")
+        return True
+        
+    except Exception as e:
+        print(f"❌ TIMEOUT TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_streaming_and_bounded_output():
+    """Test line callbacks and the output ring buffer."""
+    print("\n" + "=" * 60)
+    print("TESTING: Streaming and bounded output")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AsyncCommandEngine
+        
+        engine = AsyncCommandEngine(buffer_lines=100)
+        lines = []
+        return_code = engine.run("seq 1 1000", on_line=lambda stream, line: lines.append(line))
+        handle = engine.submit("seq 1 1000")
+        handle.wait(10)
+        print(f"   streamed {len(lines)} lines, kept {len(handle.stdout.lines)}")
+        
+        if return_code != 0 or len(lines) != 1000 or lines[-1] != "1000":
+            print("❌ FAIL: Not every line was streamed")
+            return False
+        if len(handle.stdout.lines) != 100 or handle.stdout.dropped_lines != 900:
+            print("❌ FAIL: Output buffer is not bounded")
+            return False
+        
+        print("✅ PASS: Output streams line by line into bounded buffers")
+        return True
+        
+    except Exception as e:
+        print(f"❌ STREAMING TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all command engine tests."""
+    print("🧪 TESTING SD-PINNOKIO COMMAND ENGINE")
+    print("=" * 80)
+    
+    tests = [
+        test_run_command_contract,
+        test_timeout_and_concurrency,
+        test_streaming_and_bounded_output,
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Command engine is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
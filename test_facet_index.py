@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the bitset facet index.
+
+Checks that combined facet filters and live counts over the real catalog
+match a naive scan of the records, that facet bits follow per-record updates
+and removals, and that the UI's facet dropdowns show counts and filter the
+app list.
+"""
+
+import sys
+import copy
+import time
+import itertools
+import traceback
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def load_db():
+    from SINGLE_MEGA_CELL_NOTEBOOK import AppsDatabase
+    
+    apps_db = AppsDatabase()
+    if not apps_db.load_apps_database():
+        raise RuntimeError("catalog did not load")
+    return apps_db
+
+def naive_match(app_data, filters):
+    """The dict-scan a filter replaces; a number for vram means "fits in N GB"."""
+    from SINGLE_MEGA_CELL_NOTEBOOK import FacetIndex
+    
+    values = FacetIndex.values_for(app_data)
+    for facet, wanted in filters.items():
+        if wanted is None:
+            continue
+        if facet == 'vram':
+            if not values['vram'] & set(FacetIndex.tiers_within(wanted)):
+                return False
+        elif wanted not in values[facet]:
+            return False
+    return True
+
+def test_filters_match_scan():
+    """Test combined facet filters and counts against a scan of the records."""
+    print("=" * 60)
+    print("TESTING: Facet filters and counts against a record scan")
+    print("=" * 60)
+    
+    try:
+        apps_db = load_db()
+        records = {app_id: apps_db.apps_data[app_id] for app_id in apps_db.apps_data.keys()}
+        facets = apps_db.search_index.facets
+        print(f"   vram tiers: {sorted(facets.bits['vram'])}")
+        
+        combinations = itertools.product(
+            [None] + apps_db.categories[:4], [None, 'js', 'json'], [None, 8, 12], [None, 'tts'])
+        checked = 0
+        for category, installer, vram, tag in combinations:
+            filters = {'category': category, 'installer_type': installer, 'vram': vram, 'tag': tag}
+            expected = [app_id for app_id, app_data in records.items() if naive_match(app_data, filters)]
+            if apps_db.search("", filters=filters) != expected:
+                print(f"❌ FAIL: Filter {filters} differs from a scan")
+                return False
+            checked += 1
+        
+        filters = {'installer_type': 'json', 'vram': 12}
+        counts = apps_db.facet_counts("", filters=filters)
+        for category, count in counts['category'].items():
+            expected = sum(1 for app_data in records.values()
+                           if naive_match(app_data, dict(filters, category=category)))
+            if count != expected:
+                print(f"❌ FAIL: Count for {category} is {count}, expected {expected}")
+                return False
+        if counts['installer_type'].get('js', 0) != sum(
+                1 for app_data in records.values() if naive_match(app_data, {'installer_type': 'js', 'vram': 12})):
+            print("❌ FAIL: Counts for a facet should ignore that facet's own filter")
+            return False
+        
+        started = time.perf_counter()
+        for _ in range(1000):
+            facets.select([('category', 'IMAGE'), ('vram', 8), ('installer_type', 'json')])
+        per_filter_us = (time.perf_counter() - started) * 1000
+        print(f"   {checked} filter combinations checked; IMAGE ∧ ≤8GB ∧ json in {per_filter_us:.1f}µs")
+        
+        print("✅ PASS: Bitset filters and counts match a record scan")
+        return True
+        
+    except Exception as e:
+        print(f"❌ FILTER TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_incremental_facets():
+    """Test that facet bits follow updates and removals."""
+    print("\n" + "=" * 60)
+    print("TESTING: Facets under record updates")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppSearchIndex
+        
+        apps_db = load_db()
+        records = copy.deepcopy({app_id: apps_db.apps_data[app_id] for app_id in apps_db.apps_data.keys()})
+        index = AppSearchIndex(records)
+        first, second = list(records)[:2]
+        
+        records[first] = dict(records[first], category="NEWCAT", installer_type="json", tags=["6GB-VRAM"])
+        index.update(first, records[first])
+        del records[second]
+        index.remove(second)
+        rebuilt = AppSearchIndex(records)
+        
+        if index.facets.counts() != rebuilt.facets.counts():
+            print("❌ FAIL: Facet counts differ from a rebuild")
+            return False
+        if index.search("", filters={'category': 'NEWCAT', 'vram': 6}) != [first]:
+            print("❌ FAIL: Updated record is not found by its new facets")
+            return False
+        if second in (index.filter_ids(filters={'category': apps_db.apps_data[second].get('category')}) or ()):
+            print("❌ FAIL: Removed record is still in a facet")
+            return False
+        
+        print("✅ PASS: Facets stay consistent with a rebuild")
+        return True
+        
+    except Exception as e:
+        print(f"❌ INCREMENTAL TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_ui_facet_counts():
+    """Test the UI's facet dropdowns."""
+    print("\n" + "=" * 60)
+    print("TESTING: UI facet dropdowns")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import CompleteUI
+        
+        apps_db = load_db()
+        ui = CompleteUI(apps_db, None, None, None)
+        ui.create_complete_interface()
+        
+        ui.installer_filter.value = 'json'
+        expected = apps_db.search("", filters={'installer_type': 'json'})
+        labels = dict((value, label) for label, value in ui.category_filter.options)
+        json_count = apps_db.facet_counts("")['installer_type']['json']
+        print(f"   {len(ui.filtered_app_ids)} json apps; category options: {list(labels.values())[:3]}")
+        
+        if ui.filtered_app_ids != expected or len(expected) != json_count:
+            print("❌ FAIL: Installer filter did not apply")
+            return False
+        category = apps_db.categories[0]
+        category_count = len(apps_db.search("", filters={'installer_type': 'json', 'category': category}))
+        if labels[category] != f"{category} ({category_count})":
+            print(f"❌ FAIL: Category label is {labels[category]!r}")
+            return False
+        
+        ui.vram_filter.value = 12
+        if ui.installer_filter.value != 'json' or ui.filtered_app_ids != apps_db.search(
+                "", filters={'installer_type': 'json', 'vram': 12}):
+            print("❌ FAIL: Combining facets lost a selection")
+            return False
+        
+        print("✅ PASS: Dropdowns show live counts and combine as filters")
+        return True
+        
+    except Exception as e:
+        print(f"❌ UI TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all facet index tests."""
+    print("🧪 TESTING SD-PINNOKIO FACET INDEX")
+    print("=" * 80)
+    
+    tests = [
+        test_filters_match_scan,
+        test_incremental_facets,
+        test_ui_facet_counts,
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Facet index is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the installer dependency graph.
+
+Checks that independent steps overlap while dependencies are respected,
+that a failed step only blocks the steps depending on it, that cached steps
+are skipped on re-runs and steps sharing a cache key run one at a time,
+and that InstallationManager batches install real local git repositories
+through the graph within their network and cpu slots, moving each job
+through its states without starting duplicates, with the wait for
+background setup traced in every install span.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import subprocess
+import traceback
+import collections
+import concurrent.futures
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def make_graph(tmp, workers=8, cpu=2, network=2):
+    from SINGLE_MEGA_CELL_NOTEBOOK import InstallGraph, StepCache, Tracer
+    
+    return InstallGraph(
+        concurrent.futures.ThreadPoolExecutor(max_workers=workers),
+        {'cpu': threading.BoundedSemaphore(cpu), 'network': threading.BoundedSemaphore(network)},
+        cache=StepCache(Path(tmp) / "steps.json"),
+        tracer=Tracer(path=Path(tmp) / "spans.jsonl")
+    )
+
+def test_overlap_and_failures():
+    """Test overlapping independent steps and blocking after failures."""
+    print("=" * 60)
+    print("TESTING: Step overlap and failure propagation")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import InstallJob, InstallStep
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            graph = make_graph(tmp)
+            order = []
+            
+            def work(name, seconds=0.3, fail=False):
+                def run(context):
+                    order.append(("start", name))
+                    time.sleep(seconds)
+                    order.append(("end", name))
+                    if fail:
+                        raise RuntimeError(f"{name} broke")
+                    return {name: True}
+                return run
+            
+            for app_id, broken in (("good", False), ("bad", True)):
+                job = InstallJob(app_id, {"name": app_id})
+                graph.add_job(job, [
+                    InstallStep(app_id, 'fetch', work(f"{app_id}-fetch", fail=broken), slot='network'),
+                    InstallStep(app_id, 'environment', work(f"{app_id}-env"), slot='cpu'),
+                    InstallStep(app_id, 'wheels', work(f"{app_id}-wheels"), deps=['fetch'], slot='network'),
+                    InstallStep(app_id, 'link', work(f"{app_id}-link", 0.05), deps=['wheels', 'environment']),
+                ])
+            
+            started = time.time()
+            ok = graph.run()
+            elapsed = time.time() - started
+            good, bad = graph.jobs["good"], graph.jobs["bad"]
+            print(f"   finished in {elapsed:.2f}s: good={good.state}, bad={bad.state} ({bad.error})")
+            
+            if ok or good.state != 'done' or bad.state != 'failed' or bad.error != "bad-fetch broke":
+                print("❌ FAIL: Job states are wrong")
+                return False
+            if graph.steps["bad:wheels"].state != 'blocked' or graph.steps["bad:environment"].state != 'done':
+                print("❌ FAIL: Failure should block dependents only")
+                return False
+            if order.index(("end", "good-fetch")) > order.index(("start", "good-wheels")):
+                print("❌ FAIL: A step started before its dependency finished")
+                return False
+            # fetch + wheels + link in sequence is ~0.65s; a straight line over both apps would be ~2s
+            if elapsed > 1.5:
+                print("❌ FAIL: Independent steps did not overlap")
+                return False
+        
+        print("✅ PASS: Independent steps overlap and failures block only dependents")
+        return True
+        
+    except Exception as e:
+        print(f"❌ OVERLAP TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_step_cache():
+    """Test that re-runs skip steps whose cache key is unchanged."""
+    print("\n" + "=" * 60)
+    print("TESTING: Per-step cache")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import InstallJob, InstallStep
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            calls = []
+            revision = {"head": "aaa", "valid": True}
+            
+            def run_once():
+                graph = make_graph(tmp)
+                graph.add_job(InstallJob("demo", {"name": "Demo"}), [
+                    InstallStep("demo", 'fetch',
+                                lambda context: calls.append("fetch") or {'head': revision["head"]}),
+                    InstallStep("demo", 'resolve',
+                                lambda context: calls.append("resolve") or {'resolved': context['head']},
+                                deps=['fetch'], cache_key=lambda context: context['head'],
+                                is_valid=lambda context, outputs: revision["valid"]),
+                    InstallStep("demo", 'link',
+                                lambda context: calls.append(f"link {context['resolved']}") or {},
+                                deps=['resolve']),
+                ])
+                if not graph.run():
+                    raise RuntimeError("graph failed")
+                return [graph.steps[f"demo:{name}"].state for name in ('fetch', 'resolve', 'link')]
+            
+            first = run_once()
+            second = run_once()
+            revision["head"] = "bbb"
+            third = run_once()
+            revision["valid"] = False
+            fourth = run_once()
+            print(f"   states: {first} / {second} / {third} / {fourth}")
+            print(f"   calls: {calls}")
+            
+            if second != ['done', 'cached', 'done'] or calls.count("resolve") != 3:
+                print("❌ FAIL: Unchanged step was not served from the cache")
+                return False
+            if "link aaa" not in calls or "link bbb" not in calls or fourth[1] != 'done':
+                print("❌ FAIL: Changed or invalid steps did not re-run")
+                return False
+            
+            # Apps sharing a step name and cache key run that step one at a time
+            graph = make_graph(tmp)
+            lock = threading.Lock()
+            active = {'now': 0, 'peak': 0}
+            
+            def shared_wheels(context):
+                with lock:
+                    active['now'] += 1
+                    active['peak'] = max(active['peak'], active['now'])
+                time.sleep(0.02)
+                with lock:
+                    active['now'] -= 1
+                return {}
+            
+            for index in range(6):
+                graph.add_job(InstallJob(f"app{index}", {"name": f"App {index}"}), [
+                    InstallStep(f"app{index}", 'wheels', shared_wheels, cache_key=lambda context: "same-set")
+                ])
+            barrier = threading.Barrier(8)
+            locks = []
+            
+            def grab():
+                barrier.wait()
+                locks.append(graph._key_lock('wheels', "same-set"))
+            
+            grabbers = [threading.Thread(target=grab) for _ in range(8)]
+            for thread in grabbers:
+                thread.start()
+            for thread in grabbers:
+                thread.join()
+            graph.run()
+            print(f"   shared key: {len(set(map(id, locks)))} lock(s), most steps at once: {active['peak']}")
+            if len(set(map(id, locks))) != 1 or active['peak'] != 1:
+                print("❌ FAIL: Steps with the same key did not share one lock")
+                return False
+        
+        print("✅ PASS: Only invalid steps run again")
+        return True
+        
+    except Exception as e:
+        print(f"❌ STEP CACHE TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def make_repo(root, name):
+    repo = Path(root) / name
+    repo.mkdir(parents=True)
+    (repo / "app.py").write_text("print('hello')\n")
+    for cmd in (["git", "init", "-q"], ["git", "add", "."],
+                ["git", "-c", "user.name=test", "-c", "user.email=test@localhost", "commit", "-q", "-m", "init"]):
+        subprocess.run(cmd, cwd=repo, check=True, capture_output=True)
+    return repo.resolve().as_uri()
+
+def test_manager_batch():
+    """Test a batch install of local repositories through InstallationManager."""
+    print("\n" + "=" * 60)
+    print("TESTING: InstallationManager batch through the graph")
+    print("=" * 60)
+    
+    previous = os.getcwd()
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppEnvironments, InstallationManager, Tracer, widgets
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                apps = {
+                    "one": {"name": "One", "clone_url": make_repo(tmp, "src/one")},
+                    "two": {"name": "Two", "clone_url": make_repo(tmp, "src/two")},
+                    "gone": {"name": "Gone", "clone_url": Path(tmp, "src/missing").as_uri()},
+                }
+                manager = InstallationManager(widgets.Output(), environments=AppEnvironments(pool_size=0),
+                                              tracer=Tracer(path=Path(tmp) / "spans.jsonl"))
+                # The clone/venv path does not call into ApplicationInstaller; it only gates on it
+                manager.installer = "test"
+                hooked = []
+                manager.post_install_hooks.append(lambda job, context: hooked.append(job.app_id))
+                
+                jobs = manager.install_batch(list(apps), apps)
+                manager.wait_for_batch(jobs, timeout=300)
+                states = {app_id: job.state for app_id, job in jobs.items()}
+                print(f"   first run: {states}, error: {jobs['gone'].error}")
+                
+                if states != {"one": 'done', "two": 'done', "gone": 'failed'}:
+                    print("❌ FAIL: Unexpected job states")
+                    return False
+                if not Path("apps/one/app.py").exists() or sorted(hooked) != ["one", "two"]:
+                    print("❌ FAIL: Sources or hooks missing")
+                    return False
+                
+                jobs = manager.install_batch(["one"], apps)
+                manager.wait_for_batch(jobs, timeout=300)
+                cached_lines = [line for line in jobs["one"].lines if line.startswith("♻️")]
+                print(f"   re-run: {jobs['one'].state}, {len(cached_lines)} cached steps")
+                if jobs["one"].state != 'done' or len(cached_lines) < 3 or hooked.count("one") != 1:
+                    print("❌ FAIL: Re-run did not reuse cached steps")
+                    return False
+            finally:
+                os.chdir(previous)
+        
+        print("✅ PASS: Batches install through one graph and re-runs reuse the cache")
+        return True
+        
+    except Exception as e:
+        os.chdir(previous)
+        print(f"❌ MANAGER TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+class CountingSlot:
+    """BoundedSemaphore that records how many holders it had at once."""
+    
+    def __init__(self, size):
+        self.semaphore = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.acquired = 0
+    
+    def acquire(self, blocking=True, timeout=None):
+        if not (self.semaphore.acquire(blocking, timeout) if timeout is not None else self.semaphore.acquire(blocking)):
+            return False
+        with self.lock:
+            self.active += 1
+            self.acquired += 1
+            self.peak = max(self.peak, self.active)
+        return True
+    
+    def release(self):
+        with self.lock:
+            self.active -= 1
+        self.semaphore.release()
+    
+    __enter__ = acquire
+    
+    def __exit__(self, *exc):
+        self.release()
+
+def test_batch_slots_states_and_duplicates():
+    """Test slot caps, job state transitions and the duplicate-job guard on a real batch."""
+    print("\n" + "=" * 60)
+    print("TESTING: Batch slot caps, job states and duplicate guard")
+    print("=" * 60)
+    
+    previous = os.getcwd()
+    original_set_state = None
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import AppEnvironments, InstallationManager, InstallJob, Tracer, widgets
+        
+        transitions = collections.defaultdict(list)
+        original_set_state = InstallJob.set_state
+        
+        def recording_set_state(job, state, error=None):
+            transitions[job.app_id].append(state)
+            return original_set_state(job, state, error)
+        InstallJob.set_state = recording_set_state
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                apps = {f"app{index}": {"name": f"App {index}", "clone_url": make_repo(tmp, f"src/app{index}")}
+                        for index in range(4)}
+                apps["gone"] = {"name": "Gone", "clone_url": Path(tmp, "src/missing").as_uri()}
+                manager = InstallationManager(widgets.Output(), environments=AppEnvironments(pool_size=0),
+                                              tracer=Tracer(path=Path(tmp) / "spans.jsonl"))
+                manager.installer = "test"
+                manager.network_slots = CountingSlot(2)
+                manager.cpu_slots = CountingSlot(1)
+                fetch_source = manager.fetch_source
+                
+                def slow_fetch(job, app_dir):
+                    # Long enough that every fetch contends for the network slots
+                    time.sleep(0.3)
+                    return fetch_source(job, app_dir)
+                manager.fetch_source = slow_fetch
+                
+                # Hold the batch at the setup gate so it is still active when queued again
+                manager.ready.clear()
+                jobs = manager.install_batch(list(apps), apps)
+                again = manager.install_batch(["app0", "app1"], apps)
+                graph_threads = [thread for thread in threading.enumerate() if thread.name == "sd-install-graph"]
+                duplicates_reused = all(again[app_id] is jobs[app_id] for app_id in again)
+                deadline = time.time() + 10
+                while time.time() < deadline and not all(
+                        any("Waiting for background setup" in line for line in job.lines) for job in jobs.values()):
+                    time.sleep(0.01)
+                time.sleep(0.1)
+                manager.ready.set()
+                finished = manager.wait_for_batch(jobs, timeout=300)
+                
+                states = {app_id: job.state for app_id, job in jobs.items()}
+                print(f"   states: {states}")
+                print(f"   network slots: peak {manager.network_slots.peak} of 2 over {manager.network_slots.acquired} steps, "
+                      f"cpu slots: peak {manager.cpu_slots.peak} of 1 over {manager.cpu_slots.acquired} steps")
+                print(f"   app0 transitions: {transitions['app0']}, gone: {transitions['gone']}")
+                
+                if not duplicates_reused or len(graph_threads) != 1:
+                    print("❌ FAIL: Queueing active apps again started duplicate jobs")
+                    return False
+                if finished or states != {**{f"app{index}": 'done' for index in range(4)}, "gone": 'failed'}:
+                    print("❌ FAIL: Unexpected job states")
+                    return False
+                # fetch and wheels use network slots, environment and link use cpu slots
+                if manager.network_slots.peak != 2 or manager.network_slots.acquired != 4 * 2 + 1:
+                    print("❌ FAIL: Network steps did not run two at a time through their slots")
+                    return False
+                if manager.cpu_slots.peak != 1 or manager.cpu_slots.acquired != 4 * 2 + 1:
+                    print("❌ FAIL: CPU steps exceeded their single slot")
+                    return False
+                for index in range(4):
+                    sequence = [state for position, state in enumerate(transitions[f"app{index}"])
+                                if position == 0 or transitions[f"app{index}"][position - 1] != state]
+                    if sequence != ['cloning', 'installing', 'done']:
+                        print(f"❌ FAIL: app{index} went through {sequence}")
+                        return False
+                if transitions['gone'][0] != 'cloning' or transitions['gone'][-1] != 'failed':
+                    print(f"❌ FAIL: Failed job went through {transitions['gone']}")
+                    return False
+                for app_id in apps:
+                    root = manager.tracer.recent_roots(app_id=app_id)[0]
+                    waits = [span for span in manager.tracer.trace(root.trace_id)
+                             if span.name == "wait for setup" and span.parent_id == root.span_id]
+                    if root.name != "install" or len(waits) != 1 or waits[0].start != root.start:
+                        print(f"❌ FAIL: {app_id}'s install trace does not show the wait for setup")
+                        return False
+            finally:
+                os.chdir(previous)
+        
+        print("✅ PASS: Slots cap concurrency, jobs move queued → cloning → installing → done, no duplicates, "
+              "setup waits are traced")
+        return True
+        
+    except Exception as e:
+        os.chdir(previous)
+        print(f"❌ BATCH TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        if original_set_state is not None:
+            InstallJob.set_state = original_set_state
+
+def main():
+    """Run all install graph tests."""
+    print("🧪 TESTING SD-PINNOKIO INSTALL GRAPH")
+    print("=" * 80)
+    
+    tests = [
+        test_overlap_and_failures,
+        test_step_cache,
+        test_manager_batch,
+        test_batch_slots_states_and_duplicates,
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Install graph is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the model store and chunked downloader.
+
+Runs against a local HTTP server with byte-range support and checks
+parallel chunk downloads, resuming after an interrupted transfer, retrying
+chunks cut off mid-body, checksum verification, and that one stored copy
+is hard-linked into every app.
+"""
+
+import os
+import re
+import sys
+import hashlib
+import tempfile
+import threading
+import traceback
+import http.server
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+PAYLOAD = os.urandom(1024 * 1024 + 12345)
+CHUNK = 128 * 1024
+
+class RangeServer:
+    """Serves PAYLOAD at /model.bin with Range support; can fail after N requests.
+    
+    The next ``truncate`` chunk responses break off halfway through their
+    body with a corrupt chunked-encoding frame, as a dropped proxy might.
+    """
+    
+    def __init__(self):
+        self.requests = []
+        self.fail_after = None
+        self.truncate = 0
+        self.lock = threading.Lock()
+        server = self
+        
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                header = self.headers.get("Range")
+                server.requests.append(header)
+                if server.fail_after is not None and len(server.requests) > server.fail_after:
+                    self.send_error(503)
+                    return
+                etag = '"' + hashlib.md5(PAYLOAD).hexdigest() + '"'
+                match = re.match(r"bytes=(\d+)-(\d*)", header or "")
+                cut = False
+                if match:
+                    start = int(match.group(1))
+                    end = int(match.group(2)) if match.group(2) else len(PAYLOAD) - 1
+                    body = PAYLOAD[start:end + 1]
+                    with server.lock:
+                        cut = server.truncate > 0 and len(body) > 1
+                        server.truncate -= cut
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(PAYLOAD)}")
+                else:
+                    body = PAYLOAD
+                    self.send_response(200)
+                self.send_header("ETag", etag)
+                if cut:
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    half = body[:len(body) // 2]
+                    self.wfile.write(f"{len(half):x}\r\n".encode() + half + b"\r\nnot-a-size\r\n")
+                    self.close_connection = True
+                    return
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/model.bin"
+    
+    def close(self):
+        self.httpd.shutdown()
+
+def test_parallel_download_and_dedupe():
+    """Test a chunked download hard-linked into two apps."""
+    print("=" * 60)
+    print("TESTING: Chunked download and shared store")
+    print("=" * 60)
+    
+    server = RangeServer()
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import ModelDownloader, ModelStore
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            downloader = ModelDownloader(ModelStore(Path(tmp) / "store"), chunk_size=CHUNK)
+            lines = []
+            first = Path(tmp) / "apps/one/models/model.bin"
+            second = Path(tmp) / "apps/two/models/model.bin"
+            digest = downloader.download(server.url, first, emit=lines.append)
+            ranged = len(server.requests)
+            downloader.download(server.url, second, emit=lines.append)
+            print(f"   {ranged} requests for {len(PAYLOAD)} bytes, {len(server.requests) - ranged} for the second app")
+            
+            if digest != hashlib.sha256(PAYLOAD).hexdigest() or first.read_bytes() != PAYLOAD:
+                print("❌ FAIL: Downloaded content is wrong")
+                return False
+            if ranged < len(PAYLOAD) // CHUNK or not all(request for request in server.requests):
+                print("❌ FAIL: File was not fetched in ranged chunks")
+                return False
+            if len(server.requests) != ranged or not os.path.samefile(first, second):
+                print("❌ FAIL: Second app did not reuse the stored copy")
+                return False
+            if downloader.store.usage() != (1, len(PAYLOAD)):
+                print(f"❌ FAIL: Store holds {downloader.store.usage()}")
+                return False
+        
+        print("✅ PASS: Chunks download in parallel and apps share one copy")
+        return True
+        
+    except Exception as e:
+        print(f"❌ DOWNLOAD TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        server.close()
+
+def test_resume_after_interruption():
+    """Test that an interrupted download resumes with only missing chunks."""
+    print("\n" + "=" * 60)
+    print("TESTING: Resume after interruption")
+    print("=" * 60)
+    
+    server = RangeServer()
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import ModelDownloader, ModelStore
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ModelStore(Path(tmp) / "store")
+            server.fail_after = 4
+            try:
+                ModelDownloader(store, chunk_size=CHUNK, connections_per_file=1, retries=0).download(server.url)
+                print("❌ FAIL: Interrupted download did not raise")
+                return False
+            except OSError as e:
+                print(f"   interrupted: {e}")
+            
+            server.fail_after = None
+            server.requests.clear()
+            lines = []
+            digest = ModelDownloader(store, chunk_size=CHUNK).download(server.url, emit=lines.append)
+            total_chunks = -(-len(PAYLOAD) // CHUNK)
+            print(f"   resumed with {len(server.requests) - 1} of {total_chunks} chunk requests")
+            
+            if digest != hashlib.sha256(PAYLOAD).hexdigest():
+                print("❌ FAIL: Resumed file is corrupt")
+                return False
+            if len(server.requests) - 1 != total_chunks - 3 or not any("Resuming" in line for line in lines):
+                print("❌ FAIL: Finished chunks were downloaded again")
+                return False
+        
+        print("✅ PASS: Downloads resume from the chunks already on disk")
+        return True
+        
+    except Exception as e:
+        print(f"❌ RESUME TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        server.close()
+
+def test_retry_after_dropped_connection():
+    """Test that chunks cut off mid-body are retried without double-counting progress."""
+    print("\n" + "=" * 60)
+    print("TESTING: Retry after a dropped connection")
+    print("=" * 60)
+    
+    server = RangeServer()
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import ModelDownloader, ModelStore
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            server.truncate = 2
+            reported = []
+            downloader = ModelDownloader(ModelStore(Path(tmp) / "store"), chunk_size=CHUNK, retries=2)
+            digest = downloader.download(server.url, progress=lambda name, done, total: reported.append(done))
+            total_chunks = -(-len(PAYLOAD) // CHUNK)
+            print(f"   {len(server.requests) - 1} chunk requests for {total_chunks} chunks, "
+                  f"final progress {reported[-1]} of {len(PAYLOAD)} bytes")
+            
+            if digest != hashlib.sha256(PAYLOAD).hexdigest():
+                print("❌ FAIL: Download after dropped connections is corrupt")
+                return False
+            if len(server.requests) - 1 != total_chunks + 2:
+                print("❌ FAIL: Cut-off chunks were not retried exactly once each")
+                return False
+            if reported[-1] != len(PAYLOAD) or max(reported) > len(PAYLOAD):
+                print("❌ FAIL: Bytes from failed attempts stayed in the progress count")
+                return False
+        
+        print("✅ PASS: Dropped chunks are retried and progress stays exact")
+        return True
+        
+    except Exception as e:
+        print(f"❌ RETRY TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        server.close()
+
+def test_checksum_verification():
+    """Test that a checksum mismatch is rejected and nothing is stored."""
+    print("\n" + "=" * 60)
+    print("TESTING: Checksum verification")
+    print("=" * 60)
+    
+    server = RangeServer()
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import ModelDownloader, ModelStore
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            downloader = ModelDownloader(ModelStore(Path(tmp) / "store"), chunk_size=CHUNK,
+                                         bytes_per_second=4 * 1024 * 1024)
+            try:
+                downloader.download(server.url, Path(tmp) / "bad.bin", sha256="0" * 64)
+                print("❌ FAIL: Wrong checksum was accepted")
+                return False
+            except ValueError as e:
+                print(f"   rejected: {str(e)[:60]}...")
+            
+            if downloader.store.usage()[0] != 0 or (Path(tmp) / "bad.bin").exists():
+                print("❌ FAIL: Corrupt download was kept")
+                return False
+            
+            expected = hashlib.sha256(PAYLOAD).hexdigest()
+            if downloader.download(server.url, Path(tmp) / "good.bin", sha256=expected) != expected:
+                print("❌ FAIL: Matching checksum was rejected")
+                return False
+        
+        print("✅ PASS: Downloads are verified before they enter the store")
+        return True
+        
+    except Exception as e:
+        print(f"❌ CHECKSUM TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        server.close()
+
+def main():
+    """Run all model store tests."""
+    print("🧪 TESTING SD-PINNOKIO MODEL STORE")
+    print("=" * 80)
+    
+    tests = [
+        test_parallel_download_and_dedupe,
+        test_resume_after_interruption,
+        test_retry_after_dropped_connection,
+        test_checksum_verification,
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Model store is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the Pinokio install script interpreter.
+
+Checks the install.js object-literal parser, {{ }} template and `when`
+evaluation, that re-running a script skips memoized steps (but not those
+after a step that had to run again), that steps on separate paths run in
+parallel, that downloads work against a local HTTP server, and that a
+command an ``on`` handler left running is stopped with the script.
+"""
+
+import sys
+import time
+import tempfile
+import threading
+import traceback
+import functools
+import http.server
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+INSTALL_JS = r'''
+// Pinokio install script
+module.exports = {
+  run: [
+    {
+      method: "shell.run",
+      params: {
+        message: [
+          'echo "{{platform}} {{gpu === \'nvidia\' ? \'cuda\' : \'cpu\'}}" > platform.txt',
+        ],
+      },
+    },
+    /* only on a machine without a GPU */
+    { when: "{{gpu === 'none' && platform !== 'win32'}}", method: "fs.write", params: { path: "cpu.txt", text: `cpu only` } },
+    { method: "log", params: { text: "done" } },
+  ],
+}
+'''
+
+def make_interpreter(tmp, app_dir):
+    from SINGLE_MEGA_CELL_NOTEBOOK import (AppEnvironments, AsyncCommandEngine, ModelDownloader, ModelStore,
+                                           PinokioInterpreter, StepCache, Tracer)
+    
+    lines = []
+    interpreter = PinokioInterpreter(
+        "demo", app_dir, AsyncCommandEngine(), AppEnvironments(root=Path(tmp) / "envs", pool_size=0),
+        StepCache(Path(tmp) / "steps.json"), emit=lines.append, tracer=Tracer(path=Path(tmp) / "spans.jsonl"),
+        downloader=ModelDownloader(ModelStore(Path(tmp) / "models"))
+    )
+    return interpreter, lines
+
+def test_parser_and_templates():
+    """Test the install.js parser, templates and when conditions."""
+    print("=" * 60)
+    print("TESTING: Script parsing and templates")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import JSObjectParser, render_template
+        
+        steps = JSObjectParser.parse_module(INSTALL_JS)['run']
+        print(f"   parsed {len(steps)} steps: {[step['method'] for step in steps]}")
+        if len(steps) != 3 or steps[1]['params']['text'] != "cpu only":
+            print("❌ FAIL: install.js was not parsed")
+            return False
+        
+        try:
+            JSObjectParser.parse_module("module.exports = { run: steps }")
+            print("❌ FAIL: Variables should need evaluation")
+            return False
+        except ValueError:
+            pass
+        
+        scope = {'platform': 'linux', 'gpu': 'nvidia', 'args': {'n': 2}, 'local': {}}
+        checks = [
+            ("{{gpu === 'nvidia'}}", True),
+            ("{{platform === 'darwin' ? 'mps' : gpu}}", "nvidia"),
+            ("torch-{{args.n + 1}}.txt", "torch-3.txt"),
+            ("{{local.missing || 'fallback'}}", "fallback"),
+            ("{{!(gpu === 'amd') && args.n > 1}}", True),
+            ("{{['a', 'b'].includes(platform)}}", False),
+        ]
+        for template, expected in checks:
+            value = render_template(template, scope)
+            if value != expected:
+                print(f"❌ FAIL: {template} rendered {value!r}, expected {expected!r}")
+                return False
+        
+        print("✅ PASS: Scripts parse and templates evaluate like JavaScript")
+        return True
+        
+    except Exception as e:
+        print(f"❌ PARSER TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_memoized_rerun():
+    """Test that re-running a script skips completed steps."""
+    print("\n" + "=" * 60)
+    print("TESTING: Memoized step results")
+    print("=" * 60)
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            app_dir = Path(tmp) / "app"
+            app_dir.mkdir()
+            (app_dir / "install.js").write_text(INSTALL_JS)
+            (app_dir / "install.json").write_text(
+                '{"run": [{"method": "shell.run", "params": {"message": "echo run >> count.txt"}},'
+                ' {"method": "script.start", "params": {"uri": "install.js"}}]}'
+            )
+            
+            interpreter, lines = make_interpreter(tmp, app_dir)
+            interpreter.run_script("install.json")
+            interpreter, lines = make_interpreter(tmp, app_dir)
+            interpreter.run_script("install.json")
+            cached = [line for line in lines if line.startswith("♻️")]
+            print(f"   count.txt: {(app_dir / 'count.txt').read_text().split()}, cached on re-run: {len(cached)}")
+            
+            if (app_dir / "count.txt").read_text().split() != ["run"]:
+                print("❌ FAIL: Memoized shell step ran twice")
+                return False
+            if not (app_dir / "platform.txt").exists() or len(cached) < 3:
+                print("❌ FAIL: Nested script steps were not memoized")
+                return False
+            
+            (app_dir / "platform.txt").unlink()
+            (app_dir / "install.json").write_text(
+                '{"run": [{"method": "shell.run", "params": {"message": "echo again >> count.txt"}}]}'
+            )
+            interpreter, lines = make_interpreter(tmp, app_dir)
+            interpreter.run_script("install.json")
+            if (app_dir / "count.txt").read_text().split() != ["run", "again"]:
+                print("❌ FAIL: Changed step did not run")
+                return False
+        
+        print("✅ PASS: Completed steps are skipped and changed steps re-run")
+        return True
+        
+    except Exception as e:
+        print(f"❌ MEMO TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_rerun_after_venv_deleted():
+    """Test that steps after a venv step run again once the venv is recreated."""
+    print("\n" + "=" * 60)
+    print("TESTING: Reinstall after the venv is deleted")
+    print("=" * 60)
+    
+    try:
+        import shutil
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            app_dir = Path(tmp) / "app"
+            app_dir.mkdir()
+            (app_dir / "install.json").write_text(
+                '{"run": [{"method": "shell.run", "params": {"venv": "env"}},'
+                ' {"method": "script.start", "params": {"uri": "deps.json"}}]}'
+            )
+            # Stands in for the pip install into the venv; no venv param, so only its key links it
+            (app_dir / "deps.json").write_text(
+                '{"run": [{"method": "shell.run", "params": {"message": '
+                '"env/bin/python -c \\"import sys; print(sys.prefix)\\" >> installs.txt"}}]}'
+            )
+            
+            for _ in range(2):
+                interpreter, lines = make_interpreter(tmp, app_dir)
+                interpreter.run_script("install.json")
+            installs = (app_dir / "installs.txt").read_text().split()
+            if len(installs) != 1:
+                print(f"❌ FAIL: Install step ran {len(installs)} times before the venv was deleted")
+                return False
+            
+            shutil.rmtree(app_dir / "env")
+            interpreter, lines = make_interpreter(tmp, app_dir)
+            interpreter.run_script("install.json")
+            installs = (app_dir / "installs.txt").read_text().split()
+            print(f"   install runs: {len(installs)}, venv back: {(app_dir / 'env' / 'bin' / 'python').exists()}")
+            
+            if len(installs) != 2 or not (app_dir / "env" / "bin" / "python").exists():
+                print("❌ FAIL: Install step was served from the memo after its venv was recreated")
+                return False
+        
+        print("✅ PASS: Recreating the venv reran the steps that depend on it")
+        return True
+        
+    except Exception as e:
+        print(f"❌ VENV RERUN TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_parallel_steps_and_downloads():
+    """Test that steps on separate paths overlap, and downloads from a local server."""
+    print("\n" + "=" * 60)
+    print("TESTING: Parallel steps and downloads")
+    print("=" * 60)
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            served = Path(tmp) / "served"
+            served.mkdir()
+            (served / "model.bin").write_bytes(b"\x01" * 300000)
+            
+            class QuietHandler(http.server.SimpleHTTPRequestHandler):
+                def log_message(self, *args):
+                    pass
+            
+            server = http.server.ThreadingHTTPServer(
+                ("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(served)))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f"http://127.0.0.1:{server.server_address[1]}/model.bin"
+            
+            try:
+                app_dir = Path(tmp) / "app"
+                app_dir.mkdir()
+                (app_dir / "install.json").write_text(f'''{{"run": [
+                    {{"method": "shell.run", "params": {{"path": "a", "message": "sleep 0.6; echo a > done"}}}},
+                    {{"method": "shell.run", "params": {{"path": "b", "message": "sleep 0.6; echo b > done"}}}},
+                    {{"method": "fs.download", "params": {{"uri": "{url}", "dir": "models"}}}},
+                    {{"method": "shell.run", "params": {{"path": "a", "message": "cat done > again"}}}}
+                ]}}''')
+                
+                interpreter, lines = make_interpreter(tmp, app_dir)
+                started = time.time()
+                interpreter.run_script("install.json")
+                elapsed = time.time() - started
+                print(f"   finished in {elapsed:.2f}s")
+                
+                downloaded = app_dir / "models" / "model.bin"
+                if not downloaded.exists() or downloaded.stat().st_size != 300000:
+                    print("❌ FAIL: Download is missing or truncated")
+                    return False
+                if (app_dir / "a" / "again").read_text().strip() != "a":
+                    print("❌ FAIL: Dependent step ran before the step it depends on")
+                    return False
+                if elapsed > 1.1:
+                    print("❌ FAIL: Steps on separate paths did not overlap")
+                    return False
+            finally:
+                server.shutdown()
+        
+        print("✅ PASS: Independent steps overlap and downloads complete")
+        return True
+        
+    except Exception as e:
+        print(f"❌ PARALLEL TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_on_handler_leaves_command_running():
+    """Test that a command an on handler left running is stopped when the script ends."""
+    print("\n" + "=" * 60)
+    print("TESTING: Commands left running by on handlers")
+    print("=" * 60)
+    
+    try:
+        import os
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            app_dir = Path(tmp) / "app"
+            app_dir.mkdir()
+            (app_dir / "install.json").write_text(r'''{"run": [
+                {"method": "shell.run", "params": {"path": "server", "message": "echo $$ > pid; echo server ready; sleep 60",
+                                                    "on": [{"event": "/server ready/", "done": true}]}},
+                {"method": "shell.run", "params": {"path": "server", "message": "kill -0 $(cat pid) && echo alive > seen"}}
+            ]}''')
+            
+            interpreter, lines = make_interpreter(tmp, app_dir)
+            started = time.time()
+            interpreter.run_script("install.json")
+            elapsed = time.time() - started
+            pid = int((app_dir / "server" / "pid").read_text())
+            try:
+                os.kill(pid, 0)
+                still_running = True
+            except ProcessLookupError:
+                still_running = False
+            print(f"   finished in {elapsed:.2f}s, server pid {pid} still running: {still_running}")
+            
+            if not (app_dir / "server" / "seen").exists():
+                print("❌ FAIL: The command was not left running for the next step")
+                return False
+            if still_running or elapsed > 15:
+                if still_running:
+                    os.kill(pid, 9)
+                print("❌ FAIL: The command outlived the script")
+                return False
+            if interpreter.lingering or not any("left running" in line for line in lines):
+                print("❌ FAIL: Stopping the command was not reported")
+                return False
+        
+        print("✅ PASS: Commands left running by on handlers stop with the script")
+        return True
+        
+    except Exception as e:
+        print(f"❌ ON HANDLER TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all Pinokio script tests."""
+    print("🧪 TESTING SD-PINNOKIO PINOKIO SCRIPTS")
+    print("=" * 80)
+    
+    tests = [
+        test_parser_and_templates,
+        test_memoized_rerun,
+        test_rerun_after_venv_deleted,
+        test_parallel_steps_and_downloads,
+        test_on_handler_leaves_command_running,
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Pinokio scripts are working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the process supervisor.
+
+Runs throwaway apps from a temporary working directory and checks resource
+sampling from /proc, memory-limit enforcement, clean stops by process group,
+and bounded crash restarts that keep each crashed run's log.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import traceback
+import contextlib
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+class QuietOutput:
+    """Stand-in for the output widget that collects notices."""
+    
+    def __init__(self):
+        self.lines = []
+    
+    def append_stdout(self, text):
+        self.lines.append(text)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        return False
+
+@contextlib.contextmanager
+def app_workspace(apps):
+    """Temporary cwd with apps/<id>/app.py for each given source."""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        for app_id, source in apps.items():
+            app_dir = Path(tmp) / "apps" / app_id
+            app_dir.mkdir(parents=True)
+            (app_dir / "app.py").write_text(source)
+        os.chdir(tmp)
+        try:
+            yield tmp
+        finally:
+            os.chdir(previous)
+
+def make_supervisor(tmp):
+    from SINGLE_MEGA_CELL_NOTEBOOK import AppRunner, AppEnvironments, ProcessSupervisor, Tracer
+    
+    output = QuietOutput()
+    runner = AppRunner(output, environments=AppEnvironments(root=Path(tmp) / "envs", pool_size=0),
+                       tracer=Tracer(path=Path(tmp) / "spans.jsonl"))
+    return ProcessSupervisor(runner, interval=0.2, backoff_base=0.2), output
+
+def wait_for(condition, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+def test_memory_limit_and_stop():
+    """Test sampling, the RSS limit and stopping by process group."""
+    print("=" * 60)
+    print("TESTING: Memory limit and stop")
+    print("=" * 60)
+    
+    apps = {
+        "hog": "import time\nblocks = [bytearray(20 * 1024 * 1024) for _ in range(10)]\ntime.sleep(60)\n",
+        "idle": "import time\ntime.sleep(60)\n",
+    }
+    try:
+        with app_workspace(apps) as tmp, contextlib.redirect_stdout(open(os.devnull, "w")):
+            supervisor, output = make_supervisor(tmp)
+            supervisor.start("hog", {}, max_rss_mb=100, restart=False)
+            supervisor.start("idle", {"name": "<b>Idle & co</b>"}, restart=False)
+            
+            killed = wait_for(lambda: supervisor.usage("hog")["state"] == "crashed")
+            sampled = wait_for(lambda: supervisor.usage("idle")["rss_bytes"] > 0)
+            idle = supervisor.usage("idle")
+            dashboard = supervisor.dashboard_html()
+            stopped = supervisor.stop("idle") and wait_for(lambda: supervisor.usage("idle")["state"] == "stopped")
+            hog = supervisor.usage("hog")
+        
+        print(f"   hog: {hog['state']} ({hog['limit_reason']}), idle sample: {idle['rss_bytes']} bytes, {idle['fds']} fds")
+        
+        if not killed or not hog["limit_reason"]:
+            print("❌ FAIL: App over its memory limit was not stopped")
+            return False
+        if not sampled or idle["fds"] <= 0 or not idle["pids"]:
+            print("❌ FAIL: Running app was not sampled")
+            return False
+        if not stopped:
+            print("❌ FAIL: Stop did not end the app")
+            return False
+        if "&lt;b&gt;Idle &amp; co&lt;/b&gt;" not in dashboard or "<b>Idle" in dashboard:
+            print("❌ FAIL: Dashboard shows the app name unescaped")
+            return False
+        
+        print("✅ PASS: Usage sampled, limit enforced and app stopped")
+        return True
+        
+    except Exception as e:
+        print(f"❌ MEMORY LIMIT TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_crash_restart_backoff():
+    """Test that crashes are restarted with backoff up to the limit."""
+    print("\n" + "=" * 60)
+    print("TESTING: Crash restart with backoff")
+    print("=" * 60)
+    
+    apps = {"crash": "import os, time\nprint('crashing run', os.getpid(), flush=True)\n"
+                     "time.sleep(0.2)\nraise SystemExit(3)\n"}
+    try:
+        with app_workspace(apps) as tmp, contextlib.redirect_stdout(open(os.devnull, "w")):
+            supervisor, output = make_supervisor(tmp)
+            supervisor.start("crash", {}, max_restarts=2)
+            done = wait_for(lambda: supervisor.usage("crash")["state"] == "crashed"
+                            and supervisor.usage("crash")["restarts"] == 2)
+            usage = supervisor.usage("crash")
+            # Each restart opens a new log; the crashed runs' output must still be on disk
+            runs = [path.read_text() for path in sorted(Path(tmp, "apps", ".logs").glob("crash.log*"))]
+        
+        notices = [line for line in output.lines if "crash crashed" in line]
+        print(f"   state: {usage['state']}, restarts: {usage['restarts']}, exit: {usage['last_exit_code']}")
+        
+        if not done or usage["last_exit_code"] != 3:
+            print("❌ FAIL: Crashed app was not restarted the expected number of times")
+            return False
+        if len(notices) != 3 or "not restarting" not in notices[-1]:
+            print(f"❌ FAIL: Unexpected restart notices {notices}")
+            return False
+        pids = {line.split()[-1] for text in runs for line in text.splitlines() if line.startswith("crashing run")}
+        print(f"   log files: {len(runs)}, runs recorded: {len(pids)}")
+        if len(runs) != 3 or len(pids) != 3:
+            print("❌ FAIL: A restart discarded the crashed run's log")
+            return False
+        
+        print("✅ PASS: Crashes restarted with backoff, then given up, with every run's log kept")
+        return True
+        
+    except Exception as e:
+        print(f"❌ RESTART TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all process supervisor tests."""
+    print("🧪 TESTING SD-PINNOKIO PROCESS SUPERVISOR")
+    print("=" * 80)
+    
+    tests = [
+        test_memory_limit_and_stop,
+        test_crash_restart_backoff,
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Process supervisor is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
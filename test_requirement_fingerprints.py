@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test script to verify requirement fingerprints.
+
+Installs into throwaway venvs through a recorder that writes dist-info
+metadata the way pip would, and checks that an unchanged fingerprint skips
+the install, that changed requirements or environments fall back to a
+partial install of what is missing, and that environment markers are
+evaluated for the target interpreter rather than the kernel.
+"""
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+import subprocess
+import traceback
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def make_venv(path, base_python=None):
+    subprocess.run([base_python or sys.executable, "-m", "venv", "--without-pip", str(path)],
+                   check=True, capture_output=True)
+    return str(Path(path) / "bin" / "python")
+
+def site_packages(python):
+    return Path(subprocess.run([python, "-c", "import sysconfig; print(sysconfig.get_paths()['purelib'])"],
+                               check=True, capture_output=True, text=True).stdout.strip())
+
+class InstallRecorder:
+    """Stands in for WheelCache.install: records the lines and registers the distributions."""
+    
+    def __init__(self):
+        self.installs = []
+    
+    def install(self, req_file, run, emit, python=None, cwd=None):
+        lines = [line.strip() for line in Path(req_file).read_text().splitlines() if line.strip()]
+        self.installs.append(lines)
+        for line in lines:
+            name, version = re.match(r"([A-Za-z0-9._-]+)==([^;\s]+)", line).groups()
+            dist_info = site_packages(python) / f"{name.replace('-', '_')}-{version}.dist-info"
+            dist_info.mkdir(parents=True, exist_ok=True)
+            (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n")
+        return True
+
+def other_python():
+    """Another CPython 3 minor version on PATH, if there is one."""
+    for minor in range(14, 5, -1):
+        if minor == sys.version_info[1]:
+            continue
+        candidate = shutil.which(f"python3.{minor}")
+        if candidate and subprocess.run([candidate, "-c", "import venv"], capture_output=True).returncode == 0:
+            return candidate, minor
+    return None, None
+
+def test_fingerprint_hit_and_miss():
+    """Test skipping on an unchanged fingerprint and partial installs after changes."""
+    print("=" * 60)
+    print("TESTING: Fingerprint hits and misses")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import RequirementFingerprints
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            python = make_venv(Path(tmp) / "venv")
+            req_file = Path(tmp) / "requirements.txt"
+            req_file.write_text("sd-alpha==1.0\nsd-beta==2.0\n")
+            fingerprints = RequirementFingerprints(Path(tmp) / "fingerprints.json")
+            recorder = InstallRecorder()
+            messages = []
+            
+            def install():
+                return fingerprints.install(req_file, recorder, None, messages.append, python=python)
+            
+            install()
+            install()
+            print(f"   first two runs: {messages}")
+            if recorder.installs != [["sd-alpha==1.0", "sd-beta==2.0"]] or "fingerprint unchanged" not in messages[-1]:
+                print("❌ FAIL: Unchanged requirements were installed again")
+                return False
+            
+            req_file.write_text("sd-alpha==1.0\nsd-beta==2.0\nsd-gamma==3.0\n")
+            install()
+            print(f"   after adding a line: {messages[-1]}")
+            if recorder.installs[-1] != ["sd-gamma==3.0"] or "partial" not in messages[-1]:
+                print("❌ FAIL: A changed requirement set should install only the new line")
+                return False
+            
+            shutil.rmtree(site_packages(python) / "sd_beta-2.0.dist-info")
+            install()
+            print(f"   after removing a package: {messages[-1]}")
+            if recorder.installs[-1] != ["sd-beta==2.0"]:
+                print("❌ FAIL: A package removed from the environment was not reinstalled")
+                return False
+            
+            install()
+            if len(recorder.installs) != 3 or "fingerprint unchanged" not in messages[-1]:
+                print("❌ FAIL: Fingerprint was not recorded after the partial install")
+                return False
+        
+        print("✅ PASS: Unchanged fingerprints skip; changes install only what is missing")
+        return True
+        
+    except Exception as e:
+        print(f"❌ FINGERPRINT TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_markers_use_target_interpreter():
+    """Test that marker-excluded lines are skipped using the target's marker environment."""
+    print("\n" + "=" * 60)
+    print("TESTING: Environment markers on the target interpreter")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import RequirementFingerprints
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            python = make_venv(Path(tmp) / "venv")
+            req_file = Path(tmp) / "requirements.txt"
+            req_file.write_text('sd-alpha==1.0\nsd-windows==1.0; sys_platform == "win32"\n'
+                                'sd-legacy==1.0; python_version < "3"\n')
+            fingerprints = RequirementFingerprints(Path(tmp) / "fingerprints.json")
+            (site_packages(python) / "sd_alpha-1.0.dist-info").mkdir(parents=True)
+            (site_packages(python) / "sd_alpha-1.0.dist-info" / "METADATA").write_text(
+                "Metadata-Version: 2.1\nName: sd-alpha\nVersion: 1.0\n")
+            
+            action, reason, lines = fingerprints.plan(req_file, python)
+            print(f"   markers excluded everything else: {action} ({reason})")
+            if action != 'skip':
+                print("❌ FAIL: Requirements excluded by their markers were treated as missing")
+                return False
+            if str(Path(python).absolute()) not in RequirementFingerprints._marker_environments:
+                print("❌ FAIL: The target's marker environment was not cached")
+                return False
+            
+            candidate, minor = other_python()
+            if candidate is None:
+                print("   ℹ️ No second Python version on PATH; cross-interpreter check skipped")
+            else:
+                target = make_venv(Path(tmp) / "other", candidate)
+                req_file.write_text(f'sd-alpha==1.0; python_version == "3.{minor}"\n'
+                                    f'sd-kernel-only==1.0; python_version == "3.{sys.version_info[1]}"\n')
+                action, reason, lines = fingerprints.plan(req_file, target)
+                print(f"   python3.{minor} target: {action}, lines {lines}")
+                if lines != ['sd-alpha==1.0;python_version=="3.' + str(minor) + '"']:
+                    print("❌ FAIL: Markers were evaluated against the kernel instead of the target")
+                    return False
+        
+        print("✅ PASS: Markers are evaluated for the target interpreter")
+        return True
+        
+    except Exception as e:
+        print(f"❌ MARKER TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all requirement fingerprint tests."""
+    print("🧪 TESTING SD-PINNOKIO REQUIREMENT FINGERPRINTS")
+    print("=" * 80)
+    
+    tests = [
+        test_fingerprint_hit_and_miss,
+        test_markers_use_target_interpreter
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Requirement fingerprints are working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Test script to verify span tracing of the install, run and tunnel flows.
+
+Checks span nesting (including spans ended from other threads), the JSONL
+export, exit codes and byte counts recorded for streamed commands, and the
+OTLP/JSON export, phase summary and timeline rendering.
+"""
+
+import sys
+import json
+import tempfile
+import threading
+import traceback
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def test_nested_spans_and_jsonl():
+    """Test parent/child links and one JSON line per finished span."""
+    print("=" * 60)
+    print("TESTING: Nested spans and JSONL export")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import Tracer
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            tracer = Tracer(path=Path(tmp) / "spans.jsonl")
+            finished_roots = []
+            tracer.listeners.append(finished_roots.append)
+            
+            with tracer.span("install", app_id="demo") as root:
+                with tracer.span("clone") as clone:
+                    clone.set(bytes=1234)
+                later = tracer.start_span("port")
+            worker = threading.Thread(target=lambda: later.end(port=7860))
+            worker.start()
+            worker.join()
+            
+            try:
+                with tracer.span("tunnel", app_id="demo"):
+                    raise RuntimeError("boom")
+            except RuntimeError:
+                pass
+            
+            records = [json.loads(line) for line in (Path(tmp) / "spans.jsonl").read_text().splitlines()]
+            by_name = {record['name']: record for record in records}
+            print(f"   exported: {[record['name'] for record in records]}")
+            
+            if set(by_name) != {"install", "clone", "port", "tunnel"}:
+                print("❌ FAIL: Not every span was exported")
+                return False
+            if by_name['clone']['parent_id'] != root.span_id or by_name['port']['parent_id'] != root.span_id:
+                print("❌ FAIL: Child spans are not linked to their parent")
+                return False
+            if by_name['clone']['app_id'] != "demo" or by_name['clone']['attributes'] != {"bytes": 1234}:
+                print(f"❌ FAIL: Child span lost its app id or attributes: {by_name['clone']}")
+                return False
+            if by_name['tunnel']['status'] != 'error' or by_name['tunnel']['parent_id'] is not None:
+                print("❌ FAIL: Exceptions should fail a new root span")
+                return False
+            if [span.name for span in finished_roots] != ["install", "tunnel"]:
+                print(f"❌ FAIL: Listeners saw {[span.name for span in finished_roots]}")
+                return False
+            
+            with tracer.span("launch", app_id="demo", command="python -c 'print(\"<b>\")'"):
+                pass
+            timeline = tracer.timeline_html("demo")
+            if "<b>\"" in timeline or "&#x27;print(&quot;&lt;b&gt;&quot;)&#x27;" not in timeline:
+                print("❌ FAIL: Span attributes reach the timeline HTML unescaped")
+                return False
+        
+        print("✅ PASS: Spans nest, cross threads and export as JSONL")
+        return True
+        
+    except Exception as e:
+        print(f"❌ NESTING TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_command_spans():
+    """Test exit codes and output byte counts on streamed install commands."""
+    print("\n" + "=" * 60)
+    print("TESTING: Command spans from the installation manager")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import InstallationManager, InstallJob, Tracer, widgets
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            tracer = Tracer(path=Path(tmp) / "spans.jsonl")
+            manager = InstallationManager(widgets.Output(), tracer=tracer)
+            job = InstallJob("demo", {"name": "Demo"})
+            
+            with tracer.span("install", app_id="demo") as root:
+                return_code = manager.run_streamed(job, "echo hello; echo oops >&2; exit 3")
+            
+            commands = [span for span in tracer.trace(root.trace_id) if span.name == "command"]
+            print(f"   return code: {return_code}, spans: {[span.attributes for span in commands]}")
+            
+            if return_code != 3 or len(commands) != 1:
+                print("❌ FAIL: Command was not traced exactly once")
+                return False
+            attributes = commands[0].attributes
+            if attributes.get('exit_code') != 3 or commands[0].status != 'error':
+                print("❌ FAIL: Exit code not recorded on the span")
+                return False
+            if attributes.get('output_lines') != 2 or attributes.get('output_bytes') != len("hello\noops\n"):
+                print("❌ FAIL: Output byte counts are wrong")
+                return False
+        
+        print("✅ PASS: Streamed commands record exit codes and byte counts")
+        return True
+        
+    except Exception as e:
+        print(f"❌ COMMAND SPAN TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_otlp_summary_and_timeline():
+    """Test OTLP/JSON export, the phase summary and the timeline HTML."""
+    print("\n" + "=" * 60)
+    print("TESTING: OTLP export, phase summary and timeline")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import Tracer
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            tracer = Tracer(path=Path(tmp) / "spans.jsonl")
+            for index in range(3):
+                root = tracer.start_span("install", app_id=f"app-{index}", start=100.0)
+                tracer.record("clone", 100.0, 101.0, parent=root, bytes=10)
+                tracer.record("requirements", 101.0, 110.0, parent=root)
+                root.end(110.0)
+            
+            count = tracer.export_otlp(Path(tmp) / "otlp.json")
+            document = json.loads((Path(tmp) / "otlp.json").read_text())
+            spans = document['resourceSpans'][0]['scopeSpans'][0]['spans']
+            clone = next(span for span in spans if span['name'] == 'clone')
+            print(f"   exported {count} OTLP spans")
+            
+            if count != 9 or len(clone['traceId']) != 32 or len(clone['spanId']) != 16 or 'parentSpanId' not in clone:
+                print("❌ FAIL: OTLP spans are malformed")
+                return False
+            if {'key': 'bytes', 'value': {'intValue': '10'}} not in clone['attributes']:
+                print(f"❌ FAIL: OTLP attributes are wrong: {clone['attributes']}")
+                return False
+            
+            summary = tracer.phase_summary()
+            print(f"   phases: {[(phase['name'], phase['total']) for phase in summary]}")
+            if [phase['name'] for phase in summary] != ["install", "requirements", "clone"]:
+                print("❌ FAIL: Phases are not ranked by total time")
+                return False
+            
+            html = tracer.timeline_html("app-1")
+            if "requirements" not in html or "app-1" not in html or "app-2" in html:
+                print("❌ FAIL: Timeline does not show the app's trace")
+                return False
+        
+        print("✅ PASS: Traces export to OTLP and summarize by phase")
+        return True
+        
+    except Exception as e:
+        print(f"❌ EXPORT TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all tracing tests."""
+    print("🧪 TESTING SD-PINNOKIO TRACING")
+    print("=" * 80)
+    
+    tests = [
+        test_nested_spans_and_jsonl,
+        test_command_spans,
+        test_otlp_summary_and_timeline,
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Tracing is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the shared wheel cache.
+
+Installs fixture wheels from a local PEP 503 index into throwaway venvs:
+a warm set must install again with the index gone, linked installs must
+share inodes with the unpacked trees without writing through them, and
+sets past max_bytes must be evicted least-recently-used, flat wheels
+included, also when the store had to copy instead of hard linking.
+"""
+
+import os
+import sys
+import base64
+import hashlib
+import zipfile
+import tempfile
+import threading
+import functools
+import subprocess
+import traceback
+import http.server
+from pathlib import Path
+
+# Import the notebook cell as a module (the launcher only runs as __main__)
+sys.path.insert(0, str(Path(__file__).parent))
+
+def build_wheel(directory, name, version, installer=None):
+    """Write a minimal pure-Python wheel; ``installer`` adds a dist-info INSTALLER."""
+    module = name.replace("-", "_")
+    dist_info = f"{module}-{version}.dist-info"
+    files = {
+        f"{module}/__init__.py": f"__version__ = {version!r}\n" + "#" * 4096 + "\n",
+        f"{dist_info}/METADATA": f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n",
+        f"{dist_info}/WHEEL": "Wheel-Version: 1.0\nGenerator: sd-test\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+    }
+    if installer:
+        files[f"{dist_info}/INSTALLER"] = installer
+    record = []
+    for path, content in files.items():
+        digest = base64.urlsafe_b64encode(hashlib.sha256(content.encode()).digest()).rstrip(b"=").decode()
+        record.append(f"{path},sha256={digest},{len(content.encode())}")
+    record.append(f"{dist_info}/RECORD,,")
+    files[f"{dist_info}/RECORD"] = "\n".join(record) + "\n"
+    
+    wheel = Path(directory) / f"{module}-{version}-py3-none-any.whl"
+    with zipfile.ZipFile(wheel, "w") as archive:
+        for path, content in files.items():
+            archive.writestr(path, content)
+    return wheel
+
+class PackageIndex:
+    """Fixture wheels served as a PEP 503 simple index on localhost."""
+    
+    def __init__(self, root, packages):
+        files = Path(root) / "files"
+        files.mkdir(parents=True)
+        for name, version in packages.items():
+            wheel = build_wheel(files, name, version, installer="wheel-builder\n")
+            project = Path(root) / "simple" / name
+            project.mkdir(parents=True)
+            (project / "index.html").write_text(f'<a href="../../files/{wheel.name}">{wheel.name}</a>\n')
+        
+        class QuietHandler(http.server.SimpleHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+        
+        self.server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(root)))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/simple/"
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def make_venv(path):
+    """A venv without its own pip; the system pip is visible through site-packages."""
+    subprocess.run([sys.executable, "-m", "venv", "--without-pip", "--system-site-packages", str(path)],
+                   check=True, capture_output=True)
+    return str(Path(path) / "bin" / "python")
+
+def make_runner(index_url):
+    env = {**os.environ, "PIP_INDEX_URL": index_url, "PIP_DISABLE_PIP_VERSION_CHECK": "1",
+           "PIP_NO_CACHE_DIR": "1", "PIP_RETRIES": "0", "PIP_TIMEOUT": "2"}
+    
+    def run(cmd, cwd=None):
+        return subprocess.run(cmd, cwd=cwd, env=env, capture_output=True).returncode
+    return run
+
+def site_packages(python):
+    return Path(subprocess.run([python, "-c", "import sysconfig; print(sysconfig.get_paths()['purelib'])"],
+                               check=True, capture_output=True, text=True).stdout.strip())
+
+def test_warm_install_offline_and_linked():
+    """Test that a warm set installs offline through hard links into the trees."""
+    print("=" * 60)
+    print("TESTING: Warm wheel set installs offline via shared links")
+    print("=" * 60)
+    
+    try:
+        from SINGLE_MEGA_CELL_NOTEBOOK import WheelCache
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            index = PackageIndex(tmp / "index", {"sd-fixture-alpha": "1.0", "sd-fixture-beta": "2.0"})
+            req_file = tmp / "requirements.txt"
+            req_file.write_text("sd-fixture-alpha==1.0\nsd-fixture-beta==2.0\n")
+            cache = WheelCache(root=tmp / "cache")
+            messages = []
+            
+            try:
+                first = make_venv(tmp / "first")
+                cold = cache.install(req_file, make_runner(index.url), messages.append, python=first)
+            finally:
+                index.close()
+            
+            # The index is gone: only the cache can satisfy the second install
+            second = make_venv(tmp / "second")
+            warm = cache.install(req_file, make_runner(index.url), messages.append, python=second)
+            versions = subprocess.run([second, "-c", "import sd_fixture_alpha, sd_fixture_beta; "
+                                       "print(sd_fixture_alpha.__version__, sd_fixture_beta.__version__)"],
+                                      capture_output=True, text=True).stdout.split()
+            print(f"   cold install: {cold}, offline warm install: {warm}, versions: {versions}")
+            
+            if not cold or not warm or versions != ["1.0", "2.0"]:
+                print(f"❌ FAIL: Warm set did not install offline ({messages})")
+                return False
+            if not any("Wheel cache hit" in message for message in messages):
+                print("❌ FAIL: Second install did not hit the cache")
+                return False
+            
+            key, _ = cache.lookup(req_file, second)
+            digest = cache._read_index()["sets"][key]["wheels"]["sd_fixture_alpha-1.0-py3-none-any.whl"]
+            tree = tmp / "cache" / "trees" / digest
+            inodes = {os.stat(root / "sd_fixture_alpha" / "__init__.py").st_ino
+                      for root in (tree, site_packages(first), site_packages(second))}
+            print(f"   distinct inodes for one module across tree and two venvs: {len(inodes)}")
+            if len(inodes) != 1:
+                print("❌ FAIL: Linked installs do not share the cached files")
+                return False
+            
+            installers = [(root / "sd_fixture_alpha-1.0.dist-info" / "INSTALLER").read_text().strip()
+                          for root in (tree, site_packages(first), site_packages(second))]
+            print(f"   INSTALLER in tree / first / second: {installers}")
+            if installers != ["wheel-builder", "sd-pinnokio", "sd-pinnokio"]:
+                print("❌ FAIL: Marking the install wrote through the link into the shared tree")
+                return False
+        
+        print("✅ PASS: Warm set installed offline, sharing inodes with the cached trees")
+        return True
+        
+    except Exception as e:
+        print(f"❌ WARM CACHE TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def test_eviction():
+    """Test that the least recently used set is evicted once over max_bytes."""
+    print("\n" + "=" * 60)
+    print("TESTING: Wheel cache eviction")
+    print("=" * 60)
+    
+    try:
+        import SINGLE_MEGA_CELL_NOTEBOOK as notebook
+        from SINGLE_MEGA_CELL_NOTEBOOK import WheelCache
+        
+        def no_hard_links(source, target):
+            raise OSError(18, "Invalid cross-device link")
+        
+        # The second round stores every wheel as a copy, as on a cache on another filesystem
+        for copies in (False, True):
+            print(f"   {'copy fallback' if copies else 'hard links'}:")
+            with tempfile.TemporaryDirectory() as tmp:
+                tmp = Path(tmp)
+                index = PackageIndex(tmp / "index", {"sd-fixture-old": "1.0", "sd-fixture-new": "1.0"})
+                old_req = tmp / "old.txt"
+                old_req.write_text("sd-fixture-old==1.0\n")
+                new_req = tmp / "new.txt"
+                new_req.write_text("sd-fixture-new==1.0\n")
+                messages = []
+                
+                link = notebook.os.link
+                try:
+                    if copies:
+                        notebook.os.link = no_hard_links
+                    run = make_runner(index.url)
+                    cache = WheelCache(root=tmp / "cache")
+                    old_venv = make_venv(tmp / "old")
+                    cache.install(old_req, run, messages.append, python=old_venv)
+                    old_key, _ = cache.lookup(old_req, old_venv)
+                    # Room for about one set: the next install must push the old one out
+                    cache.max_bytes = cache.size_bytes() + 1024
+                    new_venv = make_venv(tmp / "new")
+                    cache.install(new_req, run, messages.append, python=new_venv)
+                    new_key, new_dir = cache.lookup(new_req, new_venv)
+                finally:
+                    notebook.os.link = link
+                    index.close()
+                
+                sets = cache._read_index()["sets"]
+                objects = sorted(path.name for path in (tmp / "cache" / "objects").iterdir())
+                flat = sorted(path.name for path in (tmp / "cache" / "wheels").iterdir())
+                print(f"   sets kept: {[key[:12] for key in sets]}, wheels kept: {flat}")
+                
+                if old_key in sets or (tmp / "cache" / "sets" / old_key).exists():
+                    print("❌ FAIL: Least recently used set was not evicted")
+                    return False
+                if new_key not in sets or new_dir is None or objects != sorted(sets[new_key]["wheels"].values()):
+                    print("❌ FAIL: Eviction removed the set in use or left unreferenced objects")
+                    return False
+                if set(cache._read_index()["flat"]) != {"sd_fixture_new-1.0-py3-none-any.whl"}:
+                    print("❌ FAIL: The flat pool record still lists evicted wheels")
+                    return False
+                if flat != ["sd_fixture_new-1.0-py3-none-any.whl"] or len(list((tmp / "cache" / "trees").iterdir())) != 1:
+                    print("❌ FAIL: Evicted wheels are still in the flat pool or unpacked trees")
+                    return False
+                if "1.0" not in subprocess.run([old_venv, "-c", "import sd_fixture_old; print(sd_fixture_old.__version__)"],
+                                               capture_output=True, text=True).stdout:
+                    print("❌ FAIL: Evicting the cache broke an environment linked from it")
+                    return False
+        
+        print("✅ PASS: Oldest set evicted with its objects; linked installs keep working")
+        return True
+        
+    except Exception as e:
+        print(f"❌ EVICTION TEST FAILED: {e}")
+        traceback.print_exc()
+        return False
+
+def main():
+    """Run all wheel cache tests."""
+    print("🧪 TESTING SD-PINNOKIO WHEEL CACHE")
+    print("=" * 80)
+    
+    tests = [
+        test_warm_install_offline_and_linked,
+        test_eviction
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ TEST EXCEPTION: {e}")
+            traceback.print_exc()
+            failed += 1
+    
+    print("\n" + "=" * 80)
+    print("🏁 TEST SUMMARY")
+    print("=" * 80)
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Success rate: {passed/(passed+failed)*100:.1f}%")
+    
+    if failed == 0:
+        print("\n🎉 ALL TESTS PASSED! Wheel cache is working.")
+        return True
+    else:
+        print(f"\n⚠️  {failed} tests failed. Some issues may still exist.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)